@@ -0,0 +1,128 @@
+"""
+关键词匹配引擎测试
+
+索引匹配的结果需要与原先逐条遍历规则的匹配结果一致。
+"""
+
+import random
+from difflib import SequenceMatcher
+
+import pytest
+
+from wxauto_mgt.core.platforms.keyword_matcher import AhoCorasick, KeywordMatcher
+
+
+def _old_match_keywords(content, keywords, match_type):
+    """原 KeywordPlatform._match_keywords 的匹配逻辑"""
+    if not keywords:
+        return False
+
+    content_lower = content.lower()
+    for keyword in keywords:
+        keyword_lower = keyword.lower()
+        if match_type == 'exact':
+            if content_lower == keyword_lower:
+                return True
+        elif match_type == 'contains':
+            if keyword_lower in content_lower:
+                return True
+        elif match_type == 'fuzzy':
+            if SequenceMatcher(None, content_lower, keyword_lower).ratio() >= 0.8:
+                return True
+    return False
+
+
+def _old_match(rules, content):
+    """原先逐条遍历规则，返回第一条命中的规则"""
+    for rule in rules:
+        if _old_match_keywords(content, rule.get('keywords', []), rule.get('match_type', 'exact')):
+            return rule
+    return None
+
+
+def _rule(match_type, *keywords):
+    return {'keywords': list(keywords), 'match_type': match_type}
+
+
+def test_exact_match_is_case_insensitive_and_whole_message():
+    rules = [_rule('exact', 'Hello', '你好')]
+    matcher = KeywordMatcher(rules)
+
+    assert matcher.match('hello') is rules[0]
+    assert matcher.match('你好') is rules[0]
+    assert matcher.match('hello world') is None
+
+
+def test_contains_match_finds_keyword_anywhere():
+    rules = [_rule('contains', '价格', 'Price')]
+    matcher = KeywordMatcher(rules)
+
+    assert matcher.match('请问这个价格是多少') is rules[0]
+    assert matcher.match('what is the PRICE?') is rules[0]
+    assert matcher.match('请问怎么购买') is None
+
+
+def test_contains_empty_keyword_matches_every_message():
+    rules = [_rule('exact', '菜单'), _rule('contains', '')]
+    matcher = KeywordMatcher(rules)
+
+    assert matcher.match('菜单') is rules[0]
+    assert matcher.match('随便说点什么') is rules[1]
+
+
+def test_fuzzy_match_uses_similarity_threshold():
+    rules = [_rule('fuzzy', '如何退款')]
+    matcher = KeywordMatcher(rules)
+
+    # 相似度 2*4/(5+4)=0.89
+    assert matcher.match('如何退款呢') is rules[0]
+    # 相似度 2*2/(4+4)=0.5
+    assert matcher.match('如何发货') is None
+
+
+def test_earlier_rule_wins_across_match_types():
+    rules = [
+        _rule('fuzzy', 'abcdef'),
+        _rule('contains', 'abc'),
+        _rule('exact', 'abcdeg'),
+    ]
+    matcher = KeywordMatcher(rules)
+
+    # 三条规则都命中时返回序号最小的规则
+    assert matcher.match('abcdeg') is rules[0]
+    assert matcher.match('xxabcxx') is rules[1]
+
+
+def test_aho_corasick_returns_min_rule_index_below_bound():
+    automaton = AhoCorasick()
+    automaton.add('she', 3)
+    automaton.add('he', 1)
+    automaton.add('hers', 0)
+    automaton.build()
+
+    assert automaton.search_min('ushe') == 1
+    assert automaton.search_min('ushers') == 0
+    assert automaton.search_min('ushe', upper_bound=1) is None
+    assert automaton.search_min('xyz') is None
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_randomised_rules_match_old_matcher(seed):
+    rng = random.Random(seed)
+    alphabet = 'abcAB你好'
+
+    def random_text(min_length, max_length):
+        return ''.join(rng.choice(alphabet) for _ in range(rng.randint(min_length, max_length)))
+
+    rules = [
+        _rule(
+            rng.choice(['exact', 'contains', 'fuzzy']),
+            *[random_text(1, 6) for _ in range(rng.randint(1, 3))],
+        )
+        for _ in range(30)
+    ]
+    matcher = KeywordMatcher(rules)
+
+    for _ in range(300):
+        content = random_text(0, 10)
+        assert matcher.match(content) is _old_match(rules, content), content
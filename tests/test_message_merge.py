@@ -0,0 +1,106 @@
+"""
+消息合并投递测试
+
+同一聊天对象连续保存多条消息时，合并时间窗口结束后只投递一条合并消息。
+"""
+
+import asyncio
+import json
+import time
+
+from wxauto_mgt.core.domain_events import domain_events, DomainEventType
+from wxauto_mgt.core.message_delivery_service import MessageDeliveryService
+
+
+def _make_messages(count, instance_id="inst", chat_name="chat"):
+    now = int(time.time())
+    return [
+        {
+            'message_id': f"msg-{i}",
+            'instance_id': instance_id,
+            'chat_name': chat_name,
+            'sender': "张三",
+            'content': f"第{i}条",
+            'mtype': 'text',
+            'create_time': now,
+            'processed': 0,
+            'delivery_status': 0,
+        }
+        for i in range(count)
+    ]
+
+
+def test_burst_of_saves_produces_one_merged_delivery(monkeypatch):
+    count = 5
+    messages = _make_messages(count)
+    service = MessageDeliveryService(merge_messages=True, merge_window=0.5)
+    delivered = []
+
+    async def fake_fetchall(sql, params=None, row_type=None):
+        return [dict(message) for message in messages]
+
+    async def no_batch_platforms(pending):
+        return pending, {}
+
+    async def fake_process_message(message, rule=None, rule_matched=False):
+        delivered.append(message)
+        return True
+
+    monkeypatch.setattr("wxauto_mgt.core.message_delivery_service.db_manager.fetchall", fake_fetchall)
+    monkeypatch.setattr(service, "_deliver_platform_batches", no_batch_platforms)
+    monkeypatch.setattr(service, "process_message", fake_process_message)
+
+    async def run():
+        service._running = True
+        domain_events.subscribe(DomainEventType.MESSAGE_SAVED, service._on_message_saved)
+        try:
+            # 每次保存都重新开始计时，窗口内的连续消息不会触发投递
+            for message in messages:
+                domain_events.publish(
+                    DomainEventType.MESSAGE_SAVED,
+                    instance_id=message['instance_id'],
+                    chat_name=message['chat_name'],
+                    message_id=message['message_id'],
+                    create_time=message['create_time'],
+                )
+                await asyncio.sleep(0.1)
+            assert delivered == []
+
+            await asyncio.sleep(0.8)
+            if service._tasks:
+                await asyncio.gather(*service._tasks)
+        finally:
+            domain_events.unsubscribe(DomainEventType.MESSAGE_SAVED, service._on_message_saved)
+            service._running = False
+
+    asyncio.run(run())
+
+    assert len(delivered) == 1
+    merged = delivered[0]
+    assert merged['merged'] == 1
+    assert merged['merged_count'] == count
+    assert json.loads(merged['merged_ids']) == [message['message_id'] for message in messages]
+
+
+def test_debounced_burst_is_merged_before_platform_batching(monkeypatch):
+    count = 3
+    messages = _make_messages(count)
+    service = MessageDeliveryService(merge_messages=True, merge_window=60)
+    batched = []
+
+    async def fake_fetchall(sql, params=None, row_type=None):
+        return [dict(message) for message in messages]
+
+    async def capture_platform_batches(pending):
+        batched.append(pending)
+        return [], {}
+
+    monkeypatch.setattr("wxauto_mgt.core.message_delivery_service.db_manager.fetchall", fake_fetchall)
+    monkeypatch.setattr(service, "_deliver_platform_batches", capture_platform_batches)
+
+    asyncio.run(service._deliver_chat_messages("inst", "chat"))
+
+    # 批量平台收到的是一条合并消息，而不是逐条消息
+    assert len(batched) == 1
+    assert len(batched[0]) == 1
+    assert batched[0][0]['merged_count'] == count
@@ -0,0 +1,170 @@
+"""
+性能指标存储测试
+
+聚合行写入时与已有行合并，查询根据时间跨度选择数据层。
+"""
+
+import asyncio
+import sqlite3
+
+import pytest
+
+from wxauto_mgt.core import metrics_store as store_module
+from wxauto_mgt.core.metrics_store import (
+    MetricsStore, ROLLUP_UPSERT_SQL, RESOLUTION_DAY, RESOLUTION_HOUR, RESOLUTION_MINUTE,
+)
+
+NOW = 1_700_000_000
+
+ROLLUP_TABLE_SQL = """
+    CREATE TABLE performance_metrics_rollup (
+        instance_id TEXT NOT NULL,
+        metric_type TEXT NOT NULL,
+        resolution INTEGER NOT NULL,
+        bucket_time INTEGER NOT NULL,
+        count INTEGER NOT NULL,
+        min_value REAL NOT NULL,
+        max_value REAL NOT NULL,
+        avg_value REAL NOT NULL,
+        p95_value REAL NOT NULL,
+        PRIMARY KEY (instance_id, metric_type, resolution, bucket_time)
+    )
+"""
+
+
+@pytest.fixture
+def conn():
+    connection = sqlite3.connect(":memory:")
+    connection.execute(ROLLUP_TABLE_SQL)
+    connection.execute(
+        "CREATE TABLE performance_metrics (instance_id TEXT, metric_type TEXT, value REAL, create_time INTEGER)"
+    )
+    yield connection
+    connection.close()
+
+
+@pytest.fixture
+def fake_db(conn, monkeypatch):
+    """把 db_manager 的批量写入转到内存数据库"""
+
+    async def executemany(sql, params_list):
+        conn.executemany(sql, params_list)
+
+    async def execute(sql, params=None):
+        conn.execute(sql, params or ())
+
+    monkeypatch.setattr(store_module.db_manager, "executemany", executemany)
+    monkeypatch.setattr(store_module.db_manager, "execute", execute)
+    monkeypatch.setattr(store_module.time, "time", lambda: NOW)
+    return conn
+
+
+def _rollup_rows(conn, resolution):
+    return conn.execute(
+        "SELECT bucket_time, count, min_value, max_value, avg_value FROM performance_metrics_rollup "
+        "WHERE resolution = ? ORDER BY bucket_time",
+        (resolution,)
+    ).fetchall()
+
+
+def test_rollup_upsert_merges_with_existing_row(conn):
+    conn.execute(ROLLUP_UPSERT_SQL, ("inst", "cpu", 60, 0, 2, 1.0, 3.0, 2.0, 3.0))
+    conn.execute(ROLLUP_UPSERT_SQL, ("inst", "cpu", 60, 0, 6, 0.5, 2.5, 1.0, 2.0))
+
+    row = conn.execute(
+        "SELECT count, min_value, max_value, avg_value, p95_value FROM performance_metrics_rollup"
+    ).fetchone()
+    # 数量累加，最小/最大值取极值，平均值和p95按数量加权
+    assert row == (8, 0.5, 3.0, pytest.approx(1.25), pytest.approx(2.25))
+
+
+def test_minute_buckets_roll_up_into_hour_and_day(fake_db):
+    store = MetricsStore(flush_interval=3600)
+    hour_start = NOW - NOW % RESOLUTION_HOUR
+
+    store.record("inst", "cpu", 1, hour_start)
+    store.record("inst", "cpu", 3, hour_start + 10)
+    # 进入下一分钟时结束上一个分钟桶
+    store.record("inst", "cpu", 8, hour_start + 60)
+    assert len(store._pending_rollups) == 3
+
+    asyncio.run(store.flush(include_open_buckets=True))
+
+    assert _rollup_rows(fake_db, RESOLUTION_MINUTE) == [
+        (hour_start, 2, 1.0, 3.0, 2.0),
+        (hour_start + 60, 1, 8.0, 8.0, 8.0),
+    ]
+    assert _rollup_rows(fake_db, RESOLUTION_HOUR) == [
+        (hour_start, 3, 1.0, 8.0, pytest.approx(4.0)),
+    ]
+    day_start = hour_start - hour_start % RESOLUTION_DAY
+    assert _rollup_rows(fake_db, RESOLUTION_DAY) == [
+        (day_start, 3, 1.0, 8.0, pytest.approx(4.0)),
+    ]
+
+
+def test_flushing_open_bucket_twice_does_not_overwrite(fake_db):
+    store = MetricsStore(flush_interval=3600)
+    minute_start = NOW - NOW % RESOLUTION_MINUTE
+
+    store.record("inst", "cpu", 2, minute_start)
+    asyncio.run(store.flush(include_open_buckets=True))
+    # 停止后重启，同一分钟的新采样合并进已有聚合行
+    store = MetricsStore(flush_interval=3600)
+    store.record("inst", "cpu", 4, minute_start + 1)
+    asyncio.run(store.flush(include_open_buckets=True))
+
+    assert _rollup_rows(fake_db, RESOLUTION_MINUTE) == [
+        (minute_start, 2, 2.0, 4.0, pytest.approx(3.0)),
+    ]
+    assert fake_db.execute("SELECT COUNT(*) FROM performance_metrics").fetchone() == (2,)
+
+
+@pytest.mark.parametrize("age, expected", [
+    (3600, "raw"),
+    (3 * 86400, RESOLUTION_MINUTE),
+    (30 * 86400, RESOLUTION_HOUR),
+    (365 * 86400, RESOLUTION_DAY),
+    (10 * 365 * 86400, RESOLUTION_DAY),
+])
+def test_query_chooses_tier_by_age(monkeypatch, age, expected):
+    store = MetricsStore()
+    chosen = []
+
+    async def query_raw(instance_id, metric_type, start_time, end_time, limit):
+        chosen.append("raw")
+        return []
+
+    async def query_rollup(instance_id, metric_type, resolution, start_time, end_time, limit):
+        chosen.append(resolution)
+        return []
+
+    monkeypatch.setattr(store_module.time, "time", lambda: NOW)
+    monkeypatch.setattr(store, "_query_raw", query_raw)
+    monkeypatch.setattr(store, "_query_rollup", query_rollup)
+
+    asyncio.run(store.query("inst", "cpu", start_time=NOW - age))
+    assert chosen == [expected]
+
+
+def test_query_uses_hot_data_when_it_covers_the_range(monkeypatch):
+    store = MetricsStore()
+    monkeypatch.setattr(store_module.time, "time", lambda: NOW + 5)
+
+    async def fail(*args, **kwargs):
+        raise AssertionError("不应查询数据库")
+
+    monkeypatch.setattr(store, "_query_raw", fail)
+    monkeypatch.setattr(store, "_query_rollup", fail)
+
+    for offset in range(5):
+        store.record("inst", "cpu", offset, NOW + offset)
+
+    rows = asyncio.run(store.query("inst", "cpu", start_time=NOW + 1))
+    assert [row['value'] for row in rows] == [4.0, 3.0, 2.0, 1.0]
+    assert store.get_stats()['hot_queries'] == 1
+
+    # 查询起点早于热数据时转到数据库
+    monkeypatch.setattr(store, "_query_raw", lambda *args: asyncio.sleep(0, result=[]))
+    asyncio.run(store.query("inst", "cpu", start_time=NOW - 1))
+    assert store.get_stats()['db_queries'] == 1
@@ -0,0 +1,140 @@
+"""
+服务平台限流与熔断测试
+"""
+
+import asyncio
+
+import pytest
+
+from wxauto_mgt.core import platform_throttle as throttle_module
+from wxauto_mgt.core.platform_throttle import CircuitBreaker, PlatformThrottle, TokenBucket
+
+
+class FakeClock:
+    """同时替代 time.monotonic 和 time.time 的可控时钟"""
+
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(throttle_module.time, "monotonic", fake)
+    monkeypatch.setattr(throttle_module.time, "time", fake)
+    return fake
+
+
+def test_token_bucket_allows_burst_then_refills_at_rate(clock):
+    bucket = TokenBucket(rate=2, capacity=3)
+
+    async def take(count):
+        return [await bucket.acquire() for _ in range(count)]
+
+    # 桶满时突发量内的请求不等待
+    assert asyncio.run(take(3)) == [0.0, 0.0, 0.0]
+    assert bucket._tokens == pytest.approx(0)
+
+    # 经过1秒按速率补充2个令牌
+    clock.advance(1)
+    assert asyncio.run(take(2)) == [0.0, 0.0]
+
+    # 补充不超过桶容量
+    clock.advance(60)
+    bucket._refill()
+    assert bucket._tokens == pytest.approx(3)
+
+
+def test_token_bucket_waits_for_missing_token(clock, monkeypatch):
+    bucket = TokenBucket(rate=4, capacity=1)
+    slept = []
+
+    async def fake_sleep(seconds):
+        slept.append(seconds)
+        clock.advance(seconds)
+
+    monkeypatch.setattr(throttle_module.asyncio, "sleep", fake_sleep)
+
+    async def run():
+        await bucket.acquire()
+        return await bucket.acquire()
+
+    waited = asyncio.run(run())
+    assert waited == pytest.approx(0.25)
+    assert slept == [pytest.approx(0.25)]
+
+
+def test_circuit_breaker_opens_after_threshold(clock):
+    breaker = CircuitBreaker(failure_threshold=3, recovery_timeout=30)
+
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow_request()
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow_request()
+    assert breaker.retry_at == clock.now + 30
+
+
+def test_circuit_breaker_half_open_allows_single_probe(clock):
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=30)
+    breaker.record_failure()
+
+    clock.advance(30)
+    assert breaker.allow_request()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    # 试探进行中时拒绝其他请求
+    assert not breaker.allow_request()
+
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.consecutive_failures == 0
+    assert breaker.allow_request()
+
+
+def test_circuit_breaker_failed_probe_reopens_with_longer_timeout(clock):
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=30, max_recovery_timeout=100)
+    breaker.record_failure()
+
+    clock.advance(30)
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.recovery_timeout == 60
+
+    clock.advance(60)
+    assert breaker.allow_request()
+    breaker.record_failure()
+    # 恢复等待时间不超过上限
+    assert breaker.recovery_timeout == 100
+
+    clock.advance(100)
+    assert breaker.allow_request()
+    breaker.record_success()
+    assert breaker.recovery_timeout == 30
+
+
+def test_throttle_acquire_records_failure_on_exception(clock):
+    throttle = PlatformThrottle("p1", rate=10, burst=5, failure_threshold=1)
+
+    async def run():
+        async with throttle.acquire():
+            raise RuntimeError("upstream error")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(run())
+
+    stats = throttle.get_stats()
+    assert stats['requests'] == 1
+    assert stats['failures'] == 1
+    assert stats['circuit_state'] == CircuitBreaker.OPEN
+    assert not throttle.allow_request()
+    assert throttle.get_stats()['rejected'] == 1
@@ -0,0 +1,162 @@
+"""
+Web响应缓存测试
+
+ETag / If-None-Match 返回 304，标签版本号变化后缓存失效。
+"""
+
+import asyncio
+import sys
+import types
+
+import pytest
+from fastapi import Request
+from fastapi.responses import JSONResponse
+
+from wxauto_mgt.core.domain_events import DomainEvent, DomainEventType
+from wxauto_mgt.web.response_cache import CachePolicy, ResponseCache, _etag_matches
+
+
+@pytest.fixture(autouse=True)
+def skip_auth(monkeypatch):
+    """缓存命中前的认证检查不在这里测试"""
+
+    async def verify_request_auth(request):
+        return None
+
+    monkeypatch.setitem(
+        sys.modules, "wxauto_mgt.web.api", types.SimpleNamespace(verify_request_auth=verify_request_auth)
+    )
+
+
+def _request(path="/api/rules", query=b"", headers=None):
+    return Request({
+        'type': 'http',
+        'method': 'GET',
+        'path': path,
+        'query_string': query,
+        'headers': [(name.encode(), value.encode()) for name, value in (headers or {}).items()],
+    })
+
+
+class CountingHandler:
+    """记录调用次数的处理函数"""
+
+    def __init__(self, payload=None):
+        self.calls = 0
+        self.payload = payload or {'code': 0, 'data': ['rule']}
+
+    async def __call__(self, request):
+        self.calls += 1
+        return JSONResponse(self.payload)
+
+
+def _serve(cache, policy, handler, **request_kwargs):
+    return asyncio.run(cache.serve(_request(**request_kwargs), policy, handler))
+
+
+def test_second_request_is_served_from_cache():
+    cache = ResponseCache()
+    policy = CachePolicy(('rules',), ttl=60)
+    handler = CountingHandler()
+
+    first = _serve(cache, policy, handler)
+    second = _serve(cache, policy, handler)
+
+    assert handler.calls == 1
+    assert first.status_code == second.status_code == 200
+    assert second.body == first.body
+    assert second.headers['etag'] == first.headers['etag']
+    assert cache.get_stats()['hits'] == 1
+
+
+def test_matching_if_none_match_returns_304():
+    cache = ResponseCache()
+    policy = CachePolicy(('rules',), ttl=60)
+    handler = CountingHandler()
+
+    etag = _serve(cache, policy, handler).headers['etag']
+
+    response = _serve(cache, policy, handler, headers={'if-none-match': etag})
+    assert response.status_code == 304
+    assert response.body == b''
+    assert response.headers['etag'] == etag
+    assert cache.get_stats()['not_modified'] == 1
+
+    # ETag不匹配时返回完整响应
+    response = _serve(cache, policy, handler, headers={'if-none-match': '"stale"'})
+    assert response.status_code == 200
+    assert handler.calls == 1
+
+
+def test_etag_matching_accepts_lists_weak_tags_and_wildcard():
+    assert _etag_matches('"a", "b"', '"b"')
+    assert _etag_matches('W/"b"', '"b"')
+    assert _etag_matches('*', '"b"')
+    assert not _etag_matches(None, '"b"')
+    assert not _etag_matches('"a"', '"b"')
+
+
+def test_invalidating_tag_refreshes_dependent_entries_only():
+    cache = ResponseCache()
+    rules_policy = CachePolicy(('rules',), ttl=60)
+    messages_policy = CachePolicy(('messages',), ttl=60)
+    rules_handler = CountingHandler()
+    messages_handler = CountingHandler({'code': 0, 'data': ['message']})
+
+    etag = _serve(cache, rules_policy, rules_handler).headers['etag']
+    _serve(cache, messages_policy, messages_handler, path="/api/messages")
+
+    cache.invalidate_tags('rules')
+
+    # 标签版本变化后重新生成响应，内容未变时ETag不变，客户端仍可得到304
+    response = _serve(cache, rules_policy, rules_handler, headers={'if-none-match': etag})
+    assert rules_handler.calls == 2
+    assert response.status_code == 304
+
+    _serve(cache, messages_policy, messages_handler, path="/api/messages")
+    assert messages_handler.calls == 1
+
+
+def test_content_change_after_invalidation_produces_new_etag():
+    cache = ResponseCache()
+    policy = CachePolicy(('accounting',), ttl=60)
+    handler = CountingHandler({'code': 0, 'data': [1]})
+
+    etag = _serve(cache, policy, handler, path="/api/accounting/records").headers['etag']
+
+    handler.payload = {'code': 0, 'data': [1, 2]}
+    cache._on_domain_event(DomainEvent(DomainEventType.ACCOUNTING_RECORDED, {'platform_id': 'p1'}))
+
+    response = _serve(cache, policy, handler, path="/api/accounting/records", headers={'if-none-match': etag})
+    assert response.status_code == 200
+    assert response.headers['etag'] != etag
+    assert handler.calls == 2
+
+
+def test_response_not_cached_when_data_changes_while_generating():
+    cache = ResponseCache()
+    policy = CachePolicy(('messages',), ttl=60)
+    calls = []
+
+    async def handler(request):
+        calls.append(request)
+        cache.invalidate_tags('messages')
+        return JSONResponse({'code': 0})
+
+    _serve(cache, policy, handler, path="/api/messages")
+    _serve(cache, policy, handler, path="/api/messages")
+
+    assert len(calls) == 2
+    assert cache.get_stats()['entries'] == 0
+
+
+def test_query_parameters_are_part_of_cache_key():
+    cache = ResponseCache()
+    policy = CachePolicy(('messages',), ttl=60)
+    handler = CountingHandler()
+
+    _serve(cache, policy, handler, path="/api/messages", query=b"limit=10&instance_id=a")
+    _serve(cache, policy, handler, path="/api/messages", query=b"instance_id=a&limit=10")
+    _serve(cache, policy, handler, path="/api/messages", query=b"instance_id=b&limit=10")
+
+    assert handler.calls == 2
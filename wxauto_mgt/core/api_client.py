@@ -7,7 +7,8 @@ import logging
 import requests
 import json
 import asyncio
-from typing import Dict, List, Optional, Any, Tuple
+import time
+from typing import Callable, Dict, List, Optional, Any, Tuple
 import aiohttp
 
 # 导入标准日志记录器
@@ -16,6 +17,7 @@ logger = logging.getLogger(__name__)
 # 导入文件处理专用日志记录器
 from wxauto_mgt.utils import file_logger
 from wxauto_mgt.utils.performance_monitor import monitor_performance
+from wxauto_mgt.core.domain_events import domain_events, DomainEventType
 
 class ApiError(Exception):
     """API错误"""
@@ -27,6 +29,11 @@ class ApiError(Exception):
 class WxAutoApiClient:
     """WxAuto API客户端"""
 
+    # 批量添加监听对象的接口，服务端不支持时回退为逐个并发添加
+    BATCH_LISTEN_ENDPOINT = '/api/message/listen/batch_add'
+    # 探测到不支持批量接口后，间隔多久（秒）再重新探测（服务端可能已升级）
+    BATCH_LISTEN_REPROBE_INTERVAL = 600
+
     def __init__(self, instance_id: str, base_url: str, api_key: str):
         """
         初始化API客户端
@@ -41,6 +48,9 @@ class WxAutoApiClient:
         self.api_key = api_key
         self._initialized = False
         self._connected = False
+        # 服务端是否支持批量添加监听对象：None表示尚未探测
+        self.batch_listen_supported: Optional[bool] = None
+        self._batch_listen_reprobe_at = 0.0
 
     async def _get(self, endpoint: str, params: Dict = None) -> Dict:
         """发送GET请求"""
@@ -245,8 +255,7 @@ class WxAutoApiClient:
                     raise e
 
             # 在事件循环的线程池中执行同步请求
-            import asyncio
-            loop = asyncio.get_event_loop()
+            loop = asyncio.get_running_loop()
             response = await loop.run_in_executor(None, send_request)
 
             if response.status_code == 200:
@@ -306,10 +315,6 @@ class WxAutoApiClient:
     async def add_listener(self, who: str, **kwargs) -> bool:
         """添加监听对象"""
         try:
-            import requests
-            import json
-            import asyncio
-
             # 新的API只需要nickname参数，移除其他多余参数
             api_params = {
                 'nickname': who
@@ -339,7 +344,7 @@ class WxAutoApiClient:
                     raise e
 
             # 在事件循环的线程池中执行同步请求
-            loop = asyncio.get_event_loop()
+            loop = asyncio.get_running_loop()
             response = await loop.run_in_executor(None, send_request)
             status_code = response.status_code
 
@@ -371,9 +376,6 @@ class WxAutoApiClient:
     async def remove_listener(self, who: str) -> bool:
         """移除监听对象"""
         try:
-            import requests
-            import json
-            import asyncio
             data = {'nickname': who}
 
             # 构建完整的API URL和请求头
@@ -400,7 +402,7 @@ class WxAutoApiClient:
                     raise e
 
             # 在事件循环的线程池中执行同步请求
-            loop = asyncio.get_event_loop()
+            loop = asyncio.get_running_loop()
             response = await loop.run_in_executor(None, send_request)
             status_code = response.status_code
 
@@ -429,6 +431,136 @@ class WxAutoApiClient:
             logger.exception(e)
             return False
 
+    async def add_listeners(self, whos: List[str], concurrency: int = 5, reset: bool = False,
+                            on_result: Optional[Callable[[str, bool], None]] = None,
+                            save_pic: bool = True, save_file: bool = True, save_voice: bool = True,
+                            parse_url: bool = True) -> Dict[str, bool]:
+        """
+        批量添加监听对象
+
+        服务端支持批量接口时一次请求完成；否则在并发上限内逐个调用add_listener，
+        按whos的顺序开始处理（调用方可以把优先级高的聊天排在前面）。
+
+        Args:
+            whos: 监听对象列表
+            concurrency: 逐个添加时的最大并发请求数
+            reset: 是否先移除再添加（用于重置服务端可能已失效的监听）
+            on_result: 每个监听对象处理完成时的回调 (who, success)
+            save_pic: 是否保存图片
+            save_file: 是否保存文件
+            save_voice: 是否保存语音
+            parse_url: 是否解析链接
+
+        Returns:
+            Dict[str, bool]: 监听对象 -> 是否添加成功
+        """
+        options = {
+            'save_pic': save_pic,
+            'save_file': save_file,
+            'save_voice': save_voice,
+            'parse_url': parse_url,
+        }
+        results: Dict[str, bool] = {}
+        if not whos:
+            return results
+
+        if self.batch_listen_supported is False and time.monotonic() >= self._batch_listen_reprobe_at:
+            self.batch_listen_supported = None
+
+        if not reset and self.batch_listen_supported is not False:
+            batch_results = await self._add_listeners_batch(whos, **options)
+            if batch_results is not None:
+                for who in whos:
+                    results[who] = bool(batch_results.get(who, False))
+                    if on_result:
+                        on_result(who, results[who])
+                return results
+
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+
+        async def register(who: str):
+            async with semaphore:
+                try:
+                    if reset:
+                        await self.remove_listener(who)
+                    success = await self.add_listener(who, **options)
+                except Exception as e:
+                    logger.error(f"添加监听对象 {who} 时出错: {e}")
+                    success = False
+            results[who] = success
+            if on_result:
+                on_result(who, success)
+
+        await asyncio.gather(*(register(who) for who in whos))
+        return results
+
+    async def _add_listeners_batch(self, whos: List[str], save_pic: bool = True, save_file: bool = True,
+                                   save_voice: bool = True, parse_url: bool = True) -> Optional[Dict[str, bool]]:
+        """
+        通过批量接口添加监听对象，监听选项与逐个添加时相同
+
+        Args:
+            whos: 监听对象列表
+            save_pic: 是否保存图片
+            save_file: 是否保存文件
+            save_voice: 是否保存语音
+            parse_url: 是否解析链接
+
+        Returns:
+            Optional[Dict[str, bool]]: 各监听对象的结果，服务端不支持或请求失败时返回None
+        """
+        url = f"{self.base_url}{self.BATCH_LISTEN_ENDPOINT}"
+        headers = {
+            'X-API-Key': self.api_key,
+            'Content-Type': 'application/json'
+        }
+        payload = {
+            'nicknames': whos,
+            'savepic': save_pic,
+            'savefile': save_file,
+            'savevoice': save_voice,
+            'parseurl': parse_url,
+        }
+
+        try:
+            timeout = aiohttp.ClientTimeout(total=30.0, connect=1.0)
+            async with aiohttp.ClientSession(timeout=timeout) as session:
+                async with session.post(url, json=payload, headers=headers) as response:
+                    if response.status != 200:
+                        self._mark_batch_listen_failed(f"状态码: {response.status}")
+                        return None
+
+                    data = await response.json(content_type=None)
+        except Exception as e:
+            self._mark_batch_listen_failed(f"请求异常: {e}")
+            return None
+
+        if not isinstance(data, dict) or data.get('code') != 0 or not isinstance(data.get('data'), dict):
+            self._mark_batch_listen_failed(f"API返回: {data}")
+            return None
+
+        self.batch_listen_supported = True
+        # 期望的响应格式：{"code": 0, "data": {"results": {"昵称": true, ...}}}
+        return data['data'].get('results', {})
+
+    def _mark_batch_listen_failed(self, reason: str):
+        """
+        记录批量接口请求失败
+
+        尚未确认支持批量接口时（首次探测），任何失败的响应或请求异常都视为不支持，
+        在重新探测间隔内直接使用逐个添加，避免每次都先请求一次失败的批量接口。
+
+        Args:
+            reason: 失败原因
+        """
+        if self.batch_listen_supported:
+            logger.warning(f"批量添加监听对象请求失败，{reason}")
+            return
+        logger.info(f"实例 {self.instance_id} 不支持批量添加监听对象（{reason}），"
+                    f"{self.BATCH_LISTEN_REPROBE_INTERVAL} 秒内使用并发逐个添加")
+        self.batch_listen_supported = False
+        self._batch_listen_reprobe_at = time.monotonic() + self.BATCH_LISTEN_REPROBE_INTERVAL
+
     async def download_file(self, file_path: str) -> Optional[bytes]:
         """
         下载文件
@@ -440,9 +572,6 @@ class WxAutoApiClient:
             Optional[bytes]: 文件内容，如果下载失败则返回None
         """
         try:
-            import requests
-            import json
-            import asyncio
             import platform
             import os
 
@@ -513,7 +642,7 @@ class WxAutoApiClient:
 
             # 在事件循环的线程池中执行同步请求
             file_logger.debug(f"准备在事件循环中执行同步请求...")
-            loop = asyncio.get_event_loop()
+            loop = asyncio.get_running_loop()
             response = await loop.run_in_executor(None, send_request)
             status_code = response.status_code
             file_logger.debug(f"下载请求响应状态码: {status_code}")
@@ -581,8 +710,6 @@ class WxAutoApiClient:
     async def get_all_listener_messages(self) -> Dict[str, List[Dict]]:
         """获取所有监听对象的消息"""
         try:
-            import requests
-
             # 使用requests执行请求，不带who参数获取所有监听对象的消息
             url = f"{self.base_url}/api/message/listen/get"
             headers = {'X-API-Key': self.api_key}
@@ -591,8 +718,11 @@ class WxAutoApiClient:
             curl_cmd = f"curl -X GET '{url}' -H 'X-API-Key: {self.api_key}'"
             logger.debug(f"执行API请求，等效curl命令: {curl_cmd}")
 
-            # 执行请求
-            response = requests.get(url, headers=headers)
+            # 在线程池中执行同步请求，避免阻塞事件循环
+            loop = asyncio.get_running_loop()
+            response = await loop.run_in_executor(
+                None, lambda: requests.get(url, headers=headers, timeout=30)
+            )
             status_code = response.status_code
 
             if status_code != 200:
@@ -694,6 +824,7 @@ class InstanceManager:
         """
         client = WxAutoApiClient(instance_id, base_url, api_key)
         self._instances[instance_id] = client
+        domain_events.publish(DomainEventType.INSTANCE_STATUS_CHANGED, instance_id=instance_id, status="added")
         return client
 
     def get_instance(self, instance_id: str) -> Optional[WxAutoApiClient]:
@@ -704,6 +835,7 @@ class InstanceManager:
         """移除指定实例"""
         if instance_id in self._instances:
             del self._instances[instance_id]
+            domain_events.publish(DomainEventType.INSTANCE_STATUS_CHANGED, instance_id=instance_id, status="removed")
 
     def get_all_instances(self) -> Dict[str, WxAutoApiClient]:
         """获取所有实例"""
@@ -0,0 +1,161 @@
+"""
+领域事件模块
+
+核心服务在数据变化时发布领域事件（消息保存、投递状态变化、监听对象增删、实例状态变化、记账完成），
+UI组件订阅后只更新受影响的行或卡片，不再依靠定时器反复查询数据库。
+
+事件在核心服务所在的事件循环中分发（GUI模式下即Qt主线程），订阅者可以直接操作界面组件。
+发布方只把事件放入事件循环的回调队列，不等待订阅者执行，不会拖慢消息处理流程。
+"""
+
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from enum import Enum
+from typing import Any, Callable, Dict, List
+
+from wxauto_mgt.core.service_bridge import service_bridge
+
+logger = logging.getLogger('wxauto_mgt')
+
+
+class DomainEventType(Enum):
+    """领域事件类型"""
+    MESSAGE_SAVED = "message_saved"                      # 新消息已保存
+    DELIVERY_STATUS_CHANGED = "delivery_status_changed"  # 消息投递状态变化
+    LISTENER_ADDED = "listener_added"                    # 添加了监听对象
+    LISTENER_REMOVED = "listener_removed"                # 监听对象被移除（标记为非活跃）
+    INSTANCE_STATUS_CHANGED = "instance_status_changed"  # 实例增删或连接状态变化
+    ACCOUNTING_RECORDED = "accounting_recorded"          # 记账平台写入了记账记录
+
+
+class DomainEvent:
+    """领域事件"""
+
+    __slots__ = ('event_type', 'data', 'timestamp')
+
+    def __init__(self, event_type: DomainEventType, data: Dict[str, Any], timestamp: float = None):
+        self.event_type = event_type
+        self.data = data
+        self.timestamp = timestamp or time.time()
+
+    def __str__(self):
+        return f"DomainEvent({self.event_type.value}, {self.data})"
+
+
+class DomainEventBus:
+    """领域事件总线"""
+
+    def __init__(self):
+        """初始化事件总线"""
+        self._subscribers: Dict[DomainEventType, List[Callable]] = defaultdict(list)
+        self._global_subscribers: List[Callable] = []
+        self._published: Dict[str, int] = defaultdict(int)
+
+    def subscribe(self, event_type: DomainEventType, callback: Callable):
+        """
+        订阅特定类型的事件
+
+        Args:
+            event_type: 事件类型
+            callback: 回调函数（普通函数或协程函数），接收 DomainEvent 参数
+        """
+        if callback not in self._subscribers[event_type]:
+            self._subscribers[event_type].append(callback)
+
+    def subscribe_all(self, callback: Callable):
+        """
+        订阅所有事件
+
+        Args:
+            callback: 回调函数，接收 DomainEvent 参数
+        """
+        if callback not in self._global_subscribers:
+            self._global_subscribers.append(callback)
+
+    def unsubscribe(self, event_type: DomainEventType, callback: Callable):
+        """
+        取消订阅特定类型的事件
+
+        Args:
+            event_type: 事件类型
+            callback: 回调函数
+        """
+        try:
+            self._subscribers[event_type].remove(callback)
+        except ValueError:
+            pass
+
+    def unsubscribe_all(self, callback: Callable):
+        """
+        取消订阅所有事件
+
+        Args:
+            callback: 回调函数
+        """
+        try:
+            self._global_subscribers.remove(callback)
+        except ValueError:
+            pass
+        for callbacks in self._subscribers.values():
+            if callback in callbacks:
+                callbacks.remove(callback)
+
+    def publish(self, event_type: DomainEventType, **data):
+        """
+        发布事件，订阅者在核心服务事件循环的下一轮回调中执行
+
+        Args:
+            event_type: 事件类型
+            **data: 事件数据
+        """
+        self._published[event_type.value] += 1
+        if not self._subscribers.get(event_type) and not self._global_subscribers:
+            return
+
+        event = DomainEvent(event_type, data)
+        loop = service_bridge.loop
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+
+        if running_loop is not None and (loop is None or running_loop is loop):
+            running_loop.call_soon(self._dispatch, event)
+        elif loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._dispatch, event)
+        else:
+            self._dispatch(event)
+
+    def _dispatch(self, event: DomainEvent):
+        """把事件分发给订阅者"""
+        callbacks = self._subscribers.get(event.event_type, []) + self._global_subscribers
+        for callback in callbacks:
+            try:
+                result = callback(event)
+                if asyncio.iscoroutine(result):
+                    asyncio.ensure_future(result)
+            except Exception as e:
+                logger.error(f"领域事件回调执行失败: {event}, 错误: {e}")
+                logger.exception(e)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取统计信息
+
+        Returns:
+            Dict[str, Any]: 各类型事件的发布次数和订阅者数量
+        """
+        return {
+            'published': dict(self._published),
+            'subscribers': {
+                event_type.value: len(callbacks)
+                for event_type, callbacks in self._subscribers.items() if callbacks
+            },
+            'global_subscribers': len(self._global_subscribers)
+        }
+
+
+# 创建全局实例
+domain_events = DomainEventBus()
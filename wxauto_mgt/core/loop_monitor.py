@@ -0,0 +1,225 @@
+"""
+事件循环延迟监控模块
+
+核心服务与GUI共用一个qasync事件循环，循环中的同步操作（同步HTTP请求、文件读写等）
+会阻塞所有服务。本模块包括两部分：
+
+- 心跳协程：按固定间隔休眠，用实际唤醒时间与预期时间之差作为调度延迟，记录到指标注册表
+- 看门狗线程：心跳超过阈值未更新时，抓取事件循环线程当前的调用栈，定位阻塞的代码位置
+
+阻塞结束后按代码位置汇总阻塞次数、最长和累计阻塞时间，供查询阻塞热点。
+"""
+
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from typing import Any, Dict, List, Optional, Tuple
+
+from wxauto_mgt.utils.metrics_registry import metrics_registry
+
+logger = logging.getLogger('wxauto_mgt')
+
+event_loop_lag_seconds = metrics_registry.histogram(
+    "event_loop_lag_seconds", "事件循环调度延迟（秒）")
+event_loop_blocks_total = metrics_registry.counter(
+    "event_loop_blocks", "事件循环阻塞超过阈值的次数")
+
+_PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class LoopMonitor:
+    """事件循环延迟监控器"""
+
+    def __init__(self, interval: float = 0.1, block_threshold: float = 0.5,
+                 max_offenders: int = 100, stack_limit: int = 30):
+        """
+        初始化监控器
+
+        Args:
+            interval: 心跳间隔（秒）
+            block_threshold: 阻塞阈值（秒），心跳超过该时间未更新时抓取调用栈
+            max_offenders: 最多保留的阻塞位置数量
+            stack_limit: 保存的调用栈最大帧数
+        """
+        self.interval = interval
+        self.block_threshold = block_threshold
+        self.max_offenders = max_offenders
+        self.stack_limit = stack_limit
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self._watchdog_thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._running = False
+
+        # 心跳时间由事件循环线程写入，看门狗线程读取
+        self._last_beat = 0.0
+        # 看门狗抓取的调用栈，阻塞结束后由心跳协程取走并汇总
+        self._capture_lock = threading.Lock()
+        self._captured: Optional[Tuple[str, List[str]]] = None
+
+        self._offenders: Dict[str, Dict[str, Any]] = {}
+        self._stats = {'beats': 0, 'blocks': 0, 'max_lag': 0.0}
+
+    def start(self):
+        """在当前事件循环中启动监控（需在事件循环线程中调用）"""
+        if self._running:
+            return
+
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stop_event.clear()
+        self._running = True
+
+        self._heartbeat_task = self._loop.create_task(self._heartbeat_loop())
+        self._watchdog_thread = threading.Thread(target=self._watchdog, name="LoopWatchdog", daemon=True)
+        self._watchdog_thread.start()
+        logger.info(f"事件循环延迟监控已启动，心跳间隔 {self.interval} 秒，阻塞阈值 {self.block_threshold} 秒")
+
+    def stop(self):
+        """停止监控（可在任意线程调用）"""
+        if not self._running:
+            return
+        self._running = False
+        self._stop_event.set()
+
+        task = self._heartbeat_task
+        if task and not task.done():
+            try:
+                if self._loop_thread_id == threading.get_ident():
+                    task.cancel()
+                elif self._loop and not self._loop.is_closed():
+                    self._loop.call_soon_threadsafe(task.cancel)
+            except RuntimeError:
+                pass
+        self._heartbeat_task = None
+        logger.info("事件循环延迟监控已停止")
+
+    async def _heartbeat_loop(self):
+        """心跳协程：测量调度延迟"""
+        try:
+            while self._running:
+                expected = time.monotonic() + self.interval
+                await asyncio.sleep(self.interval)
+                now = time.monotonic()
+                lag = max(0.0, now - expected)
+                self._last_beat = now
+
+                event_loop_lag_seconds.observe(lag)
+                self._stats['beats'] += 1
+                if lag > self._stats['max_lag']:
+                    self._stats['max_lag'] = lag
+
+                if lag >= self.block_threshold:
+                    self._record_block(lag)
+        except asyncio.CancelledError:
+            pass
+
+    def _watchdog(self):
+        """看门狗线程：心跳超时时抓取事件循环线程的调用栈"""
+        check_interval = max(0.05, self.block_threshold / 2)
+        captured_beat = None
+        while not self._stop_event.wait(check_interval):
+            last_beat = self._last_beat
+            if time.monotonic() - last_beat < self.block_threshold + self.interval:
+                continue
+            # 同一次阻塞只抓取一次
+            if captured_beat == last_beat:
+                continue
+            captured_beat = last_beat
+
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            stack = traceback.extract_stack(frame, limit=self.stack_limit)
+            del frame
+            location = self._find_location(stack)
+            with self._capture_lock:
+                self._captured = (location, traceback.format_list(stack))
+
+    @staticmethod
+    def _find_location(stack: traceback.StackSummary) -> str:
+        """在调用栈中找到阻塞位置：优先取最内层的本项目代码"""
+        for frame in reversed(stack):
+            filename = os.path.abspath(frame.filename)
+            if filename.startswith(_PACKAGE_DIR):
+                return f"{os.path.relpath(filename, os.path.dirname(_PACKAGE_DIR))}:{frame.lineno} in {frame.name}"
+        if stack:
+            frame = stack[-1]
+            return f"{frame.filename}:{frame.lineno} in {frame.name}"
+        return "unknown"
+
+    def _record_block(self, duration: float):
+        """汇总一次阻塞"""
+        with self._capture_lock:
+            captured, self._captured = self._captured, None
+
+        location, stack = captured if captured else ("unknown (阻塞期间未抓取到调用栈)", [])
+        self._stats['blocks'] += 1
+        event_loop_blocks_total.inc()
+
+        offender = self._offenders.get(location)
+        if offender is None:
+            if len(self._offenders) >= self.max_offenders:
+                # 移除阻塞次数最少的位置
+                least = min(self._offenders, key=lambda key: self._offenders[key]['count'])
+                del self._offenders[least]
+            offender = self._offenders[location] = {
+                'location': location, 'count': 0, 'max_duration': 0.0, 'total_duration': 0.0,
+                'last_time': 0.0, 'stack': []
+            }
+        offender['count'] += 1
+        offender['total_duration'] += duration
+        offender['last_time'] = time.time()
+        if duration >= offender['max_duration']:
+            offender['max_duration'] = duration
+            if stack:
+                offender['stack'] = stack
+
+        logger.warning(f"事件循环阻塞 {duration:.3f} 秒，位置: {location}")
+        if stack and logger.isEnabledFor(logging.DEBUG):
+            logger.debug("阻塞时的调用栈:\n" + "".join(stack))
+
+    def get_offenders(self, limit: int = 20, include_stack: bool = False) -> List[Dict[str, Any]]:
+        """
+        获取阻塞事件循环的代码位置，按最长阻塞时间降序
+
+        Args:
+            limit: 返回数量
+            include_stack: 是否包含最长一次阻塞时的调用栈
+
+        Returns:
+            List[Dict[str, Any]]: 位置、次数、最长/累计阻塞时间和最后一次阻塞时间
+        """
+        offenders = sorted(self._offenders.values(), key=lambda item: item['max_duration'], reverse=True)[:limit]
+        result = []
+        for offender in offenders:
+            item = {key: value for key, value in offender.items() if key != 'stack'}
+            item['max_duration'] = round(item['max_duration'], 4)
+            item['total_duration'] = round(item['total_duration'], 4)
+            if include_stack:
+                item['stack'] = list(offender['stack'])
+            result.append(item)
+        return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取调度延迟统计
+
+        Returns:
+            Dict[str, Any]: 运行状态、心跳次数、阻塞次数、最大延迟和延迟分位数
+        """
+        stats = dict(self._stats)
+        stats['running'] = self._running
+        stats['lag'] = event_loop_lag_seconds.summary()
+        return stats
+
+
+# 创建全局实例
+loop_monitor = LoopMonitor()
@@ -7,14 +7,24 @@
 
 import logging
 import asyncio
+import sys
 import time
 import json
-from typing import Dict, List, Optional, Any, Set
+from collections import deque
+from typing import Dict, List, Optional, Any, Set, Tuple
 
 from wxauto_mgt.data.db_manager import db_manager
 from wxauto_mgt.core.api_client import instance_manager
+from wxauto_mgt.core.config_manager import config_manager
 from wxauto_mgt.core.service_platform_manager import platform_manager, rule_manager
-from wxauto_mgt.core.message_sender import message_sender
+from wxauto_mgt.core.message_sender import message_sender, processing_timeout
+from wxauto_mgt.core.platform_throttle import platform_throttle
+from wxauto_mgt.core.domain_events import domain_events, DomainEvent, DomainEventType
+from wxauto_mgt.core.message_record import MessageRecord
+from wxauto_mgt.core.message_trace import message_tracer
+from wxauto_mgt.utils.metrics_registry import (
+    metrics_registry, platform_call_seconds, platform_call_errors, reply_send_seconds, reply_send_errors
+)
 
 # 导入标准日志记录器 - 使用主日志记录器，确保所有日志都记录到主日志文件
 logger = logging.getLogger('wxauto_mgt')
@@ -28,26 +38,45 @@ class MessageDeliveryService:
     """消息投递服务"""
 
     def __init__(self, poll_interval: int = 5, batch_size: int = 10,
-                merge_messages: bool = True, merge_window: int = 60):
+                merge_messages: bool = False, merge_window: int = 60,
+                max_retries: int = 5, retry_base_delay: int = 10, retry_max_delay: int = 600):
         """
         初始化消息投递服务
 
         Args:
             poll_interval: 轮询间隔（秒）
             batch_size: 每次处理的消息数量
-            merge_messages: 是否合并消息
-            merge_window: 消息合并时间窗口（秒）
+            merge_messages: 是否合并同一聊天对象短时间内的连续消息
+            merge_window: 消息合并时间窗口（秒），聊天对象超过该时间没有新消息后再投递
+            max_retries: 投递失败的最大重试次数，超过后不再轮询该消息
+            retry_base_delay: 重试退避的初始等待时间（秒）
+            retry_max_delay: 重试退避的最大等待时间（秒）
         """
         self.poll_interval = poll_interval
         self.batch_size = batch_size
         self.merge_messages = merge_messages
         self.merge_window = merge_window
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
 
         self._running = False
         self._tasks = set()
         self._lock = asyncio.Lock()
         self._initialized = False
         self._processing_messages: Set[str] = set()  # 正在处理的消息ID集合
+        self._inflight_messages: Dict[str, MessageRecord] = {}  # 正在处理的消息记录，用于统计内存占用
+        metrics_registry.gauge("delivery_in_flight", "正在投递处理的消息数量").set_function(
+            lambda: len(self._processing_messages))
+        metrics_registry.gauge("delivery_inflight_bytes", "正在投递处理的消息记录占用的内存（字节）").set_function(
+            lambda: self.get_memory_stats()['total_bytes'])
+        metrics_registry.gauge("delivery_inflight_avg_bytes", "正在投递处理的消息记录平均每条占用的内存（字节）").set_function(
+            lambda: self.get_memory_stats()['avg_bytes'])
+        # 最近处理完成的消息的端到端延迟（从保存消息到处理完成，秒）
+        self._latency_samples = deque(maxlen=1000)
+        # 消息合并：聊天对象每收到一条新消息就重新计时，计时结束前轮询跳过该聊天对象
+        self._merge_timers: Dict[Tuple[str, str], asyncio.TimerHandle] = {}
+        self._merging_chats: Set[Tuple[str, str]] = set()
 
     async def initialize(self) -> bool:
         """
@@ -72,6 +101,12 @@ class MessageDeliveryService:
             # 初始化消息发送器
             await message_sender.initialize()
 
+            # 加载消息合并配置（默认关闭）
+            self.set_merge_options(
+                config_manager.get('message_delivery.merge_messages', self.merge_messages),
+                config_manager.get('message_delivery.merge_window', self.merge_window)
+            )
+
             self._initialized = True
             logger.info("消息投递服务初始化完成")
             return True
@@ -157,6 +192,9 @@ class MessageDeliveryService:
         self._running = True
         logger.info("启动消息投递服务")
 
+        if self.merge_messages:
+            domain_events.subscribe(DomainEventType.MESSAGE_SAVED, self._on_message_saved)
+
         # 启动独立的轮询循环
         await self._start_independent_polling()
 
@@ -232,15 +270,20 @@ class MessageDeliveryService:
         """独立处理消息，不依赖其他服务"""
         try:
             # 直接查询数据库获取未处理消息
-            # 包括投递失败(2)和正在投递(3)的消息，以便重新处理
+            # 包括投递失败(2)和正在投递(3)的消息，以便重新处理；
+            # 跳过退避时间未到以及重试次数已达上限的消息
             sql = """
             SELECT * FROM messages
             WHERE processed = 0 AND delivery_status IN (0, 2, 3)
+              AND COALESCE(retry_count, 0) < ?
+              AND COALESCE(next_retry_time, 0) <= ?
             ORDER BY create_time ASC
             LIMIT ?
             """
 
-            messages = await db_manager.fetchall(sql, (self.batch_size,))
+            messages = await db_manager.fetchall(
+                sql, (self.max_retries, int(time.time()), self.batch_size), row_type=MessageRecord
+            )
 
             if not messages:
                 logger.debug("🔍 独立轮询: 没有未处理的消息")
@@ -248,31 +291,363 @@ class MessageDeliveryService:
 
             logger.info(f"🎯 独立轮询: 发现 {len(messages)} 条未处理消息")
 
-            # 处理每条消息
-            for message in messages:
-                message_dict = dict(message)
-                message_id = message_dict.get('message_id', 'unknown')
+            if self.merge_messages:
+                # 合并计时中的聊天对象在计时结束后统一投递
+                messages = [
+                    message for message in messages
+                    if (message['instance_id'], message['chat_name']) not in self._merge_timers
+                    and (message['instance_id'], message['chat_name']) not in self._merging_chats
+                ]
+                if not messages:
+                    return
+                # 先合并，合并后的消息再按平台分批，批量平台收到的也是合并后的内容
+                messages = await self._merge_messages(messages)
+
+            # 支持批量处理的平台（如关键词匹配、记账）跨会话合并为一批投递
+            messages, matched_rules = await self._deliver_platform_batches(messages)
+            if not messages:
+                return
 
-                # 检查是否正在处理
-                if message_id in self._processing_messages:
-                    logger.debug(f"⏭️ 跳过正在处理的消息: {message_id}")
-                    continue
+            # 按实例分组：同一实例内按时间顺序处理，不同实例之间并发处理，
+            # 回复发送由消息发送器按实例串行化，互不阻塞
+            messages_by_instance: Dict[str, List[Dict[str, Any]]] = {}
+            for message_dict in messages:
+                messages_by_instance.setdefault(message_dict.get('instance_id', ''), []).append(message_dict)
 
-                logger.info(f"🚀 独立处理消息: {message_id}")
+            if len(messages_by_instance) > 1:
+                logger.debug(f"独立轮询: 消息分布在 {len(messages_by_instance)} 个实例，并发处理")
 
-                # 直接处理消息，避免异步任务冲突
-                try:
-                    await self.process_message(message_dict)
-                except Exception as e:
-                    logger.error(f"❌ 处理消息 {message_id} 时出错: {e}")
-                    import traceback
-                    logger.error(f"错误堆栈: {traceback.format_exc()}")
+            await asyncio.gather(*[
+                self._process_instance_messages(instance_messages, matched_rules)
+                for instance_messages in messages_by_instance.values()
+            ])
 
         except Exception as e:
             logger.error(f"❌ 独立消息处理出错: {e}")
             import traceback
             logger.error(f"错误堆栈: {traceback.format_exc()}")
 
+    async def _deliver_platform_batches(self, messages: List[Dict[str, Any]]
+                                        ) -> Tuple[List[Dict[str, Any]], Dict[str, Optional[Dict[str, Any]]]]:
+        """
+        将投递到支持批量处理的平台的消息合并为批次投递
+
+        Args:
+            messages: 待处理消息列表（按时间排序）
+
+        Returns:
+            Tuple[List[Dict[str, Any]], Dict[str, Optional[Dict[str, Any]]]]:
+                未被批量处理、需要逐条处理的消息，以及这些消息已匹配的投递规则（消息ID -> 规则，
+                没有匹配的规则时为None），逐条处理时不再重复匹配
+        """
+        remaining = []
+        matched_rules: Dict[str, Optional[Dict[str, Any]]] = {}
+        batches: Dict[str, Dict[str, Any]] = {}
+
+        for message in messages:
+            if message['message_id'] in self._processing_messages:
+                continue
+
+            rule = await rule_manager.match_rule(message['instance_id'], message['chat_name'], message.get('content', ''))
+            platform = await platform_manager.get_platform(rule['platform_id']) if rule else None
+            if not platform or not platform.supports_batch:
+                remaining.append(message)
+                matched_rules[message['message_id']] = rule
+                continue
+
+            batch = batches.setdefault(platform.platform_id, {'platform': platform, 'items': []})
+            batch['items'].append((message, rule))
+
+        for batch in batches.values():
+            items = batch['items']
+            if len(items) < 2:
+                # 单条消息走常规流程
+                for message, rule in items:
+                    remaining.append(message)
+                    matched_rules[message['message_id']] = rule
+                continue
+            await self._deliver_batch(batch['platform'], items)
+
+        return remaining, matched_rules
+
+    async def _deliver_batch(self, platform, items: List[tuple]):
+        """
+        批量投递同一平台的消息
+
+        Args:
+            platform: 支持批量处理的服务平台实例
+            items: (消息, 匹配的投递规则) 列表
+        """
+        message_ids = [message['message_id'] for message, _ in items]
+        self._processing_messages.update(message_ids)
+        for message, _ in items:
+            self._inflight_messages[message['message_id']] = message
+            message_tracer.mark(message['message_id'], 'queue')
+
+        try:
+            throttle = platform_throttle.get(platform)
+            if not throttle.allow_request():
+                logger.warning(f"服务平台 {platform.name} 处于熔断状态，推迟投递 {len(items)} 条消息")
+                for message_id in message_ids:
+                    await self._defer_message(message_id, throttle.breaker.retry_at)
+                return
+
+            logger.info(f"批量投递 {len(items)} 条消息到平台 {platform.name}")
+
+            # 标记为正在投递
+            now = int(time.time())
+            await db_manager.executemany(
+                "UPDATE messages SET delivery_status = 3, delivery_time = ? WHERE message_id = ?",
+                [(now, message_id) for message_id in message_ids]
+            )
+            for message_id in message_ids:
+                domain_events.publish(DomainEventType.DELIVERY_STATUS_CHANGED, message_id=message_id, status=3)
+
+            prepared = []
+            for message, _ in items:
+                await self._attach_conversation_id(message)
+                prepared.append(await self._prepare_message(message))
+
+            # 每次上游请求各自占用一次限流配额并单独超时，
+            # 超时或失败的消息只重试自身，已成功的消息不会重复提交
+            platform_type = platform.get_type()
+            try:
+                with platform_call_seconds.time(platform_type=platform_type):
+                    results = await platform.process_batch(prepared, call_guard=throttle.acquire, item_timeout=30)
+            except Exception as e:
+                # 平台没有返回逐条结果，无法区分成功的消息，只能整批重试
+                platform_call_errors.inc(platform_type=platform_type)
+                throttle.record_failure()
+                logger.error(f"❌ 批量投递到平台 {platform.name} 出错: {e}")
+                for message_id in message_ids:
+                    message_tracer.finish(message_id, "failed")
+                    await self._schedule_retry(message_id, str(e))
+                return
+
+            for message_id in message_ids:
+                message_tracer.mark(message_id, 'platform')
+
+            failed_count = sum(1 for result in results if 'error' in result)
+            if failed_count:
+                platform_call_errors.inc(failed_count, platform_type=platform_type)
+            if failed_count == len(results):
+                throttle.record_failure()
+            else:
+                throttle.record_success()
+
+            # 回复按实例分组发送：同一实例内保持顺序，不同实例并发
+            results_by_instance: Dict[str, List[tuple]] = {}
+            for (message, rule), result in zip(items, results):
+                results_by_instance.setdefault(message.get('instance_id', ''), []).append((message, rule, result))
+
+            async def handle_instance_results(instance_results: List[tuple]):
+                for message, rule, result in instance_results:
+                    try:
+                        if result.get('timeout'):
+                            logger.error(f"❌ 消息 {message['message_id']} 批量投递到平台 {platform.name} 超时")
+                            message_tracer.finish(message['message_id'], "timeout")
+                            await self._schedule_retry(message['message_id'], "处理超时", status=0)
+                            continue
+                        await self._check_platform_result(message, result)
+                        success = await self._handle_delivery_result(message, rule, platform, result)
+                        message_tracer.finish(message['message_id'], "ok" if success else "failed")
+                    except Exception as e:
+                        logger.error(f"❌ 处理消息 {message['message_id']} 的投递结果时出错: {e}")
+                        message_tracer.finish(message['message_id'], "failed")
+                        await self._schedule_retry(message['message_id'], str(e))
+
+            await asyncio.gather(*[
+                handle_instance_results(instance_results)
+                for instance_results in results_by_instance.values()
+            ])
+        finally:
+            self._processing_messages.difference_update(message_ids)
+            for message_id in message_ids:
+                self._inflight_messages.pop(message_id, None)
+
+    async def _prepare_message(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        投递前的通用预处理：收集合并消息的图片和文件，去除卡片、语音解析前缀
+
+        Args:
+            message: 消息数据
+
+        Returns:
+            Dict[str, Any]: 预处理后的消息副本
+        """
+        processed_message = message.copy()
+        message_id = message.get('message_id', 'unknown')
+        content = message.get('content', '')
+        mtype = message.get('mtype', '')
+
+        # 合并消息：收集子消息中的图片和文件
+        if message.get('merged', 0) == 1 and message.get('merged_ids'):
+            file_logger.info(f"检测到合并消息: {message_id}, 合并数量: {message.get('merged_count', 0)}")
+
+            try:
+                attachments = message.get('attachments')
+                if attachments is None:
+                    # 不是本次组装的合并消息（例如从数据库读取），一次查询所有子消息
+                    merged_ids = json.loads(message['merged_ids'])
+                    placeholders = ','.join(['?' for _ in merged_ids])
+                    merged_messages = await db_manager.fetchall(
+                        f"SELECT message_id, mtype, local_file_path, original_file_path, file_size "
+                        f"FROM messages WHERE message_id IN ({placeholders}) ORDER BY create_time ASC",
+                        tuple(merged_ids)
+                    )
+                    attachments = self._collect_attachments(merged_messages)
+
+                processed_message['attachments'] = attachments
+                if attachments:
+                    file_logger.info(f"合并消息 {message_id} 包含 {len(attachments)} 个图片/文件: "
+                                     f"{[item['local_file_path'] for item in attachments]}")
+            except Exception as e:
+                file_logger.error(f"处理合并消息时出错: {e}")
+                file_logger.exception(e)
+
+        if mtype == 'card':
+            # 移除[wxauto卡片链接解析]前缀
+            processed_message['content'] = content.replace('[wxauto卡片链接解析]', '').strip()
+            logger.info(f"投递前处理卡片消息: {message_id}, 移除前缀")
+        elif mtype == 'voice':
+            # 移除[wxauto语音解析]前缀
+            processed_message['content'] = content.replace('[wxauto语音解析]', '').strip()
+            logger.info(f"投递前处理语音消息: {message_id}, 移除前缀")
+        return processed_message
+
+    async def _check_platform_result(self, message: Dict[str, Any], result: Dict[str, Any]):
+        """
+        检查平台处理结果：会话不存在（404）时清除监听对象的会话ID
+
+        Args:
+            message: 原始消息
+            result: 平台处理结果
+        """
+        error = result.get('error', '')
+        if error and '404' in error and 'Conversation Not Exists' in error:
+            instance_id = message.get('instance_id')
+            chat_name = message.get('chat_name')
+            if instance_id and chat_name:
+                file_logger.warning(f"检测到会话ID不存在错误，清除监听对象的会话ID: {instance_id} - {chat_name}")
+                logger.warning(f"检测到会话ID不存在错误，清除监听对象的会话ID: {instance_id} - {chat_name}")
+                await self._clear_invalid_conversation_id(instance_id, chat_name)
+
+    async def _process_instance_messages(self, messages: List[Dict[str, Any]],
+                                         matched_rules: Optional[Dict[str, Optional[Dict[str, Any]]]] = None):
+        """
+        依次处理同一实例的消息
+
+        Args:
+            messages: 同一实例的消息列表（按时间排序，开启消息合并时已合并）
+            matched_rules: 已匹配的投递规则（消息ID -> 规则），逐条处理时不再重复匹配
+        """
+        matched_rules = matched_rules or {}
+
+        for message_dict in messages:
+            message_id = message_dict.get('message_id', 'unknown')
+
+            # 检查是否正在处理
+            if message_id in self._processing_messages:
+                logger.debug(f"⏭️ 跳过正在处理的消息: {message_id}")
+                continue
+
+            logger.info(f"🚀 独立处理消息: {message_id}")
+
+            # 直接处理消息，避免异步任务冲突
+            try:
+                if message_id in matched_rules:
+                    await self.process_message(message_dict, rule=matched_rules[message_id], rule_matched=True)
+                else:
+                    await self.process_message(message_dict)
+            except Exception as e:
+                logger.error(f"❌ 处理消息 {message_id} 时出错: {e}")
+                import traceback
+                logger.error(f"错误堆栈: {traceback.format_exc()}")
+
+    def set_merge_options(self, merge_messages: bool, merge_window: int):
+        """
+        设置消息合并选项，服务运行中修改时立即生效
+
+        Args:
+            merge_messages: 是否合并同一聊天对象短时间内的连续消息
+            merge_window: 消息合并时间窗口（秒）
+        """
+        merge_messages = bool(merge_messages)
+        self.merge_window = merge_window
+        if merge_messages == self.merge_messages:
+            return
+
+        self.merge_messages = merge_messages
+        logger.info(f"消息合并已{'开启' if merge_messages else '关闭'}，合并时间窗口 {merge_window} 秒")
+        if not self._running:
+            return
+
+        if merge_messages:
+            domain_events.subscribe(DomainEventType.MESSAGE_SAVED, self._on_message_saved)
+        else:
+            # 计时中的聊天对象交给轮询投递
+            domain_events.unsubscribe(DomainEventType.MESSAGE_SAVED, self._on_message_saved)
+            for handle in self._merge_timers.values():
+                handle.cancel()
+            self._merge_timers.clear()
+
+    def _on_message_saved(self, event: DomainEvent):
+        """新消息保存后重新开始该聊天对象的合并计时"""
+        key = (event.data.get('instance_id', ''), event.data.get('chat_name', ''))
+        handle = self._merge_timers.pop(key, None)
+        if handle:
+            handle.cancel()
+        self._merge_timers[key] = asyncio.get_running_loop().call_later(
+            self.merge_window, self._on_merge_window_closed, key
+        )
+
+    def _on_merge_window_closed(self, key: Tuple[str, str]):
+        """合并时间窗口内没有新消息，投递该聊天对象的消息"""
+        self._merge_timers.pop(key, None)
+        if not self._running:
+            return
+        task = asyncio.create_task(self._deliver_chat_messages(*key))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _deliver_chat_messages(self, instance_id: str, chat_name: str):
+        """
+        合并并投递一个聊天对象的未处理消息
+
+        Args:
+            instance_id: 实例ID
+            chat_name: 聊天对象名称
+        """
+        key = (instance_id, chat_name)
+        if key in self._merging_chats:
+            return
+        self._merging_chats.add(key)
+        try:
+            sql = """
+            SELECT * FROM messages
+            WHERE instance_id = ? AND chat_name = ? AND processed = 0 AND delivery_status IN (0, 2, 3)
+              AND COALESCE(retry_count, 0) < ?
+              AND COALESCE(next_retry_time, 0) <= ?
+            ORDER BY create_time ASC
+            """
+            messages = await db_manager.fetchall(
+                sql, (instance_id, chat_name, self.max_retries, int(time.time())), row_type=MessageRecord
+            )
+            messages = [message for message in messages if message['message_id'] not in self._processing_messages]
+            if not messages:
+                return
+
+            logger.info(f"聊天对象 {instance_id} - {chat_name} 合并时间窗口结束，投递 {len(messages)} 条消息")
+            # 先合并再按平台分批，批量平台不会把计时等来的消息逐条处理
+            messages = await self._merge_messages(messages)
+            messages, matched_rules = await self._deliver_platform_batches(messages)
+            if messages:
+                await self._process_instance_messages(messages, matched_rules)
+        except Exception as e:
+            logger.error(f"❌ 投递聊天对象 {instance_id} - {chat_name} 的合并消息出错: {e}")
+        finally:
+            self._merging_chats.discard(key)
+
     async def stop(self) -> None:
         """停止服务"""
         if not self._running:
@@ -281,6 +656,11 @@ class MessageDeliveryService:
         self._running = False
         logger.info("停止消息投递服务")
 
+        domain_events.unsubscribe(DomainEventType.MESSAGE_SAVED, self._on_message_saved)
+        for handle in self._merge_timers.values():
+            handle.cancel()
+        self._merge_timers.clear()
+
         # 取消所有任务
         for task in self._tasks:
             task.cancel()
@@ -373,12 +753,16 @@ class MessageDeliveryService:
             sql = """
             SELECT * FROM messages
             WHERE instance_id = ? AND processed = 0 AND delivery_status IN (0, 2, 3)
+              AND COALESCE(retry_count, 0) < ?
+              AND COALESCE(next_retry_time, 0) <= ?
             ORDER BY create_time ASC
             LIMIT ?
             """
 
             file_logger.debug(f"查询实例 {instance_id} 的未处理消息")
-            messages = await db_manager.fetchall(sql, (instance_id, self.batch_size))
+            messages = await db_manager.fetchall(
+                sql, (instance_id, self.max_retries, int(time.time()), self.batch_size), row_type=MessageRecord
+            )
             file_logger.debug(f"查询到 {len(messages)} 条未处理消息")
 
             if messages:
@@ -403,75 +787,91 @@ class MessageDeliveryService:
         """
         合并消息
 
+        同一聊天对象相邻两条消息的间隔不超过合并时间窗口时归为一组（滑动窗口），
+        每组合并为一条消息。
+
         Args:
             messages: 消息列表
 
         Returns:
-            List[Dict[str, Any]]: 合并后的消息列表
+            List[Dict[str, Any]]: 合并后的消息列表，按时间排序
         """
         try:
-            # 按聊天对象和时间窗口分组
-            grouped_messages = {}
-            now = int(time.time())
-
-            for msg in messages:
-                # 创建分组键：实例ID_聊天对象
-                chat_key = f"{msg['instance_id']}_{msg['chat_name']}"
-
-                # 检查时间窗口
-                if chat_key not in grouped_messages:
-                    grouped_messages[chat_key] = []
-
-                # 添加到分组
-                grouped_messages[chat_key].append(msg)
-
-            # 合并消息
-            merged_results = []
-            for chat_key, msgs in grouped_messages.items():
-                if len(msgs) == 1:
-                    # 只有一条消息，不需要合并
-                    merged_results.append(msgs[0])
+            # 按聊天对象分组，组内按时间间隔切分
+            bursts: Dict[tuple, List[List[Dict[str, Any]]]] = {}
+            for msg in sorted(messages, key=lambda item: item['create_time']):
+                groups = bursts.setdefault((msg['instance_id'], msg['chat_name']), [])
+                if groups and msg['create_time'] - groups[-1][-1]['create_time'] <= self.merge_window:
+                    groups[-1].append(msg)
                 else:
-                    # 按时间排序
-                    sorted_msgs = sorted(msgs, key=lambda x: x['create_time'])
-
-                    # 检查时间窗口
-                    first_msg_time = sorted_msgs[0]['create_time']
-                    last_msg_time = sorted_msgs[-1]['create_time']
-
-                    if last_msg_time - first_msg_time > self.merge_window:
-                        # 超出时间窗口，不合并
-                        for msg in sorted_msgs:
-                            merged_results.append(msg)
-                    else:
-                        # 合并内容
-                        merged_content = "\n".join([
-                            f"{msg['sender'] or '我'}: {msg['content']}"
-                            for msg in sorted_msgs
-                        ])
-
-                        # 创建合并后的消息
-                        merged_msg = sorted_msgs[-1].copy()  # 使用最新消息作为基础
-                        merged_msg['content'] = merged_content
-                        merged_msg['merged'] = 1
-                        merged_msg['merged_count'] = len(sorted_msgs)
-                        merged_msg['merged_ids'] = json.dumps([msg['message_id'] for msg in sorted_msgs])
-
-                        # 添加到结果
-                        merged_results.append(merged_msg)
+                    groups.append([msg])
 
+            merged_results = [
+                group[0] if len(group) == 1 else self._build_merged_message(group)
+                for groups in bursts.values() for group in groups
+            ]
+            merged_results.sort(key=lambda item: item['create_time'])
             return merged_results
         except Exception as e:
             logger.error(f"合并消息失败: {e}")
             # 出错时返回原始消息
             return messages
 
-    async def process_message(self, message: Dict[str, Any]) -> bool:
+    def _build_merged_message(self, group: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        把同一聊天对象的一组消息合并为一条消息
+
+        Args:
+            group: 消息列表（按时间排序）
+
+        Returns:
+            Dict[str, Any]: 合并后的消息，图片和文件收集在 attachments 列表中
+        """
+        merged_msg = group[-1].copy()  # 使用最新消息作为基础
+        merged_msg['content'] = "\n".join(
+            f"{msg.get('sender') or '我'}: {msg.get('content') or ''}" for msg in group
+        )
+        merged_msg['merged'] = 1
+        merged_msg['merged_count'] = len(group)
+        merged_msg['merged_ids'] = json.dumps([msg['message_id'] for msg in group])
+        merged_msg['attachments'] = self._collect_attachments(group)
+        # 被合并的消息不再单独追踪，由合并后的消息（最新一条）记录处理耗时
+        for msg in group[:-1]:
+            message_tracer.discard(msg['message_id'])
+        return merged_msg
+
+    @staticmethod
+    def _collect_attachments(messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        收集消息中的图片和文件
+
+        Args:
+            messages: 消息列表
+
+        Returns:
+            List[Dict[str, Any]]: 附件列表，包含消息ID、文件类型、本地路径、原始路径和文件大小
+        """
+        return [
+            {
+                'message_id': msg.get('message_id'),
+                'file_type': msg.get('mtype'),
+                'local_file_path': msg.get('local_file_path'),
+                'original_file_path': msg.get('original_file_path'),
+                'file_size': msg.get('file_size'),
+            }
+            for msg in messages
+            if msg.get('mtype') in ('image', 'file') and msg.get('local_file_path')
+        ]
+
+    async def process_message(self, message: Dict[str, Any], rule: Optional[Dict[str, Any]] = None,
+                              rule_matched: bool = False) -> bool:
         """
         处理单条消息（带超时机制）
 
         Args:
             message: 消息数据
+            rule: 已匹配的投递规则
+            rule_matched: 是否已经匹配过规则（为True时直接使用rule，rule为None表示没有匹配的规则）
 
         Returns:
             bool: 是否处理成功
@@ -483,28 +883,39 @@ class MessageDeliveryService:
 
         # 使用超时机制包装实际的处理逻辑
         try:
-            # 设置30秒超时
-            async with asyncio.timeout(30):
-                return await self._process_message_internal(message)
+            # 设置30秒超时，排队等待实例发送通道的时间不计入（由消息发送器单独限时）
+            async with asyncio.timeout(30) as budget:
+                budget_token = processing_timeout.set(budget)
+                try:
+                    success = await self._process_message_internal(message, rule, rule_matched)
+                finally:
+                    processing_timeout.reset(budget_token)
+            message_tracer.finish(message_id, "ok" if success else "failed")
+            return success
         except asyncio.TimeoutError:
             logger.error(f"❌ 消息处理超时: {message_id} (30秒)")
+            message_tracer.finish(message_id, "timeout")
             # 超时处理：重置状态，清理资源
             await self._handle_timeout(message_id)
             return False
         except Exception as e:
             logger.error(f"❌ 消息处理异常: {message_id}, 错误: {e}")
+            message_tracer.finish(message_id, "failed")
             import traceback
             logger.error(f"异常堆栈: {traceback.format_exc()}")
             # 异常处理：重置状态，清理资源
             await self._handle_exception(message_id, e)
             return False
 
-    async def _process_message_internal(self, message: Dict[str, Any]) -> bool:
+    async def _process_message_internal(self, message: Dict[str, Any], rule: Optional[Dict[str, Any]] = None,
+                                        rule_matched: bool = False) -> bool:
         """
         内部消息处理逻辑
 
         Args:
             message: 消息数据
+            rule: 已匹配的投递规则
+            rule_matched: 是否已经匹配过规则
 
         Returns:
             bool: 是否处理成功
@@ -524,52 +935,12 @@ class MessageDeliveryService:
 
         # 添加到正在处理的集合
         self._processing_messages.add(message_id)
+        self._inflight_messages[message_id] = message
+        message_tracer.mark(message_id, 'queue')
         logger.debug(f"消息 {message_id} 已添加到处理队列")
 
         # 获取监听对象的会话ID
-        try:
-            # 从数据库中获取监听对象的会话ID
-            instance_id = message.get('instance_id')
-            chat_name = message.get('chat_name')
-
-            if instance_id and chat_name:
-                query = "SELECT conversation_id FROM listeners WHERE instance_id = ? AND who = ?"
-                listener_data = await db_manager.fetchone(query, (instance_id, chat_name))
-
-                if listener_data and listener_data.get('conversation_id'):
-                    conversation_id = listener_data.get('conversation_id')
-                    # 将会话ID添加到消息中
-                    message['conversation_id'] = conversation_id
-                    file_logger.info(f"获取到监听对象的会话ID: {instance_id} - {chat_name} - {conversation_id}")
-                    logger.info(f"获取到监听对象的会话ID: {instance_id} - {chat_name} - {conversation_id}")
-                else:
-                    file_logger.info(f"监听对象没有会话ID: {instance_id} - {chat_name}，将创建新会话")
-                    logger.info(f"监听对象没有会话ID: {instance_id} - {chat_name}，将创建新会话")
-
-                    # 检查监听对象是否存在，如果不存在则添加
-                    from wxauto_mgt.core.message_listener import message_listener
-                    if not await message_listener.has_listener(instance_id, chat_name):
-                        logger.info(f"监听对象不存在，尝试添加: {instance_id} - {chat_name}")
-                        add_success = await message_listener.add_listener(
-                            instance_id,
-                            chat_name,
-                            save_pic=True,
-                            save_file=True,
-                            save_voice=True,
-                            parse_url=True
-                        )
-                        if add_success:
-                            logger.info(f"成功添加监听对象: {instance_id} - {chat_name}")
-                        else:
-                            logger.error(f"添加监听对象失败: {instance_id} - {chat_name}")
-            else:
-                file_logger.warning(f"消息缺少实例ID或聊天名称，无法获取会话ID")
-                logger.warning(f"消息缺少实例ID或聊天名称，无法获取会话ID")
-        except Exception as e:
-            file_logger.error(f"获取监听对象会话ID时出错: {e}")
-            logger.error(f"获取监听对象会话ID时出错: {e}")
-            logger.exception(e)
-            # 继续处理消息，不中断流程
+        await self._attach_conversation_id(message)
 
         try:
             # 标记为正在投递
@@ -581,10 +952,12 @@ class MessageDeliveryService:
             logger.info(f"为消息 {message_id} 匹配规则, 实例: {message.get('instance_id')}, 聊天对象: {message.get('chat_name')}")
             # 传递消息内容，用于检查@消息
             content = message.get('content', '')
-            rule = await rule_manager.match_rule(message['instance_id'], message['chat_name'], content)
+            if not rule_matched:
+                rule = await rule_manager.match_rule(message['instance_id'], message['chat_name'], content)
             if not rule:
                 file_logger.warning(f"消息 {message_id} 没有匹配的投递规则，将删除该消息")
                 logger.warning(f"消息 {message_id} 没有匹配的投递规则，将删除该消息")
+                message_tracer.finish(message_id, "no_rule")
                 # 直接删除消息，而不是标记为已处理
                 delete_result = await self._delete_message(message)
                 logger.info(f"删除消息 {message_id} 结果: {delete_result}")
@@ -598,11 +971,12 @@ class MessageDeliveryService:
             if not platform:
                 file_logger.error(f"找不到服务平台: {rule['platform_id']}")
                 logger.error(f"找不到服务平台: {rule['platform_id']}")
-                # 标记为投递失败
-                await self._update_message_delivery_status(message_id, 2)
+                # 标记为投递失败，按退避时间重试
+                await self._schedule_retry(message_id, "找不到服务平台")
                 return False
 
             file_logger.info(f"获取到服务平台: {platform.name}, 类型: {platform.get_type() if hasattr(platform, 'get_type') else 'unknown'}")
+            message_tracer.mark(message_id, 'match')
 
             # 投递消息 - 记录详细信息
             logger.info(f"投递消息: ID={message_id}, 实例={message.get('instance_id')}, 聊天={message.get('chat_name')}, 平台={platform.name}, 平台类型={platform.get_type() if hasattr(platform, 'get_type') else 'unknown'}")
@@ -617,146 +991,282 @@ class MessageDeliveryService:
                 if 'local_file_path' in message:
                     logger.debug(f"文件路径: {message.get('local_file_path')}")
 
+            # 熔断器打开时不请求平台，推迟到允许试探的时间再投递（不计入重试次数）
+            throttle = platform_throttle.get(platform)
+            if not throttle.allow_request():
+                logger.warning(f"服务平台 {platform.name} 处于熔断状态，推迟投递消息: {message_id}")
+                await self._defer_message(message_id, throttle.breaker.retry_at)
+                return False
+
             logger.debug(f"🚀 开始调用deliver_message方法: {message_id}")
-            delivery_result = await self.deliver_message(message, platform)
+            async with throttle.acquire():
+                delivery_result = await self.deliver_message(message, platform)
+            message_tracer.mark(message_id, 'platform')
             logger.debug(f"📊 deliver_message返回结果: {delivery_result}")
             file_logger.debug(f"投递结果: {delivery_result}")
 
-            # 记录投递完成，开始后续处理
-            logger.debug(f"平台处理完成，开始后续处理: {message_id}")
-
-            logger.debug(f"🔍 检查投递结果是否包含错误: {'error' in delivery_result}")
             if 'error' in delivery_result:
-                file_logger.error(f"投递消息 {message_id} 失败: {delivery_result['error']}")
-                logger.error(f"投递消息 {message_id} 失败: {delivery_result['error']}")
-                # 标记为投递失败
-                await self._update_message_delivery_status(message_id, 2)
-                return False
-
-            # 标记为已投递
-            file_logger.info(f"消息 {message_id} 投递成功，标记为已投递")
-            # 使用特殊格式的日志，确保能被UI识别
-            logger.info(f"【转发消息到{platform.name}平台成功】: ID={message_id}, 实例={message.get('instance_id')}, 聊天={message.get('chat_name')}")
-
-            # 更新投递状态为已投递(1)
-            logger.debug(f"🔄 开始更新消息 {message_id} 的投递状态为已投递(1)")
-            update_result = await self._update_message_delivery_status(
-                message_id, 1, rule['platform_id']
-            )
-            if update_result:
-                logger.debug(f"✅ 消息 {message_id} 投递状态更新成功")
+                throttle.record_failure()
             else:
-                logger.error(f"❌ 消息 {message_id} 投递状态更新失败")
-                # 即使状态更新失败，也继续处理回复
-                file_logger.error(f"消息 {message_id} 投递状态更新失败，但继续处理回复")
-
-            # 发送回复 - 记录详细信息
-            logger.debug(f"🔄 步骤4: 开始处理回复发送，消息ID: {message_id}")
+                throttle.record_success()
 
-            # 检查平台是否建议发送回复
-            should_reply = delivery_result.get('should_reply', True)  # 默认发送回复
-            reply_content = delivery_result.get('content', '') or delivery_result.get('reply_content', '')
+            return await self._handle_delivery_result(message, rule, platform, delivery_result)
+        except Exception as e:
+            logger.error(f"❌ 处理消息 {message_id} 时出错: {e}")
+            logger.error(f"❌ 异常类型: {type(e).__name__}")
+            import traceback
+            logger.error(f"❌ 异常堆栈: {traceback.format_exc()}")
+            # 标记为投递失败，按退避时间重试
+            await self._schedule_retry(message_id, str(e))
+            return False
+        finally:
+            # 从正在处理的集合中移除
+            self._processing_messages.discard(message_id)
+            self._inflight_messages.pop(message_id, None)
 
-            # 添加调试日志，帮助诊断问题
-            logger.debug(f"🔍 回复检查: should_reply={should_reply}, reply_content长度={len(reply_content) if reply_content else 0}")
-            logger.debug(f"🔍 delivery_result keys: {list(delivery_result.keys())}")
-            if 'content' in delivery_result:
-                logger.debug(f"🔍 delivery_result['content']: {delivery_result['content'][:100] if delivery_result['content'] else 'None/Empty'}")
+    async def _attach_conversation_id(self, message: Dict[str, Any]):
+        """
+        从监听对象获取会话ID并添加到消息中；监听对象不存在时尝试添加
 
-            if should_reply and reply_content:
-                logger.debug(f"✅ 满足回复条件，准备发送回复: {message_id}")
-                # 记录详细的回复信息
-                logger.info(f"准备发送回复: ID={message_id}, 实例={message['instance_id']}, 聊天={message['chat_name']}, 内容长度={len(reply_content)}")
-                logger.debug(f"回复内容摘要: {reply_content[:100]}{'...' if len(reply_content) > 100 else ''}")
+        Args:
+            message: 消息数据（会被就地修改）
+        """
+        try:
+            instance_id = message.get('instance_id')
+            chat_name = message.get('chat_name')
 
-                # 记录完整回复内容到调试日志
-                logger.debug(f"完整回复内容: {reply_content}")
+            if instance_id and chat_name:
+                # 优先使用内存中的监听对象信息，只有不在内存中时才查询数据库
+                from wxauto_mgt.core.message_listener import message_listener
+                listener_info = message_listener.get_listener_info(instance_id, chat_name)
+                if listener_info is not None:
+                    conversation_id = listener_info.conversation_id
+                else:
+                    query = "SELECT conversation_id FROM listeners WHERE instance_id = ? AND who = ?"
+                    listener_data = await db_manager.fetchone(query, (instance_id, chat_name))
+                    conversation_id = listener_data.get('conversation_id') if listener_data else ''
 
-                # 检查是否有会话ID
-                if 'conversation_id' in delivery_result:
-                    logger.info(f"回复使用会话ID: {delivery_result['conversation_id']}, 消息ID={message_id}")
+                if conversation_id:
+                    # 将会话ID添加到消息中
+                    message['conversation_id'] = conversation_id
+                    file_logger.info(f"获取到监听对象的会话ID: {instance_id} - {chat_name} - {conversation_id}")
+                    logger.info(f"获取到监听对象的会话ID: {instance_id} - {chat_name} - {conversation_id}")
+                else:
+                    file_logger.info(f"监听对象没有会话ID: {instance_id} - {chat_name}，将创建新会话")
+                    logger.info(f"监听对象没有会话ID: {instance_id} - {chat_name}，将创建新会话")
 
-                    # 更新数据库中的会话ID
-                    try:
-                        # 更新监听对象的会话ID
-                        from wxauto_mgt.data.db_manager import db_manager
-                        await db_manager.execute(
-                            "UPDATE listeners SET conversation_id = ? WHERE instance_id = ? AND who = ?",
-                            (delivery_result['conversation_id'], message['instance_id'], message['chat_name'])
+                    # 检查监听对象是否存在，如果不存在则添加
+                    if listener_info is None and not await message_listener.has_listener(instance_id, chat_name):
+                        logger.info(f"监听对象不存在，尝试添加: {instance_id} - {chat_name}")
+                        add_success = await message_listener.add_listener(
+                            instance_id,
+                            chat_name,
+                            save_pic=True,
+                            save_file=True,
+                            save_voice=True,
+                            parse_url=True
                         )
-                        logger.info(f"已更新监听对象的会话ID: {message['instance_id']} - {message['chat_name']} - {delivery_result['conversation_id']}")
-                    except Exception as e:
-                        logger.error(f"更新会话ID时出错: {e}")
+                        if add_success:
+                            logger.info(f"成功添加监听对象: {instance_id} - {chat_name}")
+                        else:
+                            logger.error(f"添加监听对象失败: {instance_id} - {chat_name}")
+            else:
+                file_logger.warning(f"消息缺少实例ID或聊天名称，无法获取会话ID")
+                logger.warning(f"消息缺少实例ID或聊天名称，无法获取会话ID")
+        except Exception as e:
+            file_logger.error(f"获取监听对象会话ID时出错: {e}")
+            logger.error(f"获取监听对象会话ID时出错: {e}")
+            logger.exception(e)
+            # 继续处理消息，不中断流程
+
+    async def _handle_delivery_result(self, message: Dict[str, Any], rule: Dict[str, Any],
+                                      platform, delivery_result: Dict[str, Any]) -> bool:
+        """
+        处理平台返回的投递结果：更新投递状态、发送回复并标记消息为已处理
 
-                # 发送回复
-                logger.debug(f"🚀 步骤5: 开始发送回复到微信，消息ID: {message_id}")
-                logger.info(f"开始发送回复到微信: ID={message_id}, 实例={message['instance_id']}, 聊天={message['chat_name']}")
+        Args:
+            message: 消息数据
+            rule: 匹配的投递规则
+            platform: 服务平台实例
+            delivery_result: 平台处理结果
+
+        Returns:
+            bool: 是否处理成功
+        """
+        message_id = message['message_id']
 
-                logger.debug(f"🔄 调用send_reply方法: {message_id}")
-                reply_success = await self.send_reply(message, reply_content)
-                logger.debug(f"📊 send_reply返回结果: {reply_success}, 消息ID: {message_id}")
+        # 记录投递完成，开始后续处理
+        logger.debug(f"平台处理完成，开始后续处理: {message_id}")
 
-                logger.debug(f"🔍 检查回复发送结果: {reply_success}, 消息ID: {message_id}")
-                if reply_success:
-                    # 标记为已回复
-                    logger.debug(f"🚀 步骤6: 更新回复状态为成功，消息ID: {message_id}")
-                    logger.info(f"回复发送成功: ID={message_id}, 聊天={message['chat_name']}")
+        logger.debug(f"🔍 检查投递结果是否包含错误: {'error' in delivery_result}")
+        if 'error' in delivery_result:
+            file_logger.error(f"投递消息 {message_id} 失败: {delivery_result['error']}")
+            logger.error(f"投递消息 {message_id} 失败: {delivery_result['error']}")
+            # 标记为投递失败，按退避时间重试
+            await self._schedule_retry(message_id, delivery_result['error'])
+            return False
 
-                    logger.debug(f"🔄 调用_update_message_reply_status(成功): {message_id}")
-                    await self._update_message_reply_status(message_id, 1, reply_content)
-                    logger.debug(f"✅ 回复状态更新完成(成功): {message_id}")
-                else:
-                    # 标记为回复失败
-                    logger.debug(f"🚀 步骤6: 更新回复状态为失败，消息ID: {message_id}")
-                    logger.error(f"回复发送失败: ID={message_id}, 聊天={message['chat_name']}")
-
-                    logger.debug(f"🔄 调用_update_message_reply_status(失败): {message_id}")
-                    await self._update_message_reply_status(message_id, 2, reply_content)
-                    logger.debug(f"✅ 回复状态更新完成(失败): {message_id}")
-            elif not should_reply:
-                # 平台建议不发送回复（如"信息与记账无关"）
-                logger.info(f"平台建议不发送回复: ID={message_id}, 实例={message['instance_id']}, 聊天={message['chat_name']}")
-                # 标记为不需要回复（使用状态0表示不需要回复）
-                await self._update_message_reply_status(message_id, 0, reply_content or "不需要回复")
+        # 标记为已投递
+        file_logger.info(f"消息 {message_id} 投递成功，标记为已投递")
+        # 使用特殊格式的日志，确保能被UI识别
+        logger.info(f"【转发消息到{platform.name}平台成功】: ID={message_id}, 实例={message.get('instance_id')}, 聊天={message.get('chat_name')}")
+
+        # 更新投递状态为已投递(1)
+        logger.debug(f"🔄 开始更新消息 {message_id} 的投递状态为已投递(1)")
+        update_result = await self._update_message_delivery_status(
+            message_id, 1, rule['platform_id']
+        )
+        if update_result:
+            logger.debug(f"✅ 消息 {message_id} 投递状态更新成功")
+        else:
+            logger.error(f"❌ 消息 {message_id} 投递状态更新失败")
+            # 即使状态更新失败，也继续处理回复
+            file_logger.error(f"消息 {message_id} 投递状态更新失败，但继续处理回复")
+
+        # 发送回复 - 记录详细信息
+        logger.debug(f"🔄 步骤4: 开始处理回复发送，消息ID: {message_id}")
+
+        # 检查平台是否建议发送回复
+        should_reply = delivery_result.get('should_reply', True)  # 默认发送回复
+        reply_content = delivery_result.get('content', '') or delivery_result.get('reply_content', '')
+
+        # 添加调试日志，帮助诊断问题
+        logger.debug(f"🔍 回复检查: should_reply={should_reply}, reply_content长度={len(reply_content) if reply_content else 0}")
+        logger.debug(f"🔍 delivery_result keys: {list(delivery_result.keys())}")
+        if 'content' in delivery_result:
+            logger.debug(f"🔍 delivery_result['content']: {delivery_result['content'][:100] if delivery_result['content'] else 'None/Empty'}")
+
+        if should_reply and reply_content:
+            logger.debug(f"✅ 满足回复条件，准备发送回复: {message_id}")
+            # 记录详细的回复信息
+            logger.info(f"准备发送回复: ID={message_id}, 实例={message['instance_id']}, 聊天={message['chat_name']}, 内容长度={len(reply_content)}")
+            logger.debug(f"回复内容摘要: {reply_content[:100]}{'...' if len(reply_content) > 100 else ''}")
+
+            # 记录完整回复内容到调试日志
+            logger.debug(f"完整回复内容: {reply_content}")
+
+            # 检查是否有会话ID
+            if 'conversation_id' in delivery_result:
+                logger.info(f"回复使用会话ID: {delivery_result['conversation_id']}, 消息ID={message_id}")
+
+                # 更新监听对象的会话ID（内存立即生效，数据库批量写回）
+                try:
+                    from wxauto_mgt.core.message_listener import message_listener
+                    message_listener.set_conversation_id(
+                        message['instance_id'], message['chat_name'], delivery_result['conversation_id']
+                    )
+                    logger.info(f"已更新监听对象的会话ID: {message['instance_id']} - {message['chat_name']} - {delivery_result['conversation_id']}")
+                except Exception as e:
+                    logger.error(f"更新会话ID时出错: {e}")
+
+            # 发送回复
+            logger.debug(f"🚀 步骤5: 开始发送回复到微信，消息ID: {message_id}")
+            logger.info(f"开始发送回复到微信: ID={message_id}, 实例={message['instance_id']}, 聊天={message['chat_name']}")
+
+            logger.debug(f"🔄 调用send_reply方法: {message_id}")
+            reply_success = await self.send_reply(message, reply_content)
+            message_tracer.mark(message_id, 'reply')
+            logger.debug(f"📊 send_reply返回结果: {reply_success}, 消息ID: {message_id}")
+
+            logger.debug(f"🔍 检查回复发送结果: {reply_success}, 消息ID: {message_id}")
+            if reply_success:
+                # 标记为已回复
+                logger.debug(f"🚀 步骤6: 更新回复状态为成功，消息ID: {message_id}")
+                logger.info(f"回复发送成功: ID={message_id}, 聊天={message['chat_name']}")
+
+                logger.debug(f"🔄 调用_update_message_reply_status(成功): {message_id}")
+                await self._update_message_reply_status(message_id, 1, reply_content)
+                logger.debug(f"✅ 回复状态更新完成(成功): {message_id}")
             else:
-                # 记录警告日志
-                logger.warning(f"平台没有返回回复内容: ID={message_id}, 实例={message['instance_id']}, 聊天={message['chat_name']}")
                 # 标记为回复失败
-                await self._update_message_reply_status(message_id, 2, '')
+                logger.debug(f"🚀 步骤6: 更新回复状态为失败，消息ID: {message_id}")
+                logger.error(f"回复发送失败: ID={message_id}, 聊天={message['chat_name']}")
+
+                logger.debug(f"🔄 调用_update_message_reply_status(失败): {message_id}")
+                await self._update_message_reply_status(message_id, 2, reply_content)
+                logger.debug(f"✅ 回复状态更新完成(失败): {message_id}")
+        elif not should_reply:
+            # 平台建议不发送回复（如"信息与记账无关"）
+            logger.info(f"平台建议不发送回复: ID={message_id}, 实例={message['instance_id']}, 聊天={message['chat_name']}")
+            # 标记为不需要回复（使用状态0表示不需要回复）
+            await self._update_message_reply_status(message_id, 0, reply_content or "不需要回复")
+        else:
+            # 记录警告日志
+            logger.warning(f"平台没有返回回复内容: ID={message_id}, 实例={message['instance_id']}, 聊天={message['chat_name']}")
+            # 标记为回复失败
+            await self._update_message_reply_status(message_id, 2, '')
+
+        # 标记消息为已处理
+        logger.debug(f"🚀 步骤7: 标记消息为已处理，消息ID: {message_id}")
+        logger.debug(f"🔄 调用_mark_as_processed: {message_id}")
+        await self._mark_as_processed(message)
+        message_tracer.mark(message_id, 'status')
+        message_tracer.finish(message_id, "ok")
+        logger.debug(f"✅ 消息已标记为已处理: {message_id}")
+
+        # 记录端到端延迟
+        create_time = message.get('create_time')
+        if create_time:
+            self._latency_samples.append(max(0.0, time.time() - create_time))
+
+        # 只记录处理完成的关键信息
+        logger.info(f"🎉 消息 {message_id} 处理完成")
+        logger.debug(f"🏁 process_message方法即将返回True: {message_id}")
+        return True
+
+    def get_latency_stats(self) -> Dict[str, Any]:
+        """
+        获取最近处理完成的消息的端到端延迟统计
 
-            # 标记消息为已处理
-            logger.debug(f"🚀 步骤7: 标记消息为已处理，消息ID: {message_id}")
-            logger.debug(f"🔄 调用_mark_as_processed: {message_id}")
-            await self._mark_as_processed(message)
-            logger.debug(f"✅ 消息已标记为已处理: {message_id}")
+        延迟从消息保存到数据库开始计算（create_time精度为秒），到回复发送并标记为已处理为止。
 
-            # 只记录处理完成的关键信息
-            logger.info(f"🎉 消息 {message_id} 处理完成")
-            logger.debug(f"🏁 process_message方法即将返回True: {message_id}")
-            return True
-        except Exception as e:
-            logger.error(f"❌ 处理消息 {message_id} 时出错: {e}")
-            logger.error(f"❌ 异常类型: {type(e).__name__}")
-            import traceback
-            logger.error(f"❌ 异常堆栈: {traceback.format_exc()}")
-            # 标记为投递失败
-            await self._update_message_delivery_status(message_id, 2)
-            return False
-        finally:
-            # 从正在处理的集合中移除
-            self._processing_messages.discard(message_id)
+        Returns:
+            Dict[str, Any]: 样本数、平均值、P50、P95和最大值（秒）
+        """
+        samples = sorted(self._latency_samples)
+        if not samples:
+            return {'count': 0, 'avg': 0.0, 'p50': 0.0, 'p95': 0.0, 'max': 0.0}
+
+        def percentile(ratio: float) -> float:
+            return round(samples[min(len(samples) - 1, int(len(samples) * ratio))], 3)
+
+        return {
+            'count': len(samples),
+            'avg': round(sum(samples) / len(samples), 3),
+            'p50': percentile(0.5),
+            'p95': percentile(0.95),
+            'max': round(samples[-1], 3)
+        }
+
+    def get_memory_stats(self) -> Dict[str, Any]:
+        """
+        获取正在处理的消息记录的内存占用统计
+
+        Returns:
+            Dict[str, Any]: 正在处理的消息数、总字节数和平均每条消息的字节数
+        """
+        sizes = [
+            message.memory_size() if isinstance(message, MessageRecord) else sys.getsizeof(message)
+            for message in self._inflight_messages.values()
+        ]
+        return {
+            'inflight': len(sizes),
+            'total_bytes': sum(sizes),
+            'avg_bytes': round(sum(sizes) / len(sizes)) if sizes else 0
+        }
 
     async def _handle_timeout(self, message_id: str):
         """处理消息处理超时"""
         try:
             logger.error(f"⏰ 处理消息超时，开始清理: {message_id}")
 
-            # 重置消息状态为未投递
-            await self._update_message_delivery_status(message_id, 0)
+            # 重置消息状态为未投递，按退避时间重试
+            await self._schedule_retry(message_id, "处理超时", status=0)
             logger.info(f"✅ 已重置超时消息状态: {message_id}")
 
             # 从正在处理的集合中移除
             self._processing_messages.discard(message_id)
+            self._inflight_messages.pop(message_id, None)
 
         except Exception as e:
             logger.error(f"❌ 处理超时清理时出错: {message_id}, 错误: {e}")
@@ -766,12 +1276,13 @@ class MessageDeliveryService:
         try:
             logger.error(f"💥 处理消息异常，开始清理: {message_id}, 异常: {exception}")
 
-            # 标记为投递失败
-            await self._update_message_delivery_status(message_id, 2)
+            # 标记为投递失败，按退避时间重试
+            await self._schedule_retry(message_id, str(exception))
             logger.info(f"✅ 已标记异常消息为失败: {message_id}")
 
             # 从正在处理的集合中移除
             self._processing_messages.discard(message_id)
+            self._inflight_messages.pop(message_id, None)
 
         except Exception as e:
             logger.error(f"❌ 处理异常清理时出错: {message_id}, 错误: {e}")
@@ -807,6 +1318,7 @@ class MessageDeliveryService:
 
                     # 从正在处理的集合中移除
                     self._processing_messages.discard(message_id)
+                    self._inflight_messages.pop(message_id, None)
 
                     logger.info(f"✅ 已恢复卡住的消息: {message_id}")
 
@@ -849,66 +1361,13 @@ class MessageDeliveryService:
             content = message.get('content', '')
             message_id = message.get('message_id', 'unknown')
 
-            # 创建消息的副本，避免修改原始消息
-            processed_message = message.copy()
-
-            # 检查是否是合并消息，如果是，尝试查找相关的图片消息
-            if message.get('merged', 0) == 1 and message.get('merged_ids'):
-                file_logger.info(f"检测到合并消息: {message_id}, 合并数量: {message.get('merged_count', 0)}")
-
-                try:
-                    # 解析合并的消息ID
-                    import json
-                    merged_ids = json.loads(message.get('merged_ids', '[]'))
-                    file_logger.debug(f"合并的消息ID: {merged_ids}")
-
-                    # 查询数据库，获取合并的消息详情
-                    from wxauto_mgt.data.db_manager import db_manager
-
-                    # 查找图片或文件类型的消息
-                    for merged_id in merged_ids:
-                        file_logger.debug(f"查询合并消息: {merged_id}")
-                        merged_messages = await db_manager.fetchall(
-                            "SELECT * FROM messages WHERE message_id = ?",
-                            (merged_id,)
-                        )
+            # 创建消息的副本并完成通用预处理（合并消息附件、卡片/语音前缀）
+            processed_message = await self._prepare_message(message)
 
-                        if merged_messages:
-                            merged_message = merged_messages[0]
-                            merged_mtype = merged_message.get('mtype', '')
-
-                            file_logger.debug(f"合并消息详情: {merged_message}")
-
-                            # 如果找到图片或文件类型的消息
-                            if merged_mtype in ['image', 'file'] and 'local_file_path' in merged_message:
-                                file_logger.info(f"在合并消息中找到图片/文件: {merged_id}, 类型: {merged_mtype}")
-
-                                # 将图片/文件信息添加到处理消息中
-                                processed_message['file_type'] = merged_mtype
-                                processed_message['local_file_path'] = merged_message.get('local_file_path')
-                                processed_message['original_file_path'] = merged_message.get('original_file_path')
-                                processed_message['file_size'] = merged_message.get('file_size')
-
-                                file_logger.info(f"从合并消息中提取文件信息: {processed_message.get('local_file_path')}")
-                                break
-                except Exception as e:
-                    file_logger.error(f"处理合并消息时出错: {e}")
-                    file_logger.exception(e)
-
-            # 处理卡片类型消息
-            if mtype == 'card':
-                # 移除[wxauto卡片链接解析]前缀
-                processed_message['content'] = content.replace('[wxauto卡片链接解析]', '').strip()
-                logger.info(f"投递前处理卡片消息: {message_id}, 移除前缀")
-
-            # 处理语音类型消息
-            elif mtype == 'voice':
-                # 移除[wxauto语音解析]前缀
-                processed_message['content'] = content.replace('[wxauto语音解析]', '').strip()
-                logger.info(f"投递前处理语音消息: {message_id}, 移除前缀")
-
-            # 处理图片或文件类型消息
-            elif mtype in ['image', 'file'] or message.get('file_type') in ['image', 'file'] or processed_message.get('file_type') in ['image', 'file']:
+            # 处理图片或文件类型消息（合并消息的图片和文件由平台按附件列表处理）
+            if mtype not in ('card', 'voice') and not processed_message.get('attachments') and (
+                    mtype in ['image', 'file'] or message.get('file_type') in ['image', 'file']
+                    or processed_message.get('file_type') in ['image', 'file']):
                 # 确保文件类型信息存在
                 if 'file_type' not in processed_message and mtype in ['image', 'file']:
                     processed_message['file_type'] = mtype
@@ -1201,12 +1660,14 @@ class MessageDeliveryService:
             try:
                 dify_debug_logger.info("开始调用platform.process_message...")
                 print(f"[DEBUG] 开始调用platform.process_message...")
-                result = await platform.process_message(processed_message)
+                with platform_call_seconds.time(platform_type=platform.get_type()):
+                    result = await platform.process_message(processed_message)
                 dify_debug_logger.info(f"平台处理消息完成: {message_id}")
                 dify_debug_logger.info(f"处理结果: {result}")
                 print(f"[DEBUG] 平台处理消息完成: {message_id}")
                 print(f"[DEBUG] 处理结果: {result}")
             except Exception as e:
+                platform_call_errors.inc(platform_type=platform.get_type())
                 dify_debug_logger.error(f"调用platform.process_message时出错: {e}")
                 print(f"[ERROR] 调用platform.process_message时出错: {e}")
                 import traceback
@@ -1219,14 +1680,7 @@ class MessageDeliveryService:
             file_logger.debug(f"处理结果: {result}")
 
             # 检查是否有错误信息
-            if 'error' in result and '404' in result.get('error', '') and 'Conversation Not Exists' in result.get('error', ''):
-                # 处理404错误，清除无效的会话ID
-                instance_id = message.get('instance_id')
-                chat_name = message.get('chat_name')
-                if instance_id and chat_name:
-                    file_logger.warning(f"检测到会话ID不存在错误，清除监听对象的会话ID: {instance_id} - {chat_name}")
-                    logger.warning(f"检测到会话ID不存在错误，清除监听对象的会话ID: {instance_id} - {chat_name}")
-                    await self._clear_invalid_conversation_id(instance_id, chat_name)
+            await self._check_platform_result(message, result)
 
             # 检查是否返回了新的会话ID - 仅记录日志，不进行实际更新
             if 'conversation_id' in result:
@@ -1308,15 +1762,17 @@ class MessageDeliveryService:
                 logger.info(f"完整的消息数据: {message}")
 
             # 使用消息发送器发送回复
-            result, error_msg = await message_sender.send_message(
-                message['instance_id'],
-                message['chat_name'],
-                reply_content,
-                message_send_mode,
-                at_list
-            )
+            with reply_send_seconds.time():
+                result, error_msg = await message_sender.send_message(
+                    message['instance_id'],
+                    message['chat_name'],
+                    reply_content,
+                    message_send_mode,
+                    at_list
+                )
 
             if not result:
+                reply_send_errors.inc()
                 logger.error(f"发送回复失败: {error_msg}")
                 file_logger.error(f"发送回复失败: {error_msg}")
                 return False
@@ -1344,11 +1800,11 @@ class MessageDeliveryService:
             # 如果是合并消息，标记所有合并的消息为已处理
             if message.get('merged', 0) == 1 and message.get('merged_ids'):
                 merged_ids = json.loads(message['merged_ids'])
-                for msg_id in merged_ids:
-                    await db_manager.execute(
-                        "UPDATE messages SET processed = 1 WHERE message_id = ?",
-                        (msg_id,)
-                    )
+                placeholders = ','.join(['?' for _ in merged_ids])
+                await db_manager.execute(
+                    f"UPDATE messages SET processed = 1 WHERE message_id IN ({placeholders})",
+                    tuple(merged_ids)
+                )
                 return True
             else:
                 # 标记单条消息为已处理
@@ -1381,11 +1837,11 @@ class MessageDeliveryService:
             if message.get('merged', 0) == 1 and message.get('merged_ids'):
                 try:
                     merged_ids = json.loads(message['merged_ids'])
-                    for msg_id in merged_ids:
-                        await db_manager.execute(
-                            "DELETE FROM messages WHERE message_id = ?",
-                            (msg_id,)
-                        )
+                    placeholders = ','.join(['?' for _ in merged_ids])
+                    await db_manager.execute(
+                        f"DELETE FROM messages WHERE message_id IN ({placeholders})",
+                        tuple(merged_ids)
+                    )
                     file_logger.info(f"已删除合并消息: {message_id}，包含 {len(merged_ids)} 条子消息")
                     logger.info(f"已删除合并消息: {message_id}，包含 {len(merged_ids)} 条子消息")
                 except Exception as e:
@@ -1451,6 +1907,8 @@ class MessageDeliveryService:
 
                 await db_manager.execute(sql, params)
 
+            domain_events.publish(DomainEventType.DELIVERY_STATUS_CHANGED, message_id=message_id, status=status)
+
             # 验证更新是否成功
             check_sql = "SELECT delivery_status FROM messages WHERE message_id = ?"
             result = await db_manager.fetchone(check_sql, (message_id,))
@@ -1472,6 +1930,75 @@ class MessageDeliveryService:
             logger.error(f"错误堆栈: {traceback.format_exc()}")
             return False
 
+    async def _schedule_retry(self, message_id: str, reason: str, status: int = 2) -> bool:
+        """
+        记录一次投递失败：增加重试次数并按指数退避设置下次重试时间
+
+        重试次数达到上限后消息不再被轮询，需人工处理。
+
+        Args:
+            message_id: 消息ID
+            reason: 失败原因
+            status: 更新后的投递状态（默认2投递失败）
+
+        Returns:
+            bool: 是否更新成功
+        """
+        try:
+            row = await db_manager.fetchone(
+                "SELECT retry_count FROM messages WHERE message_id = ?",
+                (message_id,)
+            )
+            if not row:
+                logger.error(f"❌ 消息 {message_id} 不存在，无法记录重试")
+                return False
+
+            retry_count = (row.get('retry_count') or 0) + 1
+            delay = min(self.retry_base_delay * (2 ** (retry_count - 1)), self.retry_max_delay)
+            now = int(time.time())
+
+            await db_manager.execute(
+                """
+                UPDATE messages
+                SET delivery_status = ?, delivery_time = ?, retry_count = ?, next_retry_time = ?
+                WHERE message_id = ?
+                """,
+                (status, now, retry_count, now + delay, message_id)
+            )
+            domain_events.publish(DomainEventType.DELIVERY_STATUS_CHANGED, message_id=message_id, status=status)
+
+            if retry_count >= self.max_retries:
+                logger.error(f"消息 {message_id} 投递失败 {retry_count} 次，已达重试上限，停止投递: {reason}")
+            else:
+                logger.warning(f"消息 {message_id} 第 {retry_count} 次投递失败，{delay} 秒后重试: {reason}")
+            return True
+        except Exception as e:
+            logger.error(f"❌ 记录消息重试失败: {e}")
+            return False
+
+    async def _defer_message(self, message_id: str, retry_at: float) -> bool:
+        """
+        推迟消息投递（不计入重试次数），用于服务平台熔断期间
+
+        Args:
+            message_id: 消息ID
+            retry_at: 允许再次投递的时间戳
+
+        Returns:
+            bool: 是否更新成功
+        """
+        message_tracer.finish(message_id, "deferred")
+        try:
+            await db_manager.execute(
+                "UPDATE messages SET delivery_status = 0, next_retry_time = ? WHERE message_id = ?",
+                (int(retry_at) + 1, message_id)
+            )
+            domain_events.publish(DomainEventType.DELIVERY_STATUS_CHANGED, message_id=message_id, status=0)
+            return True
+        except Exception as e:
+            logger.error(f"❌ 推迟消息投递失败: {e}")
+            return False
+
     async def _update_message_reply_status(self, message_id: str, status: int,
                                           reply_content: str) -> bool:
         """
@@ -1518,11 +2045,7 @@ class MessageDeliveryService:
             from wxauto_mgt.core.message_listener import message_listener
 
             # 清除监听对象的会话ID（设置为空字符串）
-            await message_listener.add_listener(
-                instance_id,
-                chat_name,
-                conversation_id=""  # 清空会话ID
-            )
+            message_listener.set_conversation_id(instance_id, chat_name, "")
 
             file_logger.info(f"已清除监听对象的无效会话ID: {instance_id} - {chat_name}")
             logger.info(f"已清除监听对象的无效会话ID: {instance_id} - {chat_name}")
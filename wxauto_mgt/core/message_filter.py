@@ -120,10 +120,11 @@ class MessageFilter:
         logger.debug(f"{log_prefix}检查消息: ID={message_id}, 原始发送者={original_sender}, 小写={sender}, 原始类型={original_type}, 小写={msg_type}")
         logger.debug(f"{log_prefix}消息内容: {content[:100]}")
 
-        try:
-            logger.debug(f"{log_prefix}完整消息数据: {json.dumps(message, ensure_ascii=False)}")
-        except Exception as e:
-            logger.debug(f"{log_prefix}完整消息数据(无法序列化): {str(message)}")
+        if logger.isEnabledFor(logging.DEBUG):
+            try:
+                logger.debug(f"{log_prefix}完整消息数据: {json.dumps(dict(message), ensure_ascii=False)}")
+            except Exception as e:
+                logger.debug(f"{log_prefix}完整消息数据(无法序列化): {str(message)}")
 
         # 1. 检查发送者是否为Self或SYS（不区分大小写）
         is_self_sender = sender == 'self' or original_sender == 'Self'
@@ -13,15 +13,22 @@ import asyncio
 import logging
 import time
 import json
-from typing import Dict, List, Optional, Set
+from typing import Dict, List, Optional, Set, Tuple
 from dataclasses import dataclass
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
 from collections import defaultdict
 
 from wxauto_mgt.core.api_client import instance_manager
 from wxauto_mgt.data.db_manager import db_manager
 from wxauto_mgt.core.config_notifier import config_notifier, ConfigChangeEvent
+from wxauto_mgt.core.domain_events import domain_events, DomainEvent, DomainEventType
+from wxauto_mgt.core.message_record import MessageRecord
+from wxauto_mgt.core.message_trace import message_tracer
 from wxauto_mgt.core.service_monitor import service_monitor
+from wxauto_mgt.core.poll_scheduler import AdaptivePollScheduler
+from wxauto_mgt.utils.startup_profiler import startup_profiler
+from wxauto_mgt.utils.metrics_registry import metrics_registry, listener_poll_seconds
 
 # 配置日志 - 使用主日志记录器，确保所有日志都记录到主日志文件
 logger = logging.getLogger('wxauto_mgt')
@@ -77,12 +84,50 @@ class MessageListener:
         self._pause_event = asyncio.Event()
         self._pause_event.set()  # 初始状态为未暂停
 
+        # 按实例的收发仲裁：发送消息时只暂停对应实例的轮询，其它实例照常收消息
+        self._instance_pause_counts: Dict[str, int] = {}  # instance_id -> 暂停引用计数
+        self._instance_fetch_idle: Dict[str, asyncio.Event] = {}  # instance_id -> 无进行中的拉取
+
         # 启动时间戳，用于提供宽限期
         self.startup_timestamp = 0
 
         # 配置变更监听标志
         self._config_listeners_registered = False
 
+        # 自适应轮询调度：活跃实例按poll_interval轮询，空闲实例指数退避
+        self._poll_scheduler = AdaptivePollScheduler(min_interval=self._poll_interval)
+
+        # 连接状态监控
+        self._instance_connection_states = {}  # 实例连接状态跟踪 {instance_id: {"connected": bool, "last_check": float}}
+        self._connection_monitor_task = None  # 连接监控任务
+        self._connection_check_interval = 30  # 连接检查间隔（秒）
+
+        # 监听对象批量重新注册：每个实例的最大并发请求数，以及各实例最近一次重新注册的进度
+        self.reregister_concurrency = 5
+        self._reregistration_progress: Dict[str, Dict] = {}
+
+        # ListenerInfo是监听对象元数据的权威缓存，时间戳和会话ID的变化合并后批量写回数据库
+        self.listener_flush_interval = 2  # 批量写回间隔（秒）
+        self._pending_listener_writes: Dict[Tuple[str, str], Dict] = {}
+        self._listener_flush_task: Optional[asyncio.Task] = None
+
+        # get_all_listeners_from_db 使用的数据库记录缓存（含非活跃对象），监听对象增删时失效
+        self.listener_rows_ttl = 60
+        self._listener_rows: Optional[List[Dict]] = None
+        self._listener_rows_loaded_at = 0.0
+
+        # 导出到指标注册表的队列深度
+        metrics_registry.gauge("listener_active", "内存中的监听对象数量").set_function(
+            lambda: sum(len(listeners) for listeners in self.listeners.values()))
+        metrics_registry.gauge("listener_pending_writes", "等待批量写回数据库的监听对象数量").set_function(
+            lambda: len(self._pending_listener_writes))
+        metrics_registry.gauge("listener_polls_performed", "自适应轮询实际执行的轮询次数").set_function(
+            lambda: self._poll_scheduler.get_stats()['polls_performed'])
+        metrics_registry.gauge("listener_polls_saved", "相对固定间隔轮询节省的轮询次数").set_function(
+            lambda: self._poll_scheduler.get_stats()['polls_saved'])
+        metrics_registry.gauge("listener_poll_added_latency_seconds", "轮询退避导致的平均增加延迟（秒）").set_function(
+            lambda: self._poll_scheduler.get_stats()['avg_added_latency'])
+
     @property
     def poll_interval(self) -> int:
         """获取轮询间隔"""
@@ -95,12 +140,40 @@ class MessageListener:
             logger.warning(f"轮询间隔 {value} 秒小于最小值5秒，已自动调整为5秒")
             value = 5
         self._poll_interval = value
+        self._poll_scheduler.set_min_interval(value)
         logger.debug(f"轮询间隔已设置为 {value} 秒")
 
-        # 连接状态监控
-        self._instance_connection_states = {}  # 实例连接状态跟踪 {instance_id: {"connected": bool, "last_check": float}}
-        self._connection_monitor_task = None  # 连接监控任务
-        self._connection_check_interval = 30  # 连接检查间隔（秒）
+    def get_poll_stats(self) -> Dict:
+        """
+        获取自适应轮询统计信息
+
+        Returns:
+            Dict: 执行/节省的轮询次数、平均增加延迟和各实例当前轮询间隔
+        """
+        return self._poll_scheduler.get_stats()
+
+    def get_reregistration_progress(self) -> Dict[str, Dict]:
+        """
+        获取各实例最近一次批量重新注册监听对象的进度
+
+        Returns:
+            Dict: instance_id -> 原因、总数、已完成/成功/失败数量、开始/结束时间和耗时
+        """
+        return {instance_id: dict(progress) for instance_id, progress in self._reregistration_progress.items()}
+
+    def _on_instance_status_changed(self, event: DomainEvent):
+        """实例被移除后不再轮询，清理其调度状态"""
+        if event.data.get('status') == 'removed':
+            self._poll_scheduler.forget(event.data.get('instance_id', ''))
+
+    def mark_instance_active(self, instance_id: str):
+        """
+        标记实例有活动，使其轮询立即回到最小间隔
+
+        Args:
+            instance_id: 实例ID
+        """
+        self._poll_scheduler.mark_active(instance_id)
 
     async def start(self):
         """启动监听服务"""
@@ -116,28 +189,21 @@ class MessageListener:
         self.running = True
         logger.info("启动消息监听服务")
 
-        # 从数据库加载监听对象
-        await self._load_listeners_from_db()
-
-        # 加载固定监听配置并自动添加到监听列表
-        logger.info("🔧 准备加载固定监听配置...")
-        await self._load_and_apply_fixed_listeners()
-        logger.info("🔧 固定监听配置加载完成")
+        # 从数据库加载监听对象（只读数据库，重新注册到实例API在后台执行）
+        await self._load_listeners_from_db(reapply=False)
 
-        # 加载完成后，暂时锁定超时处理
-        # 设置一个标志，防止UI线程同时处理超时对象
+        # 监听对象的重新注册、固定监听配置的应用和重新校验需要逐个调用实例API，放到后台执行，
+        # 避免阻塞启动；校验完成前保持启动锁定，防止UI同时处理超时对象
         self._starting_up = True
-        try:
-            # 在启动时手动检查并刷新可能超时的监听对象
-            logger.info("启动时检查所有监听对象...")
-            await self._refresh_all_listeners()
-        finally:
-            # 处理完成后，释放锁
-            self._starting_up = False
+        startup_task = asyncio.create_task(self._revalidate_listeners_on_startup())
+        self._tasks.add(startup_task)
 
         # 注册配置变更监听器
         await self._register_config_listeners()
 
+        # 实例被移除时清理其轮询调度状态
+        domain_events.subscribe(DomainEventType.INSTANCE_STATUS_CHANGED, self._on_instance_status_changed)
+
         # 创建主要任务
         main_window_task = asyncio.create_task(self._main_window_check_loop())
         listeners_task = asyncio.create_task(self._listeners_check_loop())
@@ -156,6 +222,7 @@ class MessageListener:
 
         # 注销配置变更监听器
         await self._unregister_config_listeners()
+        domain_events.unsubscribe(DomainEventType.INSTANCE_STATUS_CHANGED, self._on_instance_status_changed)
 
         # 取消所有任务
         for task in self._tasks:
@@ -165,6 +232,9 @@ class MessageListener:
         await asyncio.gather(*self._tasks, return_exceptions=True)
         self._tasks.clear()
 
+        # 写回尚未保存的时间戳和会话ID
+        await self.flush_listener_writes()
+
         # 清理连接状态
         self._instance_connection_states.clear()
 
@@ -186,6 +256,57 @@ class MessageListener:
                 self._paused = False
                 self._pause_event.set()
 
+    async def pause_instance(self, instance_id: str, wait_timeout: float = 5.0):
+        """
+        暂停指定实例的消息轮询（不影响其它实例）
+
+        会等待该实例正在进行的消息拉取请求完成，避免UI自动化操作与拉取冲突。
+
+        Args:
+            instance_id: 实例ID
+            wait_timeout: 等待进行中拉取完成的最长时间（秒）
+        """
+        self._instance_pause_counts[instance_id] = self._instance_pause_counts.get(instance_id, 0) + 1
+        logger.debug(f"暂停实例 {instance_id} 的消息轮询")
+
+        idle_event = self._instance_fetch_idle.get(instance_id)
+        if idle_event and not idle_event.is_set():
+            try:
+                await asyncio.wait_for(idle_event.wait(), timeout=wait_timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"等待实例 {instance_id} 进行中的消息拉取超时，继续执行")
+
+    async def resume_instance(self, instance_id: str):
+        """
+        恢复指定实例的消息轮询
+
+        Args:
+            instance_id: 实例ID
+        """
+        count = self._instance_pause_counts.get(instance_id, 0)
+        if count <= 1:
+            self._instance_pause_counts.pop(instance_id, None)
+            logger.debug(f"恢复实例 {instance_id} 的消息轮询")
+        else:
+            self._instance_pause_counts[instance_id] = count - 1
+
+    def is_instance_paused(self, instance_id: str) -> bool:
+        """检查指定实例的消息轮询是否被暂停"""
+        return self._instance_pause_counts.get(instance_id, 0) > 0
+
+    @asynccontextmanager
+    async def _instance_fetch(self, instance_id: str):
+        """标记指定实例正在拉取消息，供发送方等待拉取结束"""
+        idle_event = self._instance_fetch_idle.get(instance_id)
+        if idle_event is None:
+            idle_event = asyncio.Event()
+            self._instance_fetch_idle[instance_id] = idle_event
+        idle_event.clear()
+        try:
+            yield
+        finally:
+            idle_event.set()
+
     async def _internal_pause_listening(self):
         """内部暂停监听（不影响用户设置的暂停状态）"""
         # 这个方法用于内部操作时的临时暂停，不会改变用户设置的暂停状态
@@ -216,16 +337,27 @@ class MessageListener:
                     # 再次检查是否暂停（每个实例处理前）
                     await self.wait_if_paused()
 
+                    # 该实例正在发送消息时跳过本轮，不阻塞其它实例
+                    if self.is_instance_paused(instance_id):
+                        logger.debug(f"实例 {instance_id} 正在发送消息，跳过本次主窗口检查")
+                        continue
+
+                    # 未到该实例的轮询时间（空闲实例已退避）
+                    if not self._poll_scheduler.is_due('main_window', instance_id):
+                        continue
+
                     # 检查API客户端连接状态
                     if not await self._check_api_client_health(instance_id, api_client):
                         logger.warning(f"实例 {instance_id} API客户端连接异常，跳过本次检查")
                         continue
 
-                    await self.check_main_window_messages(instance_id, api_client)
+                    with listener_poll_seconds.time(kind="main_window"):
+                        had_messages = await self.check_main_window_messages(instance_id, api_client)
+                    self._poll_scheduler.record_poll('main_window', instance_id, bool(had_messages))
 
                 # 重置错误计数
                 consecutive_errors = 0
-                await asyncio.sleep(self.poll_interval)
+                await asyncio.sleep(self._poll_scheduler.seconds_until_next_due('main_window', instances.keys()))
 
             except asyncio.CancelledError:
                 logger.info("主窗口检查循环被取消")
@@ -261,16 +393,27 @@ class MessageListener:
                     # 再次检查是否暂停（每个实例处理前）
                     await self.wait_if_paused()
 
+                    # 该实例正在发送消息时跳过本轮，不阻塞其它实例
+                    if self.is_instance_paused(instance_id):
+                        logger.debug(f"实例 {instance_id} 正在发送消息，跳过本次监听对象检查")
+                        continue
+
+                    # 未到该实例的轮询时间（空闲实例已退避）
+                    if not self._poll_scheduler.is_due('listeners', instance_id):
+                        continue
+
                     # 检查API客户端连接状态
                     if not await self._check_api_client_health(instance_id, api_client):
                         logger.warning(f"实例 {instance_id} API客户端连接异常，跳过本次检查")
                         continue
 
-                    await self.check_listener_messages(instance_id, api_client)
+                    with listener_poll_seconds.time(kind="listeners"):
+                        had_messages = await self.check_listener_messages(instance_id, api_client)
+                    self._poll_scheduler.record_poll('listeners', instance_id, bool(had_messages))
 
                 # 重置错误计数
                 consecutive_errors = 0
-                await asyncio.sleep(self.poll_interval)
+                await asyncio.sleep(self._poll_scheduler.seconds_until_next_due('listeners', instances.keys()))
 
             except asyncio.CancelledError:
                 logger.info("监听对象检查循环被取消")
@@ -331,18 +474,24 @@ class MessageListener:
         Args:
             instance_id: 实例ID
             api_client: API客户端实例
+
+        Returns:
+            bool: 是否获取到新消息
         """
         try:
             # 获取主窗口未读消息，设置接收图片、文件、语音信息、URL信息参数为True
-            messages = await api_client.get_unread_messages(
-                save_pic=True,
-                save_video=False,
-                save_file=True,
-                save_voice=True,
-                parse_url=True
-            )
+            fetch_started = time.perf_counter()
+            async with self._instance_fetch(instance_id):
+                messages = await api_client.get_unread_messages(
+                    save_pic=True,
+                    save_video=False,
+                    save_file=True,
+                    save_voice=True,
+                    parse_url=True
+                )
             if not messages:
-                return
+                return False
+            fetched_at = time.perf_counter()
 
             logger.info(f"从实例 {instance_id} 主窗口获取到 {len(messages)} 条未读消息")
 
@@ -354,6 +503,10 @@ class MessageListener:
             for msg in filtered_messages:
                 chat_name = msg.get('chat_name')
                 if chat_name:
+                    trace_id = msg.get('id')
+                    message_tracer.begin(trace_id, instance_id, chat_name, started=fetch_started)
+                    message_tracer.mark(trace_id, 'fetch', at=fetched_at)
+
                     # 在保存前再次检查消息是否应该被过滤
                     # 特别是检查sender是否为self
                     from wxauto_mgt.core.message_filter import message_filter
@@ -362,6 +515,7 @@ class MessageListener:
                     sender = msg.get('sender', '')
                     if sender and (sender.lower() == 'self' or sender == 'Self'):
                         logger.debug(f"过滤掉self发送的主窗口消息: {msg.get('id')}")
+                        message_tracer.discard(trace_id)
                         continue
 
                     # 处理不同类型的消息
@@ -393,8 +547,11 @@ class MessageListener:
                             file_path = match.group(1)
                             logger.info(f"预处理主窗口{mtype}消息: {msg.get('id')}, 提取文件路径: {file_path}")
 
+                    message_tracer.mark(trace_id, 'filter')
+
                     # 处理不同类型的消息
                     processed_msg = await message_processor.process_message(msg, api_client)
+                    message_tracer.mark(trace_id, 'download')
 
                     # 将发送者添加到监听列表 - 这是关键步骤
                     # 设置接收图片、文件、语音信息、URL信息参数为True
@@ -413,28 +570,12 @@ class MessageListener:
                     # 只有成功添加监听对象后，才保存消息到数据库
                     if add_success:
                         # 保存消息到数据库
-                        save_data = {
-                            'instance_id': instance_id,
-                            'chat_name': chat_name,
-                            'message_type': processed_msg.get('type'),
-                            'content': processed_msg.get('content'),
-                            'sender': processed_msg.get('sender'),
-                            'sender_remark': processed_msg.get('sender_remark'),
-                            'message_id': processed_msg.get('id'),
-                            'mtype': processed_msg.get('mtype')
-                        }
-
-                        # 如果是文件或图片，添加本地文件路径和文件类型
-                        if 'local_file_path' in processed_msg:
-                            save_data['local_file_path'] = processed_msg.get('local_file_path')
-                            save_data['file_size'] = processed_msg.get('file_size')
-                            save_data['original_file_path'] = processed_msg.get('original_file_path')
-                            if 'file_type' in processed_msg:
-                                save_data['file_type'] = processed_msg.get('file_type')
+                        save_data = MessageRecord.from_wxauto(instance_id, chat_name, processed_msg)
 
                         # 使用消息过滤模块进行二次检查
                         if message_filter.should_filter_message(save_data, log_prefix="主窗口保存前"):
                             logger.debug(f"消息过滤模块过滤掉主窗口消息: {msg.get('id')}")
+                            message_tracer.discard(trace_id)
                             continue
 
                         logger.debug(f"准备保存主窗口消息: {save_data}")
@@ -442,7 +583,10 @@ class MessageListener:
 
                         # 记录消息处理统计
                         if message_id:
+                            message_tracer.mark(trace_id, 'save')
                             service_monitor.record_message_processed()
+                        else:
+                            message_tracer.discard(trace_id)
 
                         # 直接处理消息投递和回复 - 新增部分
                         if message_id:
@@ -450,36 +594,45 @@ class MessageListener:
                                 # 导入消息投递服务
                                 from wxauto_mgt.core.message_delivery_service import message_delivery_service
 
-                                # 获取保存的消息
-                                from wxauto_mgt.data.db_manager import db_manager
-                                saved_message = await db_manager.fetchone(
-                                    "SELECT * FROM messages WHERE message_id = ?",
-                                    (processed_msg.get('id'),)
-                                )
-
-                                if saved_message:
-                                    # 直接处理消息投递
-                                    logger.info(f"主窗口消息直接投递处理: {processed_msg.get('id')}")
-                                    # 创建异步任务处理消息，并等待处理完成
-                                    try:
-                                        # 直接等待处理完成，确保回复能发送回微信
-                                        delivery_result = await message_delivery_service.process_message(saved_message)
-                                        logger.info(f"主窗口消息投递处理完成: {processed_msg.get('id')}, 结果: {delivery_result}")
-                                    except Exception as delivery_e:
-                                        logger.error(f"主窗口消息投递处理异常: {delivery_e}")
-                                        logger.exception(delivery_e)
+                                if message_delivery_service.merge_messages:
+                                    # 开启消息合并时不逐条投递，由投递服务在合并时间窗口结束后统一投递
+                                    logger.debug(f"消息合并已开启，等待合并投递: {processed_msg.get('id')}")
                                 else:
-                                    logger.error(f"无法找到保存的消息: {processed_msg.get('id')}")
+                                    # 获取保存的消息
+                                    from wxauto_mgt.data.db_manager import db_manager
+                                    saved_message = await db_manager.fetchone(
+                                        "SELECT * FROM messages WHERE message_id = ?",
+                                        (processed_msg.get('id'),),
+                                        row_type=MessageRecord
+                                    )
+
+                                    if saved_message:
+                                        # 直接处理消息投递
+                                        logger.info(f"主窗口消息直接投递处理: {processed_msg.get('id')}")
+                                        # 创建异步任务处理消息，并等待处理完成
+                                        try:
+                                            # 直接等待处理完成，确保回复能发送回微信
+                                            delivery_result = await message_delivery_service.process_message(saved_message)
+                                            logger.info(f"主窗口消息投递处理完成: {processed_msg.get('id')}, 结果: {delivery_result}")
+                                        except Exception as delivery_e:
+                                            logger.error(f"主窗口消息投递处理异常: {delivery_e}")
+                                            logger.exception(delivery_e)
+                                    else:
+                                        logger.error(f"无法找到保存的消息: {processed_msg.get('id')}")
                             except Exception as e:
                                 logger.error(f"主窗口消息投递处理失败: {e}")
                                 logger.exception(e)
                     else:
+                        message_tracer.discard(trace_id)
                         logger.error(f"添加监听对象 {chat_name} 失败，跳过保存消息: {msg.get('id')}")
                         # 不保存消息，因为没有成功添加监听对象
 
+            return True
+
         except Exception as e:
             logger.error(f"处理实例 {instance_id} 主窗口消息时出错: {e}")
             logger.exception(e)
+            return False
 
     async def check_listener_messages(self, instance_id: str, api_client):
         """
@@ -488,19 +641,25 @@ class MessageListener:
         Args:
             instance_id: 实例ID
             api_client: API客户端实例
+
+        Returns:
+            bool: 是否获取到新消息
         """
         async with self._lock:
             if instance_id not in self.listeners:
-                return
+                return False
 
             try:
                 # 获取所有监听对象的新消息
                 logger.debug(f"开始获取实例 {instance_id} 所有监听对象的新消息")
-                all_messages = await api_client.get_all_listener_messages()
+                fetch_started = time.perf_counter()
+                async with self._instance_fetch(instance_id):
+                    all_messages = await api_client.get_all_listener_messages()
+                fetched_at = time.perf_counter()
 
                 if not all_messages:
                     logger.debug(f"实例 {instance_id} 没有任何监听对象的新消息")
-                    return
+                    return False
 
                 # 处理每个监听对象的消息
                 for who, messages in all_messages.items():
@@ -577,6 +736,10 @@ class MessageListener:
 
                         # 保存消息到数据库
                         for msg in filtered_messages:
+                            trace_id = msg.get('id')
+                            message_tracer.begin(trace_id, instance_id, who, started=fetch_started)
+                            message_tracer.mark(trace_id, 'fetch', at=fetched_at)
+
                             # 在保存前再次检查消息是否应该被过滤
                             # 特别是检查sender是否为self
                             from wxauto_mgt.core.message_filter import message_filter
@@ -585,6 +748,7 @@ class MessageListener:
                             sender = msg.get('sender', '')
                             if sender and (sender.lower() == 'self' or sender == 'Self'):
                                 logger.debug(f"过滤掉self发送的消息: {msg.get('id')}")
+                                message_tracer.discard(trace_id)
                                 continue
 
                             # 根据消息类型进行预处理
@@ -617,37 +781,25 @@ class MessageListener:
                             # 处理不同类型的消息
                             from wxauto_mgt.core.message_processor import message_processor
 
+                            message_tracer.mark(trace_id, 'filter')
+
                             # 处理消息内容
                             processed_msg = await message_processor.process_message(msg, api_client)
+                            message_tracer.mark(trace_id, 'download')
 
                             # 保存消息到数据库
-                            save_data = {
-                                'instance_id': instance_id,
-                                'chat_name': who,
-                                'message_type': processed_msg.get('type'),
-                                'content': processed_msg.get('content'),
-                                'sender': processed_msg.get('sender'),
-                                'sender_remark': processed_msg.get('sender_remark'),
-                                'message_id': processed_msg.get('id'),
-                                'mtype': processed_msg.get('mtype')
-                            }
-
-                            # 如果是文件或图片，添加本地文件路径和文件类型
-                            if 'local_file_path' in processed_msg:
-                                save_data['local_file_path'] = processed_msg.get('local_file_path')
-                                save_data['file_size'] = processed_msg.get('file_size')
-                                save_data['original_file_path'] = processed_msg.get('original_file_path')
-                                if 'file_type' in processed_msg:
-                                    save_data['file_type'] = processed_msg.get('file_type')
+                            save_data = MessageRecord.from_wxauto(instance_id, who, processed_msg)
 
                             # 使用消息过滤模块进行二次检查
                             if message_filter.should_filter_message(save_data, log_prefix="监听器保存前"):
                                 logger.debug(f"消息过滤模块过滤掉消息: {msg.get('id')}")
+                                message_tracer.discard(trace_id)
                                 continue
 
                             logger.debug(f"准备保存监听消息: {save_data}")
                             message_id = await self._save_message(save_data)
                             if message_id:
+                                message_tracer.mark(trace_id, 'save')
                                 logger.debug(f"监听消息保存成功，ID: {message_id}")
                                 # 记录消息处理统计
                                 service_monitor.record_message_processed()
@@ -657,28 +809,35 @@ class MessageListener:
                                     # 导入消息投递服务
                                     from wxauto_mgt.core.message_delivery_service import message_delivery_service
 
-                                    # 获取保存的消息
-                                    from wxauto_mgt.data.db_manager import db_manager
-                                    saved_message = await db_manager.fetchone(
-                                        "SELECT * FROM messages WHERE message_id = ?",
-                                        (processed_msg.get('id'),)
-                                    )
-
-                                    if saved_message:
-                                        # 直接处理消息投递
-                                        logger.info(f"监听窗口消息直接投递处理: {processed_msg.get('id')}")
-                                        # 直接等待处理完成，确保回复能发送回微信
-                                        try:
-                                            delivery_result = await message_delivery_service.process_message(saved_message)
-                                            logger.info(f"监听窗口消息投递处理完成: {processed_msg.get('id')}, 结果: {delivery_result}")
-                                        except Exception as delivery_e:
-                                            logger.error(f"监听窗口消息投递处理异常: {delivery_e}")
-                                            logger.exception(delivery_e)
+                                    if message_delivery_service.merge_messages:
+                                        # 开启消息合并时不逐条投递，由投递服务在合并时间窗口结束后统一投递
+                                        logger.debug(f"消息合并已开启，等待合并投递: {processed_msg.get('id')}")
                                     else:
-                                        logger.error(f"无法找到保存的消息: {processed_msg.get('id')}")
+                                        # 获取保存的消息
+                                        from wxauto_mgt.data.db_manager import db_manager
+                                        saved_message = await db_manager.fetchone(
+                                            "SELECT * FROM messages WHERE message_id = ?",
+                                            (processed_msg.get('id'),),
+                                            row_type=MessageRecord
+                                        )
+
+                                        if saved_message:
+                                            # 直接处理消息投递
+                                            logger.info(f"监听窗口消息直接投递处理: {processed_msg.get('id')}")
+                                            # 直接等待处理完成，确保回复能发送回微信
+                                            try:
+                                                delivery_result = await message_delivery_service.process_message(saved_message)
+                                                logger.info(f"监听窗口消息投递处理完成: {processed_msg.get('id')}, 结果: {delivery_result}")
+                                            except Exception as delivery_e:
+                                                logger.error(f"监听窗口消息投递处理异常: {delivery_e}")
+                                                logger.exception(delivery_e)
+                                        else:
+                                            logger.error(f"无法找到保存的消息: {processed_msg.get('id')}")
                                 except Exception as e:
                                     logger.error(f"监听窗口消息投递处理失败: {e}")
                                     logger.exception(e)
+                            else:
+                                message_tracer.discard(trace_id)
                     else:
                         logger.debug(f"实例 {instance_id} 监听对象 {who} 没有新消息")
 
@@ -690,9 +849,12 @@ class MessageListener:
                     if info.active:
                         info.last_check_time = time.time()
 
+                return True
+
             except Exception as e:
                 logger.error(f"检查实例 {instance_id} 所有监听对象的消息时出错: {e}")
                 logger.debug(f"错误详情", exc_info=True)
+                return False
 
     def _filter_messages(self, messages: List[dict]) -> List[dict]:
         """
@@ -807,6 +969,10 @@ class MessageListener:
             if not api_success:
                 return False
 
+            # 超时移除或重启后未加载（非活跃）的监听对象重新添加时，沿用数据库中保存的会话ID，保持对话上下文
+            if not conversation_id:
+                conversation_id = await self._load_saved_conversation_id(instance_id, who)
+
             # 添加到内存中的监听列表
             self.listeners[instance_id][who] = ListenerInfo(
                 instance_id=instance_id,
@@ -822,6 +988,9 @@ class MessageListener:
             # 添加到数据库
             await self._save_listener(instance_id, who, conversation_id, manual_added)
 
+            # 新监听对象很可能马上有消息，重置该实例的轮询退避
+            self._poll_scheduler.mark_active(instance_id)
+
             if fixed_listener:
                 logger.info(f"成功添加固定监听对象（不受超时限制）: {instance_id} - {who}")
             elif manual_added:
@@ -835,6 +1004,8 @@ class MessageListener:
             # 记录监听对象添加统计
             service_monitor.record_listener_added()
 
+            domain_events.publish(DomainEventType.LISTENER_ADDED, instance_id=instance_id, who=who)
+
             return True
 
     async def remove_listener(self, instance_id: str, who: str):
@@ -975,6 +1146,11 @@ class MessageListener:
         Returns:
             int: 清理的监听对象数量
         """
+        # 启动时的后台校验完成前不移除任何监听对象
+        if self._starting_up:
+            logger.debug("监听对象启动校验尚未完成，跳过本次清理")
+            return 0
+
         removed_count = 0
         current_time = time.time()
         timeout = self.timeout_minutes * 60
@@ -1105,22 +1281,7 @@ class MessageListener:
                                     processed_msg = await message_processor.process_message(msg, api_client)
 
                                     # 保存消息到数据库
-                                    save_data = {
-                                        'instance_id': instance_id,
-                                        'chat_name': who,
-                                        'message_type': processed_msg.get('type', 'text'),
-                                        'content': processed_msg.get('content', ''),
-                                        'sender': processed_msg.get('sender', ''),
-                                        'sender_remark': processed_msg.get('sender_remark', ''),
-                                        'message_id': processed_msg.get('id', ''),
-                                        'mtype': processed_msg.get('mtype', 0)
-                                    }
-
-                                    # 如果是文件或图片，添加本地文件路径
-                                    if 'local_file_path' in processed_msg:
-                                        save_data['local_file_path'] = processed_msg.get('local_file_path')
-                                        save_data['file_size'] = processed_msg.get('file_size')
-                                        save_data['original_file_path'] = processed_msg.get('original_file_path')
+                                    save_data = MessageRecord.from_wxauto(instance_id, who, processed_msg)
 
                                     # 使用消息过滤模块进行二次检查
                                     if message_filter.should_filter_message(save_data, log_prefix="超时检查保存前"):
@@ -1137,25 +1298,30 @@ class MessageListener:
                                             # 导入消息投递服务
                                             from wxauto_mgt.core.message_delivery_service import message_delivery_service
 
-                                            # 获取保存的消息
-                                            from wxauto_mgt.data.db_manager import db_manager
-                                            saved_message = await db_manager.fetchone(
-                                                "SELECT * FROM messages WHERE message_id = ?",
-                                                (processed_msg.get('id'),)
-                                            )
-
-                                            if saved_message:
-                                                # 直接处理消息投递
-                                                logger.info(f"超时检查消息直接投递处理: {processed_msg.get('id')}")
-                                                # 直接等待处理完成，确保回复能发送回微信
-                                                try:
-                                                    delivery_result = await message_delivery_service.process_message(saved_message)
-                                                    logger.info(f"超时检查消息投递处理完成: {processed_msg.get('id')}, 结果: {delivery_result}")
-                                                except Exception as delivery_e:
-                                                    logger.error(f"超时检查消息投递处理异常: {delivery_e}")
-                                                    logger.exception(delivery_e)
+                                            if message_delivery_service.merge_messages:
+                                                # 开启消息合并时不逐条投递，由投递服务在合并时间窗口结束后统一投递
+                                                logger.debug(f"消息合并已开启，等待合并投递: {processed_msg.get('id')}")
                                             else:
-                                                logger.error(f"无法找到保存的消息: {processed_msg.get('id')}")
+                                                # 获取保存的消息
+                                                from wxauto_mgt.data.db_manager import db_manager
+                                                saved_message = await db_manager.fetchone(
+                                                    "SELECT * FROM messages WHERE message_id = ?",
+                                                    (processed_msg.get('id'),),
+                                                    row_type=MessageRecord
+                                                )
+
+                                                if saved_message:
+                                                    # 直接处理消息投递
+                                                    logger.info(f"超时检查消息直接投递处理: {processed_msg.get('id')}")
+                                                    # 直接等待处理完成，确保回复能发送回微信
+                                                    try:
+                                                        delivery_result = await message_delivery_service.process_message(saved_message)
+                                                        logger.info(f"超时检查消息投递处理完成: {processed_msg.get('id')}, 结果: {delivery_result}")
+                                                    except Exception as delivery_e:
+                                                        logger.error(f"超时检查消息投递处理异常: {delivery_e}")
+                                                        logger.exception(delivery_e)
+                                                else:
+                                                    logger.error(f"无法找到保存的消息: {processed_msg.get('id')}")
                                         except Exception as e:
                                             logger.error(f"超时检查消息投递处理失败: {e}")
                                             logger.exception(e)
@@ -1178,17 +1344,20 @@ class MessageListener:
 
         return removed_count
 
-    async def _save_message(self, message_data: dict) -> str:
+    async def _save_message(self, message_data: MessageRecord) -> str:
         """
         保存消息到数据库
 
         Args:
-            message_data: 消息数据
+            message_data: 消息记录
 
         Returns:
             str: 保存成功返回消息ID，失败返回空字符串
         """
         try:
+            if not isinstance(message_data, MessageRecord):
+                message_data = MessageRecord.from_row(message_data)
+
             message_id = message_data.get('message_id', '')
             instance_id = message_data.get('instance_id', '')
             chat_name = message_data.get('chat_name', '')
@@ -1309,11 +1478,19 @@ class MessageListener:
                     logger.error(f"检查回复匹配时出错: {e}")
 
             # 插入消息到数据库
-            await db_manager.insert('messages', message_data)
+            await db_manager.insert('messages', message_data.to_row())
 
             # 返回消息ID
             message_id = message_data.get('message_id', '')
             logger.debug(f"消息保存成功，ID: {message_id}")
+
+            domain_events.publish(
+                DomainEventType.MESSAGE_SAVED,
+                instance_id=message_data.get('instance_id', ''),
+                chat_name=message_data.get('chat_name', ''),
+                message_id=message_id,
+                create_time=message_data['create_time']
+            )
             return message_id
         except Exception as e:
             logger.error(f"保存消息到数据库失败: {e}")
@@ -1372,6 +1549,7 @@ class MessageListener:
                 await db_manager.insert('listeners', data)
                 logger.debug(f"插入监听对象: {instance_id} - {who}")
 
+            self.invalidate_listener_rows()
             return True
         except Exception as e:
             logger.error(f"保存监听对象到数据库失败: {e}")
@@ -1394,6 +1572,7 @@ class MessageListener:
 
             # 执行SQL
             await db_manager.execute(sql, (instance_id, who))
+            self.invalidate_listener_rows()
 
             # 验证是否删除成功
             verify_sql = "SELECT COUNT(*) as count FROM listeners WHERE instance_id = ? AND who = ?"
@@ -1431,6 +1610,7 @@ class MessageListener:
 
             # 执行SQL
             await db_manager.execute(sql, (instance_id, who))
+            self.invalidate_listener_rows()
 
             # 验证是否更新成功
             verify_sql = "SELECT status FROM listeners WHERE instance_id = ? AND who = ?"
@@ -1515,7 +1695,10 @@ class MessageListener:
 
     async def get_all_listeners_from_db(self, instance_id: str = None) -> Dict[str, List[Dict]]:
         """
-        从数据库获取所有监听对象列表（包括inactive状态的），按状态和最后活跃时间排序
+        获取所有监听对象列表（包括inactive状态的），按状态和最后活跃时间排序
+
+        数据库记录只在监听对象增删、状态变化或缓存过期时重新查询，
+        内存中存在的监听对象以ListenerInfo的状态、时间戳和会话ID为准。
 
         Args:
             instance_id: 可选的实例ID，如果提供则只返回该实例的监听对象
@@ -1524,46 +1707,46 @@ class MessageListener:
             Dict[str, List[Dict]]: 实例ID到监听对象详细信息列表的映射
         """
         try:
-            # 构建查询条件
-            query = "SELECT instance_id, who, last_message_time, conversation_id, manual_added, status FROM listeners WHERE 1=1"
-            params = []
-
-            if instance_id:
-                query += " AND instance_id = ?"
-                params.append(instance_id)
-
-            # 添加排序：按状态排序（活跃在前），然后按最后消息时间降序排序
-            query += " ORDER BY CASE WHEN status = 'active' THEN 0 ELSE 1 END, last_message_time DESC"
-
-            # 执行查询
-            db_listeners = await db_manager.fetchall(query, tuple(params))
+            rows = await self._get_listener_rows()
 
             # 组织结果
             result = {}
-            for listener in db_listeners:
+            for listener in rows:
                 inst_id = listener['instance_id']
-                if inst_id not in result:
-                    result[inst_id] = []
-
-                # 检查是否在内存中存在（用于获取更多实时信息）
-                memory_info = None
-                if inst_id in self.listeners and listener['who'] in self.listeners[inst_id]:
-                    memory_info = self.listeners[inst_id][listener['who']]
-
-                listener_data = {
-                    'who': listener['who'],
-                    'active': listener['status'] == 'active',
-                    'last_message_time': listener['last_message_time'],
-                    'last_check_time': memory_info.last_check_time if memory_info else listener['last_message_time'],
-                    'conversation_id': listener.get('conversation_id', ''),
-                    'manual_added': bool(listener.get('manual_added', 0)),
-                    'fixed_listener': memory_info.fixed_listener if memory_info else False,
-                    'status': listener['status']
-                }
-
-                result[inst_id].append(listener_data)
-
-            logger.debug(f"从数据库获取到 {sum(len(listeners) for listeners in result.values())} 个监听对象")
+                if instance_id and inst_id != instance_id:
+                    continue
+
+                memory_info = self.listeners.get(inst_id, {}).get(listener['who'])
+                if memory_info:
+                    active = memory_info.active
+                    listener_data = {
+                        'who': listener['who'],
+                        'active': active,
+                        'last_message_time': max(memory_info.last_message_time, listener['last_message_time'] or 0),
+                        'last_check_time': memory_info.last_check_time,
+                        'conversation_id': memory_info.conversation_id or listener.get('conversation_id', ''),
+                        'manual_added': memory_info.manual_added or bool(listener.get('manual_added', 0)),
+                        'fixed_listener': memory_info.fixed_listener,
+                        'status': 'active' if active else 'inactive'
+                    }
+                else:
+                    listener_data = {
+                        'who': listener['who'],
+                        'active': listener['status'] == 'active',
+                        'last_message_time': listener['last_message_time'],
+                        'last_check_time': listener['last_message_time'],
+                        'conversation_id': listener.get('conversation_id', ''),
+                        'manual_added': bool(listener.get('manual_added', 0)),
+                        'fixed_listener': False,
+                        'status': listener['status']
+                    }
+
+                result.setdefault(inst_id, []).append(listener_data)
+
+            # 排序：活跃状态在前，然后按最后消息时间降序
+            for listeners in result.values():
+                listeners.sort(key=lambda x: (not x['active'], -(x['last_message_time'] or 0)))
+
             return result
 
         except Exception as e:
@@ -1571,8 +1754,143 @@ class MessageListener:
             logger.exception(e)
             return {}
 
-    async def _load_listeners_from_db(self):
-        """从数据库加载保存的监听对象"""
+    async def _get_listener_rows(self) -> List[Dict]:
+        """获取监听对象数据库记录（带缓存）"""
+        if self._listener_rows is None or time.time() - self._listener_rows_loaded_at > self.listener_rows_ttl:
+            self._listener_rows = await db_manager.fetchall(
+                "SELECT instance_id, who, last_message_time, conversation_id, manual_added, status FROM listeners"
+            )
+            self._listener_rows_loaded_at = time.time()
+            logger.debug(f"从数据库获取到 {len(self._listener_rows)} 个监听对象")
+        return self._listener_rows
+
+    def invalidate_listener_rows(self):
+        """使监听对象数据库记录缓存失效（监听对象增删或状态变化后调用）"""
+        self._listener_rows = None
+
+    def get_listener_info(self, instance_id: str, who: str) -> Optional[ListenerInfo]:
+        """
+        获取内存中的监听对象信息
+
+        Args:
+            instance_id: 实例ID
+            who: 监听对象的标识
+
+        Returns:
+            Optional[ListenerInfo]: 监听对象信息，不在内存中时返回None
+        """
+        return self.listeners.get(instance_id, {}).get(who)
+
+    async def _load_saved_conversation_id(self, instance_id: str, who: str) -> str:
+        """
+        获取监听对象保存的会话ID（包括尚未写回数据库的值）
+
+        Args:
+            instance_id: 实例ID
+            who: 监听对象的标识
+
+        Returns:
+            str: 会话ID，没有时返回空字符串
+        """
+        pending = self._pending_listener_writes.get((instance_id, who), {})
+        if 'conversation_id' in pending:
+            return pending['conversation_id'] or ""
+
+        try:
+            row = await db_manager.fetchone(
+                "SELECT conversation_id FROM listeners WHERE instance_id = ? AND who = ?",
+                (instance_id, who)
+            )
+        except Exception as e:
+            logger.warning(f"查询监听对象保存的会话ID失败: {instance_id} - {who}, {e}")
+            return ""
+        return (row.get('conversation_id') if row else "") or ""
+
+    def set_conversation_id(self, instance_id: str, who: str, conversation_id: str):
+        """
+        更新监听对象的会话ID（内存立即生效，数据库批量写回）
+
+        Args:
+            instance_id: 实例ID
+            who: 监听对象的标识
+            conversation_id: 会话ID
+        """
+        info = self.get_listener_info(instance_id, who)
+        if info is not None:
+            if info.conversation_id == conversation_id:
+                return
+            info.conversation_id = conversation_id
+        self._queue_listener_write(instance_id, who, conversation_id=conversation_id)
+
+    def _queue_listener_write(self, instance_id: str, who: str, last_message_time: Optional[int] = None,
+                              conversation_id: Optional[str] = None):
+        """
+        登记待写回数据库的监听对象字段，同一监听对象的多次修改合并为一次写入
+
+        Args:
+            instance_id: 实例ID
+            who: 监听对象的标识
+            last_message_time: 最后消息时间
+            conversation_id: 会话ID
+        """
+        pending = self._pending_listener_writes.setdefault((instance_id, who), {})
+        if last_message_time is not None:
+            pending['last_message_time'] = last_message_time
+        if conversation_id is not None:
+            pending['conversation_id'] = conversation_id
+
+        if self._listener_flush_task is None or self._listener_flush_task.done():
+            self._listener_flush_task = asyncio.create_task(self._flush_listener_writes_later())
+
+    async def _flush_listener_writes_later(self):
+        """等待一个写回间隔后批量写入"""
+        await asyncio.sleep(self.listener_flush_interval)
+        await self.flush_listener_writes()
+
+    async def flush_listener_writes(self):
+        """把合并后的时间戳和会话ID批量写回数据库"""
+        if not self._pending_listener_writes:
+            return
+
+        pending, self._pending_listener_writes = self._pending_listener_writes, {}
+        timestamps = [
+            (fields['last_message_time'], instance_id, who)
+            for (instance_id, who), fields in pending.items() if 'last_message_time' in fields
+        ]
+        conversations = [
+            (fields['conversation_id'], instance_id, who)
+            for (instance_id, who), fields in pending.items() if 'conversation_id' in fields
+        ]
+
+        try:
+            if timestamps:
+                await db_manager.executemany(
+                    "UPDATE listeners SET last_message_time = ? WHERE instance_id = ? AND who = ?",
+                    timestamps
+                )
+            if conversations:
+                await db_manager.executemany(
+                    "UPDATE listeners SET conversation_id = ? WHERE instance_id = ? AND who = ?",
+                    conversations
+                )
+            logger.debug(f"已批量写回监听对象: 时间戳 {len(timestamps)} 个, 会话ID {len(conversations)} 个")
+        except Exception as e:
+            logger.error(f"批量写回监听对象失败: {e}")
+            # 放回队列等待下次写入，不覆盖期间产生的新值
+            for key, fields in pending.items():
+                merged = {**fields, **self._pending_listener_writes.get(key, {})}
+                self._pending_listener_writes[key] = merged
+            if self.running and (self._listener_flush_task is None or self._listener_flush_task.done()
+                                 or self._listener_flush_task is asyncio.current_task()):
+                self._listener_flush_task = asyncio.create_task(self._flush_listener_writes_later())
+
+    async def _load_listeners_from_db(self, reapply: bool = True):
+        """
+        从数据库加载保存的监听对象
+
+        Args:
+            reapply: 加载后是否立即重新添加到实例API，启动时由后台任务执行
+        """
         try:
             logger.info("从数据库加载监听对象")
 
@@ -1631,7 +1949,8 @@ class MessageListener:
             logger.info(f"从数据库加载了 {total} 个active状态的监听对象到内存中")
 
             # 重新添加监听对象到API
-            await self._reapply_listeners_to_api()
+            if reapply:
+                await self._reapply_listeners_to_api()
 
             # 注意：超时对象的处理已移至start方法的_refresh_all_listeners中
 
@@ -1640,85 +1959,119 @@ class MessageListener:
             logger.exception(e)
             # 出错时也要确保监听器字典被初始化
 
+    async def _bulk_register_listeners(self, instance_id: str, api_client, whos: List[str],
+                                       reason: str, reset: bool = False) -> Dict[str, bool]:
+        """
+        并发重新注册一个实例的多个监听对象
+
+        最近有消息的聊天排在前面优先注册，注册结果同步到ListenerInfo.api_connected，
+        进度记录在 get_reregistration_progress() 中。
+
+        Args:
+            instance_id: 实例ID
+            api_client: 实例API客户端
+            whos: 监听对象列表
+            reason: 重新注册的原因（用于日志和进度）
+            reset: 是否先移除再添加
+
+        Returns:
+            Dict[str, bool]: 监听对象 -> 是否注册成功
+        """
+        listeners_dict = self.listeners.get(instance_id, {})
+        ordered = sorted(
+            whos,
+            key=lambda who: listeners_dict[who].last_message_time if who in listeners_dict else 0,
+            reverse=True
+        )
+
+        progress = {
+            'reason': reason,
+            'total': len(ordered),
+            'done': 0,
+            'succeeded': 0,
+            'failed': 0,
+            'started_at': time.time(),
+            'finished_at': None,
+            'duration': None
+        }
+        self._reregistration_progress[instance_id] = progress
+
+        def on_result(who: str, success: bool):
+            progress['done'] += 1
+            progress['succeeded' if success else 'failed'] += 1
+            listener_info = listeners_dict.get(who)
+            if listener_info:
+                listener_info.api_connected = success
+            if not success:
+                logger.warning(f"重新注册监听对象失败: {instance_id} - {who}")
+
+        results = await api_client.add_listeners(
+            ordered,
+            concurrency=self.reregister_concurrency,
+            reset=reset,
+            on_result=on_result
+        )
+
+        progress['finished_at'] = time.time()
+        progress['duration'] = round(progress['finished_at'] - progress['started_at'], 3)
+        logger.info(
+            f"实例 {instance_id} 重新注册监听对象完成({reason}): 成功 {progress['succeeded']} 个，"
+            f"失败 {progress['failed']} 个，耗时 {progress['duration']:.2f} 秒"
+        )
+        return results
+
     async def _reapply_listeners_to_api(self):
-        """重新将监听对象添加到API"""
+        """重新将监听对象添加到API（各实例并行，实例内并发）"""
         try:
             logger.info("🔧 重新将监听对象添加到API...")
 
-            total_reapplied = 0
-            total_failed = 0
-            total_pending = 0  # 等待重试的数量
+            async def reapply_instance(instance_id: str, listeners_dict: Dict[str, ListenerInfo]):
+                """返回 (成功数, 失败数, 等待重试数)"""
+                active_whos = [who for who, info in listeners_dict.items() if info.active]
+
+                def mark_pending():
+                    # 标记这些监听对象为等待重试状态
+                    for who in active_whos:
+                        listeners_dict[who].api_connected = False
+                    return 0, 0, len(active_whos)
 
-            for instance_id, listeners_dict in self.listeners.items():
                 # 获取API客户端
                 api_client = instance_manager.get_instance(instance_id)
                 if not api_client:
                     logger.warning(f"找不到实例 {instance_id} 的API客户端，跳过重新添加监听")
-                    # 标记这些监听对象为等待重试状态
-                    for who, listener_info in listeners_dict.items():
-                        if listener_info.active:
-                            listener_info.api_connected = False
-                            total_pending += 1
-                    continue
+                    return mark_pending()
 
-                logger.info(f"为实例 {instance_id} 重新添加 {len(listeners_dict)} 个监听对象")
+                logger.info(f"为实例 {instance_id} 重新添加 {len(active_whos)} 个监听对象")
 
                 # 首先检查API客户端连接状态
                 try:
                     if not api_client.initialized:
                         logger.info(f"初始化API客户端: {instance_id}")
-                        init_success = await api_client.initialize()
-                        if not init_success:
+                        if not await api_client.initialize():
                             logger.warning(f"API客户端初始化失败: {instance_id}")
-                            # 标记所有监听对象为等待重试状态
-                            for who, listener_info in listeners_dict.items():
-                                if listener_info.active:
-                                    listener_info.api_connected = False
-                                    total_pending += 1
-                            continue
+                            return mark_pending()
                 except Exception as e:
                     logger.warning(f"API客户端初始化异常: {instance_id} - {e}")
-                    # 标记所有监听对象为等待重试状态
-                    for who, listener_info in listeners_dict.items():
-                        if listener_info.active:
-                            listener_info.api_connected = False
-                            total_pending += 1
-                    continue
+                    return mark_pending()
 
-                for who, listener_info in listeners_dict.items():
-                    try:
-                        # 只重新添加活跃的监听对象
-                        if not listener_info.active:
-                            logger.debug(f"跳过非活跃监听对象: {instance_id} - {who}")
-                            continue
+                results = await self._bulk_register_listeners(instance_id, api_client, active_whos, "重新添加")
+                succeeded = sum(1 for success in results.values() if success)
+                return succeeded, len(results) - succeeded, 0
 
-                        # 调用API重新添加监听
-                        api_success = await api_client.add_listener(
-                            who,
-                            save_pic=True,
-                            save_file=True,
-                            save_voice=True,
-                            parse_url=True
-                        )
-
-                        if api_success:
-                            total_reapplied += 1
-                            listener_info.api_connected = True  # 标记API连接成功
-                            if listener_info.fixed_listener:
-                                logger.info(f"成功重新添加固定监听对象: {instance_id} - {who}")
-                            elif listener_info.manual_added:
-                                logger.info(f"成功重新添加手动监听对象: {instance_id} - {who}")
-                            else:
-                                logger.debug(f"成功重新添加监听对象: {instance_id} - {who}")
-                        else:
-                            total_failed += 1
-                            listener_info.api_connected = False  # 标记API连接失败
-                            logger.warning(f"重新添加监听对象失败: {instance_id} - {who}")
+            counts = await asyncio.gather(
+                *(reapply_instance(instance_id, listeners_dict)
+                  for instance_id, listeners_dict in list(self.listeners.items())),
+                return_exceptions=True
+            )
 
-                    except Exception as e:
-                        total_failed += 1
-                        listener_info.api_connected = False  # 标记API连接失败
-                        logger.error(f"重新添加监听对象 {instance_id} - {who} 时出错: {e}")
+            total_reapplied = total_failed = total_pending = 0
+            for result in counts:
+                if isinstance(result, Exception):
+                    logger.error(f"重新添加监听对象时出错: {result}")
+                    continue
+                total_reapplied += result[0]
+                total_failed += result[1]
+                total_pending += result[2]
 
             logger.info(f"🔧 监听对象重新添加完成: 成功 {total_reapplied} 个，失败 {total_failed} 个，等待重试 {total_pending} 个")
 
@@ -1750,47 +2103,41 @@ class MessageListener:
 
             logger.info("🔄 开始重试失败的监听对象...")
 
-            retry_count = 0
-            success_count = 0
-
-            for instance_id, listeners_dict in self.listeners.items():
-                # 获取API客户端
+            async def retry_instance(instance_id: str, listeners_dict: Dict[str, ListenerInfo]):
+                """返回 (尝试数, 成功数)"""
+                # 只重试活跃但未连接API的监听对象
+                whos = [
+                    who for who, info in listeners_dict.items()
+                    if info.active and not getattr(info, 'api_connected', False)
+                ]
                 api_client = instance_manager.get_instance(instance_id)
-                if not api_client:
-                    continue
-
-                for who, listener_info in listeners_dict.items():
-                    # 只重试活跃但未连接API的监听对象
-                    if not listener_info.active or getattr(listener_info, 'api_connected', False):
-                        continue
-
-                    retry_count += 1
+                if not whos or not api_client:
+                    return 0, 0
 
-                    try:
-                        # 尝试重新连接API
-                        if not api_client.initialized:
-                            init_success = await api_client.initialize()
-                            if not init_success:
-                                continue
+                # 尝试重新连接API
+                try:
+                    if not api_client.initialized and not await api_client.initialize():
+                        return len(whos), 0
+                except Exception as e:
+                    logger.debug(f"重试时初始化实例 {instance_id} 异常: {e}")
+                    return len(whos), 0
 
-                        # 尝试添加监听对象
-                        api_success = await api_client.add_listener(
-                            who,
-                            save_pic=True,
-                            save_file=True,
-                            save_voice=True,
-                            parse_url=True
-                        )
+                results = await self._bulk_register_listeners(instance_id, api_client, whos, "重试")
+                return len(whos), sum(1 for success in results.values() if success)
 
-                        if api_success:
-                            listener_info.api_connected = True
-                            success_count += 1
-                            logger.info(f"重试成功: {instance_id} - {who}")
-                        else:
-                            logger.debug(f"重试失败: {instance_id} - {who}")
+            counts = await asyncio.gather(
+                *(retry_instance(instance_id, listeners_dict)
+                  for instance_id, listeners_dict in list(self.listeners.items())),
+                return_exceptions=True
+            )
 
-                    except Exception as e:
-                        logger.debug(f"重试异常: {instance_id} - {who} - {e}")
+            retry_count = success_count = 0
+            for result in counts:
+                if isinstance(result, Exception):
+                    logger.debug(f"重试异常: {result}")
+                    continue
+                retry_count += result[0]
+                success_count += result[1]
 
             logger.info(f"🔄 监听对象重试完成: 尝试 {retry_count} 个，成功 {success_count} 个")
 
@@ -1827,8 +2174,11 @@ class MessageListener:
         try:
             instances = instance_manager.get_all_instances()
 
-            for instance_id, api_client in instances.items():
-                await self._check_single_instance_connection(instance_id, api_client)
+            # 各实例并发检查，一个实例的恢复（重新注册监听对象）不阻塞其他实例
+            await asyncio.gather(*(
+                self._check_single_instance_connection(instance_id, api_client)
+                for instance_id, api_client in list(instances.items())
+            ))
 
         except Exception as e:
             logger.error(f"检查实例连接状态时出错: {e}")
@@ -1852,6 +2202,13 @@ class MessageListener:
             }
 
             # 检测连接状态变化
+            if was_connected is not None and was_connected != is_connected:
+                domain_events.publish(
+                    DomainEventType.INSTANCE_STATUS_CHANGED,
+                    instance_id=instance_id,
+                    status="online" if is_connected else "offline"
+                )
+
             if was_connected is not None:  # 不是第一次检查
                 if not was_connected and is_connected:
                     # 连接从中断恢复到正常
@@ -1893,37 +2250,11 @@ class MessageListener:
                 logger.debug(f"实例 {instance_id} 没有需要恢复的监听对象")
                 return
 
-            listeners_dict = self.listeners[instance_id]
-            recovery_count = 0
-            failed_count = 0
-
-            for who, listener_info in listeners_dict.items():
-                try:
-                    # 只处理活跃的监听对象
-                    if not listener_info.active:
-                        continue
-
-                    # 重新添加监听对象到API
-                    api_success = await api_client.add_listener(
-                        who,
-                        save_pic=True,
-                        save_file=True,
-                        save_voice=True,
-                        parse_url=True
-                    )
-
-                    if api_success:
-                        listener_info.api_connected = True
-                        recovery_count += 1
-                        logger.info(f"✅ 成功恢复监听对象: {instance_id} - {who}")
-                    else:
-                        listener_info.api_connected = False
-                        failed_count += 1
-                        logger.warning(f"❌ 恢复监听对象失败: {instance_id} - {who}")
-
-                except Exception as e:
-                    failed_count += 1
-                    logger.error(f"恢复监听对象 {instance_id} - {who} 时出错: {e}")
+            # 只处理活跃的监听对象，重新添加到API
+            active_whos = [who for who, info in self.listeners[instance_id].items() if info.active]
+            results = await self._bulk_register_listeners(instance_id, api_client, active_whos, "连接恢复")
+            recovery_count = sum(1 for success in results.values() if success)
+            failed_count = len(results) - recovery_count
 
             logger.info(f"🔄 实例 {instance_id} 监听对象恢复完成: 成功 {recovery_count} 个，失败 {failed_count} 个")
 
@@ -1960,6 +2291,26 @@ class MessageListener:
         """
         logger.info(f"开始刷新 {len(potentially_expired)} 个可能超时的监听对象")
 
+        # 先按实例并发重置（移除再添加）这些监听对象，确保在API端仍然有效
+        by_instance: Dict[str, List[str]] = defaultdict(list)
+        for instance_id, who in potentially_expired:
+            by_instance[instance_id].append(who)
+
+        async def reset_instance(instance_id: str, whos: List[str]) -> Dict[str, bool]:
+            api_client = instance_manager.get_instance(instance_id)
+            if not api_client:
+                return {}
+            logger.info(f"验证 {len(whos)} 个监听对象是否有效: {instance_id}")
+            return await self._bulk_register_listeners(instance_id, api_client, whos, "超时验证", reset=True)
+
+        reset_results = dict(zip(
+            by_instance.keys(),
+            await asyncio.gather(
+                *(reset_instance(instance_id, whos) for instance_id, whos in by_instance.items()),
+                return_exceptions=True
+            )
+        ))
+
         for instance_id, who in potentially_expired:
             try:
                 # 获取API客户端
@@ -1968,43 +2319,23 @@ class MessageListener:
                     logger.error(f"找不到实例 {instance_id} 的API客户端")
                     continue
 
-                # 首先检查监听对象是否有效（例如尝试初始化验证）
-                logger.info(f"验证监听对象是否有效: {instance_id} - {who}")
-
-                # 添加一个移除再添加的验证步骤，确保监听对象在API端仍然有效
-                try:
-                    # 先尝试移除（如果存在）
-                    logger.debug(f"尝试重置监听对象: 先移除 {instance_id} - {who}")
-                    remove_result = await api_client.remove_listener(who)
-                    logger.debug(f"移除结果: {remove_result}")
-
-                    # 再重新添加，设置接收图片、文件、语音信息、URL信息参数为True
-                    logger.debug(f"尝试重新添加监听对象: {instance_id} - {who}")
-                    add_success = await api_client.add_listener(
-                        who,
-                        save_pic=True,
-                        save_file=True,
-                        save_voice=True,
-                        parse_url=True
-                    )
-
-                    if add_success:
-                        logger.info(f"监听对象验证成功，已重置: {instance_id} - {who}")
-                        # 更新时间戳
-                        async with self._lock:
-                            if instance_id in self.listeners and who in self.listeners[instance_id]:
-                                self.listeners[instance_id][who].last_message_time = time.time()
-                                self.listeners[instance_id][who].last_check_time = time.time()
-                                # 更新数据库
-                                await self._update_listener_timestamp(instance_id, who)
-                                logger.debug(f"已更新监听对象时间戳: {instance_id} - {who}")
-                        # 跳过后续处理，不需要再获取消息
-                        continue
-                    else:
-                        logger.warning(f"监听对象验证失败，无法添加: {instance_id} - {who}")
-                except Exception as e:
-                    logger.error(f"监听对象验证时出错: {e}")
-                    logger.exception(e)
+                instance_results = reset_results.get(instance_id)
+                if isinstance(instance_results, Exception):
+                    logger.error(f"监听对象验证时出错: {instance_results}")
+                elif instance_results and instance_results.get(who):
+                    logger.info(f"监听对象验证成功，已重置: {instance_id} - {who}")
+                    # 更新时间戳
+                    async with self._lock:
+                        if instance_id in self.listeners and who in self.listeners[instance_id]:
+                            self.listeners[instance_id][who].last_message_time = time.time()
+                            self.listeners[instance_id][who].last_check_time = time.time()
+                            # 更新数据库
+                            await self._update_listener_timestamp(instance_id, who)
+                            logger.debug(f"已更新监听对象时间戳: {instance_id} - {who}")
+                    # 跳过后续处理，不需要再获取消息
+                    continue
+                else:
+                    logger.warning(f"监听对象验证失败，无法添加: {instance_id} - {who}")
 
                 # 尝试获取该监听对象的最新消息
                 logger.info(f"尝试获取可能已超时的监听对象消息: {instance_id} - {who}")
@@ -2097,22 +2428,7 @@ class MessageListener:
                                 processed_msg = await message_processor.process_message(msg, api_client)
 
                                 # 保存消息到数据库
-                                save_data = {
-                                    'instance_id': instance_id,
-                                    'chat_name': who,
-                                    'message_type': processed_msg.get('type', 'text'),
-                                    'content': processed_msg.get('content', ''),
-                                    'sender': processed_msg.get('sender', ''),
-                                    'sender_remark': processed_msg.get('sender_remark', ''),
-                                    'message_id': processed_msg.get('id', ''),
-                                    'mtype': processed_msg.get('mtype', 0)
-                                }
-
-                                # 如果是文件或图片，添加本地文件路径
-                                if 'local_file_path' in processed_msg:
-                                    save_data['local_file_path'] = processed_msg.get('local_file_path')
-                                    save_data['file_size'] = processed_msg.get('file_size')
-                                    save_data['original_file_path'] = processed_msg.get('original_file_path')
+                                save_data = MessageRecord.from_wxauto(instance_id, who, processed_msg)
 
                                 # 使用消息过滤模块进行二次检查
                                 if message_filter.should_filter_message(save_data, log_prefix="刷新保存前"):
@@ -2145,7 +2461,7 @@ class MessageListener:
 
     async def _update_listener_timestamp(self, instance_id: str, who: str, conversation_id: str = "") -> bool:
         """
-        更新数据库中监听对象的时间戳和会话ID
+        更新监听对象的时间戳和会话ID（内存中的ListenerInfo立即生效，数据库批量写回）
 
         Args:
             instance_id: 实例ID
@@ -2155,34 +2471,54 @@ class MessageListener:
         Returns:
             bool: 是否更新成功
         """
-        try:
-            current_time = int(time.time())
+        current_time = int(time.time())
 
+        info = self.get_listener_info(instance_id, who)
+        if info is not None:
+            info.last_message_time = max(info.last_message_time, current_time)
             if conversation_id:
-                # 如果提供了会话ID，同时更新时间戳和会话ID
-                update_query = "UPDATE listeners SET last_message_time = ?, conversation_id = ? WHERE instance_id = ? AND who = ?"
-                await db_manager.execute(update_query, (current_time, conversation_id, instance_id, who))
-                logger.debug(f"已更新监听对象时间戳和会话ID: {instance_id} - {who} - {conversation_id}")
-            else:
-                # 否则只更新时间戳
-                update_query = "UPDATE listeners SET last_message_time = ? WHERE instance_id = ? AND who = ?"
-                await db_manager.execute(update_query, (current_time, instance_id, who))
-                logger.debug(f"已更新监听对象时间戳: {instance_id} - {who}")
+                info.conversation_id = conversation_id
 
-            return True
+        self._queue_listener_write(instance_id, who, last_message_time=current_time,
+                                   conversation_id=conversation_id or None)
+        return True
+
+    async def _revalidate_listeners_on_startup(self):
+        """后台重新注册监听对象、加载固定监听配置并重新校验所有监听对象（启动时执行一次）"""
+        started = time.perf_counter()
+        try:
+            # 重新添加从数据库加载的监听对象到API
+            await self._reapply_listeners_to_api()
+
+            # 加载固定监听配置并自动添加到监听列表
+            logger.info("🔧 准备加载固定监听配置...")
+            await self._load_and_apply_fixed_listeners()
+            logger.info("🔧 固定监听配置加载完成")
+
+            # 在启动时检查并刷新可能超时的监听对象
+            logger.info("启动时检查所有监听对象...")
+            await self._refresh_all_listeners()
+        except asyncio.CancelledError:
+            raise
         except Exception as e:
-            logger.error(f"更新监听对象时间戳失败: {e}")
-            return False
+            logger.error(f"启动时校验监听对象失败: {e}")
+            logger.exception(e)
+        finally:
+            # 处理完成后，释放锁
+            self._starting_up = False
+            self._tasks.discard(asyncio.current_task())
+            startup_profiler.record("监听对象后台校验", time.perf_counter() - started)
 
     async def _refresh_all_listeners(self):
         """在启动时刷新所有监听对象"""
-        # 首先确保所有API实例已初始化
+        # 首先确保所有API实例已初始化（各实例并发初始化）
         logger.info("检查API实例初始化状态")
-        for instance_id in self.listeners.keys():
+
+        async def ensure_initialized(instance_id: str):
             api_client = instance_manager.get_instance(instance_id)
             if not api_client:
                 logger.error(f"找不到实例 {instance_id} 的API客户端")
-                continue
+                return
 
             # 确保API客户端已初始化
             if not api_client.initialized:
@@ -2196,6 +2532,8 @@ class MessageListener:
                 except Exception as e:
                     logger.error(f"初始化API实例时出错: {e}")
 
+        await asyncio.gather(*(ensure_initialized(instance_id) for instance_id in list(self.listeners.keys())))
+
         # 为所有监听对象提供启动宽限期，避免在初始化时立即移除
         logger.info("为所有监听对象提供启动宽限期")
         async with self._lock:
@@ -2218,21 +2556,25 @@ class MessageListener:
             logger.info("开始重新激活内存中的监听对象")
             reactivated_count = 0
 
+            rows = []
             async with self._lock:
                 for instance_id, listeners_dict in self.listeners.items():
                     for who, info in listeners_dict.items():
                         # 重新激活监听对象
                         info.active = True
                         info.last_check_time = time.time()
+                        rows.append((instance_id, who))
+                        logger.debug(f"重新激活监听对象: {instance_id} - {who}")
 
-                        # 更新数据库状态为active
-                        try:
-                            update_sql = "UPDATE listeners SET status = 'active' WHERE instance_id = ? AND who = ?"
-                            await db_manager.execute(update_sql, (instance_id, who))
-                            reactivated_count += 1
-                            logger.debug(f"重新激活监听对象: {instance_id} - {who}")
-                        except Exception as e:
-                            logger.error(f"重新激活监听对象数据库更新失败: {instance_id} - {who}, 错误: {e}")
+            # 一次批量更新数据库状态为active
+            if rows:
+                try:
+                    update_sql = "UPDATE listeners SET status = 'active' WHERE instance_id = ? AND who = ?"
+                    await db_manager.executemany(update_sql, rows)
+                    self.invalidate_listener_rows()
+                    reactivated_count = len(rows)
+                except Exception as e:
+                    logger.error(f"重新激活监听对象数据库更新失败: {e}")
 
             logger.info(f"重新激活完成，共激活 {reactivated_count} 个监听对象")
 
@@ -2261,6 +2603,7 @@ class MessageListener:
             # 更新数据库中的状态
             update_sql = "UPDATE listeners SET status = 'inactive' WHERE instance_id = ? AND who = ?"
             await db_manager.execute(update_sql, (instance_id, who))
+            self.invalidate_listener_rows()
 
             # 验证更新是否成功
             verify_sql = "SELECT status FROM listeners WHERE instance_id = ? AND who = ?"
@@ -2268,6 +2611,7 @@ class MessageListener:
 
             if verify_result and verify_result.get('status') == 'inactive':
                 logger.debug(f"数据库中标记监听对象为非活跃成功: {instance_id} - {who}")
+                domain_events.publish(DomainEventType.LISTENER_REMOVED, instance_id=instance_id, who=who)
                 return True
             else:
                 logger.warning(f"数据库中标记监听对象为非活跃可能失败: {instance_id} - {who}, 验证结果: {verify_result}")
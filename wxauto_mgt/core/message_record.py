@@ -0,0 +1,209 @@
+"""
+消息记录模块
+
+定义在消息监听、过滤、处理和投递流程中传递的消息记录类型。
+MessageRecord 使用 __slots__ 存储 messages 表的各个字段，没有实例字典，
+同时实现字典接口（get、in、下标读写、copy等），现有按字典访问消息的代码无需修改。
+"""
+
+import sys
+from collections.abc import MutableMapping
+from typing import Any, Dict, Iterator, Optional
+
+# messages 表的字段
+MESSAGE_COLUMNS = (
+    'id', 'instance_id', 'message_id', 'chat_name', 'message_type', 'content',
+    'sender', 'sender_remark', 'mtype', 'processed', 'create_time',
+    'delivery_status', 'delivery_time', 'platform_id', 'reply_content',
+    'reply_status', 'reply_time', 'merged', 'merged_count', 'merged_ids',
+    'local_file_path', 'file_size', 'original_file_path', 'retry_count', 'next_retry_time'
+)
+
+# 处理流程中使用但不保存到数据库的字段
+TRANSIENT_FIELDS = ('conversation_id', 'file_type', 'attachments')
+
+_SLOT_FIELDS = MESSAGE_COLUMNS + TRANSIENT_FIELDS
+_SLOT_FIELD_SET = frozenset(_SLOT_FIELDS)
+
+
+class MessageRecord(MutableMapping):
+    """
+    消息记录
+
+    未赋值的字段视为不存在（与字典中没有该键一致），
+    不在预定义字段中的键保存在额外字段字典中，只在需要时创建。
+    """
+
+    __slots__ = _SLOT_FIELDS + ('_extra',)
+
+    def __init__(self, **fields):
+        """
+        初始化消息记录
+
+        Args:
+            **fields: 字段值
+        """
+        self._extra: Optional[Dict[str, Any]] = None
+        for key, value in fields.items():
+            self[key] = value
+
+    @classmethod
+    def from_row(cls, row) -> 'MessageRecord':
+        """
+        从数据库行（aiosqlite.Row 或字典）创建消息记录，不经过中间字典
+
+        Args:
+            row: 支持 keys() 和下标访问的数据库行
+
+        Returns:
+            MessageRecord: 消息记录
+        """
+        record = cls.__new__(cls)
+        record._extra = None
+        for key in row.keys():
+            record[key] = row[key]
+        return record
+
+    @classmethod
+    def from_wxauto(cls, instance_id: str, chat_name: str, message: Dict[str, Any]) -> 'MessageRecord':
+        """
+        从消息处理器处理后的wxauto消息创建待保存的消息记录
+
+        Args:
+            instance_id: 实例ID
+            chat_name: 聊天对象名称
+            message: 处理后的wxauto消息
+
+        Returns:
+            MessageRecord: 消息记录
+        """
+        record = cls(
+            instance_id=instance_id,
+            chat_name=chat_name,
+            message_type=message.get('type', 'text'),
+            content=message.get('content', ''),
+            sender=message.get('sender', ''),
+            sender_remark=message.get('sender_remark', ''),
+            message_id=message.get('id', ''),
+            mtype=message.get('mtype')
+        )
+
+        # 如果是文件或图片，添加本地文件路径和文件类型
+        if 'local_file_path' in message:
+            record.local_file_path = message.get('local_file_path')
+            record.file_size = message.get('file_size')
+            record.original_file_path = message.get('original_file_path')
+            if 'file_type' in message:
+                record.file_type = message.get('file_type')
+
+        return record
+
+    # ---- 字典接口 ----
+
+    def __getitem__(self, key: str) -> Any:
+        if key in _SLOT_FIELD_SET:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        if self._extra is not None and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key: str, value: Any):
+        if key in _SLOT_FIELD_SET:
+            setattr(self, key, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __delitem__(self, key: str):
+        if key in _SLOT_FIELD_SET:
+            try:
+                delattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        elif self._extra is not None and key in self._extra:
+            del self._extra[key]
+        else:
+            raise KeyError(key)
+
+    def __contains__(self, key) -> bool:
+        if key in _SLOT_FIELD_SET:
+            return hasattr(self, key)
+        return self._extra is not None and key in self._extra
+
+    def __iter__(self) -> Iterator[str]:
+        for key in _SLOT_FIELDS:
+            if hasattr(self, key):
+                yield key
+        if self._extra:
+            yield from self._extra
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key in _SLOT_FIELD_SET:
+            return getattr(self, key, default)
+        if self._extra is not None:
+            return self._extra.get(key, default)
+        return default
+
+    def copy(self) -> 'MessageRecord':
+        """浅复制消息记录（只复制已赋值的字段）"""
+        record = MessageRecord.__new__(MessageRecord)
+        for key in _SLOT_FIELDS:
+            try:
+                setattr(record, key, getattr(self, key))
+            except AttributeError:
+                pass
+        record._extra = dict(self._extra) if self._extra else None
+        return record
+
+    def __repr__(self) -> str:
+        return f"MessageRecord({self.to_dict()})"
+
+    # ---- 转换 ----
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        转换为包含全部字段的字典（投递给服务平台或序列化时使用）
+
+        Returns:
+            Dict[str, Any]: 字段字典
+        """
+        return dict(self.items())
+
+    def to_row(self) -> Dict[str, Any]:
+        """
+        转换为只包含 messages 表字段的字典，用于插入数据库
+
+        Returns:
+            Dict[str, Any]: 数据库字段字典
+        """
+        row = {}
+        for key in MESSAGE_COLUMNS:
+            try:
+                row[key] = getattr(self, key)
+            except AttributeError:
+                pass
+        return row
+
+    def memory_size(self) -> int:
+        """
+        估算消息记录占用的内存（字节），包括记录本身和各字段值
+
+        Returns:
+            int: 字节数
+        """
+        size = sys.getsizeof(self)
+        for key in _SLOT_FIELDS:
+            value = getattr(self, key, None)
+            if value is not None:
+                size += sys.getsizeof(value)
+        if self._extra:
+            size += sys.getsizeof(self._extra)
+            size += sum(sys.getsizeof(value) for value in self._extra.values())
+        return size
@@ -5,6 +5,7 @@
 """
 
 import asyncio
+import contextvars
 import logging
 import time
 import json
@@ -14,9 +15,17 @@ from typing import Dict, Any, Optional, Tuple, List
 
 from wxauto_mgt.data.db_manager import db_manager
 from wxauto_mgt.core.api_client import instance_manager
+from wxauto_mgt.utils.metrics_registry import metrics_registry
 
 logger = logging.getLogger(__name__)
 
+# 排队等待发送通道的最长时间（秒），超时按发送失败处理
+LANE_WAIT_TIMEOUT = 120
+
+# 调用方设置的处理超时（如消息投递的单条处理超时），排队等待发送通道的时间不计入该超时
+processing_timeout: contextvars.ContextVar[Optional[asyncio.Timeout]] = contextvars.ContextVar(
+    'processing_timeout', default=None)
+
 class MessageSender:
     """消息发送器"""
 
@@ -25,6 +34,11 @@ class MessageSender:
         self._initialized = False
         self._retry_count = 3  # 重试次数
         self._retry_interval = 2  # 重试间隔（秒）
+        # 每个实例一条发送通道：同一实例的发送串行执行，不同实例之间并发
+        self._send_lanes: Dict[str, asyncio.Lock] = {}
+        self._lane_waiting: Dict[str, int] = {}  # instance_id -> 排队等待发送的数量
+        metrics_registry.gauge("sender_queue_depth", "各实例发送通道排队发送的消息总数").set_function(
+            lambda: sum(self._lane_waiting.values()))
 
     async def initialize(self):
         """初始化消息发送器"""
@@ -34,6 +48,54 @@ class MessageSender:
         self._initialized = True
         logger.info("消息发送器初始化完成")
 
+    def _get_send_lane(self, instance_id: str) -> asyncio.Lock:
+        """获取实例的发送通道锁"""
+        lane = self._send_lanes.get(instance_id)
+        if lane is None:
+            lane = asyncio.Lock()
+            self._send_lanes[instance_id] = lane
+        return lane
+
+    async def _acquire_send_lane(self, instance_id: str) -> bool:
+        """
+        排队进入实例的发送通道
+
+        排队期间暂停调用方的处理超时，进入通道后恢复剩余时间；排队本身最多等待 LANE_WAIT_TIMEOUT 秒。
+
+        Args:
+            instance_id: 实例ID
+
+        Returns:
+            bool: 是否进入发送通道
+        """
+        lane = self._get_send_lane(instance_id)
+        budget = processing_timeout.get()
+        remaining = None
+        if budget is not None and not budget.expired() and budget.when() is not None:
+            loop = asyncio.get_running_loop()
+            remaining = budget.when() - loop.time()
+            budget.reschedule(None)
+
+        try:
+            async with asyncio.timeout(LANE_WAIT_TIMEOUT):
+                await lane.acquire()
+            return True
+        except TimeoutError:
+            logger.error(f"实例 {instance_id} 的发送通道排队超过 {LANE_WAIT_TIMEOUT} 秒")
+            return False
+        finally:
+            if remaining is not None:
+                budget.reschedule(asyncio.get_running_loop().time() + remaining)
+
+    def get_send_queue_depths(self) -> Dict[str, int]:
+        """
+        获取各实例发送通道的排队数量
+
+        Returns:
+            Dict[str, int]: 实例ID到排队发送数量（含正在发送的一条）的映射
+        """
+        return {instance_id: count for instance_id, count in self._lane_waiting.items() if count > 0}
+
     async def send_message(self, instance_id: str, chat_name: str, content: str, message_send_mode: str = None, at_list: List[str] = None) -> Tuple[bool, str]:
         """
         发送消息到微信实例
@@ -97,33 +159,45 @@ class MessageSender:
 
         logger.info(f"使用消息发送模式: {message_send_mode}")
 
-        # 导入消息监听器，用于暂停/恢复监听
+        # 导入消息监听器，用于暂停/恢复对应实例的监听
         from wxauto_mgt.core.message_listener import message_listener
 
-        # 尝试发送消息
-        for attempt in range(self._retry_count):
+        # 进入该实例的发送通道，同一实例的回复依次发送，不同实例互不阻塞
+        self._lane_waiting[instance_id] = self._lane_waiting.get(instance_id, 0) + 1
+        try:
+            if not await self._acquire_send_lane(instance_id):
+                return False, f"等待发送通道超时 ({LANE_WAIT_TIMEOUT}秒)"
             try:
-                # 暂停消息监听服务，确保发送消息时不受干扰
-                await message_listener.pause_listening()
-                logger.info(f"发送消息前暂停监听服务: 实例 {instance_id}, 聊天对象 {chat_name}")
+                # 尝试发送消息
+                for attempt in range(self._retry_count):
+                    try:
+                        # 只暂停该实例的消息轮询，确保发送消息时不受干扰
+                        await message_listener.pause_instance(instance_id)
+                        logger.info(f"发送消息前暂停实例监听: 实例 {instance_id}, 聊天对象 {chat_name}")
 
-                try:
-                    # 直接调用API发送消息
-                    result = await self._send_via_direct_api(instance, chat_name, content, message_send_mode, at_list)
-                finally:
-                    # 恢复消息监听服务
-                    await message_listener.resume_listening()
-                    logger.info(f"发送消息后恢复监听服务: 实例 {instance_id}, 聊天对象 {chat_name}")
-
-                if result[0]:
-                    return True, "发送成功"
-
-                # 如果失败，等待一段时间后重试
-                logger.warning(f"发送消息失败，将在 {self._retry_interval} 秒后重试 ({attempt+1}/{self._retry_count})")
-                await asyncio.sleep(self._retry_interval)
-            except Exception as e:
-                logger.error(f"发送消息时发生异常: {e}")
-                await asyncio.sleep(self._retry_interval)
+                        try:
+                            # 直接调用API发送消息
+                            result = await self._send_via_direct_api(instance, chat_name, content, message_send_mode, at_list)
+                        finally:
+                            # 恢复该实例的消息轮询
+                            await message_listener.resume_instance(instance_id)
+                            logger.info(f"发送消息后恢复实例监听: 实例 {instance_id}, 聊天对象 {chat_name}")
+
+                        if result[0]:
+                            # 刚回复过的会话很可能继续对话，重置该实例的轮询退避
+                            message_listener.mark_instance_active(instance_id)
+                            return True, "发送成功"
+
+                        # 如果失败，等待一段时间后重试
+                        logger.warning(f"发送消息失败，将在 {self._retry_interval} 秒后重试 ({attempt+1}/{self._retry_count})")
+                        await asyncio.sleep(self._retry_interval)
+                    except Exception as e:
+                        logger.error(f"发送消息时发生异常: {e}")
+                        await asyncio.sleep(self._retry_interval)
+            finally:
+                self._send_lanes[instance_id].release()
+        finally:
+            self._lane_waiting[instance_id] -= 1
 
         return False, f"发送消息失败，已重试 {self._retry_count} 次"
 
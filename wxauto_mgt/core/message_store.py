@@ -10,6 +10,7 @@ import time
 from typing import Dict, List, Optional, Any
 
 from ..data.db_manager import db_manager
+from .domain_events import domain_events, DomainEventType
 
 logger = logging.getLogger(__name__)
 
@@ -49,6 +50,14 @@ class MessageStore:
             # 保存到数据库
             await db_manager.insert('messages', message_data)
             logger.debug(f"消息已保存: {message.get('message_id')}")
+
+            domain_events.publish(
+                DomainEventType.MESSAGE_SAVED,
+                instance_id=instance_id,
+                chat_name=message_data['chat_name'],
+                message_id=message_data['message_id'],
+                create_time=message_data['create_time']
+            )
             return True
         except Exception as e:
             logger.error(f"保存消息失败: {str(e)}")
@@ -0,0 +1,323 @@
+"""
+消息链路追踪模块
+
+记录每条消息在处理流水线各阶段的耗时：
+MessageListener（获取、过滤、下载附件、保存）→ MessageDeliveryService（排队、规则匹配、
+平台调用、发送回复、状态更新）。
+
+每条消息只保存单调时钟时间戳列表，处理结束后把各阶段耗时汇总到指标注册表的直方图中，
+超过耗时预算的消息写入慢消息日志，并记录超出预算最多的阶段。
+"""
+
+import logging
+import time
+import zlib
+from collections import OrderedDict, deque
+from typing import Any, Dict, List, Optional, Tuple
+
+from wxauto_mgt.utils.metrics_registry import metrics_registry
+
+logger = logging.getLogger('wxauto_mgt')
+
+# 流水线阶段（按处理顺序）
+STAGES = ('fetch', 'filter', 'download', 'save', 'queue', 'match', 'platform', 'reply', 'status')
+
+# 各阶段耗时预算（秒），超出预算的消息记入慢消息日志
+DEFAULT_STAGE_BUDGETS = {
+    'fetch': 3.0,
+    'filter': 0.1,
+    'download': 5.0,
+    'save': 0.5,
+    'queue': 10.0,
+    'match': 0.5,
+    'platform': 20.0,
+    'reply': 10.0,
+    'status': 0.5,
+}
+
+message_stage_seconds = metrics_registry.histogram(
+    "message_stage_seconds", "消息在各处理阶段的耗时（秒）", ("stage",))
+message_total_seconds = metrics_registry.histogram(
+    "message_total_seconds", "消息从获取到处理结束的总耗时（秒）", ("outcome",))
+
+
+class MessageTrace:
+    """单条消息的追踪记录"""
+
+    __slots__ = ('message_id', 'instance_id', 'chat_name', 'started', 'marks')
+
+    def __init__(self, message_id: str, instance_id: str, chat_name: str, started: float):
+        self.message_id = message_id
+        self.instance_id = instance_id
+        self.chat_name = chat_name
+        self.started = started
+        self.marks: List[Tuple[str, float]] = []  # (阶段, 阶段结束时的单调时钟时间)
+
+    def stage_durations(self) -> List[Tuple[str, float]]:
+        """
+        计算各阶段耗时
+
+        Returns:
+            List[Tuple[str, float]]: (阶段, 耗时秒数) 列表，按处理顺序排列
+        """
+        durations = []
+        previous = self.started
+        for stage, at in self.marks:
+            durations.append((stage, max(0.0, at - previous)))
+            previous = at
+        return durations
+
+    def last_time(self) -> float:
+        """最后一个阶段结束的时间"""
+        return self.marks[-1][1] if self.marks else self.started
+
+    def next_stage(self) -> str:
+        """下一个（尚未完成的）阶段名称"""
+        if not self.marks:
+            return STAGES[0]
+        last = self.marks[-1][0]
+        try:
+            index = STAGES.index(last)
+        except ValueError:
+            return 'unknown'
+        return STAGES[index + 1] if index + 1 < len(STAGES) else 'unknown'
+
+    def to_dict(self, now: Optional[float] = None) -> Dict[str, Any]:
+        """转换为字典"""
+        stages = self.stage_durations()
+        end = self.last_time() if now is None else now
+        return {
+            'message_id': self.message_id,
+            'instance_id': self.instance_id,
+            'chat_name': self.chat_name,
+            'total': round(end - self.started, 4),
+            'stages': {stage: round(duration, 4) for stage, duration in stages},
+        }
+
+
+class MessageTracer:
+    """消息链路追踪器"""
+
+    def __init__(self, sample_rate: float = 1.0, max_active: int = 2000, max_recent: int = 500,
+                 max_slow: int = 200, slow_threshold: float = 30.0):
+        """
+        初始化追踪器
+
+        Args:
+            sample_rate: 采样比例（0-1），按消息ID哈希采样，同一消息在各模块的采样结果一致
+            max_active: 最多同时追踪的消息数量，超出时丢弃最早的追踪记录
+            max_recent: 保留最近处理结束的追踪记录数量
+            max_slow: 慢消息日志最大条数
+            slow_threshold: 总耗时超过该值（秒）的消息记为慢消息
+        """
+        self.sample_rate = sample_rate
+        self.max_active = max_active
+        self.slow_threshold = slow_threshold
+        self.stage_budgets: Dict[str, float] = dict(DEFAULT_STAGE_BUDGETS)
+
+        self._active: "OrderedDict[str, MessageTrace]" = OrderedDict()
+        self._recent: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._max_recent = max_recent
+        self._slow_messages = deque(maxlen=max_slow)
+        self._stats = {'traced': 0, 'finished': 0, 'discarded': 0, 'evicted': 0, 'slow': 0}
+
+    def _sampled(self, message_id: str) -> bool:
+        """判断消息是否被采样"""
+        if not message_id:
+            return False
+        if self.sample_rate >= 1:
+            return True
+        if self.sample_rate <= 0:
+            return False
+        return zlib.crc32(str(message_id).encode('utf-8')) % 10000 < self.sample_rate * 10000
+
+    def begin(self, message_id: str, instance_id: str = "", chat_name: str = "",
+              started: Optional[float] = None) -> Optional[MessageTrace]:
+        """
+        开始追踪一条消息
+
+        Args:
+            message_id: 消息ID
+            instance_id: 实例ID
+            chat_name: 聊天对象名称
+            started: 开始时间（time.perf_counter()），默认为当前时间
+
+        Returns:
+            Optional[MessageTrace]: 追踪记录，未被采样时返回None
+        """
+        if not self._sampled(message_id):
+            return None
+
+        trace = MessageTrace(message_id, instance_id, chat_name,
+                             time.perf_counter() if started is None else started)
+        self._active[message_id] = trace
+        self._active.move_to_end(message_id)
+        self._stats['traced'] += 1
+
+        while len(self._active) > self.max_active:
+            self._active.popitem(last=False)
+            self._stats['evicted'] += 1
+        return trace
+
+    def mark(self, message_id: str, stage: str, at: Optional[float] = None):
+        """
+        记录消息完成某个阶段
+
+        消息没有追踪记录时（例如程序重启后投递的历史消息、重试的消息）从当前时间开始追踪。
+
+        Args:
+            message_id: 消息ID
+            stage: 阶段名称
+            at: 阶段结束时间（time.perf_counter()），默认为当前时间
+        """
+        trace = self._active.get(message_id)
+        if trace is None:
+            trace = self.begin(message_id, started=at)
+            if trace is None:
+                return
+        trace.marks.append((stage, time.perf_counter() if at is None else at))
+
+    def discard(self, message_id: str):
+        """
+        放弃追踪消息（消息被过滤或保存失败）
+
+        Args:
+            message_id: 消息ID
+        """
+        if self._active.pop(message_id, None) is not None:
+            self._stats['discarded'] += 1
+
+    def finish(self, message_id: str, outcome: str = "ok"):
+        """
+        结束追踪消息：汇总各阶段耗时，检查耗时预算
+
+        Args:
+            message_id: 消息ID
+            outcome: 处理结果（ok、failed、timeout等）
+        """
+        trace = self._active.pop(message_id, None)
+        if trace is None:
+            return
+
+        now = time.perf_counter()
+        stages = trace.stage_durations()
+        # 未正常结束时，把最后一个阶段之后的时间计入下一个阶段
+        if outcome != "ok" and now > trace.last_time():
+            stages.append((trace.next_stage(), now - trace.last_time()))
+        total = now - trace.started if outcome != "ok" else trace.last_time() - trace.started
+
+        for stage, duration in stages:
+            message_stage_seconds.observe(duration, stage=stage)
+        message_total_seconds.observe(total, outcome=outcome)
+        self._stats['finished'] += 1
+
+        record = {
+            'message_id': trace.message_id,
+            'instance_id': trace.instance_id,
+            'chat_name': trace.chat_name,
+            'outcome': outcome,
+            'total': round(total, 4),
+            'stages': {stage: round(duration, 4) for stage, duration in stages},
+            'finished_at': time.time(),
+        }
+        self._recent[message_id] = record
+        self._recent.move_to_end(message_id)
+        while len(self._recent) > self._max_recent:
+            self._recent.popitem(last=False)
+
+        self._check_budget(record, stages, total)
+
+    def _check_budget(self, record: Dict[str, Any], stages: List[Tuple[str, float]], total: float):
+        """检查耗时预算，超出时记入慢消息日志"""
+        worst_stage = None
+        worst_ratio = 1.0
+        for stage, duration in stages:
+            budget = self.stage_budgets.get(stage)
+            if budget and duration / budget > worst_ratio:
+                worst_stage, worst_ratio = stage, duration / budget
+
+        if worst_stage is None and total <= self.slow_threshold:
+            return
+
+        if worst_stage is None:
+            # 总耗时超限但没有单个阶段超出预算，记录耗时最长的阶段
+            worst_stage = max(stages, key=lambda item: item[1])[0] if stages else 'unknown'
+
+        slow = dict(record)
+        slow['slow_stage'] = worst_stage
+        slow['slow_stage_seconds'] = record['stages'].get(worst_stage, 0.0)
+        slow['slow_stage_budget'] = self.stage_budgets.get(worst_stage)
+        self._slow_messages.append(slow)
+        self._stats['slow'] += 1
+
+        logger.warning(
+            f"慢消息: ID={record['message_id']}, 聊天={record['chat_name']}, 结果={record['outcome']}, "
+            f"总耗时 {total:.2f} 秒, 超时阶段 {worst_stage} ({slow['slow_stage_seconds']:.2f} 秒), "
+            f"各阶段: {record['stages']}"
+        )
+
+    def get_trace(self, message_id: str) -> Optional[Dict[str, Any]]:
+        """
+        获取单条消息的阶段耗时
+
+        Args:
+            message_id: 消息ID
+
+        Returns:
+            Optional[Dict[str, Any]]: 追踪记录（处理中的消息包含 in_progress 标记），不存在时返回None
+        """
+        trace = self._active.get(message_id)
+        if trace is not None:
+            result = trace.to_dict(now=time.perf_counter())
+            result['in_progress'] = True
+            result['current_stage'] = trace.next_stage()
+            return result
+        record = self._recent.get(message_id)
+        return dict(record) if record else None
+
+    def get_stage_stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        获取各阶段耗时统计
+
+        Returns:
+            Dict[str, Dict[str, float]]: 阶段 -> count、avg、min、max、p50、p95、p99
+        """
+        stats = {}
+        for stage in STAGES:
+            summary = message_stage_seconds.summary(stage=stage)
+            if summary:
+                stats[stage] = summary
+        return stats
+
+    def get_total_stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        获取端到端总耗时统计
+
+        Returns:
+            Dict[str, Dict[str, float]]: 处理结果 -> 统计摘要
+        """
+        return {outcome: message_total_seconds.summary(outcome=outcome)
+                for (outcome,) in message_total_seconds.label_values()}
+
+    def get_slow_messages(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        获取最近的慢消息
+
+        Args:
+            limit: 返回数量
+
+        Returns:
+            List[Dict[str, Any]]: 慢消息记录，最新的在前
+        """
+        return list(self._slow_messages)[-limit:][::-1]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取追踪器自身的统计信息"""
+        stats = dict(self._stats)
+        stats['active'] = len(self._active)
+        stats['sample_rate'] = self.sample_rate
+        return stats
+
+
+# 创建全局实例
+message_tracer = MessageTracer()
@@ -0,0 +1,408 @@
+"""
+性能指标存储模块
+
+按时间序列保存实例性能指标：
+- 热数据：每个 (实例ID, 指标类型) 在内存中保留最近的采样点（环形缓冲区）
+- 原始数据：performance_metrics 表，批量写入
+- 聚合数据：performance_metrics_rollup 表，按 1分钟/1小时/1天 聚合为 min/max/avg/p95
+内存中只累积当前分钟的采样值，每个分钟桶结束时同时合并进所在小时和天的聚合行，
+写入时与已有行合并（累加数量、取最小/最大值、按数量加权平均），重启后不会覆盖已有聚合。
+每一层按各自的保留时间清理，历史查询根据时间跨度选择合适的数据层。
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from wxauto_mgt.data.db_manager import db_manager
+from wxauto_mgt.utils.metrics_registry import metrics_registry
+
+logger = logging.getLogger('wxauto_mgt')
+
+SeriesKey = Tuple[str, str]  # (实例ID, 指标类型)
+
+# 聚合粒度（秒）
+RESOLUTION_MINUTE = 60
+RESOLUTION_HOUR = 3600
+RESOLUTION_DAY = 86400
+ROLLUP_RESOLUTIONS = (RESOLUTION_MINUTE, RESOLUTION_HOUR, RESOLUTION_DAY)
+
+# 聚合行合并写入：p95 无法由分钟聚合精确合成，按数量加权平均近似
+ROLLUP_UPSERT_SQL = (
+    "INSERT INTO performance_metrics_rollup "
+    "(instance_id, metric_type, resolution, bucket_time, count, min_value, max_value, avg_value, p95_value) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+    "ON CONFLICT(instance_id, metric_type, resolution, bucket_time) DO UPDATE SET "
+    "count = count + excluded.count, "
+    "min_value = MIN(min_value, excluded.min_value), "
+    "max_value = MAX(max_value, excluded.max_value), "
+    "avg_value = (avg_value * count + excluded.avg_value * excluded.count) / (count + excluded.count), "
+    "p95_value = (p95_value * count + excluded.p95_value * excluded.count) / (count + excluded.count)"
+)
+
+# 各数据层的默认保留时间（秒），'raw' 为原始数据
+DEFAULT_RETENTION = {
+    'raw': 2 * 86400,
+    RESOLUTION_MINUTE: 7 * 86400,
+    RESOLUTION_HOUR: 90 * 86400,
+    RESOLUTION_DAY: 2 * 365 * 86400,
+}
+
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    """
+    计算一组采样值的聚合结果
+
+    Args:
+        values: 采样值列表（非空）
+
+    Returns:
+        Dict[str, float]: count、min、max、avg、p95
+    """
+    ordered = sorted(values)
+    count = len(ordered)
+    return {
+        'count': count,
+        'min': ordered[0],
+        'max': ordered[-1],
+        'avg': sum(ordered) / count,
+        'p95': ordered[min(count - 1, int(count * 0.95))],
+    }
+
+
+class MetricsStore:
+    """性能指标时间序列存储"""
+
+    def __init__(self, hot_size: int = 240, flush_interval: float = 5, flush_batch_size: int = 500,
+                 retention: Optional[Dict] = None, prune_interval: int = 3600):
+        """
+        初始化指标存储
+
+        Args:
+            hot_size: 每个指标在内存中保留的最近采样点数量
+            flush_interval: 批量写入间隔（秒）
+            flush_batch_size: 待写入的采样点达到该数量时立即写入
+            retention: 各数据层的保留时间（秒），未指定的层使用默认值
+            prune_interval: 清理过期数据的间隔（秒）
+        """
+        self.hot_size = hot_size
+        self.flush_interval = flush_interval
+        self.flush_batch_size = flush_batch_size
+        self.retention = {**DEFAULT_RETENTION, **(retention or {})}
+        self.prune_interval = prune_interval
+
+        # 热数据：(实例ID, 指标类型) -> [(时间戳, 值)]
+        self._hot: Dict[SeriesKey, Deque[Tuple[int, float]]] = {}
+        # 正在累积的分钟聚合桶：(实例ID, 指标类型) -> (桶开始时间, 采样值列表)
+        self._open_buckets: Dict[SeriesKey, Tuple[int, List[float]]] = {}
+
+        # 待写入数据库的原始采样点和聚合结果
+        self._pending_samples: List[Tuple[str, str, float, int]] = []
+        self._pending_rollups: List[Tuple] = []
+        metrics_registry.gauge("metrics_store_pending_writes", "等待写入数据库的指标样本和汇总数量").set_function(
+            lambda: len(self._pending_samples) + len(self._pending_rollups))
+        self._flush_task: Optional[asyncio.Task] = None
+        self._urgent_flush_task: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+        self._last_prune = 0.0
+
+        self._stats = {
+            'samples': 0,
+            'flushes': 0,
+            'rows_written': 0,
+            'rollups_written': 0,
+            'hot_queries': 0,
+            'db_queries': 0,
+        }
+
+    # ---- 写入 ----
+
+    def record(self, instance_id: str, metric_type: str, value: Any, timestamp: Optional[int] = None):
+        """
+        记录一个采样点（立即进入热数据和聚合桶，数据库批量写入）
+
+        Args:
+            instance_id: 实例ID
+            metric_type: 指标类型
+            value: 指标值，无法转换为数字时忽略
+            timestamp: 采样时间戳，默认为当前时间
+        """
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            logger.debug(f"忽略无法转换为数字的指标值: {instance_id} - {metric_type} = {value!r}")
+            return
+
+        timestamp = int(timestamp if timestamp is not None else time.time())
+        key = (instance_id, metric_type)
+
+        hot = self._hot.get(key)
+        if hot is None:
+            hot = self._hot[key] = deque(maxlen=self.hot_size)
+        hot.append((timestamp, value))
+
+        self._add_to_bucket(key, value, timestamp)
+
+        self._pending_samples.append((instance_id, metric_type, value, timestamp))
+        self._stats['samples'] += 1
+        self._schedule_flush()
+
+    def record_many(self, instance_id: str, metrics: Dict[str, Any], timestamp: Optional[int] = None):
+        """
+        记录同一时刻的多个指标
+
+        Args:
+            instance_id: 实例ID
+            metrics: 指标类型到指标值的映射
+            timestamp: 采样时间戳，默认为当前时间
+        """
+        timestamp = int(timestamp if timestamp is not None else time.time())
+        for metric_type, value in metrics.items():
+            self.record(instance_id, metric_type, value, timestamp)
+
+    def _add_to_bucket(self, key: SeriesKey, value: float, timestamp: int):
+        """把采样值加入分钟聚合桶，进入新的分钟时结束上一个桶"""
+        bucket_start = timestamp - timestamp % RESOLUTION_MINUTE
+        bucket = self._open_buckets.get(key)
+
+        if bucket is not None and bucket[0] != bucket_start:
+            self._queue_rollup(key, bucket)
+            bucket = None
+
+        if bucket is None:
+            bucket = self._open_buckets[key] = (bucket_start, [])
+        bucket[1].append(value)
+
+    def _queue_rollup(self, key: SeriesKey, bucket: Tuple[int, List[float]]):
+        """把一个分钟桶的聚合结果加入待写入队列，同时合并进所在的小时和天聚合"""
+        instance_id, metric_type = key
+        bucket_start, values = bucket
+        if not values:
+            return
+        summary = summarize(values)
+        for resolution in ROLLUP_RESOLUTIONS:
+            self._pending_rollups.append((
+                instance_id, metric_type, resolution, bucket_start - bucket_start % resolution,
+                summary['count'], summary['min'], summary['max'], summary['avg'], summary['p95']
+            ))
+
+    def _schedule_flush(self):
+        """安排一次批量写入，待写入数据过多时立即写入"""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+
+        if len(self._pending_samples) >= self.flush_batch_size:
+            if self._urgent_flush_task is None or self._urgent_flush_task.done():
+                self._urgent_flush_task = loop.create_task(self.flush())
+        elif self._flush_task is None or self._flush_task.done():
+            self._flush_task = loop.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        """等待一个写入间隔后批量写入"""
+        await asyncio.sleep(self.flush_interval)
+        await self.flush()
+
+    async def flush(self, include_open_buckets: bool = False):
+        """
+        把待写入的采样点和聚合结果批量写入数据库
+
+        Args:
+            include_open_buckets: 是否同时写入尚未结束的聚合桶（停止服务时使用）
+        """
+        async with self._flush_lock:
+            if include_open_buckets:
+                # 已写入的部分不再保留，之后的采样会作为新的部分合并进同一聚合行
+                for key, bucket in self._open_buckets.items():
+                    self._queue_rollup(key, bucket)
+                self._open_buckets.clear()
+
+            samples, self._pending_samples = self._pending_samples, []
+            rollups, self._pending_rollups = self._pending_rollups, []
+            if not samples and not rollups:
+                return
+
+            try:
+                if samples:
+                    await db_manager.executemany(
+                        "INSERT INTO performance_metrics (instance_id, metric_type, value, create_time) "
+                        "VALUES (?, ?, ?, ?)",
+                        samples
+                    )
+                if rollups:
+                    await db_manager.executemany(ROLLUP_UPSERT_SQL, rollups)
+                self._stats['flushes'] += 1
+                self._stats['rows_written'] += len(samples)
+                self._stats['rollups_written'] += len(rollups)
+                logger.debug(f"性能指标批量写入: 采样点 {len(samples)} 个, 聚合结果 {len(rollups)} 个")
+            except Exception as e:
+                logger.error(f"性能指标批量写入失败: {e}")
+                # 放回队列，下次写入时重试
+                self._pending_samples[:0] = samples
+                self._pending_rollups[:0] = rollups
+                return
+
+            if time.time() - self._last_prune >= self.prune_interval:
+                await self.prune()
+
+    async def prune(self):
+        """按各数据层的保留时间删除过期数据"""
+        now = int(time.time())
+        self._last_prune = time.time()
+        try:
+            await db_manager.execute(
+                "DELETE FROM performance_metrics WHERE create_time < ?",
+                (now - self.retention['raw'],)
+            )
+            for resolution in ROLLUP_RESOLUTIONS:
+                await db_manager.execute(
+                    "DELETE FROM performance_metrics_rollup WHERE resolution = ? AND bucket_time < ?",
+                    (resolution, now - self.retention[resolution])
+                )
+        except Exception as e:
+            logger.error(f"清理过期性能指标失败: {e}")
+
+    # ---- 查询 ----
+
+    async def query(self, instance_id: str, metric_type: str, start_time: Optional[int] = None,
+                    end_time: Optional[int] = None, limit: int = 100) -> List[Dict]:
+        """
+        查询指标历史数据，按时间倒序返回
+
+        根据时间跨度选择数据层：热数据覆盖时直接从内存返回，
+        原始数据保留期内查询 performance_metrics，更早的数据依次使用 1分钟/1小时/1天 聚合。
+        聚合数据的 value 为平均值，并附带 min/max/p95/count。
+
+        Args:
+            instance_id: 实例ID
+            metric_type: 指标类型
+            start_time: 开始时间戳
+            end_time: 结束时间戳
+            limit: 返回记录数量限制
+
+        Returns:
+            List[Dict]: 指标历史数据列表
+        """
+        now = int(time.time())
+        hot_rows = self._query_hot(instance_id, metric_type, start_time, end_time, limit)
+        if hot_rows is not None:
+            self._stats['hot_queries'] += 1
+            return hot_rows
+
+        self._stats['db_queries'] += 1
+        oldest = start_time if start_time is not None else now
+        age = now - oldest
+        if age <= self.retention['raw']:
+            return await self._query_raw(instance_id, metric_type, start_time, end_time, limit)
+
+        for resolution in ROLLUP_RESOLUTIONS:
+            if age <= self.retention[resolution] or resolution == RESOLUTION_DAY:
+                return await self._query_rollup(instance_id, metric_type, resolution, start_time, end_time, limit)
+        return []
+
+    def _query_hot(self, instance_id: str, metric_type: str, start_time: Optional[int],
+                   end_time: Optional[int], limit: int) -> Optional[List[Dict]]:
+        """
+        从热数据查询，热数据不能完整覆盖查询范围时返回None
+
+        Returns:
+            Optional[List[Dict]]: 查询结果
+        """
+        hot = self._hot.get((instance_id, metric_type))
+        if not hot:
+            return None
+
+        rows = []
+        for timestamp, value in reversed(hot):
+            if end_time is not None and timestamp > end_time:
+                continue
+            if start_time is not None and timestamp < start_time:
+                break
+            rows.append({
+                'instance_id': instance_id,
+                'metric_type': metric_type,
+                'value': value,
+                'create_time': timestamp
+            })
+            if len(rows) >= limit:
+                return rows
+
+        # 热数据的起点晚于查询起点时，更早的数据只在数据库中
+        covers_start = start_time is not None and hot[0][0] <= start_time
+        return rows if covers_start else None
+
+    async def _query_raw(self, instance_id: str, metric_type: str, start_time: Optional[int],
+                         end_time: Optional[int], limit: int) -> List[Dict]:
+        """查询原始数据"""
+        conditions = ["instance_id = ?", "metric_type = ?"]
+        params: List[Any] = [instance_id, metric_type]
+        if start_time:
+            conditions.append("create_time >= ?")
+            params.append(start_time)
+        if end_time:
+            conditions.append("create_time <= ?")
+            params.append(end_time)
+        params.append(limit)
+
+        sql = f"""
+            SELECT * FROM performance_metrics
+            WHERE {' AND '.join(conditions)}
+            ORDER BY create_time DESC
+            LIMIT ?
+        """
+        return await db_manager.fetchall(sql, tuple(params))
+
+    async def _query_rollup(self, instance_id: str, metric_type: str, resolution: int,
+                            start_time: Optional[int], end_time: Optional[int], limit: int) -> List[Dict]:
+        """查询聚合数据"""
+        conditions = ["instance_id = ?", "metric_type = ?", "resolution = ?"]
+        params: List[Any] = [instance_id, metric_type, resolution]
+        if start_time:
+            conditions.append("bucket_time >= ?")
+            params.append(start_time - start_time % resolution)
+        if end_time:
+            conditions.append("bucket_time <= ?")
+            params.append(end_time)
+        params.append(limit)
+
+        sql = f"""
+            SELECT instance_id, metric_type, resolution, bucket_time AS create_time, count,
+                   min_value AS min, max_value AS max, avg_value AS value, p95_value AS p95
+            FROM performance_metrics_rollup
+            WHERE {' AND '.join(conditions)}
+            ORDER BY bucket_time DESC
+            LIMIT ?
+        """
+        return await db_manager.fetchall(sql, tuple(params))
+
+    def get_latest(self, instance_id: str, metric_type: str) -> Optional[Tuple[int, float]]:
+        """
+        获取指标的最新采样点
+
+        Returns:
+            Optional[Tuple[int, float]]: (时间戳, 值)，没有数据时返回None
+        """
+        hot = self._hot.get((instance_id, metric_type))
+        return hot[-1] if hot else None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取统计信息
+
+        Returns:
+            Dict[str, Any]: 写入、查询次数和内存中的数据量
+        """
+        return {
+            **self._stats,
+            'series': len(self._hot),
+            'hot_points': sum(len(points) for points in self._hot.values()),
+            'pending_samples': len(self._pending_samples),
+            'pending_rollups': len(self._pending_rollups),
+        }
+
+
+# 创建全局实例
+metrics_store = MetricsStore()
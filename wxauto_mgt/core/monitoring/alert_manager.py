@@ -5,10 +5,12 @@
 支持多实例管理和多种警报通知方式。
 """
 
+import asyncio
 import json
 import time
 import logging
-from typing import List, Dict, Optional, Any, Union
+from collections import deque
+from typing import List, Dict, Optional, Any, Union, Tuple
 from enum import Enum
 
 from ...data.db_manager import db_manager
@@ -29,18 +31,85 @@ class AlertSeverity(Enum):
     ERROR = "error"      # 错误
     CRITICAL = "critical"  # 严重
 
+def _exceeds(value: float, threshold: float, threshold_type: str) -> bool:
+    """判断指标值是否超过阈值"""
+    if threshold_type == 'gt':
+        return value > threshold
+    if threshold_type == 'lt':
+        return value < threshold
+    if threshold_type == 'gte':
+        return value >= threshold
+    if threshold_type == 'lte':
+        return value <= threshold
+    return False
+
+
+class RuleWindow:
+    """
+    单条警报规则的滑动窗口状态
+
+    保存最近 window_size 个采样是否超过阈值，增量维护超过阈值的次数；
+    超过阈值的次数达到 trigger_count 时规则处于触发状态。
+    """
+
+    __slots__ = ('samples', 'hits', 'firing', 'last_alert_time')
+
+    def __init__(self, window_size: int):
+        self.samples = deque(maxlen=max(1, window_size))
+        self.hits = 0
+        self.firing = False
+        self.last_alert_time = 0.0
+
+    def push(self, exceeded: bool) -> int:
+        """
+        加入一个采样结果
+
+        Args:
+            exceeded: 该采样是否超过阈值
+
+        Returns:
+            int: 窗口内超过阈值的次数
+        """
+        if len(self.samples) == self.samples.maxlen and self.samples[0]:
+            self.hits -= 1
+        self.samples.append(exceeded)
+        if exceeded:
+            self.hits += 1
+        return self.hits
+
+
 class AlertManager:
     """警报管理器，负责管理和处理系统警报"""
     
-    def __init__(self):
-        """初始化警报管理器"""
+    def __init__(self, history_flush_interval: float = 5):
+        """
+        初始化警报管理器
+
+        Args:
+            history_flush_interval: 警报历史批量写入间隔（秒）
+        """
         self._alert_handlers = {}  # 警报处理器字典
+
+        # 启用的规则缓存：(实例ID, 指标类型) -> 规则列表，规则变更时失效
+        self._rule_index: Optional[Dict[Tuple[str, str], List[Dict[str, Any]]]] = None
+        self._rule_load_lock = asyncio.Lock()
+        # 规则ID -> 滑动窗口状态
+        self._windows: Dict[int, RuleWindow] = {}
+
+        # 待写入的警报历史
+        self.history_flush_interval = history_flush_interval
+        self._pending_history: List[Tuple] = []
+        self._history_flush_task: Optional[asyncio.Task] = None
+
+        self._stats = {'evaluations': 0, 'triggered': 0, 'suppressed': 0, 'resolved': 0}
         logger.debug("初始化警报管理器")
     
     async def add_alert_rule(self, instance_id: str, metric_type: str, threshold: float,
                            threshold_type: str, notify_methods: List[str],
                            alert_type: AlertType = AlertType.PERFORMANCE,
-                           severity: AlertSeverity = AlertSeverity.WARNING) -> int:
+                           severity: AlertSeverity = AlertSeverity.WARNING,
+                           window_size: int = 1, trigger_count: int = 1,
+                           suppress_seconds: int = 300) -> int:
         """
         添加新的警报规则
         
@@ -52,6 +121,9 @@ class AlertManager:
             notify_methods: 通知方式列表
             alert_type: 警报类型
             severity: 警报严重程度
+            window_size: 滑动窗口的采样数量（最近M个采样）
+            trigger_count: 窗口内超过阈值的采样达到该数量时触发（N of M）
+            suppress_seconds: 持续触发时重复记录警报的最小间隔（秒）
             
         Returns:
             新添加的规则ID
@@ -67,6 +139,9 @@ class AlertManager:
             "notify_methods": notify_methods_json,
             "alert_type": alert_type.value,
             "severity": severity.value,
+            "window_size": max(1, window_size),
+            "trigger_count": max(1, min(trigger_count, window_size)),
+            "suppress_seconds": suppress_seconds,
             "create_time": now,
             "last_update": now,
             "enabled": True
@@ -74,6 +149,7 @@ class AlertManager:
         
         try:
             rule_id = await db_manager.insert("alert_rules", data)
+            self.invalidate_rules()
             logger.info(f"添加警报规则成功: {rule_id}")
             return rule_id
         except Exception as e:
@@ -112,6 +188,8 @@ class AlertManager:
                 f"UPDATE alert_rules SET {', '.join(f'{k} = ?' for k in update_data.keys())} WHERE {conditions}",
                 list(update_data.values()) + [rule_id]
             )
+            self.invalidate_rules()
+            self._windows.pop(rule_id, None)
             logger.info(f"更新警报规则成功: {rule_id}")
             return True
         except Exception as e:
@@ -172,16 +250,46 @@ class AlertManager:
         """
         try:
             await db_manager.execute("DELETE FROM alert_rules WHERE id = ?", (rule_id,))
+            self.invalidate_rules()
+            self._windows.pop(rule_id, None)
             logger.info(f"删除警报规则成功: {rule_id}")
             return True
         except Exception as e:
             logger.error(f"删除警报规则失败: {e}")
             raise
 
+    def invalidate_rules(self):
+        """使规则缓存失效（规则增删改后调用）"""
+        self._rule_index = None
+
+    async def _get_rule_index(self) -> Dict[Tuple[str, str], List[Dict[str, Any]]]:
+        """获取按 (实例ID, 指标类型) 索引的启用规则，缓存失效时从数据库重新加载"""
+        if self._rule_index is not None:
+            return self._rule_index
+
+        async with self._rule_load_lock:
+            if self._rule_index is None:
+                index: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+                for rule in await self.get_alert_rules():
+                    rule['threshold'] = float(rule['threshold'])
+                    index.setdefault((rule['instance_id'], rule['metric_type']), []).append(rule)
+
+                # 清理已删除或停用规则的窗口状态
+                rule_ids = {rule['id'] for rules in index.values() for rule in rules}
+                for rule_id in [rule_id for rule_id in self._windows if rule_id not in rule_ids]:
+                    del self._windows[rule_id]
+
+                self._rule_index = index
+                logger.debug(f"加载警报规则缓存: {len(rule_ids)} 条")
+        return self._rule_index
+
     async def check_metric_alert(self, instance_id: str, metric_type: str,
                                metric_value: float) -> List[Dict[str, Any]]:
         """
         检查指标是否触发警报
+
+        每条规则维护最近 window_size 个采样的滑动窗口，超过阈值的采样达到 trigger_count 时触发；
+        持续触发期间每 suppress_seconds 秒最多记录一次，恢复正常时记录一条恢复记录。
         
         Args:
             instance_id: 实例ID
@@ -189,40 +297,46 @@ class AlertManager:
             metric_value: 指标值
             
         Returns:
-            触发的警报规则列表
+            本次采样新记录警报的规则列表
         """
-        rules = await self.get_alert_rules(instance_id)
+        rules = (await self._get_rule_index()).get((instance_id, metric_type))
+        if not rules:
+            return []
+
+        now = time.time()
         triggered_rules = []
-        
+
         for rule in rules:
-            if rule['metric_type'] != metric_type:
-                continue
-                
-            threshold = float(rule['threshold'])
-            threshold_type = rule['threshold_type']
-            
-            is_triggered = False
-            if threshold_type == 'gt' and metric_value > threshold:
-                is_triggered = True
-            elif threshold_type == 'lt' and metric_value < threshold:
-                is_triggered = True
-            elif threshold_type == 'gte' and metric_value >= threshold:
-                is_triggered = True
-            elif threshold_type == 'lte' and metric_value <= threshold:
-                is_triggered = True
-                
-            if is_triggered:
-                await self._record_alert(rule['id'], instance_id, metric_type, 
-                                      metric_value, threshold, threshold_type)
+            self._stats['evaluations'] += 1
+            window = self._windows.get(rule['id'])
+            if window is None:
+                window = self._windows[rule['id']] = RuleWindow(rule.get('window_size') or 1)
+
+            hits = window.push(_exceeds(metric_value, rule['threshold'], rule['threshold_type']))
+            if hits >= (rule.get('trigger_count') or 1):
+                suppress_seconds = rule.get('suppress_seconds') or 0
+                if window.firing and now - window.last_alert_time < suppress_seconds:
+                    self._stats['suppressed'] += 1
+                    continue
+                window.firing = True
+                window.last_alert_time = now
+                self._stats['triggered'] += 1
+                self._record_alert(rule['id'], instance_id, metric_type,
+                                   metric_value, rule['threshold'], rule['threshold_type'])
                 triggered_rules.append(rule)
-                
+            elif window.firing:
+                window.firing = False
+                self._stats['resolved'] += 1
+                self._record_alert(rule['id'], instance_id, metric_type,
+                                   metric_value, rule['threshold'], rule['threshold_type'], status="resolved")
+
         return triggered_rules
 
-    async def _record_alert(self, rule_id: int, instance_id: str,
-                          metric_type: str, metric_value: float,
-                          threshold: float, threshold_type: str) -> None:
+    def _record_alert(self, rule_id: int, instance_id: str,
+                      metric_type: str, metric_value: float,
+                      threshold: float, threshold_type: str, status: str = "triggered") -> None:
         """
-        记录警报
+        记录警报（加入待写入队列，批量写入数据库）
         
         Args:
             rule_id: 规则ID
@@ -231,26 +345,51 @@ class AlertManager:
             metric_value: 指标值
             threshold: 阈值
             threshold_type: 阈值类型
+            status: 警报状态（triggered/resolved）
         """
-        now = int(time.time())
-        
-        data = {
-            "rule_id": rule_id,
-            "instance_id": instance_id,
-            "metric_type": metric_type,
-            "metric_value": metric_value,
-            "threshold": threshold,
-            "threshold_type": threshold_type,
-            "status": "triggered",
-            "create_time": now
-        }
-        
+        self._pending_history.append((
+            rule_id, instance_id, metric_type, metric_value,
+            threshold, threshold_type, status, int(time.time())
+        ))
+        logger.info(f"记录警报: rule_id={rule_id}, instance_id={instance_id}, status={status}")
+
+        if self._history_flush_task is None or self._history_flush_task.done():
+            self._history_flush_task = asyncio.create_task(self._flush_history_later())
+
+    async def _flush_history_later(self):
+        """等待一个写入间隔后批量写入警报历史"""
+        await asyncio.sleep(self.history_flush_interval)
+        await self.flush_history()
+
+    async def flush_history(self) -> None:
+        """把待写入的警报历史批量写入数据库"""
+        if not self._pending_history:
+            return
+
+        pending, self._pending_history = self._pending_history, []
         try:
-            await db_manager.insert("alert_history", data)
-            logger.info(f"记录警报成功: rule_id={rule_id}, instance_id={instance_id}")
+            await db_manager.executemany(
+                "INSERT INTO alert_history (rule_id, instance_id, metric_type, metric_value, "
+                "threshold, threshold_type, status, create_time) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                pending
+            )
+            logger.debug(f"批量写入警报历史: {len(pending)} 条")
         except Exception as e:
             logger.error(f"记录警报失败: {e}")
-            raise
+            self._pending_history[:0] = pending
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取统计信息
+
+        Returns:
+            Dict[str, Any]: 评估、触发、抑制和恢复次数，以及待写入的历史记录数
+        """
+        return {
+            **self._stats,
+            'cached_rules': sum(len(rules) for rules in self._rule_index.values()) if self._rule_index else 0,
+            'pending_history': len(self._pending_history)
+        }
 
     async def get_alert_history(self, instance_id: Optional[str] = None,
                               start_time: Optional[int] = None,
@@ -302,6 +441,7 @@ class AlertManager:
         params.append(limit)
         
         try:
+            await self.flush_history()
             history = await db_manager.fetchall(sql, params)
             for record in history:
                 if record['notify_methods']:
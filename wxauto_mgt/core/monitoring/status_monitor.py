@@ -15,6 +15,7 @@ import logging
 
 from ..api_client import WxAutoApiClient, instance_manager
 from ...data.db_manager import db_manager
+from ..metrics_store import metrics_store
 
 logger = logging.getLogger(__name__)
 
@@ -41,14 +42,16 @@ class StatusMonitor:
     状态监控服务，负责监控WxAuto实例的状态和性能指标
     """
     
-    def __init__(self, check_interval: int = 60):
+    def __init__(self, check_interval: int = 60, check_timeout: float = 10):
         """
         初始化状态监控服务
         
         Args:
             check_interval: 状态检查间隔（秒）
+            check_timeout: 单个实例检查的超时时间（秒）
         """
         self.check_interval = check_interval
+        self.check_timeout = check_timeout
         self.running = False
         self._status_task = None
         self._instance_statuses = {}  # 实例状态缓存
@@ -94,7 +97,8 @@ class StatusMonitor:
                 pass
             
             self._status_task = None
-        
+
+        await metrics_store.flush(include_open_buckets=True)
         logger.info("状态监控服务已停止")
     
     async def _status_check_loop(self) -> None:
@@ -119,20 +123,21 @@ class StatusMonitor:
         Returns:
             Dict[str, Dict]: 实例状态字典，键为实例ID
         """
-        results = {}
-        
-        for instance_id, client in instance_manager.get_all_instances().items():
+        instance_ids = list(instance_manager.get_all_instances())
+
+        async def check(instance_id: str) -> Dict:
             try:
-                status_data = await self.check_instance_status(instance_id)
-                results[instance_id] = status_data
+                return await asyncio.wait_for(self.check_instance_status(instance_id), self.check_timeout)
             except Exception as e:
-                logger.error(f"检查实例 {instance_id} 状态失败: {e}")
-                results[instance_id] = {
+                logger.error(f"检查实例 {instance_id} 状态失败: {e!r}")
+                return {
                     "status": InstanceStatus.ERROR,
-                    "error": str(e)
+                    "error": str(e) or type(e).__name__
                 }
-        
-        return results
+
+        # 各实例的检查并发执行，单个实例超时不影响其他实例
+        statuses = await asyncio.gather(*[check(instance_id) for instance_id in instance_ids])
+        return dict(zip(instance_ids, statuses))
             
     async def check_instance_status(self, instance_id: str) -> Dict[str, Any]:
         """
@@ -188,24 +193,11 @@ class StatusMonitor:
             metrics: 性能指标数据
         """
         try:
-            now = int(time.time())
-            
-            # 保存CPU使用率
-            await db_manager.insert("performance_metrics", {
-                "instance_id": instance_id,
-                "metric_type": MetricType.CPU_USAGE.value,
-                "value": metrics.get("cpu_usage", 0),
-                "create_time": now
+            # 写入指标存储，由指标存储批量写入数据库
+            metrics_store.record_many(instance_id, {
+                MetricType.CPU_USAGE.value: metrics.get("cpu_usage", 0),
+                MetricType.MEMORY_USAGE.value: metrics.get("memory_usage", 0)
             })
-            
-            # 保存内存使用率
-            await db_manager.insert("performance_metrics", {
-                "instance_id": instance_id,
-                "metric_type": MetricType.MEMORY_USAGE.value,
-                "value": metrics.get("memory_usage", 0),
-                "create_time": now
-            })
-            
         except Exception as e:
             logger.error(f"保存性能指标失败: {e}")
     
@@ -253,26 +245,11 @@ class StatusMonitor:
             List[Dict]: 指标历史数据列表
         """
         try:
-            conditions = ["instance_id = ?", "metric_type = ?"]
-            params = [instance_id, metric_type.value if isinstance(metric_type, MetricType) else metric_type]
-            
-            if start_time:
-                conditions.append("create_time >= ?")
-                params.append(start_time)
-            
-            if end_time:
-                conditions.append("create_time <= ?")
-                params.append(end_time)
-            
-            sql = f"""
-                SELECT * FROM performance_metrics 
-                WHERE {' AND '.join(conditions)}
-                ORDER BY create_time DESC
-                LIMIT ?
-            """
-            params.append(limit)
-            
-            return await db_manager.fetchall(sql, params)
+            return await metrics_store.query(
+                instance_id,
+                metric_type.value if isinstance(metric_type, MetricType) else metric_type,
+                start_time, end_time, limit
+            )
         except Exception as e:
             logger.error(f"获取性能指标历史失败: {e}")
             return []
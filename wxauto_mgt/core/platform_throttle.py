@@ -0,0 +1,287 @@
+"""
+服务平台限流与熔断模块
+
+为每个服务平台提供独立的保护措施，避免消息突发时无限制地请求上游AI接口：
+- 令牌桶：限制每秒请求数，允许一定的突发量
+- 并发限制：限制同时进行中的请求数
+- 熔断器：连续失败达到阈值后打开，按计划进入半开状态试探恢复
+"""
+
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, Any
+
+logger = logging.getLogger('wxauto_mgt')
+
+
+class TokenBucket:
+    """异步令牌桶"""
+
+    def __init__(self, rate: float, capacity: float):
+        """
+        初始化令牌桶
+
+        Args:
+            rate: 每秒补充的令牌数
+            capacity: 桶容量（允许的最大突发请求数）
+        """
+        self.rate = max(rate, 0.001)
+        self.capacity = max(capacity, 1.0)
+        self._tokens = self.capacity
+        self._last_refill = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        """按经过的时间补充令牌"""
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+    async def acquire(self) -> float:
+        """
+        获取一个令牌，令牌不足时等待
+
+        Returns:
+            float: 等待的秒数
+        """
+        waited = 0.0
+        async with self._lock:
+            self._refill()
+            if self._tokens < 1:
+                wait_time = (1 - self._tokens) / self.rate
+                await asyncio.sleep(wait_time)
+                waited = wait_time
+                self._refill()
+            self._tokens -= 1
+        return waited
+
+
+class CircuitBreaker:
+    """熔断器（closed -> open -> half_open -> closed/open）"""
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int = 5, recovery_timeout: float = 30,
+                 max_recovery_timeout: float = 300):
+        """
+        初始化熔断器
+
+        Args:
+            failure_threshold: 连续失败多少次后打开熔断器
+            recovery_timeout: 打开后多久进入半开状态（秒）
+            max_recovery_timeout: 半开试探连续失败时，恢复等待时间的上限（秒）
+        """
+        self.failure_threshold = failure_threshold
+        self.base_recovery_timeout = recovery_timeout
+        self.max_recovery_timeout = max_recovery_timeout
+
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.recovery_timeout = recovery_timeout
+        self.opened_at = 0.0
+        self.open_count = 0
+        self._probe_in_flight = False
+
+    @property
+    def retry_at(self) -> float:
+        """熔断器允许下一次试探的时间戳（time.time()）"""
+        if self.state != self.OPEN:
+            return time.time()
+        return self.opened_at + self.recovery_timeout
+
+    def allow_request(self) -> bool:
+        """
+        检查当前是否允许请求
+
+        Returns:
+            bool: 是否允许请求
+        """
+        if self.state == self.CLOSED:
+            return True
+
+        if self.state == self.OPEN:
+            if time.time() < self.retry_at:
+                return False
+            self.state = self.HALF_OPEN
+            self._probe_in_flight = False
+
+        # 半开状态只放行一个试探请求
+        if self._probe_in_flight:
+            return False
+        self._probe_in_flight = True
+        return True
+
+    def record_success(self):
+        """记录一次成功请求"""
+        if self.state != self.CLOSED:
+            logger.info("熔断器试探请求成功，恢复正常")
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.recovery_timeout = self.base_recovery_timeout
+        self._probe_in_flight = False
+
+    def record_failure(self):
+        """记录一次失败请求"""
+        self.consecutive_failures += 1
+        self._probe_in_flight = False
+
+        if self.state == self.HALF_OPEN:
+            # 试探失败，延长恢复时间后重新打开
+            self.recovery_timeout = min(self.recovery_timeout * 2, self.max_recovery_timeout)
+            self._open()
+        elif self.state == self.CLOSED and self.consecutive_failures >= self.failure_threshold:
+            self._open()
+
+    def _open(self):
+        """打开熔断器"""
+        self.state = self.OPEN
+        self.opened_at = time.time()
+        self.open_count += 1
+
+
+class PlatformThrottle:
+    """单个服务平台的限流与熔断控制"""
+
+    def __init__(self, platform_id: str, rate: float = 2.0, burst: int = 5,
+                 max_concurrency: int = 3, failure_threshold: int = 5,
+                 recovery_timeout: float = 30):
+        """
+        初始化平台限流器
+
+        Args:
+            platform_id: 平台ID
+            rate: 每秒允许的请求数
+            burst: 允许的突发请求数
+            max_concurrency: 最大并发请求数
+            failure_threshold: 熔断失败阈值
+            recovery_timeout: 熔断恢复等待时间（秒）
+        """
+        self.platform_id = platform_id
+        self.settings = (rate, burst, max_concurrency, failure_threshold, recovery_timeout)
+        self.bucket = TokenBucket(rate, burst)
+        self.breaker = CircuitBreaker(failure_threshold, recovery_timeout)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+        self._stats = {
+            'requests': 0,
+            'failures': 0,
+            'rejected': 0,
+            'throttled': 0,
+            'throttle_wait_total': 0.0
+        }
+
+    def allow_request(self) -> bool:
+        """
+        检查熔断器是否放行
+
+        Returns:
+            bool: 是否允许请求
+        """
+        allowed = self.breaker.allow_request()
+        if not allowed:
+            self._stats['rejected'] += 1
+        return allowed
+
+    @asynccontextmanager
+    async def acquire(self):
+        """
+        在并发限制和令牌桶内执行一次平台请求
+
+        调用方需先通过 allow_request() 检查熔断器，并在请求结束后调用
+        record_success()/record_failure() 上报结果；请求过程中抛出的异常
+        （包括超时取消）会自动计为失败。
+        """
+        async with self._semaphore:
+            waited = await self.bucket.acquire()
+            if waited > 0:
+                self._stats['throttled'] += 1
+                self._stats['throttle_wait_total'] += waited
+            self._stats['requests'] += 1
+            try:
+                yield
+            except BaseException:
+                self.record_failure()
+                raise
+
+    def record_success(self):
+        """上报请求成功"""
+        self.breaker.record_success()
+
+    def record_failure(self):
+        """上报请求失败"""
+        self._stats['failures'] += 1
+        was_open = self.breaker.state == CircuitBreaker.OPEN
+        self.breaker.record_failure()
+        if not was_open and self.breaker.state == CircuitBreaker.OPEN:
+            logger.warning(
+                f"服务平台 {self.platform_id} 连续失败 {self.breaker.consecutive_failures} 次，"
+                f"熔断 {self.breaker.recovery_timeout:.0f} 秒"
+            )
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取统计信息
+
+        Returns:
+            Dict[str, Any]: 统计信息
+        """
+        return {
+            **self._stats,
+            'circuit_state': self.breaker.state,
+            'consecutive_failures': self.breaker.consecutive_failures,
+            'circuit_open_count': self.breaker.open_count,
+            'retry_at': self.breaker.retry_at if self.breaker.state == CircuitBreaker.OPEN else None
+        }
+
+
+class PlatformThrottleManager:
+    """服务平台限流器管理器"""
+
+    def __init__(self):
+        """初始化管理器"""
+        self._throttles: Dict[str, PlatformThrottle] = {}
+
+    def get(self, platform) -> PlatformThrottle:
+        """
+        获取平台对应的限流器，不存在或平台限流配置变更时按配置创建
+
+        平台配置中可选的字段：rate_limit（每秒请求数）、burst、max_concurrency、
+        failure_threshold、recovery_timeout。
+
+        Args:
+            platform: 服务平台实例
+
+        Returns:
+            PlatformThrottle: 限流器
+        """
+        config = getattr(platform, 'config', None) or {}
+        settings = (
+            float(config.get('rate_limit', 2.0)),
+            int(config.get('burst', 5)),
+            int(config.get('max_concurrency', 3)),
+            int(config.get('failure_threshold', 5)),
+            float(config.get('recovery_timeout', 30))
+        )
+
+        throttle = self._throttles.get(platform.platform_id)
+        if throttle is None or throttle.settings != settings:
+            throttle = PlatformThrottle(platform.platform_id, *settings)
+            self._throttles[platform.platform_id] = throttle
+        return throttle
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        获取所有平台的限流统计
+
+        Returns:
+            Dict[str, Dict[str, Any]]: 平台ID -> 统计信息
+        """
+        return {platform_id: throttle.get_stats() for platform_id, throttle in self._throttles.items()}
+
+
+# 创建全局实例
+platform_throttle = PlatformThrottleManager()
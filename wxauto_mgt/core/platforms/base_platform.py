@@ -4,9 +4,11 @@
 定义了所有服务平台必须实现的标准接口。
 """
 
+import asyncio
 import logging
 from abc import ABC, abstractmethod
-from typing import Dict, Any
+from contextlib import nullcontext
+from typing import Callable, Dict, Any, List
 
 logger = logging.getLogger(__name__)
 
@@ -14,6 +16,9 @@ logger = logging.getLogger(__name__)
 class ServicePlatform(ABC):
     """服务平台基类，定义所有平台必须实现的接口"""
 
+    # 是否支持批量处理消息，支持的子类重写process_batch并设置为True
+    supports_batch = False
+
     def __init__(self, platform_id: str, name: str, config: Dict[str, Any]):
         """
         初始化服务平台
@@ -66,6 +71,54 @@ class ServicePlatform(ABC):
         """
         pass
 
+    async def process_batch(self, messages: List[Dict[str, Any]], call_guard: Callable = nullcontext,
+                            item_timeout: float = 30) -> List[Dict[str, Any]]:
+        """
+        批量处理消息（可选实现）
+
+        默认实现逐条调用process_message。支持批量的平台可以一次处理多条消息，
+        投递服务会把同一平台的待投递消息合并为一批调用。
+
+        每次请求上游接口都应在 call_guard() 上下文中进行（投递服务传入平台限流器），
+        单条消息超时或出错时只有该条返回错误结果，不影响同批其他消息。
+
+        Args:
+            messages: 消息数据列表，字段同process_message
+            call_guard: 返回异步上下文管理器的函数，包裹每次上游请求
+            item_timeout: 单条消息的处理超时（秒）
+
+        Returns:
+            List[Dict[str, Any]]: 与messages一一对应的处理结果，格式同process_message；
+                超时的消息返回 {'error': ..., 'timeout': True}
+        """
+        results = []
+        for message in messages:
+            results.append(await self._process_batch_item(message, call_guard, item_timeout))
+        return results
+
+    async def _process_batch_item(self, message: Dict[str, Any], call_guard: Callable,
+                                  item_timeout: float) -> Dict[str, Any]:
+        """
+        在限流上下文和超时内处理批量中的一条消息，超时或出错时返回错误结果
+
+        Args:
+            message: 消息数据
+            call_guard: 返回异步上下文管理器的函数
+            item_timeout: 处理超时（秒）
+
+        Returns:
+            Dict[str, Any]: 处理结果
+        """
+        async with call_guard():
+            try:
+                async with asyncio.timeout(item_timeout):
+                    return await self.process_message(message)
+            except asyncio.TimeoutError:
+                return {"error": f"处理超时 ({item_timeout}秒)", "timeout": True}
+            except Exception as e:
+                logger.error(f"批量处理消息 {message.get('message_id')} 出错: {e}")
+                return {"error": str(e)}
+
     @abstractmethod
     async def test_connection(self) -> Dict[str, Any]:
         """
@@ -429,8 +429,13 @@ class DifyPlatform(ServicePlatform):
                 return {"error": "平台未初始化"}
 
         try:
+            # 合并消息的图片和文件在附件列表中，与文字内容一起发送
+            attachments = message.get('attachments') or []
+
             # 检查是否是文件类型消息
-            is_file_message = 'dify_file' in message or ('local_file_path' in message and message.get('file_type') in ['image', 'file'])
+            is_file_message = not attachments and (
+                'dify_file' in message or ('local_file_path' in message and message.get('file_type') in ['image', 'file'])
+            )
 
             # 构建请求数据
             # 获取发送者和聊天名称，优先使用sender_remark字段
@@ -457,8 +462,24 @@ class DifyPlatform(ServicePlatform):
                 "user": user_id
             }
 
+            # 处理合并消息的附件
+            if attachments:
+                files = []
+                for attachment in attachments:
+                    upload_result = await self.upload_file_to_dify(attachment['local_file_path'])
+                    if 'error' in upload_result:
+                        file_logger.error(f"上传附件到Dify失败: {attachment['local_file_path']}, {upload_result['error']}")
+                        return {"error": f"上传文件失败: {upload_result['error']}"}
+                    files.append({
+                        "type": upload_result.get('dify_file_type', 'document'),
+                        "transfer_method": "local_file",
+                        "upload_file_id": upload_result.get('id')
+                    })
+                request_data["files"] = files
+                file_logger.info(f"已上传 {len(files)} 个附件并添加到请求")
+
             # 处理文件消息
-            if is_file_message:
+            elif is_file_message:
                 file_logger.info(f"检测到文件类型消息，开始处理文件")
                 dify_debug_logger.info(f"检测到文件类型消息，开始处理文件")
 
@@ -0,0 +1,260 @@
+"""
+关键词匹配引擎
+
+在平台初始化时把关键词规则编译为索引，避免每条消息遍历所有规则和关键词：
+- exact（完全匹配）：哈希表，关键词 -> 规则序号
+- contains（包含匹配）：Aho–Corasick 自动机，一次扫描消息找出所有命中的关键词
+- fuzzy（模糊匹配）：二元组（bigram）倒排索引预筛选候选关键词，
+  再用长度上界和 SequenceMatcher 计算相似度
+
+模糊匹配的预筛选不会漏掉结果：两个字符串没有公共二元组时，匹配块都只有1个字符，
+相邻匹配块之间至少隔一个字符，相似度 2M/(la+lb) <= 2M/(3M-1)，
+只有 M <= 2（即 la+lb <= 5）时才可能达到0.8，这部分短关键词单独检查。
+
+多条规则同时命中时返回序号最小（优先级最高）的规则，与逐条遍历规则的结果一致。
+"""
+
+import logging
+from collections import deque
+from difflib import SequenceMatcher
+from typing import Dict, Any, List, Optional, Set
+
+logger = logging.getLogger('wxauto_mgt')
+
+# 模糊匹配相似度阈值
+FUZZY_THRESHOLD = 0.8
+
+
+class AhoCorasick:
+    """Aho–Corasick 多模式匹配自动机，每个模式关联一个规则序号"""
+
+    def __init__(self):
+        """初始化空自动机"""
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # 每个状态命中的最小规则序号（含失败链上的输出）
+        self._output: List[Optional[int]] = [None]
+        self._built = False
+
+    def add(self, pattern: str, rule_index: int):
+        """
+        添加模式
+
+        Args:
+            pattern: 模式字符串（非空）
+            rule_index: 关联的规则序号
+        """
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(None)
+            state = next_state
+
+        current = self._output[state]
+        if current is None or rule_index < current:
+            self._output[state] = rule_index
+        self._built = False
+
+    def build(self):
+        """构建失败指针，并沿失败链合并输出"""
+        queue = deque()
+        for next_state in self._goto[0].values():
+            self._fail[next_state] = 0
+            queue.append(next_state)
+
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+
+                fail_state = self._fail[state]
+                while fail_state and char not in self._goto[fail_state]:
+                    fail_state = self._fail[fail_state]
+                fail_target = self._goto[fail_state].get(char, 0)
+                self._fail[next_state] = fail_target if fail_target != next_state else 0
+
+                inherited = self._output[self._fail[next_state]]
+                if inherited is not None:
+                    current = self._output[next_state]
+                    if current is None or inherited < current:
+                        self._output[next_state] = inherited
+
+        self._built = True
+
+    def search_min(self, text: str, upper_bound: Optional[int] = None) -> Optional[int]:
+        """
+        扫描文本，返回命中模式中最小的规则序号
+
+        Args:
+            text: 待扫描文本
+            upper_bound: 只关心小于该值的规则序号，命中0号规则时提前结束
+
+        Returns:
+            Optional[int]: 最小规则序号，没有命中时返回None
+        """
+        if not self._built:
+            self.build()
+
+        best = upper_bound
+        state = 0
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+
+            rule_index = output[state]
+            if rule_index is not None and (best is None or rule_index < best):
+                best = rule_index
+                if best == 0:
+                    break
+
+        if best == upper_bound:
+            return None
+        return best
+
+
+class KeywordMatcher:
+    """编译后的关键词规则索引"""
+
+    def __init__(self, rules: List[Dict[str, Any]]):
+        """
+        编译关键词规则
+
+        Args:
+            rules: 关键词规则列表（顺序即优先级）
+        """
+        self.rules = rules
+        self._exact: Dict[str, int] = {}
+        self._contains = AhoCorasick()
+        # 包含空关键词的contains规则对任何消息都命中
+        self._contains_always: Optional[int] = None
+        # 模糊匹配关键词：(规则序号, 关键词, 预先构建的SequenceMatcher)
+        self._fuzzy: List[tuple] = []
+        self._fuzzy_bigrams: Dict[str, Set[int]] = {}
+        # 长度不超过4的模糊关键词：关键词长度 -> 序号集合
+        self._fuzzy_short: Dict[int, Set[int]] = {}
+
+        self._compile()
+
+    def _compile(self):
+        """构建各匹配模式的索引"""
+        contains_count = 0
+
+        for rule_index, rule in enumerate(self.rules):
+            keywords = rule.get('keywords', []) or []
+            match_type = rule.get('match_type', 'exact')
+
+            for keyword in keywords:
+                keyword_lower = str(keyword).lower()
+
+                if match_type == 'exact':
+                    self._exact.setdefault(keyword_lower, rule_index)
+                elif match_type == 'contains':
+                    if not keyword_lower:
+                        if self._contains_always is None:
+                            self._contains_always = rule_index
+                        continue
+                    self._contains.add(keyword_lower, rule_index)
+                    contains_count += 1
+                elif match_type == 'fuzzy':
+                    fuzzy_index = len(self._fuzzy)
+                    # SequenceMatcher缓存第二个序列的信息，关键词作为第二个序列只需构建一次
+                    self._fuzzy.append((rule_index, keyword_lower, SequenceMatcher(None, '', keyword_lower)))
+                    for bigram in self._bigrams(keyword_lower):
+                        self._fuzzy_bigrams.setdefault(bigram, set()).add(fuzzy_index)
+                    if len(keyword_lower) <= 4:
+                        self._fuzzy_short.setdefault(len(keyword_lower), set()).add(fuzzy_index)
+
+        self._contains.build()
+        logger.debug(
+            f"关键词索引编译完成: 完全匹配 {len(self._exact)} 个, 包含匹配 {contains_count} 个, "
+            f"模糊匹配 {len(self._fuzzy)} 个"
+        )
+
+    @staticmethod
+    def _bigrams(text: str) -> Set[str]:
+        """获取文本的二元组集合（长度不足2时为空）"""
+        return {text[i:i + 2] for i in range(len(text) - 1)}
+
+    def match(self, content: str) -> Optional[Dict[str, Any]]:
+        """
+        查找消息命中的优先级最高的规则
+
+        Args:
+            content: 消息内容
+
+        Returns:
+            Optional[Dict[str, Any]]: 命中的规则，没有命中时返回None
+        """
+        content_lower = content.lower()
+        best: Optional[int] = None
+
+        # 完全匹配
+        exact_index = self._exact.get(content_lower)
+        if exact_index is not None:
+            best = exact_index
+
+        # 包含匹配
+        if self._contains_always is not None and (best is None or self._contains_always < best):
+            best = self._contains_always
+        if best != 0:
+            contains_index = self._contains.search_min(content_lower, best)
+            if contains_index is not None:
+                best = contains_index
+
+        # 模糊匹配（只检查优先级高于当前结果的候选）
+        if self._fuzzy and best != 0:
+            fuzzy_index = self._match_fuzzy(content_lower, best)
+            if fuzzy_index is not None:
+                best = fuzzy_index
+
+        return self.rules[best] if best is not None else None
+
+    def _match_fuzzy(self, content_lower: str, upper_bound: Optional[int]) -> Optional[int]:
+        """
+        模糊匹配
+
+        Args:
+            content_lower: 小写的消息内容
+            upper_bound: 只检查规则序号小于该值的关键词
+
+        Returns:
+            Optional[int]: 命中的最小规则序号
+        """
+        content_length = len(content_lower)
+        candidates: Set[int] = set()
+
+        # 与消息没有公共二元组的关键词，只有总长度不超过5时才可能命中
+        for keyword_length in range(1, 6 - content_length):
+            candidates.update(self._fuzzy_short.get(keyword_length, ()))
+
+        for bigram in self._bigrams(content_lower):
+            indexes = self._fuzzy_bigrams.get(bigram)
+            if indexes:
+                candidates.update(indexes)
+
+        # 按规则优先级检查候选关键词，命中即可返回
+        for fuzzy_index in sorted(candidates, key=lambda i: self._fuzzy[i][0]):
+            rule_index, keyword_lower, matcher = self._fuzzy[fuzzy_index]
+            if upper_bound is not None and rule_index >= upper_bound:
+                break
+
+            # 相似度上界 2*min(la, lb)/(la+lb)，低于阈值时不可能命中
+            total_length = content_length + len(keyword_lower)
+            if not total_length or 2.0 * min(content_length, len(keyword_lower)) / total_length < FUZZY_THRESHOLD:
+                continue
+
+            matcher.set_seq1(content_lower)
+            if matcher.quick_ratio() >= FUZZY_THRESHOLD and matcher.ratio() >= FUZZY_THRESHOLD:
+                return rule_index
+
+        return None
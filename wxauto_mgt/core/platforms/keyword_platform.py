@@ -11,9 +11,11 @@
 import asyncio
 import logging
 import random
-from typing import Dict, Any, List
+from contextlib import nullcontext
+from typing import Callable, Dict, Any, List
 
 from .base_platform import ServicePlatform
+from .keyword_matcher import KeywordMatcher
 
 # 导入标准日志记录器
 logger = logging.getLogger('wxauto_mgt')
@@ -22,6 +24,8 @@ logger = logging.getLogger('wxauto_mgt')
 class KeywordMatchPlatform(ServicePlatform):
     """关键词匹配平台实现"""
 
+    supports_batch = True
+
     def __init__(self, platform_id: str, name: str, config: Dict[str, Any]):
         """
         初始化关键词匹配平台
@@ -37,6 +41,8 @@ class KeywordMatchPlatform(ServicePlatform):
         # 默认回复时间范围（秒）
         self.min_reply_time = config.get('min_reply_time', 1)
         self.max_reply_time = config.get('max_reply_time', 3)
+        # 编译后的关键词索引，在initialize时构建
+        self._matcher = None
         # 消息发送模式已在父类中初始化
 
     async def initialize(self) -> bool:
@@ -53,6 +59,9 @@ class KeywordMatchPlatform(ServicePlatform):
                 self._initialized = False
                 return False
 
+            # 编译关键词索引
+            self._matcher = KeywordMatcher(self.rules)
+
             # 基本配置验证完成
             logger.info("关键词匹配平台配置验证完成")
             self._initialized = True
@@ -85,116 +94,134 @@ class KeywordMatchPlatform(ServicePlatform):
 
             logger.info(f"关键词匹配平台处理消息: {content[:50]}...")
 
-            # 匹配关键词
-            matched_rule = None
-            for rule in self.rules:
-                # 获取规则信息
-                keywords = rule.get('keywords', [])
-                match_type = rule.get('match_type', 'exact')  # 默认为完全匹配
-
-                # 检查是否匹配
-                if self._match_keywords(content, keywords, match_type):
-                    matched_rule = rule
-                    logger.info(f"找到匹配的关键词规则: {keywords}")
-                    break
-
-            # 如果没有匹配的规则，返回空回复
-            if not matched_rule:
-                logger.info("没有找到匹配的关键词规则")
-                return {"content": ""}
-
-            # 获取回复内容
-            replies = matched_rule.get('replies', [])
-            if not replies:
-                logger.warning("匹配的规则没有设置回复内容")
-                return {"content": ""}
-
-            # 是否随机选择回复
-            is_random_reply = matched_rule.get('is_random_reply', False)
-
-            # 选择回复内容
-            reply_content = ""
-            if is_random_reply and len(replies) > 1:
-                # 随机选择一条回复
-                reply_content = random.choice(replies)
-                logger.info(f"随机选择回复内容: {reply_content[:50]}...")
-            else:
-                # 使用第一条回复
-                reply_content = replies[0]
-                logger.info(f"使用固定回复内容: {reply_content[:50]}...")
-
-            # 计算随机回复时间
-            min_time = matched_rule.get('min_reply_time', self.min_reply_time)
-            max_time = matched_rule.get('max_reply_time', self.max_reply_time)
-
-            # 确保最小时间不大于最大时间
-            if min_time > max_time:
-                min_time, max_time = max_time, min_time
-
-            # 随机延时
-            delay_time = random.uniform(min_time, max_time)
-            logger.info(f"关键词匹配将延时 {delay_time:.2f} 秒后回复")
+            result = self._build_reply(content)
 
             # 延时
-            await asyncio.sleep(delay_time)
+            delay_time = result.get('raw_response', {}).get('delay_time', 0)
+            if delay_time:
+                logger.info(f"关键词匹配将延时 {delay_time:.2f} 秒后回复")
+                await asyncio.sleep(delay_time)
 
             # 返回回复内容
-            return {
-                "content": reply_content,
-                "raw_response": {
-                    "matched_rule": matched_rule,
-                    "delay_time": delay_time
-                }
-            }
+            return result
         except Exception as e:
             logger.error(f"关键词匹配处理消息时出错: {e}")
             return {"error": str(e)}
 
-    def _match_keywords(self, content: str, keywords: List[str], match_type: str) -> bool:
+    async def process_batch(self, messages: List[Dict[str, Any]], call_guard: Callable = nullcontext,
+                            item_timeout: float = 30) -> List[Dict[str, Any]]:
         """
-        匹配关键词
+        批量处理消息：一次完成所有消息的关键词匹配，只等待一次回复延时
+
+        关键词匹配在本地完成，不请求上游接口，整批只占用一次限流配额。
 
         Args:
-            content: 消息内容
-            keywords: 关键词列表
-            match_type: 匹配类型（exact-完全匹配，contains-包含匹配，fuzzy-模糊匹配）
+            messages: 消息数据列表
+            call_guard: 返回异步上下文管理器的函数，包裹整批处理
+            item_timeout: 整批处理的超时（秒）
 
         Returns:
-            bool: 是否匹配
+            List[Dict[str, Any]]: 与messages一一对应的处理结果
         """
-        if not keywords:
-            return False
+        async with call_guard():
+            try:
+                async with asyncio.timeout(item_timeout):
+                    return await self._match_batch(messages)
+            except asyncio.TimeoutError:
+                return [{"error": f"处理超时 ({item_timeout}秒)", "timeout": True} for _ in messages]
+
+    async def _match_batch(self, messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """匹配整批消息并等待回复延时"""
+        if not self._initialized:
+            await self.initialize()
+            if not self._initialized:
+                return [{"error": "平台未初始化"} for _ in messages]
+
+        results = []
+        for message in messages:
+            content = message.get('content', '')
+            if not content:
+                results.append({"error": "消息内容为空"})
+                continue
+            try:
+                results.append(self._build_reply(content))
+            except Exception as e:
+                logger.error(f"关键词匹配处理消息时出错: {e}")
+                results.append({"error": str(e)})
+
+        # 整批回复使用其中最长的随机延时，避免逐条等待
+        delay_time = max(
+            (result.get('raw_response', {}).get('delay_time', 0) for result in results),
+            default=0
+        )
+        matched_count = sum(1 for result in results if result.get('content'))
+        logger.info(f"关键词匹配平台批量处理 {len(messages)} 条消息，匹配 {matched_count} 条")
+        if delay_time:
+            logger.info(f"关键词匹配将延时 {delay_time:.2f} 秒后回复")
+            await asyncio.sleep(delay_time)
 
-        # 转换为小写进行不区分大小写的匹配
-        content_lower = content.lower()
-
-        for keyword in keywords:
-            keyword_lower = keyword.lower()
-
-            # 根据匹配类型进行匹配
-            if match_type == 'exact':
-                # 完全匹配
-                if content_lower == keyword_lower:
-                    return True
-            elif match_type == 'contains':
-                # 包含匹配
-                if keyword_lower in content_lower:
-                    return True
-            elif match_type == 'fuzzy':
-                # 模糊匹配（使用简单的相似度算法）
-                try:
-                    from difflib import SequenceMatcher
-                    similarity = SequenceMatcher(None, content_lower, keyword_lower).ratio()
-                    # 相似度阈值设为0.8
-                    if similarity >= 0.8:
-                        return True
-                except Exception as e:
-                    logger.error(f"模糊匹配算法出错: {e}")
-                    # 降级为包含匹配
-                    if keyword_lower in content_lower:
-                        return True
-
-        return False
+        return results
+
+    def _build_reply(self, content: str) -> Dict[str, Any]:
+        """
+        匹配关键词规则并选择回复内容和延时（不执行延时）
+
+        Args:
+            content: 消息内容
+
+        Returns:
+            Dict[str, Any]: 处理结果，匹配成功时raw_response中包含delay_time
+        """
+        # 匹配关键词（使用编译后的索引，按规则顺序取优先级最高的规则）
+        if self._matcher is None:
+            self._matcher = KeywordMatcher(self.rules)
+        matched_rule = self._matcher.match(content)
+        if matched_rule:
+            logger.info(f"找到匹配的关键词规则: {matched_rule.get('keywords', [])}")
+
+        # 如果没有匹配的规则，返回空回复
+        if not matched_rule:
+            logger.info("没有找到匹配的关键词规则")
+            return {"content": ""}
+
+        # 获取回复内容
+        replies = matched_rule.get('replies', [])
+        if not replies:
+            logger.warning("匹配的规则没有设置回复内容")
+            return {"content": ""}
+
+        # 是否随机选择回复
+        is_random_reply = matched_rule.get('is_random_reply', False)
+
+        # 选择回复内容
+        reply_content = ""
+        if is_random_reply and len(replies) > 1:
+            # 随机选择一条回复
+            reply_content = random.choice(replies)
+            logger.info(f"随机选择回复内容: {reply_content[:50]}...")
+        else:
+            # 使用第一条回复
+            reply_content = replies[0]
+            logger.info(f"使用固定回复内容: {reply_content[:50]}...")
+
+        # 计算随机回复时间
+        min_time = matched_rule.get('min_reply_time', self.min_reply_time)
+        max_time = matched_rule.get('max_reply_time', self.max_reply_time)
+
+        # 确保最小时间不大于最大时间
+        if min_time > max_time:
+            min_time, max_time = max_time, min_time
+
+        # 随机延时
+        delay_time = random.uniform(min_time, max_time)
+
+        return {
+            "content": reply_content,
+            "raw_response": {
+                "matched_rule": matched_rule,
+                "delay_time": delay_time
+            }
+        }
 
     async def test_connection(self) -> Dict[str, Any]:
         """
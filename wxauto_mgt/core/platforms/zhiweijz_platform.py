@@ -8,12 +8,15 @@
 - 错误处理和重试机制
 """
 
+import asyncio
 import logging
 import json
-from typing import Dict, Any, Optional
+from contextlib import nullcontext
+from typing import Callable, Dict, Any, List, Optional
 
 from .base_platform import ServicePlatform
 from ..async_accounting_manager import AsyncAccountingManager
+from ..domain_events import domain_events, DomainEventType
 
 # 导入标准日志记录器
 logger = logging.getLogger('wxauto_mgt')
@@ -21,7 +24,9 @@ logger = logging.getLogger('wxauto_mgt')
 
 class ZhiWeiJZPlatform(ServicePlatform):
     """只为记账服务平台实现"""
-    
+
+    supports_batch = True
+
     def __init__(self, platform_id: str, name: str, config: Dict[str, Any]):
         """
         初始化只为记账平台
@@ -48,6 +53,8 @@ class ZhiWeiJZPlatform(ServicePlatform):
         self.token_refresh_interval = config.get('token_refresh_interval', 300)
         self.request_timeout = config.get('request_timeout', 30)
         self.max_retries = config.get('max_retries', 3)
+        # 批量处理时同时进行的记账请求数
+        self.batch_concurrency = config.get('batch_concurrency', 3)
         
         logger.info(f"只为记账平台初始化: {name} ({platform_id})")
     
@@ -135,6 +142,7 @@ class ZhiWeiJZPlatform(ServicePlatform):
 
             if success:
                 logger.info(f"[记账平台] 记账成功: {result}")
+                domain_events.publish(DomainEventType.ACCOUNTING_RECORDED, platform_id=self.platform_id)
                 return {
                     'success': True,
                     'response': result,
@@ -164,6 +172,38 @@ class ZhiWeiJZPlatform(ServicePlatform):
                 'should_reply': False
             }
 
+    async def process_batch(self, messages: List[Dict[str, Any]], call_guard: Callable = nullcontext,
+                            item_timeout: float = 30) -> List[Dict[str, Any]]:
+        """
+        批量处理记账消息
+
+        记账接口目前只支持单条记录，这里复用同一会话和token，
+        以有限并发提交整批记录，并在提交前统一完成一次登录。
+        每条记录单独限流和超时，超时或失败的记录不影响已提交成功的记录。
+
+        Args:
+            messages: 消息字典列表
+            call_guard: 返回异步上下文管理器的函数，包裹每次记账请求
+            item_timeout: 单条记录的处理超时（秒）
+
+        Returns:
+            List[Dict[str, Any]]: 与messages一一对应的处理结果
+        """
+        if self._initialized and self.accounting_manager and self.accounting_manager.config.auto_login:
+            token_info = self.accounting_manager.token_info
+            if not token_info or not token_info.token or token_info.is_expired():
+                # 先登录一次，避免并发请求各自触发登录
+                await self.accounting_manager.login()
+
+        semaphore = asyncio.Semaphore(max(1, int(self.batch_concurrency)))
+
+        async def process_one(message: Dict[str, Any]) -> Dict[str, Any]:
+            async with semaphore:
+                return await self._process_batch_item(message, call_guard, item_timeout)
+
+        logger.info(f"[记账平台] 批量处理 {len(messages)} 条记账消息，并发数: {self.batch_concurrency}")
+        return await asyncio.gather(*[process_one(message) for message in messages])
+
     def _should_send_reply(self, accounting_result: str) -> bool:
         """
         判断是否应该发送回复（参考旧版代码逻辑）
@@ -0,0 +1,203 @@
+"""
+自适应轮询调度模块
+
+根据各实例的消息活跃度动态调整轮询间隔：
+- 有新消息的实例立即回到最小轮询间隔
+- 连续空轮询的实例按指数退避逐步延长间隔（不超过最大间隔）
+- 为每次调度加入随机抖动，避免多个实例同时请求wxauto
+- 统计节省的轮询次数和因退避增加的预估延迟
+"""
+
+import logging
+import random
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, Tuple, Any
+
+logger = logging.getLogger('wxauto_mgt')
+
+
+@dataclass
+class PollState:
+    """单个轮询目标（轮询类型 + 实例）的调度状态"""
+    interval: float
+    next_due: float
+    last_poll_time: float = 0.0
+    last_activity_time: float = 0.0
+    idle_polls: int = 0
+
+
+class AdaptivePollScheduler:
+    """自适应轮询调度器"""
+
+    def __init__(
+        self,
+        min_interval: float = 5,
+        max_interval: float = 60,
+        backoff_factor: float = 1.5,
+        jitter_ratio: float = 0.1
+    ):
+        """
+        初始化调度器
+
+        Args:
+            min_interval: 最小轮询间隔（秒），活跃实例使用该间隔
+            max_interval: 最大轮询间隔（秒），空闲实例退避的上限
+            backoff_factor: 每次空轮询后间隔的放大倍数
+            jitter_ratio: 随机抖动比例（0.1表示±10%）
+        """
+        self.min_interval = min_interval
+        self.max_interval = max(max_interval, min_interval)
+        self.backoff_factor = max(backoff_factor, 1.0)
+        self.jitter_ratio = jitter_ratio
+
+        self._states: Dict[Tuple[str, str], PollState] = {}
+
+        # 统计信息
+        self._stats = {
+            'polls_performed': 0,
+            'active_polls': 0,
+            'baseline_polls': 0.0,
+            'added_latency_total': 0.0
+        }
+
+    def set_min_interval(self, value: float):
+        """
+        更新最小轮询间隔（与监听器的poll_interval保持一致）
+
+        Args:
+            value: 新的最小轮询间隔（秒）
+        """
+        self.min_interval = value
+        self.max_interval = max(self.max_interval, value)
+        for state in self._states.values():
+            state.interval = max(state.interval, value)
+
+    def _get_state(self, kind: str, instance_id: str) -> PollState:
+        """获取调度状态，不存在时创建（新目标立即到期）"""
+        key = (kind, instance_id)
+        state = self._states.get(key)
+        if state is None:
+            state = PollState(interval=self.min_interval, next_due=0.0)
+            self._states[key] = state
+        return state
+
+    def _with_jitter(self, interval: float) -> float:
+        """为间隔加入随机抖动"""
+        if self.jitter_ratio <= 0:
+            return interval
+        jitter = interval * self.jitter_ratio
+        return max(0.0, interval + random.uniform(-jitter, jitter))
+
+    def is_due(self, kind: str, instance_id: str) -> bool:
+        """
+        检查目标是否到了轮询时间
+
+        Args:
+            kind: 轮询类型（如 main_window、listeners）
+            instance_id: 实例ID
+
+        Returns:
+            bool: 是否应该轮询
+        """
+        return time.time() >= self._get_state(kind, instance_id).next_due
+
+    def record_poll(self, kind: str, instance_id: str, had_activity: bool):
+        """
+        记录一次轮询结果并计算下次轮询时间
+
+        Args:
+            kind: 轮询类型
+            instance_id: 实例ID
+            had_activity: 本次轮询是否获取到新消息
+        """
+        now = time.time()
+        state = self._get_state(kind, instance_id)
+
+        # 与固定间隔相比，这段时间内本应执行的轮询次数
+        if state.last_poll_time:
+            elapsed = now - state.last_poll_time
+            self._stats['baseline_polls'] += elapsed / self.min_interval
+        else:
+            self._stats['baseline_polls'] += 1
+        self._stats['polls_performed'] += 1
+
+        if had_activity:
+            # 退避期间到达的消息平均多等待 (interval - min_interval) / 2
+            self._stats['active_polls'] += 1
+            self._stats['added_latency_total'] += max(0.0, state.interval - self.min_interval) / 2
+            state.last_activity_time = now
+            state.idle_polls = 0
+            state.interval = self.min_interval
+        else:
+            state.idle_polls += 1
+            state.interval = min(state.interval * self.backoff_factor, self.max_interval)
+
+        state.last_poll_time = now
+        state.next_due = now + self._with_jitter(state.interval)
+
+    def mark_active(self, instance_id: str):
+        """
+        标记实例有活动（如新增监听对象、刚发送过消息），所有轮询类型立即回到最小间隔
+
+        Args:
+            instance_id: 实例ID
+        """
+        now = time.time()
+        for (kind, inst_id), state in self._states.items():
+            if inst_id == instance_id:
+                state.interval = self.min_interval
+                state.idle_polls = 0
+                state.last_activity_time = now
+                state.next_due = min(state.next_due, now + self._with_jitter(self.min_interval))
+
+    def seconds_until_next_due(self, kind: str, instance_ids: Iterable[str]) -> float:
+        """
+        计算距离下一个目标到期的秒数
+
+        结果限制在 [1, min_interval] 之间，保证新实例和被重置的目标能及时被轮询。
+
+        Args:
+            kind: 轮询类型
+            instance_ids: 参与调度的实例ID
+
+        Returns:
+            float: 建议的休眠时间（秒）
+        """
+        now = time.time()
+        wait = self.min_interval
+        for instance_id in instance_ids:
+            wait = min(wait, self._get_state(kind, instance_id).next_due - now)
+        return max(1.0, wait)
+
+    def forget(self, instance_id: str):
+        """
+        移除实例的调度状态
+
+        Args:
+            instance_id: 实例ID
+        """
+        for key in [key for key in self._states if key[1] == instance_id]:
+            del self._states[key]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取调度统计信息
+
+        Returns:
+            Dict[str, Any]: 包含执行的轮询数、相对固定间隔节省的轮询数、
+                            平均增加延迟以及各目标当前间隔
+        """
+        performed = self._stats['polls_performed']
+        baseline = self._stats['baseline_polls']
+        active = self._stats['active_polls']
+        return {
+            'polls_performed': performed,
+            'polls_saved': max(0, int(baseline - performed)),
+            'active_polls': active,
+            'avg_added_latency': round(self._stats['added_latency_total'] / active, 3) if active else 0.0,
+            'intervals': {
+                f"{kind}:{instance_id}": round(state.interval, 2)
+                for (kind, instance_id), state in self._states.items()
+            }
+        }
@@ -0,0 +1,195 @@
+"""
+跨事件循环服务桥接模块
+
+核心服务（数据库管理器、消息监听器、平台/规则管理器等）的锁和后台任务都属于主事件循环，
+而Web服务运行在独立线程的事件循环中。该模块把其他线程中的协程提交到主事件循环执行，
+并提供带超时的调用和只读快照缓存，避免Web请求跨事件循环直接操作核心服务的状态。
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger('wxauto_mgt')
+
+
+class ServiceBridge:
+    """跨事件循环服务桥接"""
+
+    def __init__(self, default_timeout: float = 30, max_snapshots: int = 256):
+        """
+        初始化服务桥接
+
+        Args:
+            default_timeout: 默认调用超时时间（秒）
+            max_snapshots: 快照缓存的最大条目数
+        """
+        self.default_timeout = default_timeout
+        self.max_snapshots = max_snapshots
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        # 快照缓存只在主事件循环中访问：key -> (过期时间, 值)
+        self._snapshots: Dict[str, tuple] = {}
+        self._pending: Dict[str, asyncio.Future] = {}
+
+        self._stats = {
+            'calls': 0,
+            'cross_loop_calls': 0,
+            'timeouts': 0,
+            'snapshot_hits': 0,
+            'snapshot_misses': 0
+        }
+
+    def bind_loop(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        """
+        绑定核心服务所在的事件循环（在主事件循环中调用）
+
+        Args:
+            loop: 事件循环，为None时使用当前运行的事件循环
+        """
+        self._loop = loop or asyncio.get_running_loop()
+        logger.info("服务桥接已绑定主事件循环")
+
+    @property
+    def loop(self) -> Optional[asyncio.AbstractEventLoop]:
+        """核心服务所在的事件循环"""
+        return self._loop
+
+    def in_service_loop(self) -> bool:
+        """
+        当前是否运行在核心服务所在的事件循环中
+
+        未绑定事件循环时（例如单独启动Web服务）视为在同一循环中，直接执行。
+
+        Returns:
+            bool: 是否可以直接执行
+        """
+        if self._loop is None:
+            return True
+        try:
+            return asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            return False
+
+    async def call(self, coro: Awaitable, timeout: Optional[float] = None) -> Any:
+        """
+        在核心服务所在的事件循环中执行协程并等待结果
+
+        Args:
+            coro: 要执行的协程
+            timeout: 超时时间（秒），为None时使用默认超时
+
+        Returns:
+            Any: 协程的返回值
+
+        Raises:
+            asyncio.TimeoutError: 执行超时
+            RuntimeError: 主事件循环已关闭
+        """
+        self._stats['calls'] += 1
+
+        if self.in_service_loop():
+            return await coro
+
+        if self._loop.is_closed():
+            coro.close()
+            raise RuntimeError("主事件循环已关闭")
+
+        self._stats['cross_loop_calls'] += 1
+        future = asyncio.run_coroutine_threadsafe(coro, self._loop)
+        try:
+            return await asyncio.wait_for(
+                asyncio.wrap_future(future),
+                timeout if timeout is not None else self.default_timeout
+            )
+        except asyncio.TimeoutError:
+            self._stats['timeouts'] += 1
+            future.cancel()
+            raise
+
+    async def snapshot(self, key: str, factory: Callable[[], Awaitable], ttl: float = 2) -> Any:
+        """
+        获取只读快照，过期时调用factory重新生成
+
+        同一个key的并发请求共享一次生成过程。返回的对象会被多个请求共享，调用方不能修改。
+        必须在核心服务所在的事件循环中调用。
+
+        Args:
+            key: 快照键
+            factory: 生成快照的协程函数
+            ttl: 快照有效期（秒）
+
+        Returns:
+            Any: 快照数据
+        """
+        now = time.monotonic()
+        cached = self._snapshots.get(key)
+        if cached and cached[0] > now:
+            self._stats['snapshot_hits'] += 1
+            return cached[1]
+
+        pending = self._pending.get(key)
+        if pending is not None:
+            self._stats['snapshot_hits'] += 1
+            return await asyncio.shield(pending)
+
+        self._stats['snapshot_misses'] += 1
+        future = asyncio.get_running_loop().create_future()
+        self._pending[key] = future
+        try:
+            value = await factory()
+            self._store_snapshot(key, value, ttl)
+            future.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # 避免没有其他等待者时出现“异常未被获取”的警告
+            future.exception()
+            raise
+        finally:
+            self._pending.pop(key, None)
+
+    def _store_snapshot(self, key: str, value: Any, ttl: float):
+        """保存快照，超过容量时先清理过期条目"""
+        now = time.monotonic()
+        if len(self._snapshots) >= self.max_snapshots:
+            for expired_key in [k for k, (expires, _) in self._snapshots.items() if expires <= now]:
+                del self._snapshots[expired_key]
+            if len(self._snapshots) >= self.max_snapshots:
+                self._snapshots.pop(next(iter(self._snapshots)))
+        self._snapshots[key] = (now + ttl, value)
+
+    def invalidate(self, prefix: Optional[str] = None):
+        """
+        使快照失效
+
+        Args:
+            prefix: 快照键前缀，为None时清空全部快照
+        """
+        if prefix is None:
+            self._snapshots.clear()
+            return
+        for key in [key for key in self._snapshots if key.startswith(prefix)]:
+            del self._snapshots[key]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取统计信息
+
+        Returns:
+            Dict[str, Any]: 调用次数、跨循环调用次数、超时次数和快照命中情况
+        """
+        return {
+            **self._stats,
+            'bound': self._loop is not None,
+            'snapshots': len(self._snapshots)
+        }
+
+
+# 创建全局实例
+service_bridge = ServiceBridge()
@@ -13,8 +13,13 @@ from typing import Dict, List, Any, Optional
 from dataclasses import dataclass, asdict
 from datetime import datetime, timedelta
 
+from wxauto_mgt.utils.metrics_registry import metrics_registry
+
 logger = logging.getLogger(__name__)
 
+service_events_total = metrics_registry.counter("service_events", "服务运行事件次数", ("event",))
+service_errors_total = metrics_registry.counter("service_errors", "服务错误次数", ("service", "error_type"))
+
 @dataclass
 class ServiceStatus:
     """服务状态信息"""
@@ -84,6 +89,7 @@ class ServiceMonitor:
         
         self._error_history.append(error_record)
         self._stats['total_errors'] += 1
+        service_errors_total.inc(service=service_name, error_type=error_type)
         
         # 保持错误历史记录在限制范围内
         if len(self._error_history) > self._max_error_history:
@@ -95,26 +101,31 @@ class ServiceMonitor:
         """记录处理的消息数量"""
         if self._monitoring_enabled:
             self._stats['total_messages_processed'] += 1
+            service_events_total.inc(event="message_processed")
     
     def record_api_call(self):
         """记录API调用次数"""
         if self._monitoring_enabled:
             self._stats['api_calls_made'] += 1
+            service_events_total.inc(event="api_call")
     
     def record_listener_added(self):
         """记录添加的监听对象数量"""
         if self._monitoring_enabled:
             self._stats['listeners_added'] += 1
+            service_events_total.inc(event="listener_added")
     
     def record_listener_removed(self):
         """记录移除的监听对象数量"""
         if self._monitoring_enabled:
             self._stats['listeners_removed'] += 1
+            service_events_total.inc(event="listener_removed")
     
     def record_config_reload(self):
         """记录配置重新加载次数"""
         if self._monitoring_enabled:
             self._stats['config_reloads'] += 1
+            service_events_total.inc(event="config_reload")
     
     async def get_message_listener_status(self) -> ServiceStatus:
         """获取消息监听器状态"""
@@ -3,21 +3,48 @@
 
 该模块定义了服务平台的工厂函数和导入接口。
 具体的平台实现已移动到platforms子目录中。
+
+各平台实现模块（及其依赖的aiohttp、aiofiles等）在第一次创建该类型的平台时才导入，
+避免程序启动时加载所有平台。
 """
 
+import importlib
 import logging
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
 
 # 导入标准日志记录器
 logger = logging.getLogger('wxauto_mgt')
 
-# 导入基类和各平台实现
+# 导入基类
 from .platforms.base_platform import ServicePlatform
-from .platforms.dify_platform import DifyPlatform
-from .platforms.openai_platform import OpenAIPlatform
-from .platforms.keyword_platform import KeywordMatchPlatform
-from .platforms.zhiweijz_platform import ZhiWeiJZPlatform
-from .platforms.coze_platform import CozeServicePlatform
+
+# 平台类型 -> (实现模块, 类名)
+PLATFORM_CLASSES: Dict[str, Tuple[str, str]] = {
+    "dify": (".platforms.dify_platform", "DifyPlatform"),
+    "openai": (".platforms.openai_platform", "OpenAIPlatform"),
+    "keyword": (".platforms.keyword_platform", "KeywordMatchPlatform"),
+    "keyword_match": (".platforms.keyword_platform", "KeywordMatchPlatform"),
+    "zhiweijz": (".platforms.zhiweijz_platform", "ZhiWeiJZPlatform"),
+    "coze": (".platforms.coze_platform", "CozeServicePlatform"),
+}
+
+
+def get_platform_class(platform_type: str):
+    """
+    获取平台类型对应的实现类（按需导入实现模块）
+
+    Args:
+        platform_type: 平台类型
+
+    Returns:
+        Optional[type]: 平台实现类，不支持的类型返回None
+    """
+    entry = PLATFORM_CLASSES.get(platform_type)
+    if entry is None:
+        return None
+    module_name, class_name = entry
+    module = importlib.import_module(module_name, __package__)
+    return getattr(module, class_name)
 
 
 def create_platform(platform_type: str, platform_id: str, name: str, config: Dict[str, Any]) -> Optional[ServicePlatform]:
@@ -33,19 +60,19 @@ def create_platform(platform_type: str, platform_id: str, name: str, config: Dic
     Returns:
         Optional[ServicePlatform]: 服务平台实例
     """
-    if platform_type == "dify":
-        return DifyPlatform(platform_id, name, config)
-    elif platform_type == "openai":
-        return OpenAIPlatform(platform_id, name, config)
-    elif platform_type == "keyword" or platform_type == "keyword_match":
-        return KeywordMatchPlatform(platform_id, name, config)
-    elif platform_type == "zhiweijz":
-        return ZhiWeiJZPlatform(platform_id, name, config)
-    elif platform_type == "coze":
-        return CozeServicePlatform(platform_id, name, config)
-    else:
+    platform_class = get_platform_class(platform_type)
+    if platform_class is None:
         logger.error(f"不支持的平台类型: {platform_type}")
         return None
+    return platform_class(platform_id, name, config)
+
+
+def __getattr__(name: str):
+    """为了向后兼容，按需导出各平台实现类"""
+    for module_name, class_name in PLATFORM_CLASSES.values():
+        if class_name == name:
+            return getattr(importlib.import_module(module_name, __package__), class_name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 # 为了向后兼容，导出所有类
@@ -56,4 +83,4 @@ __all__ = [
     'KeywordMatchPlatform',
     'ZhiWeiJZPlatform',
     'create_platform'
-]
\ No newline at end of file
+]
@@ -8,10 +8,13 @@ import asyncio
 import logging
 import time
 from enum import Enum
-from typing import Dict, Optional, List
+from typing import Dict, Optional, List, Union
 
 from wxauto_mgt.core.api_client import instance_manager
 from wxauto_mgt.data.db_manager import db_manager
+from wxauto_mgt.core.domain_events import domain_events, DomainEventType
+from wxauto_mgt.core.metrics_store import metrics_store
+from wxauto_mgt.utils.metrics_registry import metrics_registry
 
 logger = logging.getLogger(__name__)
 
@@ -29,23 +32,33 @@ class MetricType(Enum):
     MESSAGE_COUNT = "msg_count"    # 消息数量
     UPTIME = "uptime"             # 运行时间
 
+# 状态监控自身的运行指标
+status_check_cycle_seconds = metrics_registry.histogram(
+    "status_check_cycle_seconds", "状态检查周期耗时（秒）")
+status_check_overruns = metrics_registry.counter(
+    "status_check_overruns", "状态检查耗时超过检查间隔的次数")
+
 class StatusMonitor:
     """状态监控器，负责监控实例状态"""
     
-    def __init__(self, check_interval: int = 30):
+    def __init__(self, check_interval: int = 30, check_timeout: float = 10):
         """
         初始化状态监控器
         
         Args:
             check_interval: 状态检查间隔（秒）
+            check_timeout: 单个实例检查的超时时间（秒）
         """
         self.check_interval = check_interval
+        self.check_timeout = check_timeout
         self._status_cache: Dict[str, Dict] = {}
         self._metrics_cache: Dict[str, Dict[str, float]] = {}
         self._running = False
         self._task: Optional[asyncio.Task] = None
         self._lock = asyncio.Lock()
         self._statuses = {}  # 存储每个实例的状态
+        # 检查周期统计：最近一次耗时、超出检查间隔的次数
+        self._cycle_stats = {"cycles": 0, "last_duration": 0.0, "max_duration": 0.0, "overruns": 0}
     
     async def start(self):
         """启动监控"""
@@ -68,52 +81,109 @@ class StatusMonitor:
                 await self._task
             except asyncio.CancelledError:
                 pass
+        await metrics_store.flush(include_open_buckets=True)
         logger.info("状态监控已停止")
     
     async def _monitor_loop(self):
-        """监控循环"""
+        """监控循环，检查耗时计入检查间隔"""
         while self._running:
+            started = time.monotonic()
             try:
                 await self._check_all_instances()
-                await asyncio.sleep(self.check_interval)
             except asyncio.CancelledError:
                 break
             except Exception as e:
                 logger.error(f"状态检查失败: {e}")
-                await asyncio.sleep(self.check_interval)
+            try:
+                await asyncio.sleep(max(0, self.check_interval - (time.monotonic() - started)))
+            except asyncio.CancelledError:
+                break
     
     async def _check_all_instances(self):
-        """检查所有实例状态"""
+        """并发检查所有实例状态，结果汇总后批量写入数据库"""
         instances = instance_manager.get_all_instances()
-        
+        started = time.monotonic()
+
+        # 各实例的检查并发执行，单个实例超时不影响其他实例
+        results = await asyncio.gather(*[
+            self._check_instance_with_metrics(instance_id, api_client)
+            for instance_id, api_client in instances.items()
+        ])
+
+        check_time = time.time()
         async with self._lock:
-            for instance_id, api_client in instances.items():
-                try:
-                    # 检查实例状态
-                    status = await self._check_instance(instance_id, api_client)
-                    
-                    # 更新缓存
-                    self._status_cache[instance_id] = {
-                        "status": status,
-                        "last_check": time.time()
-                    }
-                    
-                    # 获取性能指标
-                    metrics = await self._get_instance_metrics(instance_id, api_client)
-                    if metrics:
-                        self._metrics_cache[instance_id] = metrics
-                    
-                    # 保存到数据库
-                    await self._save_status(instance_id, status)
-                    if metrics:
-                        await self._save_metrics(instance_id, metrics)
-                    
-                except Exception as e:
-                    logger.error(f"检查实例 {instance_id} 状态失败: {e}")
-                    self._status_cache[instance_id] = {
-                        "status": InstanceStatus.ERROR,
-                        "last_check": time.time()
-                    }
+            for instance_id, (status, metrics) in zip(instances, results):
+                previous = self._status_cache.get(instance_id)
+                if previous and previous["status"] != status:
+                    domain_events.publish(
+                        DomainEventType.INSTANCE_STATUS_CHANGED,
+                        instance_id=instance_id,
+                        status=status.value
+                    )
+
+                # 更新缓存
+                self._status_cache[instance_id] = {
+                    "status": status,
+                    "last_check": check_time
+                }
+                if metrics:
+                    self._metrics_cache[instance_id] = metrics
+                    await self._save_metrics(instance_id, metrics)
+
+        # 保存到数据库
+        await self._save_statuses([(instance_id, status) for instance_id, (status, _) in zip(instances, results)])
+
+        self._record_cycle(time.monotonic() - started, len(instances))
+
+    async def _check_instance_with_metrics(self, instance_id: str, api_client) -> tuple:
+        """
+        检查单个实例的状态并获取性能指标（带超时）
+        
+        Args:
+            instance_id: 实例ID
+            api_client: API客户端
+            
+        Returns:
+            tuple: (实例状态, 性能指标或None)
+        """
+        try:
+            async with asyncio.timeout(self.check_timeout):
+                status = await self._check_instance(instance_id, api_client)
+                metrics = await self._get_instance_metrics(instance_id, api_client)
+                return status, metrics
+        except asyncio.TimeoutError:
+            logger.warning(f"检查实例 {instance_id} 状态超时 ({self.check_timeout}秒)")
+            return InstanceStatus.ERROR, None
+        except Exception as e:
+            logger.error(f"检查实例 {instance_id} 状态失败: {e}")
+            return InstanceStatus.ERROR, None
+
+    def _record_cycle(self, duration: float, instance_count: int):
+        """
+        记录一次检查周期的耗时，超过检查间隔时计为超时
+        
+        Args:
+            duration: 检查耗时（秒）
+            instance_count: 检查的实例数量
+        """
+        stats = self._cycle_stats
+        stats["cycles"] += 1
+        stats["last_duration"] = duration
+        stats["max_duration"] = max(stats["max_duration"], duration)
+        status_check_cycle_seconds.observe(duration)
+        if duration > self.check_interval:
+            stats["overruns"] += 1
+            status_check_overruns.inc()
+            logger.warning(f"状态检查耗时 {duration:.2f} 秒，超过检查间隔 {self.check_interval} 秒（实例数 {instance_count}）")
+
+    def get_cycle_stats(self) -> Dict:
+        """
+        获取检查周期统计
+        
+        Returns:
+            Dict: 检查次数、最近一次耗时、最大耗时和超时次数
+        """
+        return dict(self._cycle_stats)
     
     async def _check_instance(self, instance_id: str, api_client) -> InstanceStatus:
         """
@@ -161,50 +231,71 @@ class StatusMonitor:
             logger.error(f"获取实例 {instance_id} 性能指标失败: {e}")
             return None
     
-    async def _save_status(self, instance_id: str, status: InstanceStatus):
+    async def _save_statuses(self, statuses: List[tuple]):
         """
-        保存状态到数据库
+        批量保存状态到数据库
         
         Args:
-            instance_id: 实例ID
-            status: 实例状态
+            statuses: (实例ID, 实例状态) 列表
         """
+        if not statuses:
+            return
         try:
-            data = {
-                "instance_id": instance_id,
-                "status": status.value,
-                "create_time": int(time.time())
-            }
-            await db_manager.insert("status_logs", data)
+            now = int(time.time())
+            await db_manager.executemany(
+                "INSERT INTO status_logs (instance_id, status, create_time) VALUES (?, ?, ?)",
+                [(instance_id, status.value, now) for instance_id, status in statuses]
+            )
             
             # 更新实例表
-            await db_manager.execute(
+            await db_manager.executemany(
                 "UPDATE instances SET status = ?, last_active = ? WHERE instance_id = ?",
-                (status.value, int(time.time()), instance_id)
+                [(status.value, now, instance_id) for instance_id, status in statuses]
             )
         except Exception as e:
             logger.error(f"保存状态失败: {e}")
     
     async def _save_metrics(self, instance_id: str, metrics: Dict[str, float]):
         """
-        保存性能指标到数据库
+        保存性能指标（写入指标存储，由指标存储批量写入数据库）
         
         Args:
             instance_id: 实例ID
             metrics: 性能指标数据
         """
         try:
-            current_time = int(time.time())
-            for metric_type, value in metrics.items():
-                data = {
-                    "instance_id": instance_id,
-                    "metric_type": metric_type,
-                    "value": value,
-                    "create_time": current_time
-                }
-                await db_manager.insert("performance_metrics", data)
+            metrics_store.record_many(instance_id, metrics)
         except Exception as e:
             logger.error(f"保存性能指标失败: {e}")
+
+    async def get_metrics_history(self,
+                                  instance_id: str,
+                                  metric_type: Union[MetricType, str],
+                                  start_time: Optional[int] = None,
+                                  end_time: Optional[int] = None,
+                                  limit: int = 100) -> List[Dict]:
+        """
+        获取性能指标历史数据
+        
+        Args:
+            instance_id: 实例ID
+            metric_type: 指标类型
+            start_time: 开始时间戳
+            end_time: 结束时间戳
+            limit: 返回记录数量限制
+            
+        Returns:
+            List[Dict]: 指标历史数据列表（按时间倒序）
+        """
+        try:
+            return await metrics_store.query(
+                instance_id,
+                metric_type.value if isinstance(metric_type, MetricType) else metric_type,
+                start_time, end_time, limit
+            )
+        except Exception as e:
+            logger.error(f"获取性能指标历史失败: {e}")
+            return []
     
     async def get_instance_status(self, instance_id: str) -> Dict:
         """获取实例状态"""
@@ -2,25 +2,45 @@
 用户会话管理器模块
 
 负责管理用户ID与会话ID的映射关系，支持多平台、多实例、多聊天对象的会话管理。
+
+会话映射缓存按最近使用顺序淘汰，启动时只预加载最近活跃的映射，其余映射在首次访问时
+从数据库加载。命中缓存时的最后活跃时间先记录在内存中，定期合并批量写回数据库。
 """
 
 import asyncio
 import logging
 import time
-from typing import Dict, List, Optional, Any
+from collections import OrderedDict
+from typing import Dict, List, Optional, Any, Tuple
 
 from ..data.db_manager import db_manager
+from ..utils.metrics_registry import metrics_registry
 
 logger = logging.getLogger(__name__)
 
 class UserConversationManager:
     """用户会话管理器，管理用户ID与会话ID的映射关系"""
 
-    def __init__(self):
-        """初始化用户会话管理器"""
+    def __init__(self, max_cache_size: int = 5000, last_active_flush_interval: float = 30):
+        """
+        初始化用户会话管理器
+
+        Args:
+            max_cache_size: 缓存的会话映射最大数量，超出时淘汰最久未使用的映射
+            last_active_flush_interval: 最后活跃时间批量写回间隔（秒）
+        """
         self._initialized = False
         self._lock = asyncio.Lock()
-        self._cache = {}  # 缓存，格式: {(instance_id, chat_name, user_id, platform_id): conversation_id}
+        self.max_cache_size = max_cache_size
+        self.last_active_flush_interval = last_active_flush_interval
+        # 缓存，格式: {(instance_id, chat_name, user_id, platform_id): conversation_id}
+        self._cache: "OrderedDict[Tuple[str, str, str, str], str]" = OrderedDict()
+        # 待写回的最后活跃时间，格式: {(instance_id, chat_name, user_id, platform_id): last_active}
+        self._pending_last_active: Dict[Tuple[str, str, str, str], int] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+
+        metrics_registry.gauge("user_conversation_pending_writes", "等待批量写回数据库的用户会话最后活跃时间数量").set_function(
+            lambda: len(self._pending_last_active))
 
     async def initialize(self) -> bool:
         """
@@ -87,20 +107,24 @@ class UserConversationManager:
             raise
 
     async def _load_conversations(self) -> None:
-        """从数据库加载会话映射"""
+        """从数据库预加载最近活跃的会话映射，其余映射在访问时加载"""
         try:
-            # 查询所有会话映射
+            # 查询最近活跃的会话映射
             conversations = await db_manager.fetchall(
-                "SELECT * FROM user_conversations"
+                """
+                SELECT instance_id, chat_name, user_id, platform_id, conversation_id
+                FROM user_conversations ORDER BY last_active DESC LIMIT ?
+                """,
+                (self.max_cache_size,)
             )
 
-            # 更新缓存
-            self._cache = {
-                (conv['instance_id'], conv['chat_name'], conv['user_id'], conv['platform_id']): conv['conversation_id']
-                for conv in conversations
-            }
-            
-            logger.info(f"加载了 {len(conversations)} 个用户会话映射")
+            # 更新缓存（最近活跃的映射放在末尾）
+            self._cache = OrderedDict(
+                ((conv['instance_id'], conv['chat_name'], conv['user_id'], conv['platform_id']), conv['conversation_id'])
+                for conv in reversed(conversations)
+            )
+
+            logger.info(f"预加载了 {len(conversations)} 个用户会话映射")
         except Exception as e:
             logger.error(f"加载用户会话映射失败: {e}")
             raise
@@ -123,16 +147,13 @@ class UserConversationManager:
 
         # 先从缓存中查找
         cache_key = (instance_id, chat_name, user_id, platform_id)
-        if cache_key in self._cache:
-            # 更新最后活跃时间
-            current_time = int(time.time())
-            await db_manager.execute(
-                "UPDATE user_conversations SET last_active = ? WHERE instance_id = ? AND chat_name = ? AND user_id = ? AND platform_id = ?",
-                (current_time, instance_id, chat_name, user_id, platform_id)
-            )
-            return self._cache[cache_key]
+        conversation_id = self._cache.get(cache_key)
+        if conversation_id is not None:
+            self._cache.move_to_end(cache_key)
+            self._touch(cache_key)
+            return conversation_id
 
-        # 从数据库中查找
+        # 缓存中没有时从数据库中查找
         conversation = await db_manager.fetchone(
             """
             SELECT conversation_id FROM user_conversations
@@ -142,20 +163,62 @@ class UserConversationManager:
         )
 
         if conversation:
-            # 更新缓存
-            self._cache[cache_key] = conversation['conversation_id']
-            
-            # 更新最后活跃时间
-            current_time = int(time.time())
-            await db_manager.execute(
-                "UPDATE user_conversations SET last_active = ? WHERE instance_id = ? AND chat_name = ? AND user_id = ? AND platform_id = ?",
-                (current_time, instance_id, chat_name, user_id, platform_id)
-            )
-            
+            # 更新缓存和最后活跃时间
+            self._cache_put(cache_key, conversation['conversation_id'])
+            self._touch(cache_key)
             return conversation['conversation_id']
 
         return None
 
+    def _cache_put(self, cache_key: Tuple[str, str, str, str], conversation_id: str):
+        """写入缓存，超出容量时淘汰最久未使用的映射"""
+        self._cache[cache_key] = conversation_id
+        self._cache.move_to_end(cache_key)
+        while len(self._cache) > self.max_cache_size:
+            self._cache.popitem(last=False)
+
+    def _touch(self, cache_key: Tuple[str, str, str, str]):
+        """
+        记录会话的最后活跃时间，同一会话的多次更新合并为一次写入
+
+        Args:
+            cache_key: (instance_id, chat_name, user_id, platform_id)
+        """
+        self._pending_last_active[cache_key] = int(time.time())
+
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_last_active_later())
+
+    async def _flush_last_active_later(self):
+        """等待一个写回间隔后批量写入"""
+        await asyncio.sleep(self.last_active_flush_interval)
+        await self.flush_last_active()
+
+    async def flush_last_active(self):
+        """把合并后的最后活跃时间批量写回数据库"""
+        if not self._pending_last_active:
+            return
+
+        pending, self._pending_last_active = self._pending_last_active, {}
+        rows = [
+            (last_active, instance_id, chat_name, user_id, platform_id)
+            for (instance_id, chat_name, user_id, platform_id), last_active in pending.items()
+        ]
+
+        try:
+            await db_manager.executemany(
+                "UPDATE user_conversations SET last_active = ? WHERE instance_id = ? AND chat_name = ? AND user_id = ? AND platform_id = ?",
+                rows
+            )
+            logger.debug(f"已批量写回 {len(rows)} 个用户会话的最后活跃时间")
+        except Exception as e:
+            logger.error(f"批量写回用户会话最后活跃时间失败: {e}")
+            # 放回队列等待下次写入，不覆盖期间产生的新值
+            for key, last_active in pending.items():
+                self._pending_last_active.setdefault(key, last_active)
+            if self._flush_task is None or self._flush_task.done() or self._flush_task is asyncio.current_task():
+                self._flush_task = asyncio.create_task(self._flush_last_active_later())
+
     async def save_conversation_id(self, instance_id: str, chat_name: str, user_id: str, platform_id: str, conversation_id: str) -> bool:
         """
         保存用户的会话ID
@@ -207,10 +270,11 @@ class UserConversationManager:
                         (instance_id, chat_name, user_id, platform_id, conversation_id, current_time, current_time)
                     )
                 
-                # 更新缓存
+                # 更新缓存（保存时已写入最后活跃时间）
                 cache_key = (instance_id, chat_name, user_id, platform_id)
-                self._cache[cache_key] = conversation_id
-                
+                self._cache_put(cache_key, conversation_id)
+                self._pending_last_active.pop(cache_key, None)
+
                 logger.info(f"保存用户会话ID成功: {instance_id} - {chat_name} - {user_id} - {conversation_id}")
                 return True
         except Exception as e:
@@ -244,11 +308,11 @@ class UserConversationManager:
                     (instance_id, chat_name, user_id, platform_id)
                 )
                 
-                # 从缓存中删除
+                # 从缓存和待写回队列中删除
                 cache_key = (instance_id, chat_name, user_id, platform_id)
-                if cache_key in self._cache:
-                    del self._cache[cache_key]
-                
+                self._cache.pop(cache_key, None)
+                self._pending_last_active.pop(cache_key, None)
+
                 logger.info(f"删除用户会话ID成功: {instance_id} - {chat_name} - {user_id}")
                 return True
         except Exception as e:
@@ -269,6 +333,9 @@ class UserConversationManager:
             await self.initialize()
 
         try:
+            # 先写回最后活跃时间，避免删除仍在使用的会话
+            await self.flush_last_active()
+
             # 计算过期时间
             expire_time = int(time.time()) - expire_days * 24 * 60 * 60
             
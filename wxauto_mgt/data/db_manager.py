@@ -16,6 +16,8 @@ import aiosqlite
 import logging
 from typing import Dict, List, Optional, Any, Union
 
+from wxauto_mgt.utils.metrics_registry import db_query_seconds
+
 logger = logging.getLogger(__name__)
 
 class DBManager:
@@ -201,6 +203,27 @@ class DBManager:
         """)
         logger.debug("创建performance_metrics表")
 
+        # 性能指标聚合表（1分钟/1小时/1天）
+        conn.execute("""
+        CREATE TABLE IF NOT EXISTS performance_metrics_rollup (
+            instance_id TEXT NOT NULL,
+            metric_type TEXT NOT NULL,
+            resolution INTEGER NOT NULL,
+            bucket_time INTEGER NOT NULL,
+            count INTEGER NOT NULL,
+            min_value REAL NOT NULL,
+            max_value REAL NOT NULL,
+            avg_value REAL NOT NULL,
+            p95_value REAL NOT NULL,
+            PRIMARY KEY (instance_id, metric_type, resolution, bucket_time)
+        )
+        """)
+        logger.debug("创建performance_metrics_rollup表")
+
+        # 性能指标历史查询和过期清理
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_performance_metrics_series ON performance_metrics(instance_id, metric_type, create_time)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_performance_metrics_time ON performance_metrics(create_time)")
+
         # 警报规则表
         conn.execute("""
         CREATE TABLE IF NOT EXISTS alert_rules (
@@ -213,6 +236,9 @@ class DBManager:
             alert_type TEXT NOT NULL,
             severity TEXT NOT NULL,
             enabled INTEGER NOT NULL DEFAULT 1,
+            window_size INTEGER NOT NULL DEFAULT 1,
+            trigger_count INTEGER NOT NULL DEFAULT 1,
+            suppress_seconds INTEGER NOT NULL DEFAULT 300,
             create_time INTEGER NOT NULL,
             last_update INTEGER NOT NULL
         )
@@ -284,6 +310,8 @@ class DBManager:
             local_file_path TEXT,
             file_size INTEGER,
             original_file_path TEXT,
+            retry_count INTEGER DEFAULT 0,
+            next_retry_time INTEGER DEFAULT 0,
             UNIQUE(instance_id, message_id)
         )
         """)
@@ -293,6 +321,8 @@ class DBManager:
         conn.execute("CREATE INDEX IF NOT EXISTS idx_messages_delivery_status ON messages(delivery_status)")
         conn.execute("CREATE INDEX IF NOT EXISTS idx_messages_platform_id ON messages(platform_id)")
         conn.execute("CREATE INDEX IF NOT EXISTS idx_messages_reply_status ON messages(reply_status)")
+        # 消息列表按聊天对象分页查询
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_messages_chat_time ON messages(instance_id, chat_name, create_time)")
         logger.debug("创建messages表索引")
 
         # 服务平台表
@@ -381,6 +411,27 @@ class DBManager:
                 conn.execute("UPDATE listeners SET status = 'active' WHERE status IS NULL")
                 conn.execute("CREATE INDEX IF NOT EXISTS idx_listeners_status ON listeners(status)")
 
+            # 检查messages表是否需要升级（投递重试计数与退避时间）
+            cursor = conn.execute("PRAGMA table_info(messages)")
+            message_columns = [col[1] for col in cursor.fetchall()]
+
+            if message_columns and 'retry_count' not in message_columns:
+                logger.info("添加retry_count字段到messages表")
+                conn.execute("ALTER TABLE messages ADD COLUMN retry_count INTEGER DEFAULT 0")
+
+            if message_columns and 'next_retry_time' not in message_columns:
+                logger.info("添加next_retry_time字段到messages表")
+                conn.execute("ALTER TABLE messages ADD COLUMN next_retry_time INTEGER DEFAULT 0")
+
+            # 检查alert_rules表是否需要升级（滑动窗口与告警抑制）
+            cursor = conn.execute("PRAGMA table_info(alert_rules)")
+            alert_rule_columns = [col[1] for col in cursor.fetchall()]
+
+            for column, default in (('window_size', 1), ('trigger_count', 1), ('suppress_seconds', 300)):
+                if alert_rule_columns and column not in alert_rule_columns:
+                    logger.info(f"添加{column}字段到alert_rules表")
+                    conn.execute(f"ALTER TABLE alert_rules ADD COLUMN {column} INTEGER NOT NULL DEFAULT {default}")
+
             # 检查并创建fixed_listeners表
             cursor = conn.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='fixed_listeners'")
             if not cursor.fetchone():
@@ -413,10 +464,11 @@ class DBManager:
         if not self._initialized:
             raise RuntimeError("数据库管理器未初始化")
 
-        async with self._lock:
-            async with aiosqlite.connect(self._db_path) as db:
-                await db.execute(sql, params or ())
-                await db.commit()
+        with db_query_seconds.time(operation="execute"):
+            async with self._lock:
+                async with aiosqlite.connect(self._db_path) as db:
+                    await db.execute(sql, params or ())
+                    await db.commit()
 
     async def executemany(self, sql: str, params_list: List[tuple]) -> None:
         """
@@ -429,18 +481,20 @@ class DBManager:
         if not self._initialized:
             raise RuntimeError("数据库管理器未初始化")
 
-        async with self._lock:
-            async with aiosqlite.connect(self._db_path) as db:
-                await db.executemany(sql, params_list)
-                await db.commit()
+        with db_query_seconds.time(operation="executemany"):
+            async with self._lock:
+                async with aiosqlite.connect(self._db_path) as db:
+                    await db.executemany(sql, params_list)
+                    await db.commit()
 
-    async def fetchone(self, sql: str, params: tuple = None) -> Optional[Dict]:
+    async def fetchone(self, sql: str, params: tuple = None, row_type: type = None) -> Optional[Dict]:
         """
         获取单条记录
 
         Args:
             sql: SQL查询
             params: SQL参数
+            row_type: 可选的记录类型（需提供 from_row 类方法），为None时返回字典
 
         Returns:
             Optional[Dict]: 查询结果
@@ -448,19 +502,23 @@ class DBManager:
         if not self._initialized:
             raise RuntimeError("数据库管理器未初始化")
 
-        async with aiosqlite.connect(self._db_path) as db:
-            db.row_factory = aiosqlite.Row
-            async with db.execute(sql, params or ()) as cursor:
-                row = await cursor.fetchone()
-                return dict(row) if row else None
-
-    async def fetchall(self, sql: str, params: tuple = None) -> List[Dict]:
+        with db_query_seconds.time(operation="fetchone"):
+            async with aiosqlite.connect(self._db_path) as db:
+                db.row_factory = aiosqlite.Row
+                async with db.execute(sql, params or ()) as cursor:
+                    row = await cursor.fetchone()
+                    if row is None:
+                        return None
+                    return row_type.from_row(row) if row_type else dict(row)
+
+    async def fetchall(self, sql: str, params: tuple = None, row_type: type = None) -> List[Dict]:
         """
         获取多条记录
 
         Args:
             sql: SQL查询
             params: SQL参数
+            row_type: 可选的记录类型（需提供 from_row 类方法），为None时返回字典列表
 
         Returns:
             List[Dict]: 查询结果列表
@@ -468,11 +526,14 @@ class DBManager:
         if not self._initialized:
             raise RuntimeError("数据库管理器未初始化")
 
-        async with aiosqlite.connect(self._db_path) as db:
-            db.row_factory = aiosqlite.Row
-            async with db.execute(sql, params or ()) as cursor:
-                rows = await cursor.fetchall()
-                return [dict(row) for row in rows]
+        with db_query_seconds.time(operation="fetchall"):
+            async with aiosqlite.connect(self._db_path) as db:
+                db.row_factory = aiosqlite.Row
+                async with db.execute(sql, params or ()) as cursor:
+                    rows = await cursor.fetchall()
+                    if row_type:
+                        return [row_type.from_row(row) for row in rows]
+                    return [dict(row) for row in rows]
 
     async def insert(self, table: str, data: Dict) -> int:
         """
@@ -536,45 +597,46 @@ class DBManager:
             sql = f"INSERT INTO {table} ({','.join(keys)}) VALUES ({placeholders})"
             logger.debug(f"执行SQL: {sql}, 参数: {values}")
 
-            async with self._lock:
-                async with aiosqlite.connect(self._db_path) as db:
-                    try:
-                        cursor = await db.execute(sql, values)
-                        await db.commit()
-                        last_rowid = cursor.lastrowid
-                        logger.debug(f"插入记录成功，ID: {last_rowid}")
-                        return last_rowid
-                    except Exception as db_error:
-                        import traceback
-                        error_msg = f"执行SQL时发生错误: {db_error}"
-                        logger.error(error_msg)
-                        logger.error(f"异常堆栈: {traceback.format_exc()}")
-
-                        # 尝试使用另一种方式插入
+            with db_query_seconds.time(operation="insert"):
+                async with self._lock:
+                    async with aiosqlite.connect(self._db_path) as db:
                         try:
-                            logger.info("尝试使用直接SQL语句插入...")
-                            # 构建SQL语句
-                            fields = ", ".join(keys)
-                            placeholders = ", ".join(["?" for _ in keys])
+                            cursor = await db.execute(sql, values)
+                            await db.commit()
+                            last_rowid = cursor.lastrowid
+                            logger.debug(f"插入记录成功，ID: {last_rowid}")
+                            return last_rowid
+                        except Exception as db_error:
+                            import traceback
+                            error_msg = f"执行SQL时发生错误: {db_error}"
+                            logger.error(error_msg)
+                            logger.error(f"异常堆栈: {traceback.format_exc()}")
 
-                            insert_sql = f"INSERT INTO {table} ({fields}) VALUES ({placeholders})"
-                            logger.debug(f"执行SQL: {insert_sql}")
-                            logger.debug(f"参数值: {values}")
+                            # 尝试使用另一种方式插入
+                            try:
+                                logger.info("尝试使用直接SQL语句插入...")
+                                # 构建SQL语句
+                                fields = ", ".join(keys)
+                                placeholders = ", ".join(["?" for _ in keys])
 
-                            await db.execute(insert_sql, values)
-                            await db.commit()
+                                insert_sql = f"INSERT INTO {table} ({fields}) VALUES ({placeholders})"
+                                logger.debug(f"执行SQL: {insert_sql}")
+                                logger.debug(f"参数值: {values}")
 
-                            # 获取最后插入的ID
-                            cursor = await db.execute("SELECT last_insert_rowid()")
-                            row = await cursor.fetchone()
-                            last_id = row[0] if row else 0
+                                await db.execute(insert_sql, values)
+                                await db.commit()
 
-                            logger.info(f"使用直接SQL语句插入成功，ID: {last_id}")
-                            return last_id
-                        except Exception as direct_error:
-                            logger.error(f"直接SQL插入也失败: {direct_error}")
-                            logger.error(f"异常堆栈: {traceback.format_exc()}")
-                            raise ValueError(f"数据库插入失败: {str(db_error)}, 直接SQL插入也失败: {str(direct_error)}")
+                                # 获取最后插入的ID
+                                cursor = await db.execute("SELECT last_insert_rowid()")
+                                row = await cursor.fetchone()
+                                last_id = row[0] if row else 0
+
+                                logger.info(f"使用直接SQL语句插入成功，ID: {last_id}")
+                                return last_id
+                            except Exception as direct_error:
+                                logger.error(f"直接SQL插入也失败: {direct_error}")
+                                logger.error(f"异常堆栈: {traceback.format_exc()}")
+                                raise ValueError(f"数据库插入失败: {str(db_error)}, 直接SQL插入也失败: {str(direct_error)}")
 
         except Exception as e:
             import traceback
@@ -619,11 +681,12 @@ class DBManager:
         sql = f"UPDATE {table} SET {set_clause} WHERE {where_clause}"
         params = list(data.values()) + list(conditions.values())
 
-        async with self._lock:
-            async with aiosqlite.connect(self._db_path) as db:
-                cursor = await db.execute(sql, params)
-                await db.commit()
-                return cursor.rowcount
+        with db_query_seconds.time(operation="update"):
+            async with self._lock:
+                async with aiosqlite.connect(self._db_path) as db:
+                    cursor = await db.execute(sql, params)
+                    await db.commit()
+                    return cursor.rowcount
 
     async def delete(self, table: str, conditions: Dict) -> int:
         """
@@ -642,11 +705,12 @@ class DBManager:
         where_clause = ' AND '.join([f"{k}=?" for k in conditions.keys()])
         sql = f"DELETE FROM {table} WHERE {where_clause}"
 
-        async with self._lock:
-            async with aiosqlite.connect(self._db_path) as db:
-                cursor = await db.execute(sql, list(conditions.values()))
-                await db.commit()
-                return cursor.rowcount
+        with db_query_seconds.time(operation="delete"):
+            async with self._lock:
+                async with aiosqlite.connect(self._db_path) as db:
+                    cursor = await db.execute(sql, list(conditions.values()))
+                    await db.commit()
+                    return cursor.rowcount
 
     def get_connection(self):
         """
@@ -3,8 +3,12 @@
 
 """
 WxAuto管理程序入口文件
+
+默认启动Qt管理界面；使用 --headless 参数时不创建界面，
+在普通asyncio事件循环（可选uvloop）中运行消息监听、消息投递和Web服务。
 """
 
+import argparse
 import asyncio
 import os
 import signal
@@ -17,20 +21,31 @@ from pathlib import Path
 ROOT_DIR = Path(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(str(ROOT_DIR.parent))
 
-import qasync
-from PySide6.QtWidgets import QApplication
+# 启动分析需要在导入其他模块之前开启，才能统计到各模块的导入耗时
+from wxauto_mgt.utils.startup_profiler import startup_profiler
+if '--profile-startup' in sys.argv:
+    startup_profiler.enable()
+
 import logging
 
-from wxauto_mgt.ui.main_window import MainWindow
 from wxauto_mgt.data.db_manager import db_manager
 from wxauto_mgt.data.config_store import config_store
 from wxauto_mgt.core.api_client import instance_manager
 from wxauto_mgt.core.message_listener import message_listener
 from wxauto_mgt.core.message_delivery_service import message_delivery_service
+from wxauto_mgt.core.message_trace import message_tracer
+from wxauto_mgt.core.loop_monitor import loop_monitor
 from wxauto_mgt.core.message_sender import message_sender
+from wxauto_mgt.core.user_conversation_manager import user_conversation_manager
+from wxauto_mgt.core.service_bridge import service_bridge
 from wxauto_mgt.utils.logging import setup_logging, logger
 from wxauto_mgt.utils.ssl_config import init_ssl
 
+startup_profiler.checkpoint("导入核心模块")
+
+# 无界面模式下输出消息处理延迟统计的间隔（秒）
+HEADLESS_STATS_INTERVAL = 300
+
 def handle_exception(exc_type, exc_value, exc_traceback):
     """
     处理未捕获的异常
@@ -166,6 +181,10 @@ async def init_services():
             logger.info("SSL配置初始化成功")
         else:
             logger.warning("SSL配置初始化失败，HTTPS连接可能受影响")
+        startup_profiler.checkpoint("准备目录、日志和SSL")
+
+        # 核心服务都运行在当前事件循环中，Web服务线程通过服务桥接提交请求
+        service_bridge.bind_loop()
 
         # 初始化数据库
         db_path = os.path.join(data_dir, 'wxauto_mgt.db')
@@ -173,12 +192,14 @@ async def init_services():
 
         # 等待一下确保表创建完成
         await asyncio.sleep(0.1)
+        startup_profiler.checkpoint("初始化数据库")
 
         # 初始化配置管理器
         logger.info("正在初始化配置管理器...")
         from wxauto_mgt.core.config_manager import config_manager
         await config_manager.initialize()
         logger.info("配置管理器初始化完成")
+        startup_profiler.checkpoint("初始化配置管理器")
 
         # 加载实例配置
         logger.info("正在加载实例配置...")
@@ -223,7 +244,9 @@ async def init_services():
             logger.error(f"获取实例配置失败: {str(e)}")
             return False
 
-        # 初始化消息监听
+        startup_profiler.checkpoint("加载实例配置")
+
+        # 初始化消息监听（监听对象的重新校验在后台进行）
         try:
             # 检查是否启用自动启动消息监听
             auto_start = config_manager.get('message_listener.auto_start', True)  # 默认为True保持向后兼容
@@ -237,6 +260,7 @@ async def init_services():
         except Exception as e:
             logger.error(f"初始化消息监听失败: {str(e)}")
             # 不中断启动流程
+        startup_profiler.checkpoint("启动消息监听")
 
         # 初始化消息投递服务
         try:
@@ -251,6 +275,10 @@ async def init_services():
         except Exception as e:
             logger.error(f"初始化消息投递服务失败: {str(e)}")
             # 不中断启动流程
+        startup_profiler.checkpoint("启动消息投递服务")
+
+        # 启动事件循环延迟监控
+        loop_monitor.start()
 
         logger.info("服务初始化完成")
         return True
@@ -290,6 +318,12 @@ def cleanup_services_sync():
             logger.error(f"停止Web服务失败: {web_e}")
             # 不设置cleanup_success = False，因为这不应该阻止程序退出
 
+        # 停止事件循环延迟监控
+        try:
+            loop_monitor.stop()
+        except Exception as monitor_e:
+            logger.warning(f"停止事件循环延迟监控时出错: {monitor_e}")
+
         # 强制停止消息投递服务 - 不等待异步操作
         try:
             global message_delivery_service
@@ -359,83 +393,254 @@ async def cleanup_services():
         logger.error(f"异步清理服务失败: {e}")
         return False
 
-def main():
-    """主程序入口"""
-    try:
-        # 设置未捕获异常处理器
-        sys.excepthook = handle_exception
+def parse_args(argv=None):
+    """
+    解析命令行参数
 
-        # 设置信号处理器
-        setup_signal_handlers()
+    Qt可能在命令行中带有自己的参数，未识别的参数会被忽略。
 
-        # 初始化Qt应用
-        app = QApplication.instance()
-        if not app:
-            app = QApplication(sys.argv)
-            app.setApplicationName("WxAuto管理工具")
+    Args:
+        argv: 参数列表，为None时使用sys.argv
+
+    Returns:
+        argparse.Namespace: 解析结果
+    """
+    parser = argparse.ArgumentParser(description="WxAuto管理程序")
+    parser.add_argument('--headless', action='store_true',
+                        help="无界面模式：只运行消息监听、消息投递和Web服务")
+    parser.add_argument('--uvloop', action='store_true',
+                        help="无界面模式下使用uvloop事件循环（需要安装uvloop，Windows不支持）")
+    parser.add_argument('--profile-startup', action='store_true',
+                        help="输出启动分析报告（各模块导入耗时和各初始化阶段耗时）")
+    args, _ = parser.parse_known_args(argv)
+    return args
+
+def log_startup_report():
+    """启用启动分析时输出报告，并停止统计模块导入耗时"""
+    if startup_profiler.enabled:
+        startup_profiler.disable()
+        logger.info("\n" + startup_profiler.report())
+
+def log_latency_stats():
+    """输出消息端到端处理延迟、各阶段耗时、自适应轮询统计和事件循环阻塞热点"""
+    stats = message_delivery_service.get_latency_stats()
+    if stats['count']:
+        logger.info(
+            f"消息处理延迟: 样本 {stats['count']} 条, 平均 {stats['avg']:.2f} 秒, "
+            f"P50 {stats['p50']:.2f} 秒, P95 {stats['p95']:.2f} 秒, 最大 {stats['max']:.2f} 秒"
+        )
+    stage_stats = message_tracer.get_stage_stats()
+    if stage_stats:
+        breakdown = ", ".join(
+            f"{stage} 平均 {summary['avg']:.3f}/P95 {summary['p95']:.3f}"
+            for stage, summary in stage_stats.items()
+        )
+        logger.info(f"消息各阶段耗时(秒): {breakdown}")
+    poll_stats = message_listener.get_poll_stats()
+    if poll_stats['polls_performed']:
+        logger.info(
+            f"自适应轮询: 执行 {poll_stats['polls_performed']} 次, 节省 {poll_stats['polls_saved']} 次, "
+            f"平均增加延迟 {poll_stats['avg_added_latency']:.2f} 秒"
+        )
+    for offender in loop_monitor.get_offenders(limit=5):
+        logger.info(
+            f"事件循环阻塞热点: {offender['location']}, 次数 {offender['count']}, "
+            f"最长 {offender['max_duration']:.3f} 秒, 累计 {offender['total_duration']:.3f} 秒"
+        )
+
+async def run_headless_services(startup_started: float) -> int:
+    """
+    无界面模式：初始化核心服务并启动Web服务，运行到收到退出信号
 
-        # 创建事件循环
-        loop = qasync.QEventLoop(app)
-        asyncio.set_event_loop(loop)
+    Args:
+        startup_started: 程序启动时间（time.perf_counter()）
+
+    Returns:
+        int: 退出码
+    """
+    if not await init_services():
+        logger.error("服务初始化失败")
+        return 1
 
-        # 初始化服务
-        if not loop.run_until_complete(init_services()):
-            logger.error("服务初始化失败")
-            return 1
+    from wxauto_mgt.web import start_web_service, stop_web_service
+    if not await start_web_service():
+        logger.error("Web服务启动失败，仅运行消息监听和投递服务")
+    startup_profiler.checkpoint("启动Web服务")
 
-        # 创建主窗口
-        window = MainWindow()
-        window.show()
+    logger.info(f"程序已启动（无界面模式），启动耗时 {time.perf_counter() - startup_started:.2f} 秒")
+    log_startup_report()
 
-        # 设置信号处理
-        # Windows系统不支持add_signal_handler，使用平台兼容的方式
+    # 收到SIGINT/SIGTERM时退出
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
         try:
-            loop.add_signal_handler(signal.SIGINT, loop.stop)
+            loop.add_signal_handler(sig, stop_event.set)
         except NotImplementedError:
-            # Windows平台上忽略此错误
-            logger.debug("当前平台不支持add_signal_handler，跳过信号处理设置")
+            # Windows平台不支持add_signal_handler
+            signal.signal(sig, lambda signum, frame: loop.call_soon_threadsafe(stop_event.set))
 
-        # 运行事件循环
-        with loop:
-            logger.info("程序已启动")
+    try:
+        while not stop_event.is_set():
             try:
-                loop.run_forever()
-            finally:
-                # 启动强制退出监控
-                start_force_exit_monitor()
+                await asyncio.wait_for(stop_event.wait(), timeout=HEADLESS_STATS_INTERVAL)
+            except asyncio.TimeoutError:
+                log_latency_stats()
+    finally:
+        logger.info("程序正在关闭...")
+        try:
+            await stop_web_service()
+            await message_listener.stop()
+            await message_delivery_service.stop()
+            await user_conversation_manager.flush_last_active()
+            log_latency_stats()
+            await db_manager.close()
+        except Exception as e:
+            logger.error(f"关闭服务时出错: {e}")
 
-                # 强制快速清理，不等待异步操作
-                logger.info("程序正在关闭，开始强制清理...")
-                try:
-                    # 1. 立即取消所有剩余任务
-                    if not loop.is_closed():
-                        pending = asyncio.all_tasks(loop)
-                        logger.info(f"发现 {len(pending)} 个待处理任务，强制取消...")
-                        for task in pending:
-                            if not task.done():
-                                task.cancel()
-
-                        # 给任务很短的时间来响应取消
-                        if pending:
-                            try:
-                                loop.run_until_complete(asyncio.wait_for(
-                                    asyncio.gather(*pending, return_exceptions=True),
-                                    timeout=2.0  # 最多等待2秒
-                                ))
-                            except asyncio.TimeoutError:
-                                logger.warning("任务取消超时，强制继续关闭")
-                            except Exception as gather_e:
-                                logger.warning(f"任务取消时出错: {gather_e}")
-
-                    # 2. 使用同步清理方法
-                    cleanup_services_sync()
-                    logger.info("强制清理完成")
-
-                except Exception as cleanup_e:
-                    logger.error(f"强制清理失败: {cleanup_e}")
-                    # 不打印完整堆栈，避免延迟关闭
-
-        return 0
+    return 0
+
+def run_headless(use_uvloop: bool, startup_started: float) -> int:
+    """
+    在普通asyncio事件循环中运行无界面模式
+
+    Args:
+        use_uvloop: 是否尝试使用uvloop
+        startup_started: 程序启动时间（time.perf_counter()）
+
+    Returns:
+        int: 退出码
+    """
+    loop = None
+    if use_uvloop:
+        try:
+            import uvloop
+            loop = uvloop.new_event_loop()
+            logger.info("使用uvloop事件循环")
+        except ImportError:
+            logger.warning("未安装uvloop，使用默认的asyncio事件循环")
+
+    if loop is None:
+        loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+
+    try:
+        return loop.run_until_complete(run_headless_services(startup_started))
+    finally:
+        loop.close()
+
+def run_gui(startup_started: float) -> int:
+    """
+    运行Qt管理界面
+
+    Args:
+        startup_started: 程序启动时间（time.perf_counter()）
+
+    Returns:
+        int: 退出码
+    """
+    import qasync
+    from PySide6.QtWidgets import QApplication
+    from wxauto_mgt.ui.main_window import MainWindow
+
+    # 初始化Qt应用
+    app = QApplication.instance()
+    if not app:
+        app = QApplication(sys.argv)
+        app.setApplicationName("WxAuto管理工具")
+    startup_profiler.checkpoint("初始化Qt界面框架")
+
+    # 创建事件循环
+    loop = qasync.QEventLoop(app)
+    asyncio.set_event_loop(loop)
+
+    # 初始化服务
+    if not loop.run_until_complete(init_services()):
+        logger.error("服务初始化失败")
+        return 1
+
+    # 创建主窗口
+    window = MainWindow()
+    window.show()
+    startup_profiler.checkpoint("创建主窗口")
+    logger.info(f"主窗口已显示，启动耗时 {time.perf_counter() - startup_started:.2f} 秒")
+    log_startup_report()
+
+    # 设置信号处理
+    # Windows系统不支持add_signal_handler，使用平台兼容的方式
+    try:
+        loop.add_signal_handler(signal.SIGINT, loop.stop)
+    except NotImplementedError:
+        # Windows平台上忽略此错误
+        logger.debug("当前平台不支持add_signal_handler，跳过信号处理设置")
+
+    # 运行事件循环
+    with loop:
+        logger.info("程序已启动")
+        try:
+            loop.run_forever()
+        finally:
+            # 启动强制退出监控
+            start_force_exit_monitor()
+
+            # 强制快速清理，不等待异步操作
+            logger.info("程序正在关闭，开始强制清理...")
+            try:
+                # 1. 立即取消所有剩余任务
+                if not loop.is_closed():
+                    pending = asyncio.all_tasks(loop)
+                    logger.info(f"发现 {len(pending)} 个待处理任务，强制取消...")
+                    for task in pending:
+                        if not task.done():
+                            task.cancel()
+
+                    # 给任务很短的时间来响应取消
+                    if pending:
+                        try:
+                            loop.run_until_complete(asyncio.wait_for(
+                                asyncio.gather(*pending, return_exceptions=True),
+                                timeout=2.0  # 最多等待2秒
+                            ))
+                        except asyncio.TimeoutError:
+                            logger.warning("任务取消超时，强制继续关闭")
+                        except Exception as gather_e:
+                            logger.warning(f"任务取消时出错: {gather_e}")
+
+                # 2. 写回合并中的用户会话最后活跃时间（批量写回任务已被取消）
+                if not loop.is_closed():
+                    try:
+                        loop.run_until_complete(asyncio.wait_for(
+                            user_conversation_manager.flush_last_active(),
+                            timeout=2.0
+                        ))
+                    except Exception as flush_e:
+                        logger.warning(f"写回用户会话最后活跃时间失败: {flush_e}")
+
+                # 3. 使用同步清理方法
+                cleanup_services_sync()
+                log_latency_stats()
+                logger.info("强制清理完成")
+
+            except Exception as cleanup_e:
+                logger.error(f"强制清理失败: {cleanup_e}")
+                # 不打印完整堆栈，避免延迟关闭
+
+    return 0
+
+def main():
+    """主程序入口"""
+    startup_started = time.perf_counter()
+    try:
+        # 设置未捕获异常处理器
+        sys.excepthook = handle_exception
+
+        # 设置信号处理器
+        setup_signal_handlers()
+
+        args = parse_args()
+        if args.headless:
+            return run_headless(args.uvloop, startup_started)
+        return run_gui(startup_started)
 
     except Exception as e:
         import traceback
@@ -109,6 +109,22 @@ class SettingsDialog(QDialog):
 
         message_layout.addRow(self.notify_group)
 
+        # 消息合并设置
+        self.merge_group = QGroupBox("消息合并")
+        merge_layout = QFormLayout(self.merge_group)
+
+        self.merge_messages_check = QCheckBox("合并连续消息后再投递")
+        self.merge_messages_check.setToolTip("启用后，同一聊天对象在合并时间窗口内没有新消息时，才把这段时间的消息合并为一条投递")
+        merge_layout.addRow("", self.merge_messages_check)
+
+        self.merge_window_spin = QSpinBox()
+        self.merge_window_spin.setRange(1, 600)
+        self.merge_window_spin.setValue(60)
+        self.merge_window_spin.setSuffix(" 秒")
+        merge_layout.addRow("合并时间窗口:", self.merge_window_spin)
+
+        message_layout.addRow(self.merge_group)
+
         self.tab_widget.addTab(self.message_tab, "消息监听")
 
         # 数据库设置选项卡
@@ -251,6 +267,13 @@ class SettingsDialog(QDialog):
 
             notify_status = config_manager.get('message_listener.notify_status_changes', True)
             self.notify_status_check.setChecked(notify_status)
+
+            # 消息合并设置
+            merge_messages = config_manager.get('message_delivery.merge_messages', False)
+            self.merge_messages_check.setChecked(merge_messages)
+
+            merge_window = config_manager.get('message_delivery.merge_window', 60)
+            self.merge_window_spin.setValue(merge_window)
         except Exception as e:
             logger.error(f"加载消息监听设置失败: {e}")
 
@@ -452,6 +475,17 @@ class SettingsDialog(QDialog):
             message_listener.poll_interval = poll_interval
             message_listener.max_listeners = max_listeners
             message_listener.listener_timeout_minutes = listener_timeout
+
+            # 消息合并设置
+            merge_messages = self.merge_messages_check.isChecked()
+            config_manager.set('message_delivery.merge_messages', merge_messages)
+
+            merge_window = self.merge_window_spin.value()
+            config_manager.set('message_delivery.merge_window', merge_window)
+
+            # 更新消息投递服务设置
+            from wxauto_mgt.core.message_delivery_service import message_delivery_service
+            message_delivery_service.set_merge_options(merge_messages, merge_window)
         except Exception as e:
             logger.error(f"保存消息监听设置失败: {e}")
 
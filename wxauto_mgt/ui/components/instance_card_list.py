@@ -13,6 +13,7 @@ from PySide6.QtWidgets import (
 )
 
 from wxauto_mgt.utils.logging import get_logger
+from wxauto_mgt.core.domain_events import domain_events, DomainEventType
 from qasync import asyncSlot
 
 logger = get_logger()
@@ -386,6 +387,15 @@ class InstanceCardList(QWidget):
 
         self._init_ui()
 
+        # 实例增删时合并刷新，只增删变化的卡片
+        self._refresh_timer = QTimer(self)
+        self._refresh_timer.setSingleShot(True)
+        self._refresh_timer.timeout.connect(self.refresh_instances)
+        domain_events.subscribe(DomainEventType.INSTANCE_STATUS_CHANGED, self._on_instance_status_changed)
+        self.destroyed.connect(
+            lambda: domain_events.unsubscribe(DomainEventType.INSTANCE_STATUS_CHANGED, self._on_instance_status_changed)
+        )
+
     def _init_ui(self):
         """初始化UI"""
         # 主布局
@@ -515,15 +525,15 @@ class InstanceCardList(QWidget):
             # 发送添加本机实例的信号
             self.add_local_requested.emit()
 
+    def _on_instance_status_changed(self, event):
+        """实例增删事件（编辑实例时会先移除再添加）：合并后做一次差异刷新"""
+        if event.data.get('status') in ('added', 'removed'):
+            self._refresh_timer.start(300)
+
     @asyncSlot()
     async def refresh_instances(self):
-        """刷新实例列表"""
+        """刷新实例列表（与已有卡片做差异比较，只增删变化的卡片）"""
         try:
-            # 清空卡片容器
-            for card in self._instances.values():
-                card.deleteLater()
-            self._instances.clear()
-
             # 从数据库获取实例列表
             from wxauto_mgt.data.db_manager import db_manager
 
@@ -562,6 +572,11 @@ class InstanceCardList(QWidget):
                 self.status_label.setText("查询实例失败")
                 return
 
+            # 移除已不存在的实例卡片
+            current_ids = {instance.get("instance_id") for instance in instances}
+            for instance_id in [i for i in self._instances if i not in current_ids]:
+                self._remove_instance_card(instance_id)
+
             # 检查实例列表是否为空
             if not instances:
                 logger.warning("没有找到任何实例")
@@ -588,6 +603,12 @@ class InstanceCardList(QWidget):
                 if not instance.get("base_url"):
                     instance["base_url"] = "未设置"
 
+                # 已有卡片只更新数据
+                existing = self._instances.get(instance.get("instance_id"))
+                if existing is not None:
+                    existing.update_data(instance)
+                    continue
+
                 # 添加实例卡片
                 try:
                     self._add_instance_card(instance)
@@ -649,6 +670,21 @@ class InstanceCardList(QWidget):
         if len(self._instances) == 1 and self._selected_id is None:
             self._on_instance_selected(instance_id)
 
+    def _remove_instance_card(self, instance_id: str):
+        """
+        移除实例卡片
+
+        Args:
+            instance_id: 实例ID
+        """
+        card = self._instances.pop(instance_id, None)
+        if card is None:
+            return
+        self.card_layout.removeWidget(card)
+        card.deleteLater()
+        if self._selected_id == instance_id:
+            self._selected_id = None
+
     def _on_instance_selected(self, instance_id: str):
         """
         实例选中事件
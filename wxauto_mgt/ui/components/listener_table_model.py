@@ -0,0 +1,263 @@
+"""
+监听对象表格模型模块
+
+为消息监听面板提供基于QAbstractTableModel的监听对象列表：
+- 刷新时与已有行做差异比较，只插入/删除/更新变化的行，不重建整个表格
+- 超时倒计时和活跃状态由模型根据缓存的监听对象数据计算，不读取表格文本
+- "操作"列通过委托绘制移除按钮，不为每一行创建QPushButton
+"""
+
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from PySide6.QtCore import Qt, Signal, QAbstractTableModel, QModelIndex, QEvent, QSize
+from PySide6.QtGui import QColor
+from PySide6.QtWidgets import QStyledItemDelegate, QStyleOptionButton, QStyle, QApplication
+
+ListenerKey = Tuple[str, str]  # (实例ID, 监听对象)
+
+# 最近有消息的监听对象显示为"活跃"的时间窗口（秒）
+ACTIVE_WINDOW = 300
+
+
+class ListenerTableModel(QAbstractTableModel):
+    """监听对象表格模型"""
+
+    COLUMNS = ["实例", "监听对象", "活跃状态", "最后消息", "超时倒计时", "操作"]
+    COL_INSTANCE, COL_WHO, COL_STATUS, COL_LAST_MESSAGE, COL_COUNTDOWN, COL_ACTION = range(6)
+
+    def __init__(self, countdown_func: Callable[[Dict], str], parent=None):
+        """
+        初始化模型
+
+        Args:
+            countdown_func: 根据监听对象数据计算倒计时文本的函数
+            parent: 父对象
+        """
+        super().__init__(parent)
+        self._countdown_func = countdown_func
+        self._keys: List[ListenerKey] = []
+        self._rows: Dict[ListenerKey, int] = {}
+        # 监听对象数据：(实例ID, 监听对象) -> 数据字典
+        self.listener_data: Dict[ListenerKey, Dict] = {}
+        # 缓存的显示内容，避免每次绘制时重复计算
+        self._countdowns: Dict[ListenerKey, str] = {}
+        self._statuses: Dict[ListenerKey, str] = {}
+        self._time_texts: Dict[ListenerKey, str] = {}
+
+    # ---- QAbstractTableModel接口 ----
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._keys)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.COLUMNS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() >= len(self._keys):
+            return None
+
+        key = self._keys[index.row()]
+        column = index.column()
+
+        if role == Qt.DisplayRole:
+            if column == self.COL_INSTANCE:
+                return key[0]
+            if column == self.COL_WHO:
+                return key[1]
+            if column == self.COL_STATUS:
+                return self._statuses.get(key, "")
+            if column == self.COL_LAST_MESSAGE:
+                return self._time_texts.get(key, "未知")
+            if column == self.COL_COUNTDOWN:
+                return self._countdowns.get(key, "")
+            if column == self.COL_ACTION:
+                return "移除"
+        elif role == Qt.ForegroundRole and column == self.COL_STATUS:
+            status = self._statuses.get(key, "")
+            if status.startswith("🟢"):
+                return QColor(0, 170, 0)  # 绿色
+            if status.startswith("🟡"):
+                return QColor(255, 165, 0)  # 橙色
+            return QColor(255, 0, 0)  # 红色
+        elif role == Qt.UserRole:
+            return key
+
+        return None
+
+    # ---- 查询 ----
+
+    def key_at(self, row: int) -> Optional[ListenerKey]:
+        """获取行对应的(实例ID, 监听对象)"""
+        if 0 <= row < len(self._keys):
+            return self._keys[row]
+        return None
+
+    def row_of(self, instance_id: str, who: str) -> int:
+        """获取监听对象所在行，不存在时返回-1"""
+        return self._rows.get((instance_id, who), -1)
+
+    def countdown_of(self, key: ListenerKey) -> str:
+        """获取缓存的倒计时文本"""
+        return self._countdowns.get(key, "")
+
+    def timed_out_keys(self) -> List[ListenerKey]:
+        """获取已超时但仍为活跃状态的监听对象"""
+        return [
+            key for key in self._keys
+            if self._countdowns.get(key) == "已超时" and self.listener_data[key].get('active', False)
+        ]
+
+    # ---- 差异更新 ----
+
+    def apply_snapshot(self, snapshot: Dict[ListenerKey, Dict]):
+        """
+        按最新的监听对象数据更新模型，只对变化的行发出信号
+
+        Args:
+            snapshot: (实例ID, 监听对象) -> 数据字典，顺序即新增行的顺序
+        """
+        # 删除不再存在的行（从后往前按连续区间删除）
+        removed_rows = sorted((row for key, row in self._rows.items() if key not in snapshot), reverse=True)
+        index = 0
+        while index < len(removed_rows):
+            last = removed_rows[index]
+            first = last
+            while index + 1 < len(removed_rows) and removed_rows[index + 1] == first - 1:
+                index += 1
+                first = removed_rows[index]
+            self._remove_rows(first, last)
+            index += 1
+
+        # 更新已有行，收集新增行
+        new_keys = []
+        for key, data in snapshot.items():
+            if key in self._rows:
+                self.update_listener(key, data)
+            else:
+                new_keys.append(key)
+
+        # 在末尾追加新增行
+        if new_keys:
+            first = len(self._keys)
+            self.beginInsertRows(QModelIndex(), first, first + len(new_keys) - 1)
+            for key in new_keys:
+                self._rows[key] = len(self._keys)
+                self._keys.append(key)
+                self.listener_data[key] = snapshot[key]
+                self._compute(key)
+            self.endInsertRows()
+
+    def update_listener(self, key: ListenerKey, data: Dict):
+        """
+        更新单个监听对象的数据，不存在时追加一行
+
+        Args:
+            key: (实例ID, 监听对象)
+            data: 监听对象数据
+        """
+        row = self._rows.get(key)
+        if row is None:
+            self.apply_snapshot({**self.listener_data, key: data})
+            return
+
+        if self.listener_data.get(key) == data:
+            return
+        self.listener_data[key] = data
+        if self._compute(key):
+            self.dataChanged.emit(self.index(row, self.COL_STATUS), self.index(row, self.COL_COUNTDOWN))
+
+    def remove_listener(self, instance_id: str, who: str):
+        """
+        移除单个监听对象所在的行
+
+        Args:
+            instance_id: 实例ID
+            who: 监听对象
+        """
+        row = self._rows.get((instance_id, who))
+        if row is not None:
+            self._remove_rows(row, row)
+
+    def refresh_countdowns(self):
+        """根据缓存数据重新计算倒计时和活跃状态，只通知内容变化的行"""
+        for row, key in enumerate(self._keys):
+            if self._compute(key):
+                self.dataChanged.emit(self.index(row, self.COL_STATUS), self.index(row, self.COL_COUNTDOWN))
+
+    def _remove_rows(self, first: int, last: int):
+        """删除[first, last]区间的行并重建行号索引"""
+        self.beginRemoveRows(QModelIndex(), first, last)
+        for key in self._keys[first:last + 1]:
+            self._rows.pop(key, None)
+            self.listener_data.pop(key, None)
+            self._countdowns.pop(key, None)
+            self._statuses.pop(key, None)
+            self._time_texts.pop(key, None)
+        del self._keys[first:last + 1]
+        for row in range(first, len(self._keys)):
+            self._rows[self._keys[row]] = row
+        self.endRemoveRows()
+
+    def _compute(self, key: ListenerKey) -> bool:
+        """
+        计算一行的显示内容
+
+        Returns:
+            bool: 显示内容是否有变化
+        """
+        data = self.listener_data[key]
+
+        if data.get('active', False):
+            last_activity = data.get('last_message_time', 0) or 0
+            status = "🟢 活跃" if time.time() - last_activity < ACTIVE_WINDOW else "🟡 空闲"
+        else:
+            status = "🔴 非活跃"
+
+        last_time = data.get('last_message_time', 0) or 0
+        time_text = datetime.fromtimestamp(last_time).strftime("%Y-%m-%d %H:%M:%S") if last_time > 0 else "未知"
+
+        countdown = self._countdown_func(data)
+
+        changed = (
+            self._statuses.get(key) != status
+            or self._time_texts.get(key) != time_text
+            or self._countdowns.get(key) != countdown
+        )
+        self._statuses[key] = status
+        self._time_texts[key] = time_text
+        self._countdowns[key] = countdown
+        return changed
+
+
+class RemoveButtonDelegate(QStyledItemDelegate):
+    """在"操作"列绘制移除按钮，点击时发出remove_requested信号"""
+
+    remove_requested = Signal(str, str)  # 实例ID, 监听对象
+
+    def paint(self, painter, option, index):
+        button = QStyleOptionButton()
+        button.rect = option.rect.adjusted(4, 2, -4, -2)
+        button.text = index.data(Qt.DisplayRole) or "移除"
+        button.state = QStyle.State_Enabled
+        if option.state & QStyle.State_MouseOver:
+            button.state |= QStyle.State_MouseOver
+        style = option.widget.style() if option.widget else QApplication.style()
+        style.drawControl(QStyle.CE_PushButton, button, painter, option.widget)
+
+    def sizeHint(self, option, index):
+        return QSize(60, 26)
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() == QEvent.MouseButtonRelease and option.rect.contains(event.position().toPoint()):
+            key = index.data(Qt.UserRole)
+            if key:
+                self.remove_requested.emit(key[0], key[1])
+            return True
+        return super().editorEvent(event, model, option, index)
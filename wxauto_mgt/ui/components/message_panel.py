@@ -20,15 +20,18 @@ from io import StringIO
 from PySide6.QtCore import Qt, Signal, Slot, QTimer, QMetaObject, Q_ARG
 from PySide6.QtGui import QIcon, QAction, QColor, QIntValidator
 from PySide6.QtWidgets import (
-    QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QTableWidget,
-    QTableWidgetItem, QLabel, QHeaderView, QMessageBox, QMenu,
+    QWidget, QVBoxLayout, QHBoxLayout, QPushButton,
+    QLabel, QHeaderView, QMessageBox, QMenu,
     QToolBar, QLineEdit, QComboBox, QSplitter, QTextEdit, QCheckBox,
-    QGroupBox, QTabWidget, QFileDialog, QDialog
+    QGroupBox, QTabWidget, QFileDialog, QDialog, QTableView, QAbstractItemView
 )
 from qasync import asyncSlot
 
 from wxauto_mgt.core.api_client import instance_manager
 from wxauto_mgt.core.message_listener import MessageListener, message_listener
+from wxauto_mgt.core.domain_events import domain_events, DomainEventType
+from wxauto_mgt.ui.components.listener_table_model import ListenerTableModel, RemoveButtonDelegate
+from wxauto_mgt.ui.components.message_table_model import MessageTableModel, display_status
 from wxauto_mgt.utils.logger import setup_logger
 # 导入新的日志模块
 try:
@@ -64,6 +67,12 @@ except ImportError:
 # 设置日志
 logger = setup_logger(__name__)
 
+# 界面通过领域事件增量更新，定时刷新只作为低频的一致性检查（秒）
+CONSISTENCY_SWEEP_INTERVAL = 60
+
+# 合并短时间内的多个领域事件后再刷新（毫秒）
+EVENT_REFRESH_DELAY = 300
+
 # 创建调试日志记录器
 debug_logger = None
 try:
@@ -835,7 +844,7 @@ class MessageListenerPanel(QWidget):
         self.current_instance_id = None
         self.selected_listener = None
         self.selected_message_id = None
-        self.listener_data = {}  # 保存监听对象数据
+        self.listener_data = self.listener_model.listener_data  # 监听对象数据（由表格模型维护）
         self.messages = []
         self.timeout_minutes = 30  # 默认超时时间，与message_listener一致
         self.poll_interval = 5  # 默认轮询间隔(秒)
@@ -852,10 +861,17 @@ class MessageListenerPanel(QWidget):
         import asyncio
         self._operation_lock = asyncio.Lock()
 
-        # 创建定时器
+        # 创建定时器（一致性检查，日常更新由领域事件驱动）
         self.refresh_timer = QTimer()
         self.refresh_timer.timeout.connect(self._auto_refresh)
-        self.refresh_timer.start(self.poll_interval * 1000)  # 转换为毫秒
+        self.refresh_timer.start(self._sweep_interval_ms())
+
+        # 合并领域事件触发的刷新
+        self._pending_event_refresh = set()
+        self._event_refresh_timer = QTimer(self)
+        self._event_refresh_timer.setSingleShot(True)
+        self._event_refresh_timer.timeout.connect(self._apply_event_refresh)
+        self._subscribe_domain_events()
 
         # 倒计时刷新定时器
         self.countdown_timer = QTimer()
@@ -960,17 +976,29 @@ class MessageListenerPanel(QWidget):
         listener_group = QGroupBox("监听对象")
         listener_layout = QVBoxLayout(listener_group)
 
-        # 监听对象表格
-        self.listener_table = QTableWidget(0, 6)  # 0行，6列(增加活跃状态列)
-        self.listener_table.setHorizontalHeaderLabels(["实例", "监听对象", "活跃状态", "最后消息", "超时倒计时", "操作"])
+        # 监听对象表格（模型按差异更新行，倒计时由模型根据缓存数据计算）
+        self.listener_model = ListenerTableModel(self._calculate_countdown_from_data, self)
+        self.listener_table = QTableView()
+        self.listener_table.setModel(self.listener_model)
         self.listener_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         self.listener_table.horizontalHeader().setSectionResizeMode(2, QHeaderView.ResizeToContents)  # 活跃状态列
         self.listener_table.horizontalHeader().setSectionResizeMode(5, QHeaderView.ResizeToContents)  # 操作列
-        self.listener_table.setSelectionBehavior(QTableWidget.SelectRows)
-        self.listener_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.listener_table.verticalHeader().setVisible(False)
+        self.listener_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.listener_table.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.listener_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
         self.listener_table.setContextMenuPolicy(Qt.CustomContextMenu)
         self.listener_table.customContextMenuRequested.connect(self._show_listener_context_menu)
-        self.listener_table.cellClicked.connect(self._on_listener_selected)
+        self.listener_table.clicked.connect(
+            lambda index: self._on_listener_selected(index.row(), index.column())
+        )
+
+        # 操作列的移除按钮由委托绘制
+        self.remove_button_delegate = RemoveButtonDelegate(self.listener_table)
+        self.remove_button_delegate.remove_requested.connect(
+            lambda instance_id, who: asyncio.ensure_future(self._remove_listener(instance_id, who))
+        )
+        self.listener_table.setItemDelegateForColumn(ListenerTableModel.COL_ACTION, self.remove_button_delegate)
 
         listener_layout.addWidget(self.listener_table)
 
@@ -983,20 +1011,23 @@ class MessageListenerPanel(QWidget):
         message_group = QGroupBox("消息列表")
         message_layout = QVBoxLayout(message_group)
 
-        # 消息表格
-        self.message_table = QTableWidget(0, 5)  # 0行，5列（移除了接收者列）
-        self.message_table.setHorizontalHeaderLabels(["时间", "发送者", "类型", "状态", "内容"])
+        # 消息表格（虚拟化模型，滚动到底部时按页加载更早的消息）
+        self.message_model = MessageTableModel(self)
+        self.message_table = QTableView()
+        self.message_table.setModel(self.message_model)
+        self.message_table.verticalHeader().setVisible(False)
         self.message_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         self.message_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeToContents)
         self.message_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeToContents)
         self.message_table.horizontalHeader().setSectionResizeMode(2, QHeaderView.ResizeToContents)
         self.message_table.horizontalHeader().setSectionResizeMode(3, QHeaderView.ResizeToContents)
         self.message_table.horizontalHeader().setSectionResizeMode(4, QHeaderView.Stretch)  # 内容列自适应宽度
-        self.message_table.setSelectionBehavior(QTableWidget.SelectRows)
-        self.message_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.message_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.message_table.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.message_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
         self.message_table.setContextMenuPolicy(Qt.CustomContextMenu)
         self.message_table.customContextMenuRequested.connect(self._show_message_context_menu)
-        self.message_table.cellClicked.connect(self._on_message_selected)
+        self.message_table.clicked.connect(lambda index: self._on_message_selected(index.row(), index.column()))
 
         message_layout.addWidget(self.message_table)
 
@@ -1089,6 +1120,79 @@ class MessageListenerPanel(QWidget):
             if index >= 0:
                 self.instance_filter.setCurrentIndex(index)
 
+    def _sweep_interval_ms(self) -> int:
+        """一致性检查定时器的间隔（毫秒）"""
+        return max(self.poll_interval, CONSISTENCY_SWEEP_INTERVAL) * 1000
+
+    def _subscribe_domain_events(self):
+        """订阅核心服务的领域事件"""
+        handlers = [
+            (DomainEventType.MESSAGE_SAVED, self._on_message_saved),
+            (DomainEventType.DELIVERY_STATUS_CHANGED, self._on_delivery_status_changed),
+            (DomainEventType.LISTENER_ADDED, self._on_listener_changed),
+            (DomainEventType.LISTENER_REMOVED, self._on_listener_changed),
+        ]
+        for event_type, handler in handlers:
+            domain_events.subscribe(event_type, handler)
+
+        def unsubscribe():
+            for event_type, handler in handlers:
+                domain_events.unsubscribe(event_type, handler)
+
+        # 面板销毁时取消订阅
+        self.destroyed.connect(unsubscribe)
+
+    def _schedule_event_refresh(self, *parts: str):
+        """
+        登记需要刷新的部分，EVENT_REFRESH_DELAY毫秒内的事件合并为一次刷新
+
+        Args:
+            parts: listeners（监听对象列表）、messages（当前聊天的消息）、status（状态栏计数）
+        """
+        self._pending_event_refresh.update(parts)
+        if not self._event_refresh_timer.isActive():
+            self._event_refresh_timer.start(EVENT_REFRESH_DELAY)
+
+    def _on_message_saved(self, event):
+        """新消息已保存：更新对应监听对象的最后消息时间，当前查看的聊天则加载新消息"""
+        key = (event.data.get('instance_id'), event.data.get('chat_name'))
+        data = self.listener_model.listener_data.get(key)
+        if data is not None:
+            self.listener_model.update_listener(key, {**data, 'last_message_time': event.data.get('create_time', time.time())})
+
+        if self.selected_listener and tuple(self.selected_listener) == key:
+            self._schedule_event_refresh('messages', 'status')
+        else:
+            self._schedule_event_refresh('status')
+
+    def _on_delivery_status_changed(self, event):
+        """消息投递状态变化：只更新表格中对应的一行"""
+        message_id = event.data.get('message_id')
+        if self.message_model.row_of(message_id) >= 0:
+            self.message_model.update_status(message_id, display_status({'delivery_status': event.data.get('status')}))
+        self._schedule_event_refresh('status')
+
+    def _on_listener_changed(self, event):
+        """监听对象增删：合并后做一次差异刷新"""
+        self._schedule_event_refresh('listeners', 'status')
+
+    @asyncSlot()
+    async def _apply_event_refresh(self):
+        """执行合并后的事件刷新"""
+        parts = self._pending_event_refresh
+        self._pending_event_refresh = set()
+
+        try:
+            if 'listeners' in parts:
+                await self.refresh_listeners(force_reload=False, silent=True)
+            if 'messages' in parts and self.selected_listener:
+                instance_id, wxid = self.selected_listener
+                await self._view_listener_messages(instance_id=instance_id, wxid=wxid, silent=True)
+            if 'status' in parts:
+                await self._update_status_count()
+        except Exception as e:
+            logger.error(f"处理领域事件刷新时出错: {e}")
+
     def _update_poll_interval(self):
         """更新轮询间隔设置"""
         try:
@@ -1133,7 +1237,7 @@ class MessageListenerPanel(QWidget):
 
             # 重新设置定时器
             if self.auto_refresh_check.isChecked():
-                self.refresh_timer.setInterval(poll_interval * 1000)
+                self.refresh_timer.setInterval(self._sweep_interval_ms())
 
             # 更新倒计时定时器
             self.countdown_timer.setInterval(poll_interval * 1000)
@@ -1274,7 +1378,7 @@ class MessageListenerPanel(QWidget):
                             self.poll_interval_edit.setText(str(self.poll_interval))
                             message_listener.poll_interval = self.poll_interval
                             if self.auto_refresh_check.isChecked():
-                                self.refresh_timer.setInterval(self.poll_interval * 1000)
+                                self.refresh_timer.setInterval(self._sweep_interval_ms())
 
                             # 更新倒计时定时器
                             self.countdown_timer.setInterval(self.poll_interval * 1000)
@@ -1290,95 +1394,21 @@ class MessageListenerPanel(QWidget):
                     except Exception as e:
                         logger.error(f"解析实例配置时出错: {e}")
 
-            # 保存选中项
-            selected_row = self.listener_table.currentRow()
-            selected_instance = None
-            selected_who = None
-
-            if selected_row >= 0:
-                selected_instance = self.listener_table.item(selected_row, 0).text()
-                selected_who = self.listener_table.item(selected_row, 1).text()
-
-            # 清空表格
-            self.listener_table.setRowCount(0)
-            self.listener_data = {}
-
             # 获取所有监听对象（包括inactive状态的）
             result = await message_listener.get_all_listeners_from_db()
-            if not result:
-                self.status_label.setText("共 0 个监听对象")
-                return
-
-            row = 0
-            total_listeners = 0
-
-            for instance_id, listeners in result.items():
-                if not listeners:
-                    continue
 
-                api_client = instances.get(instance_id)
-                if not api_client:
+            snapshot = {}
+            for instance_id, listeners in (result or {}).items():
+                if not listeners or not instances.get(instance_id):
                     continue
-
                 for listener_data in listeners:
-                    who = listener_data['who']
-                    self.listener_table.insertRow(row)
-
-                    # 保存原始数据
-                    self.listener_data[(instance_id, who)] = listener_data
-
-                    # 实例ID
-                    self.listener_table.setItem(row, 0, QTableWidgetItem(instance_id))
-
-                    # 监听对象
-                    self.listener_table.setItem(row, 1, QTableWidgetItem(who))
+                    snapshot[(instance_id, listener_data['who'])] = listener_data
 
-                    # 活跃状态
-                    status_item = QTableWidgetItem()
-                    if listener_data['active']:
-                        status_item.setText("🟢 活跃")
-                        status_item.setForeground(QColor(0, 170, 0))  # 绿色
-                    else:
-                        status_item.setText("🔴 非活跃")
-                        status_item.setForeground(QColor(255, 0, 0))  # 红色
-                    self.listener_table.setItem(row, 2, status_item)
-
-                    # 最后消息时间
-                    time_str = "未知"
-                    last_time = listener_data.get('last_message_time', 0)
-                    if last_time > 0:
-                        dt = datetime.fromtimestamp(last_time)
-                        time_str = dt.strftime("%Y-%m-%d %H:%M:%S")
-                    self.listener_table.setItem(row, 3, QTableWidgetItem(time_str))
-
-                    # 超时倒计时
-                    countdown = self._calculate_countdown_from_data(listener_data)
-                    self.listener_table.setItem(row, 4, QTableWidgetItem(countdown))
-
-                    # 操作按钮
-                    remove_btn = QPushButton("移除")
-                    # 使用lambda函数创建一个闭包，保存当前的instance_id和who值
-                    def create_remove_handler(instance_id, who):
-                        def handler(checked=False):
-                            # 在主线程中安全地调用异步方法
-                            import asyncio
-                            asyncio.ensure_future(self._remove_listener(instance_id, who))
-                        return handler
-
-                    # 连接按钮点击事件到处理函数
-                    remove_btn.clicked.connect(create_remove_handler(instance_id, who))
-                    self.listener_table.setCellWidget(row, 5, remove_btn)
-
-                    # 检查是否是之前选中的项
-                    if selected_instance == instance_id and selected_who == who:
-                        self.listener_table.selectRow(row)
-                        self.selected_listener = (instance_id, who)
-
-                    row += 1
-                    total_listeners += 1
+            # 只更新有变化的行，选中状态由视图保持
+            self.listener_model.apply_snapshot(snapshot)
 
             # 更新状态栏
-            self.status_label.setText(f"共 {total_listeners} 个监听对象")
+            self.status_label.setText(f"共 {self.listener_model.rowCount()} 个监听对象")
 
         except asyncio.CancelledError:
             # 任务被取消，通常发生在程序关闭或窗口关闭时
@@ -1529,6 +1559,10 @@ class MessageListenerPanel(QWidget):
 
                 if success:
                     # 不再记录成功日志，避免重复
+                    # 立即从表格中移除该行
+                    self.listener_model.remove_listener(instance_id, who)
+                    if self.selected_listener == (instance_id, who):
+                        self.selected_listener = None
                     # 发送信号
                     self.listener_removed.emit(instance_id, who)
                     # 强制刷新监听对象列表
@@ -1576,13 +1610,8 @@ class MessageListenerPanel(QWidget):
             silent: 是否静默操作，不输出非关键日志
         """
         try:
-            # 记住当前选中的行
-            selected_row = -1
-            selected_message_id = None
-            if self.message_table.selectedItems():
-                selected_row = self.message_table.selectedItems()[0].row()
-                if selected_row >= 0:
-                    selected_message_id = self.message_table.item(selected_row, 0).data(Qt.UserRole)
+            # 记住当前选中的消息
+            selected_message_id = self._selected_message_id()
 
             # 如果参数为None，从发送者获取
             sender = self.sender()
@@ -1597,70 +1626,22 @@ class MessageListenerPanel(QWidget):
             if not silent:
                 logger.debug(f"正在查看消息: 实例={instance_id}, 聊天={wxid}")
 
-            # 获取消息列表
-            messages = await self._get_messages(instance_id, wxid)
-            if not silent:
-                logger.debug(f"获取到 {len(messages)} 条消息")
-
-            # 按照多个维度进行去重处理
-            unique_messages = {}
-            for msg in messages:
-                # 使用组合键作为去重标识：实例ID + 聊天名称 + 发送者 + 发送时间戳 + 内容摘要(前20字符)
-                msg_content = msg.get("content", "")[:20]  # 使用内容前20个字符作为内容摘要
-                sender_id = msg.get("sender", "")
-                timestamp = msg.get("timestamp", 0)
-                message_id = msg.get("message_id", "")
-
-                # 创建消息的唯一标识符
-                unique_key = f"{instance_id}:{wxid}:{sender_id}:{timestamp}:{msg_content}"
-
-                # 如果这个标识符已经存在，并且当前消息有ID，并且之前存储的消息没有ID，则更新
-                if unique_key in unique_messages and message_id:
-                    stored_msg = unique_messages[unique_key]
-                    if not stored_msg.get("message_id"):
-                        unique_messages[unique_key] = msg
-                else:
-                    unique_messages[unique_key] = msg
-
-            # 按时间戳排序
-            sorted_messages = sorted(
-                unique_messages.values(),
-                key=lambda x: x.get("timestamp", 0),
-                reverse=True
-            )
-
+            # 模型在后台查询和格式化最新一页，同一聊天对象只合并变化的行
+            await self.message_model.load(instance_id, wxid)
             if not silent:
-                logger.debug(f"去重后剩余 {len(sorted_messages)} 条消息")
+                logger.debug(f"已加载 {self.message_model.rowCount()} 条消息")
 
-            # 在UI线程中直接更新表格
-            def update_ui():
-                try:
-                    # 清空表格 - 确保先将行数设为0，避免在添加新消息时引起内存泄漏
-                    self.message_table.setRowCount(0)
-                    self.message_table.clearContents()
-
-                    # 添加消息到表格
-                    new_selected_row = -1
-                    for i, msg in enumerate(sorted_messages):
-                        self._add_message_to_table(msg)
-                        # 检查是否是之前选中的消息
-                        if selected_message_id and msg.get("message_id") == selected_message_id:
-                            new_selected_row = i
-
-                    # 还原选中状态
-                    if new_selected_row >= 0 and new_selected_row < self.message_table.rowCount():
-                        self.message_table.selectRow(new_selected_row)
-                        self._on_message_selected(new_selected_row, 0)
-
-                    # 更新状态标签 - 使用可见消息计数
-                    visible_count = self._get_visible_message_count()
-                    listener_count = self.listener_table.rowCount()
-                    self.status_label.setText(f"共 {listener_count} 个监听对象，{visible_count} 条消息")
-                except Exception as e:
-                    logger.error(f"更新UI时出错: {e}")
+            # 还原选中状态
+            if selected_message_id:
+                row = self.message_model.row_of(selected_message_id)
+                if row >= 0 and row != self._selected_row():
+                    self.message_table.selectRow(row)
+                    self._on_message_selected(row, 0)
 
-            # 使用QTimer在主线程中安全更新UI
-            QTimer.singleShot(0, update_ui)
+            # 更新状态标签 - 使用可见消息计数
+            visible_count = self._get_visible_message_count()
+            listener_count = self.listener_model.rowCount()
+            self.status_label.setText(f"共 {listener_count} 个监听对象，{visible_count} 条消息")
 
         except asyncio.CancelledError:
             # 任务被取消，通常发生在程序关闭或窗口关闭时
@@ -1771,7 +1752,7 @@ class MessageListenerPanel(QWidget):
 
             # 添加简短状态更新到日志窗口
             refresh_time = datetime.now().strftime('%H:%M:%S')
-            listener_count = self.listener_table.rowCount()
+            listener_count = self.listener_model.rowCount()
 
             # 获取已处理和未处理消息数量
             try:
@@ -1864,14 +1845,6 @@ class MessageListenerPanel(QWidget):
             # 清除刷新标志
             self._is_refreshing = False
 
-    @Slot("QVariant")
-    def _add_message_to_table_safe(self, message):
-        """在主线程中安全地添加消息到表格"""
-        try:
-            self._add_message_to_table(message)
-        except Exception as e:
-            logger.error(f"安全添加消息到表格时出错: {e}")
-
     async def _process_message(self, checked=False, message_id=None):
         """
         标记消息为已处理
@@ -1882,13 +1855,10 @@ class MessageListenerPanel(QWidget):
         """
         # 如果message_id为None，从所选行获取
         if message_id is None:
-            selected_items = self.message_table.selectedItems()
-            if not selected_items:
+            message_id = self._selected_message_id()
+            if not message_id:
                 return
 
-            row = selected_items[0].row()
-            message_id = self.message_table.item(row, 0).data(Qt.UserRole)
-
         if not message_id:
             logger.error("处理消息时缺少消息ID")
             return
@@ -1925,16 +1895,10 @@ class MessageListenerPanel(QWidget):
                 self.message_processed.emit(message_id)
 
                 # 在UI中直接更新消息状态
-                for row in range(self.message_table.rowCount()):
-                    item = self.message_table.item(row, 0)
-                    if item and item.data(Qt.UserRole) == message_id:
-                        status_item = self.message_table.item(row, 3)
-                        if status_item:
-                            status_item.setText("已完成")
-                            status_item.setForeground(QColor(0, 170, 0))  # 绿色
-                            # 更新状态栏显示
-                            QTimer.singleShot(0, lambda: asyncio.ensure_future(self._update_status_count()))
-                            break
+                if self.message_model.row_of(message_id) >= 0:
+                    self.message_model.update_status(message_id, "已完成")
+                    # 更新状态栏显示
+                    QTimer.singleShot(0, lambda: asyncio.ensure_future(self._update_status_count()))
 
                 QMessageBox.information(self, "处理成功", f"消息 {message_id} 已标记为已处理")
 
@@ -1947,21 +1911,6 @@ class MessageListenerPanel(QWidget):
             logger.error(f"处理消息时出错: {e}")
             QMessageBox.critical(self, "操作失败", f"处理消息时出错: {str(e)}")
 
-    @Slot("QVariantList")
-    def _update_message_table(self, messages):
-        """使用消息数据更新UI表格"""
-        try:
-            # 清空表格
-            self.message_table.setRowCount(0)
-
-            # 添加消息到表格
-            for msg in messages:
-                self._add_message_to_table(msg)
-
-        except Exception as e:
-            logger.error(f"更新消息表格时出错: {e}")
-            QMessageBox.critical(self, "刷新失败", f"更新消息显示时出错: {str(e)}")
-
     @Slot(int)
     async def _update_status_count(self, count=None):
         """更新状态栏消息计数"""
@@ -1976,256 +1925,16 @@ class MessageListenerPanel(QWidget):
             logger.info(f"消息统计: 已处理: {processed_count}, 未处理: {pending_count}, 总计: {processed_count + pending_count}")
 
             # 更新状态栏显示
-            self.status_label.setText(f"共 {self.listener_table.rowCount()} 个监听对象，{visible_count} 条消息 (已处理: {processed_count}, 未处理: {pending_count})")
+            self.status_label.setText(f"共 {self.listener_model.rowCount()} 个监听对象，{visible_count} 条消息 (已处理: {processed_count}, 未处理: {pending_count})")
         except Exception as e:
             logger.error(f"更新状态标签时出错: {e}")
 
-    async def _get_messages(self, instance_id: str, wxid: str) -> List[Dict]:
-        """
-        获取消息列表
-
-        Args:
-            instance_id: 实例ID
-            wxid: 微信ID
-
-        Returns:
-            List[Dict]: 消息列表
-        """
-        try:
-            logger.debug(f"获取消息: 实例={instance_id}, 聊天={wxid}")
-
-            # 导入消息监听器，用于暂停/恢复监听
-            from wxauto_mgt.core.message_listener import message_listener
-
-            # 从数据库获取消息
-            from wxauto_mgt.data.db_manager import db_manager
-
-            # 构建SQL查询
-            query = """
-                SELECT * FROM messages
-                WHERE instance_id = ? AND chat_name = ?
-                ORDER BY create_time DESC LIMIT 100
-            """
-
-            # 执行查询
-            messages = await db_manager.fetchall(query, (instance_id, wxid))
-
-            # 记录获取到的消息数量 - 使用匹配关键词的格式
-            if messages and len(messages) > 0:
-                # 避免重复日志，使用统一的"获取到新消息"关键词
-                logger.info(f"获取到新消息: 实例={instance_id}, 聊天={wxid}, 数量={len(messages)}")
-
-            # 格式化消息并过滤
-            formatted_messages = []
-            filtered_count = 0
-            for msg in messages:
-                # 使用统一的消息过滤模块
-                from wxauto_mgt.core.message_filter import message_filter
-
-                # 检查消息是否应该被过滤
-                if message_filter.should_filter_message(msg, log_prefix="UI层获取"):
-                    filtered_count += 1
-                    continue
-
-                # 尝试解析JSON内容
-                content = msg.get("content", "")
-                try:
-                    if content and isinstance(content, str) and (content.startswith('{') or content.startswith('[')):
-                        content_obj = json.loads(content)
-                        if isinstance(content_obj, dict) and "content" in content_obj:
-                            content = content_obj["content"]
-                except:
-                    pass  # 如果解析失败，保持原始内容
-
-                # 确定消息状态
-                status = "pending"
-                if msg.get("processed", 0):
-                    status = "processed"
-
-                # 考虑投递状态
-                delivery_status = msg.get("delivery_status", 0)
-                if delivery_status == 1:  # 已投递
-                    status = "processed"
-                elif delivery_status == 2:  # 投递失败
-                    status = "failed"
-                elif delivery_status == 3:  # 正在投递
-                    status = "pending"
-
-                # 转换状态为中文显示
-                display_status = status
-                if status == 'pending':
-                    display_status = '投递中'
-                elif status == 'processed':
-                    display_status = '已完成'
-                elif status == 'failed':
-                    display_status = '失败'
-
-                formatted_msg = {
-                    "message_id": msg.get("message_id", ""),
-                    "instance_id": msg.get("instance_id", ""),
-                    "sender": msg.get("sender", ""),
-                    "sender_remark": msg.get("sender_remark", ""),
-                    "receiver": wxid if msg.get("sender", "") != wxid else "me",
-                    "content": content,
-                    "type": msg.get("message_type", "text"),
-                    "timestamp": int(msg.get("create_time", 0)),
-                    "status": display_status
-                }
-                formatted_messages.append(formatted_msg)
-
-            # 记录过滤情况
-            if filtered_count > 0:
-                logger.debug(f"过滤掉 {filtered_count} 条消息 (self发送或time类型)")
-
-            return formatted_messages
-        except Exception as e:
-            logger.error(f"获取消息时出错: {e}")
-            return []
-
-    def _add_message_to_table(self, message: Dict):
-        """
-        添加消息到表格
-
-        Args:
-            message: 消息字典
-        """
-        try:
-            # 检查消息ID是否已存在
-            message_id = message.get('message_id', '')
-            if not message_id:
-                return
-
-            # 检查是否已经在表格中
-            for row in range(self.message_table.rowCount()):
-                if self.message_table.item(row, 0).data(Qt.UserRole) == message_id:
-                    return
-
-            # 使用统一的消息过滤模块
-            from wxauto_mgt.core.message_filter import message_filter
-
-            # 记录详细的消息信息，便于调试
-            content = message.get('content', '')
-            #logger.info(f"表格检查消息: id={message_id}")
-
-            # 使用调试日志记录器记录更详细的信息
-            if debug_logger:
-                debug_logger.debug(f"表格检查消息详细: id={message_id}")
-                debug_logger.debug(f"消息内容: {content[:100]}")
-                try:
-                    debug_logger.debug(f"完整消息数据: {json.dumps(message, ensure_ascii=False)}")
-                except:
-                    debug_logger.debug(f"完整消息数据: {str(message)}")
-
-            # 检查消息是否应该被过滤
-            if message_filter.should_filter_message(message, log_prefix="表格添加"):
-                logger.info(f"表格中过滤掉消息: ID={message_id}")
-                return
-
-            # 额外检查消息类型，过滤掉self和time类型的消息
-            # 检查所有可能的类型字段
-            msg_type = message.get('type', '').lower() if isinstance(message.get('type'), str) else ''
-            message_type = message.get('message_type', '').lower() if isinstance(message.get('message_type'), str) else ''
-
-            # 检查发送者是否为Self
-            sender = message.get('sender', '').lower() if isinstance(message.get('sender'), str) else ''
-
-            if msg_type in ['self', 'time'] or message_type in ['self', 'time'] or sender == 'self':
-                logger.info(f"表格中过滤掉消息: ID={message_id}, 类型={msg_type or message_type}, 发送者={sender}")
-                return
-
-            # 获取消息信息
-            instance_id = message.get('instance_id', '')
-            chat_name = message.get('chat_name', '')
-            content = message.get('content', '')
-            create_time = message.get('timestamp', 0)
-            sender = message.get('sender', '')
-            sender_remark = message.get('sender_remark', '')
-            msg_type = message.get('type', 'text')
-            status = message.get('status', '待处理')
-
-            # 转换时间戳
-            time_str = datetime.fromtimestamp(create_time).strftime('%Y-%m-%d %H:%M:%S') if create_time else ''
-
-            # 显示发送者备注或ID
-            display_sender = sender_remark if sender_remark else sender
-
-            # 添加新行
-            row = self.message_table.rowCount()
-            self.message_table.insertRow(row)
-
-            # 设置时间
-            time_item = QTableWidgetItem(time_str)
-            time_item.setData(Qt.UserRole, message_id)  # 存储消息ID
-            time_item.setData(Qt.UserRole + 1, content)  # 存储消息内容
-            self.message_table.setItem(row, 0, time_item)
-
-            # 设置发送者
-            self.message_table.setItem(row, 1, QTableWidgetItem(display_sender))
-
-            # 设置消息类型
-            self.message_table.setItem(row, 2, QTableWidgetItem(msg_type))
-
-            # 设置状态
-            # 转换状态显示
-            if isinstance(status, str):
-                # 如果状态已经是中文，直接使用
-                if status in ['投递中', '已完成', '失败']:
-                    display_status = status
-                # 否则转换英文状态为中文
-                elif status == 'pending':
-                    display_status = '投递中'
-                elif status == 'processed':
-                    display_status = '已完成'
-                elif status == 'failed':
-                    display_status = '失败'
-                else:
-                    display_status = status
-            else:
-                display_status = str(status)
-
-            # 根据状态设置颜色
-            if display_status == '投递中':
-                status_item = QTableWidgetItem(display_status)
-                status_item.setForeground(QColor(0, 120, 215))  # 蓝色
-            elif display_status == '已完成':
-                status_item = QTableWidgetItem(display_status)
-                status_item.setForeground(QColor(0, 170, 0))  # 绿色
-            elif display_status == '失败':
-                status_item = QTableWidgetItem(display_status)
-                status_item.setForeground(QColor(255, 0, 0))  # 红色
-            else:
-                status_item = QTableWidgetItem(display_status)
-                status_item.setForeground(QColor(128, 128, 128))  # 灰色
-
-            self.message_table.setItem(row, 3, status_item)
-
-            # 设置内容（新增）
-            # 如果内容过长，则截断显示
-            display_content = content
-            if len(content) > 100:
-                display_content = content[:97] + "..."
-            self.message_table.setItem(row, 4, QTableWidgetItem(display_content))
-
-            # 如果是当前过滤的实例，则显示，否则隐藏
-            if self.current_instance_id and instance_id != self.current_instance_id:
-                self.message_table.hideRow(row)
-
-        except Exception as e:
-            logger.error(f"添加消息到表格时出错: {e}")
-
     def _filter_messages(self):
         """过滤消息列表"""
         instance_id = self.instance_filter.currentData()
 
         # 应用过滤
-        for row in range(self.message_table.rowCount()):
-            show_row = True
-            if instance_id:
-                msg_instance = self.message_table.item(row, 0).data(Qt.UserRole)
-                if msg_instance != instance_id:
-                    show_row = False
-
-            self.message_table.setRowHidden(row, not show_row)
+        self.message_model.set_instance_filter(instance_id)
 
         # 过滤后更新状态栏显示的消息计数
         # 使用QTimer在主线程中安全更新状态栏
@@ -2245,7 +1954,7 @@ class MessageListenerPanel(QWidget):
                 #logger.info("全局监听服务已暂停，不启动自动刷新定时器")
                 return
 
-            self.refresh_timer.start(self.poll_interval * 1000)  # 转换为毫秒
+            self.refresh_timer.start(self._sweep_interval_ms())
             logger.info("已启动自动刷新定时器")
         else:
             self.refresh_timer.stop()
@@ -2262,8 +1971,11 @@ class MessageListenerPanel(QWidget):
             column: 列索引（未使用）
         """
         # 获取所选监听对象的信息
-        instance_id = self.listener_table.item(row, 0).text()
-        wxid = self.listener_table.item(row, 1).text()
+        key = self.listener_model.key_at(row)
+        if not key:
+            return
+        instance_id, wxid = key
+        self.selected_listener = key
 
         # 更新当前选中的实例ID
         if instance_id != self.current_instance_id:
@@ -2295,7 +2007,7 @@ class MessageListenerPanel(QWidget):
                         self.poll_interval_edit.setText(str(self.poll_interval))
                         message_listener.poll_interval = self.poll_interval
                         if self.auto_refresh_check.isChecked():
-                            self.refresh_timer.setInterval(self.poll_interval * 1000)
+                            self.refresh_timer.setInterval(self._sweep_interval_ms())
 
                         # 更新倒计时定时器
                         self.countdown_timer.setInterval(self.poll_interval * 1000)
@@ -2325,12 +2037,15 @@ class MessageListenerPanel(QWidget):
 
         # 已显示消息内容在表格中，不需要再单独加载和显示了
         # 但可以在状态栏显示完整信息
-        message_id = self.message_table.item(row, 0).data(Qt.UserRole)
+        message = self.message_model.message_at(row)
+        if not message:
+            return
+        message_id = message.message_id
         self.selected_message_id = message_id
 
         # 更新按钮状态
-        sender = self.message_table.item(row, 1).text()
-        status = self.message_table.item(row, 4).text()
+        sender = message.sender
+        status = message.status
 
         # 更新状态栏显示
         self.status_label.setText(f"选中消息: ID={message_id} | 发送者={sender} | 状态={status}")
@@ -2349,10 +2064,9 @@ class MessageListenerPanel(QWidget):
         refresh_action = menu.addAction("刷新")
         refresh_action.triggered.connect(self.refresh_listeners)
 
-        row = self.listener_table.rowAt(position.y())
-        if row >= 0:
-            instance_id = self.listener_table.item(row, 0).text()
-            wxid = self.listener_table.item(row, 1).text()
+        key = self.listener_model.key_at(self.listener_table.rowAt(position.y()))
+        if key:
+            instance_id, wxid = key
 
             menu.addSeparator()
 
@@ -2376,9 +2090,9 @@ class MessageListenerPanel(QWidget):
         refresh_action = menu.addAction("刷新")
         refresh_action.triggered.connect(self._auto_refresh)
 
-        row = self.message_table.rowAt(position.y())
-        if row >= 0:
-            message_id = self.message_table.item(row, 0).data(Qt.UserRole)
+        message = self.message_model.message_at(self.message_table.rowAt(position.y()))
+        if message:
+            message_id = message.message_id
 
             menu.addSeparator()
 
@@ -2401,15 +2115,9 @@ class MessageListenerPanel(QWidget):
         total = 0
 
         # 统计消息
-        for row in range(self.message_table.rowCount()):
-            if self.message_table.isRowHidden(row):
-                continue
-
-            msg_type = self.message_table.item(row, 2).text()
-            status = self.message_table.item(row, 3).text()
-
-            stats['type'][msg_type] += 1
-            stats['status'][status] += 1
+        for message in self.message_model.visible_rows():
+            stats['type'][message.msg_type] += 1
+            stats['status'][message.status] += 1
             total += 1
 
         # 显示统计结果
@@ -2468,7 +2176,7 @@ class MessageListenerPanel(QWidget):
         """导出消息到CSV文件"""
         try:
             # 检查是否有消息
-            if self.message_table.rowCount() == 0:
+            if self.message_model.rowCount() == 0:
                 QMessageBox.information(self, "导出消息", "没有消息可以导出")
                 return
 
@@ -2489,26 +2197,14 @@ class MessageListenerPanel(QWidget):
 
             # 收集消息数据
             messages = []
-            for row in range(self.message_table.rowCount()):
-                if self.message_table.isRowHidden(row):
-                    continue
-
-                time_item = self.message_table.item(row, 0)
-                sender_item = self.message_table.item(row, 1)
-                type_item = self.message_table.item(row, 2)
-                status_item = self.message_table.item(row, 3)
-
-                # 获取消息ID和内容
-                message_id = time_item.data(Qt.UserRole) if time_item else ""
-                content = time_item.data(Qt.UserRole + 1) if time_item else ""
-
+            for message in self.message_model.visible_rows():
                 messages.append({
-                    'time': time_item.text() if time_item else "",
-                    'sender': sender_item.text() if sender_item else "",
-                    'type': type_item.text() if type_item else "",
-                    'status': status_item.text() if status_item else "",
-                    'message_id': message_id,
-                    'content': content
+                    'time': message.time_text,
+                    'sender': message.sender,
+                    'type': message.msg_type,
+                    'status': message.status,
+                    'message_id': message.message_id,
+                    'content': message.content
                 })
 
             # 写入CSV文件
@@ -2527,13 +2223,10 @@ class MessageListenerPanel(QWidget):
         """回复消息"""
         # 如果message_id为None，从所选行获取
         if message_id is None:
-            selected_items = self.message_table.selectedItems()
-            if not selected_items:
+            message_id = self._selected_message_id()
+            if not message_id:
                 return
 
-            row = selected_items[0].row()
-            message_id = self.message_table.item(row, 0).data(Qt.UserRole)
-
         logger.debug(f"回复消息: {message_id}")
         QMessageBox.information(self, "回复消息", "消息回复功能尚未实现")
 
@@ -2541,13 +2234,10 @@ class MessageListenerPanel(QWidget):
         """删除消息"""
         # 如果message_id为None，从所选行获取
         if message_id is None:
-            selected_items = self.message_table.selectedItems()
-            if not selected_items:
+            message_id = self._selected_message_id()
+            if not message_id:
                 return
 
-            row = selected_items[0].row()
-            message_id = self.message_table.item(row, 0).data(Qt.UserRole)
-
         if not message_id:
             logger.error("删除消息时缺少消息ID")
             return
@@ -2605,11 +2295,7 @@ class MessageListenerPanel(QWidget):
                 # 定义成功消息回调
                 def show_success():
                     # 从表格中删除对应行
-                    for row in range(self.message_table.rowCount()):
-                        item = self.message_table.item(row, 0)
-                        if item and item.data(Qt.UserRole) == message_id:
-                            self.message_table.removeRow(row)
-                            break
+                    self.message_model.remove_message(message_id)
 
                     QMessageBox.information(self, "删除成功", f"消息已删除")
 
@@ -2881,33 +2567,9 @@ class MessageListenerPanel(QWidget):
         return f"{minutes}分{seconds}秒"
 
     def _update_listener_activity_status(self):
-        """更新监听对象的活跃状态显示"""
+        """更新监听对象的活跃状态显示（活跃状态与倒计时由模型一起计算）"""
         try:
-            # 遍历表格中的所有监听对象
-            for row in range(self.listener_table.rowCount()):
-                instance_id = self.listener_table.item(row, 0).text()
-                who = self.listener_table.item(row, 1).text()
-
-                # 从存储的数据中获取监听对象信息
-                listener_data = self.listener_data.get((instance_id, who))
-
-                # 更新活跃状态显示
-                status_item = self.listener_table.item(row, 2)
-                if status_item and listener_data:
-                    if listener_data.get('active', False):
-                        # 检查是否最近有活动（5分钟内）
-                        current_time = time.time()
-                        last_activity = listener_data.get('last_message_time', 0)
-                        if current_time - last_activity < 300:  # 5分钟内
-                            status_item.setText("🟢 活跃")
-                            status_item.setForeground(QColor(0, 170, 0))  # 绿色
-                        else:
-                            status_item.setText("🟡 空闲")
-                            status_item.setForeground(QColor(255, 165, 0))  # 橙色
-                    else:
-                        status_item.setText("🔴 非活跃")
-                        status_item.setForeground(QColor(255, 0, 0))  # 红色
-
+            self.listener_model.refresh_countdowns()
         except Exception as e:
             logger.error(f"更新监听对象活跃状态时出错: {e}")
 
@@ -2956,55 +2618,17 @@ class MessageListenerPanel(QWidget):
                 grace_period = 10  # 10秒宽限期
                 time_since_startup = current_time - message_listener.startup_timestamp
                 if time_since_startup < grace_period:
-                    # 不频繁输出日志，降低日志量
-                    # 更新所有显示，但不执行超时处理
-                    for row in range(self.listener_table.rowCount()):
-                        try:
-                            instance_id = self.listener_table.item(row, 0).text()
-                            who = self.listener_table.item(row, 1).text()
-
-                            listener_data = self.listener_data.get((instance_id, who))
-                            if listener_data:
-                                # 在宽限期内，所有倒计时都显示为"初始化中"
-                                self.listener_table.item(row, 4).setText("初始化中")
-                        except Exception as e:
-                            # 不频繁记录这类错误日志
-                            pass
+                    # 更新所有显示（宽限期内倒计时显示为"初始化中"），但不执行超时处理
+                    self.listener_model.refresh_countdowns()
                     return
 
-            # 批量收集需要移除的监听对象
-            to_remove = []
-
-            # 提前记录监听对象的状态，只记录一次
-            listener_status = {}
-
-            # 第一遍扫描：更新UI并收集超时对象
-            for row in range(self.listener_table.rowCount()):
-                try:
-                    instance_id = self.listener_table.item(row, 0).text()
-                    who = self.listener_table.item(row, 1).text()
-
-                    listener_data = self.listener_data.get((instance_id, who))
-                    if listener_data:
-                        countdown = self._calculate_countdown_from_data(listener_data)
-                        self.listener_table.item(row, 4).setText(countdown)
-
-                        # 记录监听对象状态
-                        listener_status[(instance_id, who)] = countdown
-
-                        # 检查是否需要移除（已超时且未标记为已处理移除）
-                        # 对于非活跃状态的监听对象，不需要再次移除
-                        if countdown == "已超时" and listener_data.get('active', False):
-                            # 添加到待移除列表
-                            to_remove.append((instance_id, who))
-                            # 只有当实际要移除时，才记录日志
-                            # 使用统一格式，确保日志处理器能正确去重
-                            logger.info(f"超时移除监听对象: 实例={instance_id}, 聊天={who}")
-
-                            # 不再在这里添加日志窗口消息，避免重复
-                except Exception as e:
-                    # 不记录此类错误日志，降低日志量
-                    pass
+            # 根据缓存数据重新计算倒计时，并收集需要移除的超时监听对象
+            # 对于非活跃状态的监听对象，不需要再次移除
+            self.listener_model.refresh_countdowns()
+            to_remove = self.listener_model.timed_out_keys()
+            for instance_id, who in to_remove:
+                # 使用统一格式，确保日志处理器能正确去重
+                logger.info(f"超时移除监听对象: 实例={instance_id}, 聊天={who}")
 
             # 如果有超时监听对象需要移除，一次性批量处理
             if to_remove:
@@ -3149,11 +2773,17 @@ class MessageListenerPanel(QWidget):
 
     def _get_visible_message_count(self):
         """计算当前可见的消息数量（考虑过滤条件）"""
-        count = 0
-        for row in range(self.message_table.rowCount()):
-            if not self.message_table.isRowHidden(row):
-                count += 1
-        return count
+        return self.message_model.rowCount()
+
+    def _selected_row(self) -> int:
+        """获取消息表格中当前选中的行，没有选中时返回-1"""
+        rows = self.message_table.selectionModel().selectedRows()
+        return rows[0].row() if rows else -1
+
+    def _selected_message_id(self) -> Optional[str]:
+        """获取消息表格中当前选中行的消息ID"""
+        message = self.message_model.message_at(self._selected_row())
+        return message.message_id if message else None
 
     async def _get_processed_pending_count(self) -> tuple:
         """
@@ -0,0 +1,431 @@
+"""
+消息表格模型模块
+
+为消息监听面板提供基于QAbstractTableModel的虚拟化消息列表：
+- 按页从数据库加载消息（按create_time和id做键集分页），滚动到底部时由视图调用fetchMore加载下一页
+- 消息过滤、JSON内容解析、状态和时间格式化在线程池中完成，GUI线程只接收格式化好的行
+- 模型只保存每行的显示文本，视图只为可见行调用data()，不为每个单元格创建QTableWidgetItem
+"""
+
+import asyncio
+import json
+import logging
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex
+from PySide6.QtGui import QColor
+
+logger = logging.getLogger('wxauto_mgt')
+
+# 每页加载的消息数量
+PAGE_SIZE = 100
+
+# 内容列最多显示的字符数
+CONTENT_PREVIEW_LENGTH = 100
+
+STATUS_COLORS = {
+    '投递中': QColor(0, 120, 215),  # 蓝色
+    '已完成': QColor(0, 170, 0),  # 绿色
+    '失败': QColor(255, 0, 0),  # 红色
+}
+DEFAULT_STATUS_COLOR = QColor(128, 128, 128)  # 灰色
+
+
+class MessageRow(NamedTuple):
+    """格式化后的消息行"""
+    message_id: str
+    instance_id: str
+    time_text: str
+    sender: str
+    msg_type: str
+    status: str
+    preview: str
+    content: str
+    create_time: int
+    row_id: int
+
+
+def display_status(msg: Dict) -> str:
+    """
+    根据处理和投递状态计算显示的状态文本
+
+    Args:
+        msg: 消息数据库记录
+
+    Returns:
+        str: 投递中/已完成/失败
+    """
+    status = '已完成' if msg.get('processed', 0) else '投递中'
+    delivery_status = msg.get('delivery_status', 0)
+    if delivery_status == 1:  # 已投递
+        status = '已完成'
+    elif delivery_status == 2:  # 投递失败
+        status = '失败'
+    elif delivery_status == 3:  # 正在投递
+        status = '投递中'
+    return status
+
+
+def format_messages(messages: List[Dict]) -> List[MessageRow]:
+    """
+    过滤并格式化一页消息（在线程池中执行，不能访问Qt对象）
+
+    Args:
+        messages: 按时间倒序排列的消息数据库记录
+
+    Returns:
+        List[MessageRow]: 格式化后的消息行
+    """
+    from wxauto_mgt.core.message_filter import message_filter
+
+    rows = []
+    seen = set()
+    for msg in messages:
+        message_id = msg.get('message_id', '')
+        if not message_id:
+            continue
+
+        # 使用统一的消息过滤模块
+        if message_filter.should_filter_message(msg, log_prefix="UI层获取"):
+            continue
+
+        # 尝试解析JSON内容
+        content = msg.get('content', '') or ''
+        if isinstance(content, str) and content[:1] in ('{', '['):
+            try:
+                content_obj = json.loads(content)
+                if isinstance(content_obj, dict) and 'content' in content_obj:
+                    content = str(content_obj['content'])
+            except ValueError:
+                pass  # 如果解析失败，保持原始内容
+
+        # 同一发送者、同一时间、内容相同的重复记录只显示一条
+        sender = msg.get('sender', '') or ''
+        create_time = int(msg.get('create_time', 0) or 0)
+        unique_key = (sender, create_time, content[:20])
+        if unique_key in seen:
+            continue
+        seen.add(unique_key)
+
+        preview = content if len(content) <= CONTENT_PREVIEW_LENGTH else content[:CONTENT_PREVIEW_LENGTH - 3] + "..."
+        rows.append(MessageRow(
+            message_id=message_id,
+            instance_id=msg.get('instance_id', ''),
+            time_text=datetime.fromtimestamp(create_time).strftime('%Y-%m-%d %H:%M:%S') if create_time else '',
+            sender=msg.get('sender_remark') or sender,
+            msg_type=msg.get('message_type', 'text') or 'text',
+            status=display_status(msg),
+            preview=preview,
+            content=content,
+            create_time=create_time,
+            row_id=int(msg.get('id', 0) or 0)
+        ))
+    return rows
+
+
+class MessageTableModel(QAbstractTableModel):
+    """虚拟化消息表格模型"""
+
+    COLUMNS = ["时间", "发送者", "类型", "状态", "内容"]
+    COL_TIME, COL_SENDER, COL_TYPE, COL_STATUS, COL_CONTENT = range(5)
+
+    def __init__(self, parent=None):
+        """
+        初始化模型
+
+        Args:
+            parent: 父对象
+        """
+        super().__init__(parent)
+        self._rows: List[MessageRow] = []
+        self._index: Dict[str, int] = {}
+        self._chat: Optional[Tuple[str, str]] = None
+        # 下一页的起点：(create_time, id)，为None时表示还没有加载任何页
+        self._cursor: Optional[Tuple[int, int]] = None
+        self._has_more = False
+        self._loading = False
+        # 切换聊天对象时递增，丢弃旧聊天对象尚未返回的加载结果
+        self._generation = 0
+        # 实例过滤条件，为None时不过滤
+        self._instance_filter: Optional[str] = None
+
+    # ---- QAbstractTableModel接口 ----
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        if parent.isValid() or not self._instance_visible():
+            return 0
+        return len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.COLUMNS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() >= len(self._rows):
+            return None
+
+        row = self._rows[index.row()]
+        column = index.column()
+
+        if role == Qt.DisplayRole:
+            if column == self.COL_TIME:
+                return row.time_text
+            if column == self.COL_SENDER:
+                return row.sender
+            if column == self.COL_TYPE:
+                return row.msg_type
+            if column == self.COL_STATUS:
+                return row.status
+            if column == self.COL_CONTENT:
+                return row.preview
+        elif role == Qt.ForegroundRole and column == self.COL_STATUS:
+            return STATUS_COLORS.get(row.status, DEFAULT_STATUS_COLOR)
+        elif role == Qt.ToolTipRole and column == self.COL_CONTENT and len(row.content) > CONTENT_PREVIEW_LENGTH:
+            return row.content
+        elif role == Qt.UserRole:
+            return row.message_id
+        elif role == Qt.UserRole + 1:
+            return row.content
+
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()) -> bool:
+        return not parent.isValid() and self._has_more and not self._loading and self._instance_visible()
+
+    def fetchMore(self, parent=QModelIndex()):
+        if self.canFetchMore(parent):
+            asyncio.ensure_future(self.load_next_page())
+
+    # ---- 查询 ----
+
+    @property
+    def chat(self) -> Optional[Tuple[str, str]]:
+        """当前显示的(实例ID, 聊天对象)"""
+        return self._chat
+
+    def message_at(self, row: int) -> Optional[MessageRow]:
+        """获取行对应的消息"""
+        if 0 <= row < self.rowCount():
+            return self._rows[row]
+        return None
+
+    def row_of(self, message_id: str) -> int:
+        """获取消息所在行，不存在或被过滤时返回-1"""
+        if not self._instance_visible():
+            return -1
+        return self._index.get(message_id, -1)
+
+    def visible_rows(self) -> List[MessageRow]:
+        """获取当前可见（未被实例过滤）的全部已加载消息"""
+        return list(self._rows) if self._instance_visible() else []
+
+    def _instance_visible(self) -> bool:
+        """当前聊天对象是否满足实例过滤条件"""
+        return not self._instance_filter or (self._chat is not None and self._chat[0] == self._instance_filter)
+
+    # ---- 加载 ----
+
+    async def load(self, instance_id: str, chat_name: str):
+        """
+        显示聊天对象的消息
+
+        切换到新的聊天对象时清空模型并加载第一页；刷新同一个聊天对象时只合并最新一页，
+        保留已经滚动加载的旧消息和视图位置。
+
+        Args:
+            instance_id: 实例ID
+            chat_name: 聊天对象名称
+        """
+        chat = (instance_id, chat_name)
+        if chat != self._chat:
+            self._generation += 1
+            self.beginResetModel()
+            self._chat = chat
+            self._rows = []
+            self._index = {}
+            self._cursor = None
+            self._has_more = False
+            self._loading = False
+            self.endResetModel()
+
+        generation = self._generation
+        first_load = self._cursor is None
+        rows, has_more, cursor = await self._fetch_page(instance_id, chat_name, None)
+        if generation != self._generation:
+            return
+
+        if first_load:
+            self._cursor = cursor
+            self._has_more = has_more
+            self._append_rows(rows)
+        else:
+            self._merge_latest(rows)
+
+    async def load_next_page(self):
+        """加载下一页更早的消息"""
+        if not self._chat or not self._has_more or self._loading:
+            return
+
+        self._loading = True
+        generation = self._generation
+        try:
+            rows, has_more, cursor = await self._fetch_page(self._chat[0], self._chat[1], self._cursor)
+        except Exception as e:
+            logger.error(f"加载更多消息时出错: {e}")
+            return
+        finally:
+            if generation == self._generation:
+                self._loading = False
+
+        if generation != self._generation:
+            return
+        self._cursor = cursor or self._cursor
+        self._has_more = has_more
+        self._append_rows(rows)
+
+    async def _fetch_page(self, instance_id: str, chat_name: str,
+                          cursor: Optional[Tuple[int, int]]) -> Tuple[List[MessageRow], bool, Optional[Tuple[int, int]]]:
+        """
+        查询并格式化一页消息
+
+        Args:
+            instance_id: 实例ID
+            chat_name: 聊天对象名称
+            cursor: 从该(create_time, id)之前开始查询，为None时查询最新一页
+
+        Returns:
+            Tuple: 格式化后的消息行、是否还有更早的消息和下一页的起点
+        """
+        from wxauto_mgt.data.db_manager import db_manager
+
+        if cursor is None:
+            messages = await db_manager.fetchall(
+                """
+                SELECT * FROM messages
+                WHERE instance_id = ? AND chat_name = ?
+                ORDER BY create_time DESC, id DESC LIMIT ?
+                """,
+                (instance_id, chat_name, PAGE_SIZE)
+            )
+        else:
+            create_time, row_id = cursor
+            messages = await db_manager.fetchall(
+                """
+                SELECT * FROM messages
+                WHERE instance_id = ? AND chat_name = ?
+                  AND (create_time < ? OR (create_time = ? AND id < ?))
+                ORDER BY create_time DESC, id DESC LIMIT ?
+                """,
+                (instance_id, chat_name, create_time, create_time, row_id, PAGE_SIZE)
+            )
+
+        # 分页游标取自原始记录，被过滤掉的消息不影响下一页的起点
+        next_cursor = None
+        if messages:
+            last = messages[-1]
+            next_cursor = (int(last.get('create_time', 0) or 0), int(last.get('id', 0) or 0))
+
+        loop = asyncio.get_running_loop()
+        rows = await loop.run_in_executor(None, format_messages, messages)
+        return rows, len(messages) == PAGE_SIZE, next_cursor
+
+    def _append_rows(self, rows: List[MessageRow]):
+        """在末尾追加尚未显示的消息"""
+        new_rows = [row for row in rows if row.message_id not in self._index]
+        if not new_rows:
+            return
+
+        visible = self._instance_visible()
+        first = len(self._rows)
+        if visible:
+            self.beginInsertRows(QModelIndex(), first, first + len(new_rows) - 1)
+        for row in new_rows:
+            self._index[row.message_id] = len(self._rows)
+            self._rows.append(row)
+        if visible:
+            self.endInsertRows()
+
+    def _merge_latest(self, rows: List[MessageRow]):
+        """合并最新一页：更新已有消息的状态，在开头插入新消息"""
+        new_rows = []
+        for row in rows:
+            existing = self._index.get(row.message_id)
+            if existing is None:
+                new_rows.append(row)
+            elif self._rows[existing] != row:
+                self._replace_row(existing, row)
+
+        if not new_rows:
+            return
+
+        visible = self._instance_visible()
+        if visible:
+            self.beginInsertRows(QModelIndex(), 0, len(new_rows) - 1)
+        self._rows[0:0] = new_rows
+        self._reindex(0)
+        if visible:
+            self.endInsertRows()
+
+    # ---- 修改 ----
+
+    def update_status(self, message_id: str, status: str):
+        """
+        更新单条消息的状态文本
+
+        Args:
+            message_id: 消息ID
+            status: 状态文本
+        """
+        row = self._index.get(message_id)
+        if row is not None and self._rows[row].status != status:
+            self._replace_row(row, self._rows[row]._replace(status=status))
+
+    def remove_message(self, message_id: str):
+        """
+        移除单条消息所在的行
+
+        Args:
+            message_id: 消息ID
+        """
+        row = self._index.get(message_id)
+        if row is None:
+            return
+
+        visible = self._instance_visible()
+        if visible:
+            self.beginRemoveRows(QModelIndex(), row, row)
+        del self._rows[row]
+        del self._index[message_id]
+        self._reindex(row)
+        if visible:
+            self.endRemoveRows()
+
+    def set_instance_filter(self, instance_id: Optional[str]):
+        """
+        设置实例过滤条件
+
+        Args:
+            instance_id: 只显示该实例的消息，为None或空字符串时显示全部
+        """
+        instance_id = instance_id or None
+        if instance_id == self._instance_filter:
+            return
+        self.beginResetModel()
+        self._instance_filter = instance_id
+        self.endResetModel()
+
+    def _replace_row(self, row: int, message: MessageRow):
+        """替换一行并通知视图"""
+        self._rows[row] = message
+        if self._instance_visible():
+            self.dataChanged.emit(self.index(row, 0), self.index(row, len(self.COLUMNS) - 1))
+
+    def _reindex(self, first: int):
+        """重建从first开始的行号索引"""
+        for row in range(first, len(self._rows)):
+            self._index[self._rows[row].message_id] = row
@@ -17,6 +17,7 @@ from PySide6.QtWidgets import (
 
 from wxauto_mgt.core.status_monitor import StatusMonitor, InstanceStatus, MetricType, status_monitor
 from wxauto_mgt.core.api_client import instance_manager
+from wxauto_mgt.core.domain_events import domain_events, DomainEventType
 from wxauto_mgt.core.config_manager import config_manager
 from wxauto_mgt.utils.logging import get_logger
 import logging
@@ -219,16 +220,22 @@ class StatusMonitorPanel(QWidget):
         self._init_ui()
         self._instance_panels = {}  # 存储实例面板的引用
 
-        # 启动定时刷新
+        # 启动定时刷新（一致性检查，实例状态变化由领域事件触发更新）
         self._timer = QTimer(self)
         self._timer.timeout.connect(self.refresh_status)
-        self._timer.start(30000)  # 每30秒刷新一次
+        self._timer.start(self._get_refresh_interval())
 
         # 创建状态更新器
         self._updater = StatusUpdater()
         self._updater.update_complete.connect(self._handle_status_update)
         self._updater.update_failed.connect(self._handle_update_error)
 
+        # 订阅实例状态变化
+        domain_events.subscribe(DomainEventType.INSTANCE_STATUS_CHANGED, self._on_instance_status_changed)
+        self.destroyed.connect(
+            lambda: domain_events.unsubscribe(DomainEventType.INSTANCE_STATUS_CHANGED, self._on_instance_status_changed)
+        )
+
     def _init_ui(self):
         """初始化UI组件"""
         # 主布局
@@ -252,8 +259,8 @@ class StatusMonitorPanel(QWidget):
         # 刷新间隔
         toolbar_layout.addWidget(QLabel("间隔:"))
         self.refresh_interval = QComboBox()
-        self.refresh_interval.addItems(["5秒", "10秒", "30秒", "60秒"])
-        self.refresh_interval.setCurrentIndex(2)  # 设置默认值为30秒
+        self.refresh_interval.addItems(["5秒", "10秒", "30秒", "60秒", "300秒"])
+        self.refresh_interval.setCurrentIndex(3)  # 设置默认值为60秒，状态变化时会立即更新
         self.refresh_interval.currentIndexChanged.connect(self._change_refresh_interval)
         toolbar_layout.addWidget(self.refresh_interval)
 
@@ -330,6 +337,23 @@ class StatusMonitorPanel(QWidget):
             logger.error(f"获取实例列表失败: {e}")
             return []
 
+    def _on_instance_status_changed(self, event):
+        """实例增删或连接状态变化：只更新对应的实例面板"""
+        instance_id = event.data.get('instance_id')
+        status = event.data.get('status')
+
+        if status == 'removed':
+            panel = self._instance_panels.pop(instance_id, None)
+            if panel is not None:
+                self.content_layout.removeWidget(panel)
+                panel.deleteLater()
+                self.status_label.setText(f"共 {len(self._instance_panels)} 个实例")
+        elif instance_id in self._instance_panels:
+            asyncio.ensure_future(self._updater.update_status(instance_id))
+        elif self.isVisible():
+            # 新增的实例需要从数据库读取名称并创建面板
+            self.refresh_status()
+
     def _handle_status_update(self, update_data):
         """处理状态更新结果"""
         try:
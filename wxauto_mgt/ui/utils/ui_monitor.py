@@ -2,19 +2,23 @@
 UI响应性监控工具
 
 用于监控UI线程的响应性，检测可能的阻塞问题。
+异步任务的耗时和失败次数记录到指标注册表，不再保存每个任务的明细。
 """
 
 import time
-import threading
 from typing import Optional, Callable
 from PySide6.QtCore import QTimer, QObject, Signal
 from PySide6.QtWidgets import QApplication
 
 from wxauto_mgt.utils.logging import get_logger
 from wxauto_mgt.utils.performance_monitor import performance_monitor
+from wxauto_mgt.utils.metrics_registry import metrics_registry
 
 logger = get_logger()
 
+ui_task_seconds = metrics_registry.histogram("ui_task_seconds", "UI异步任务成功完成的耗时（秒）")
+ui_task_failures = metrics_registry.counter("ui_task_failures", "UI异步任务失败次数")
+
 
 class UIResponsivenessMonitor(QObject):
     """UI响应性监控器"""
@@ -128,14 +132,16 @@ class UIResponsivenessMonitor(QObject):
 
 
 class AsyncTaskMonitor:
-    """异步任务监控器"""
+    """
+    异步任务监控器
+
+    只保存正在运行的任务，已结束任务的耗时和失败次数记录到指标注册表。
+    任务在UI事件循环中注册和结束，不需要加锁。
+    """
     
     def __init__(self):
         """初始化异步任务监控器"""
         self.active_tasks = {}
-        self.completed_tasks = []
-        self.failed_tasks = []
-        self._lock = threading.Lock()
     
     def register_task(self, task_id: str, description: str):
         """
@@ -145,13 +151,12 @@ class AsyncTaskMonitor:
             task_id: 任务ID
             description: 任务描述
         """
-        with self._lock:
-            self.active_tasks[task_id] = {
-                'description': description,
-                'start_time': time.time(),
-                'status': 'running'
-            }
-            logger.debug(f"注册异步任务: {task_id} - {description}")
+        self.active_tasks[task_id] = {
+            'description': description,
+            'start_time': time.time(),
+            'status': 'running'
+        }
+        logger.debug(f"注册异步任务: {task_id} - {description}")
     
     def complete_task(self, task_id: str, success: bool = True, error_message: Optional[str] = None):
         """
@@ -162,45 +167,37 @@ class AsyncTaskMonitor:
             success: 是否成功
             error_message: 错误信息（如果失败）
         """
-        with self._lock:
-            if task_id in self.active_tasks:
-                task_info = self.active_tasks.pop(task_id)
-                task_info['end_time'] = time.time()
-                task_info['duration'] = task_info['end_time'] - task_info['start_time']
-                task_info['success'] = success
-                task_info['error_message'] = error_message
-                
-                if success:
-                    self.completed_tasks.append(task_info)
-                    logger.debug(f"异步任务完成: {task_id}, 耗时: {task_info['duration']:.3f}秒")
-                else:
-                    self.failed_tasks.append(task_info)
-                    logger.warning(f"异步任务失败: {task_id}, 错误: {error_message}")
+        task_info = self.active_tasks.pop(task_id, None)
+        if task_info is None:
+            return
+
+        duration = time.time() - task_info['start_time']
+        if success:
+            ui_task_seconds.observe(duration)
+            logger.debug(f"异步任务完成: {task_id}, 耗时: {duration:.3f}秒")
+        else:
+            ui_task_failures.inc()
+            logger.warning(f"异步任务失败: {task_id}, 错误: {error_message}")
     
     def get_active_tasks(self) -> dict:
         """获取活跃任务列表"""
-        with self._lock:
-            return self.active_tasks.copy()
+        return self.active_tasks.copy()
     
     def get_task_statistics(self) -> dict:
         """获取任务统计信息"""
-        with self._lock:
-            total_completed = len(self.completed_tasks)
-            total_failed = len(self.failed_tasks)
-            total_tasks = total_completed + total_failed
-            
-            avg_duration = 0
-            if self.completed_tasks:
-                avg_duration = sum(task['duration'] for task in self.completed_tasks) / len(self.completed_tasks)
-            
-            return {
-                'active_tasks': len(self.active_tasks),
-                'completed_tasks': total_completed,
-                'failed_tasks': total_failed,
-                'total_tasks': total_tasks,
-                'success_rate': total_completed / total_tasks if total_tasks > 0 else 0,
-                'average_duration': avg_duration
-            }
+        summary = ui_task_seconds.summary()
+        total_completed = summary.get('count', 0)
+        total_failed = int(ui_task_failures.get())
+        total_tasks = total_completed + total_failed
+
+        return {
+            'active_tasks': len(self.active_tasks),
+            'completed_tasks': total_completed,
+            'failed_tasks': total_failed,
+            'total_tasks': total_tasks,
+            'success_rate': total_completed / total_tasks if total_tasks > 0 else 0,
+            'average_duration': summary.get('avg', 0)
+        }
 
 
 # 全局实例
@@ -0,0 +1,387 @@
+"""
+指标注册表模块
+
+统一管理程序运行指标（计数器、仪表、延迟直方图），并以Prometheus文本格式导出。
+
+- 计数器/仪表：按标签组合保存数值，记录时只做一次字典查找和加法
+- 直方图：固定的对数刻度桶（类似HDR Histogram），记录时直接计算桶下标，
+  O(1)完成，不保存原始样本，也不需要截断列表
+- 记录操作不加锁：指标主要在主事件循环中更新，其他线程（Web服务、UI定时器）
+  的少量并发更新依赖GIL，极端情况下可能丢失个别计数，对统计结果没有实际影响
+"""
+
+import math
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+LabelValues = Tuple[str, ...]
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# 直方图默认范围：0.5毫秒到约2分钟，每个桶的上界是前一个的√2倍
+HISTOGRAM_MIN = 0.0005
+HISTOGRAM_FACTOR = math.sqrt(2)
+HISTOGRAM_BUCKETS = 36
+
+
+def _escape(value: str) -> str:
+    """转义Prometheus标签值"""
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: LabelValues, extra: str = "") -> str:
+    """格式化标签，例如 {operation="get_status",le="0.1"}"""
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    """格式化数值"""
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    """指标基类"""
+
+    metric_type = ""
+    # 导出的指标族名后缀（计数器为 _total，HELP/TYPE 行与样本使用同一名称）
+    family_suffix = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        """把标签参数转换为按标签名排序的值元组"""
+        if not self.labelnames:
+            return ()
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def samples(self) -> List[Tuple[str, str, float]]:
+        """导出样本：(指标名后缀, 标签文本, 值)"""
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        """按Prometheus文本格式输出"""
+        family = self.name + self.family_suffix
+        lines = [f"# HELP {family} {self.documentation}", f"# TYPE {family} {self.metric_type}"]
+        for suffix, labels, value in self.samples():
+            lines.append(f"{family}{suffix}{labels} {_format_value(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    """计数器（只增不减）"""
+
+    metric_type = "counter"
+    family_suffix = "_total"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        """
+        增加计数
+
+        Args:
+            amount: 增加量
+            **labels: 标签值
+        """
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels) -> float:
+        """获取当前计数"""
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> List[Tuple[str, str, float]]:
+        return [("", _format_labels(self.labelnames, key), value)
+                for key, value in list(self._values.items())]
+
+
+class Gauge(_Metric):
+    """仪表（可增可减的当前值，也可以在导出时通过函数获取）"""
+
+    metric_type = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._functions: Dict[LabelValues, Callable[[], float]] = {}
+
+    def set(self, value: float, **labels):
+        """设置当前值"""
+        self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels):
+        """增加当前值"""
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        """减少当前值"""
+        self.inc(-amount, **labels)
+
+    def set_function(self, func: Callable[[], float], **labels):
+        """
+        设置取值函数，导出时调用（用于队列长度等已有状态，不需要在每次变化时更新）
+
+        Args:
+            func: 返回当前值的函数
+            **labels: 标签值
+        """
+        self._functions[self._key(labels)] = func
+
+    def get(self, **labels) -> float:
+        """获取当前值"""
+        key = self._key(labels)
+        func = self._functions.get(key)
+        if func is not None:
+            return func()
+        return self._values.get(key, 0)
+
+    def samples(self) -> List[Tuple[str, str, float]]:
+        result = [("", _format_labels(self.labelnames, key), value) for key, value in list(self._values.items())]
+        for key, func in list(self._functions.items()):
+            try:
+                result.append(("", _format_labels(self.labelnames, key), float(func())))
+            except Exception:
+                continue
+        return result
+
+
+class _HistogramData:
+    """单个标签组合的直方图数据"""
+
+    __slots__ = ('counts', 'count', 'sum', 'min', 'max')
+
+    def __init__(self, bucket_count: int):
+        self.counts = [0] * (bucket_count + 1)  # 最后一个桶保存超出范围的值
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+
+class Histogram(_Metric):
+    """
+    延迟直方图
+
+    桶上界为 minimum * factor^i（i = 0..buckets-1），记录时通过对数直接计算桶下标。
+    """
+
+    metric_type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 minimum: float = HISTOGRAM_MIN, factor: float = HISTOGRAM_FACTOR,
+                 buckets: int = HISTOGRAM_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.minimum = minimum
+        self.factor = factor
+        self.bucket_count = buckets
+        self.bounds = [minimum * factor ** i for i in range(buckets)]
+        self._log_min = math.log(minimum)
+        self._log_factor = math.log(factor)
+        self._data: Dict[LabelValues, _HistogramData] = {}
+
+    def _index(self, value: float) -> int:
+        """计算值所在的桶下标"""
+        if value <= self.minimum:
+            return 0
+        index = math.ceil((math.log(value) - self._log_min) / self._log_factor - 1e-9)
+        return min(index, self.bucket_count)
+
+    def observe(self, value: float, **labels):
+        """
+        记录一个观测值
+
+        Args:
+            value: 观测值（秒）
+            **labels: 标签值
+        """
+        key = self._key(labels)
+        data = self._data.get(key)
+        if data is None:
+            data = self._data[key] = _HistogramData(self.bucket_count)
+        data.counts[self._index(value)] += 1
+        data.count += 1
+        data.sum += value
+        if value < data.min:
+            data.min = value
+        if value > data.max:
+            data.max = value
+
+    def time(self, **labels) -> '_Timer':
+        """
+        返回计时上下文，退出时记录耗时
+
+        Example:
+            with histogram.time(operation="query"):
+                ...
+        """
+        return _Timer(self, labels)
+
+    def quantile(self, q: float, **labels) -> float:
+        """
+        估算分位数（返回所在桶的上界，误差不超过一个桶的宽度）
+
+        Args:
+            q: 分位（0-1）
+            **labels: 标签值
+
+        Returns:
+            float: 分位数估计值，没有数据时返回0
+        """
+        data = self._data.get(self._key(labels))
+        if data is None or data.count == 0:
+            return 0.0
+        target = max(1, math.ceil(data.count * q))
+        seen = 0
+        for index, count in enumerate(data.counts):
+            seen += count
+            if seen >= target:
+                bound = self.bounds[index] if index < self.bucket_count else data.max
+                return min(bound, data.max)
+        return data.max
+
+    def summary(self, **labels) -> Dict[str, float]:
+        """
+        获取统计摘要
+
+        Returns:
+            Dict[str, float]: count、avg、min、max、p50、p95、p99，没有数据时返回空字典
+        """
+        data = self._data.get(self._key(labels))
+        if data is None or data.count == 0:
+            return {}
+        return {
+            'count': data.count,
+            'avg': data.sum / data.count,
+            'min': data.min,
+            'max': data.max,
+            'p50': self.quantile(0.5, **labels),
+            'p95': self.quantile(0.95, **labels),
+            'p99': self.quantile(0.99, **labels),
+        }
+
+    def label_values(self) -> List[LabelValues]:
+        """获取已记录的标签组合"""
+        return list(self._data)
+
+    def samples(self) -> List[Tuple[str, str, float]]:
+        result = []
+        for key, data in list(self._data.items()):
+            cumulative = 0
+            for index, bound in enumerate(self.bounds):
+                cumulative += data.counts[index]
+                result.append(("_bucket", _format_labels(self.labelnames, key, f'le="{bound:.6g}"'), cumulative))
+            result.append(("_bucket", _format_labels(self.labelnames, key, 'le="+Inf"'), data.count))
+            result.append(("_sum", _format_labels(self.labelnames, key), data.sum))
+            result.append(("_count", _format_labels(self.labelnames, key), data.count))
+        return result
+
+
+class _Timer:
+    """直方图计时上下文"""
+
+    __slots__ = ('histogram', 'labels', 'started')
+
+    def __init__(self, histogram: Histogram, labels: Dict[str, str]):
+        self.histogram = histogram
+        self.labels = labels
+        self.started = 0.0
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.histogram.observe(time.perf_counter() - self.started, **self.labels)
+        return False
+
+
+class MetricsRegistry:
+    """指标注册表"""
+
+    def __init__(self, namespace: str = "wxauto"):
+        """
+        初始化注册表
+
+        Args:
+            namespace: 指标名前缀
+        """
+        self.namespace = namespace
+        self._metrics: Dict[str, _Metric] = {}
+        # 只在注册新指标时加锁，记录指标不加锁
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, documentation: str, labelnames: Iterable[str], **kwargs):
+        full_name = f"{self.namespace}_{name}" if self.namespace else name
+        metric = self._metrics.get(full_name)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.get(full_name)
+                if metric is None:
+                    metric = self._metrics[full_name] = cls(full_name, documentation, labelnames, **kwargs)
+        elif not isinstance(metric, cls):
+            raise ValueError(f"指标 {full_name} 已注册为 {metric.metric_type}")
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        """获取或注册计数器"""
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Gauge:
+        """获取或注册仪表"""
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames: Iterable[str] = (), **kwargs) -> Histogram:
+        """获取或注册直方图"""
+        return self._get_or_create(Histogram, name, documentation, labelnames, **kwargs)
+
+    def get(self, name: str) -> Optional[_Metric]:
+        """按名称（不含前缀）获取已注册的指标"""
+        return self._metrics.get(f"{self.namespace}_{name}" if self.namespace else name)
+
+    def render(self) -> str:
+        """
+        以Prometheus文本格式导出全部指标
+
+        Returns:
+            str: 导出文本
+        """
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# 创建全局实例
+metrics_registry = MetricsRegistry()
+
+# 各模块共用的指标
+db_query_seconds = metrics_registry.histogram(
+    "db_query_seconds", "数据库操作耗时（秒）", ("operation",))
+platform_call_seconds = metrics_registry.histogram(
+    "platform_call_seconds", "服务平台调用耗时（秒）", ("platform_type",))
+platform_call_errors = metrics_registry.counter(
+    "platform_call_errors", "服务平台调用失败次数", ("platform_type",))
+reply_send_seconds = metrics_registry.histogram(
+    "reply_send_seconds", "回复发送到微信的耗时（秒）")
+reply_send_errors = metrics_registry.counter(
+    "reply_send_errors", "回复发送失败次数")
+listener_poll_seconds = metrics_registry.histogram(
+    "listener_poll_seconds", "消息监听单次轮询耗时（秒）", ("kind",))
+operation_seconds = metrics_registry.histogram(
+    "operation_seconds", "性能监控记录的操作耗时（秒）", ("operation",))
+operation_errors = metrics_registry.counter(
+    "operation_errors", "性能监控记录的操作失败次数", ("operation",))
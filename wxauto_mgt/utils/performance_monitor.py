@@ -6,15 +6,17 @@
 
 import time
 import asyncio
-import threading
 from typing import Dict, List, Optional, Callable
 from dataclasses import dataclass
-from collections import defaultdict, deque
+from collections import deque
 
 from wxauto_mgt.utils.logging import get_logger
+from wxauto_mgt.utils.metrics_registry import metrics_registry, operation_seconds, operation_errors
 
 logger = get_logger()
 
+ui_blocked_total = metrics_registry.counter("ui_blocked", "UI响应检查超过阈值的次数")
+
 
 @dataclass
 class PerformanceMetric:
@@ -28,7 +30,12 @@ class PerformanceMetric:
 
 
 class PerformanceMonitor:
-    """性能监控器"""
+    """
+    性能监控器
+
+    操作耗时记录到指标注册表的直方图中（O(1)，不保存原始样本），
+    最近的操作明细保存在定长队列中，用于查询慢操作。
+    """
     
     def __init__(self, max_history: int = 1000):
         """
@@ -39,8 +46,8 @@ class PerformanceMonitor:
         """
         self.max_history = max_history
         self.metrics: deque = deque(maxlen=max_history)
-        self.operation_stats: Dict[str, List[float]] = defaultdict(list)
-        self._lock = threading.Lock()
+        self.total_operations = 0
+        self.failed_operations = 0
         
         # UI响应性监控
         self.ui_response_threshold = 0.1  # 100ms阈值
@@ -57,23 +64,22 @@ class PerformanceMonitor:
             success: 是否成功
             error_message: 错误信息（如果有）
         """
-        with self._lock:
-            metric = PerformanceMetric(
-                operation=operation,
-                start_time=time.time() - duration,
-                end_time=time.time(),
-                duration=duration,
-                success=success,
-                error_message=error_message
-            )
-            
-            self.metrics.append(metric)
-            
-            if success:
-                self.operation_stats[operation].append(duration)
-                # 保持统计数据在合理范围内
-                if len(self.operation_stats[operation]) > 100:
-                    self.operation_stats[operation] = self.operation_stats[operation][-100:]
+        now = time.time()
+        self.metrics.append(PerformanceMetric(
+            operation=operation,
+            start_time=now - duration,
+            end_time=now,
+            duration=duration,
+            success=success,
+            error_message=error_message
+        ))
+        self.total_operations += 1
+        
+        if success:
+            operation_seconds.observe(duration, operation=operation)
+        else:
+            self.failed_operations += 1
+            operation_errors.inc(operation=operation)
     
     def get_operation_stats(self, operation: str) -> Dict[str, float]:
         """
@@ -83,21 +89,9 @@ class PerformanceMonitor:
             operation: 操作名称
             
         Returns:
-            包含平均值、最小值、最大值等统计信息的字典
+            包含次数、平均值、最小值、最大值和分位数的字典
         """
-        with self._lock:
-            durations = self.operation_stats.get(operation, [])
-            
-            if not durations:
-                return {}
-            
-            return {
-                'count': len(durations),
-                'avg': sum(durations) / len(durations),
-                'min': min(durations),
-                'max': max(durations),
-                'recent_avg': sum(durations[-10:]) / min(len(durations), 10)
-            }
+        return operation_seconds.summary(operation=operation)
     
     def get_slow_operations(self, threshold: float = 1.0) -> List[PerformanceMetric]:
         """
@@ -109,8 +103,7 @@ class PerformanceMonitor:
         Returns:
             慢操作列表
         """
-        with self._lock:
-            return [metric for metric in self.metrics if metric.duration > threshold]
+        return [metric for metric in list(self.metrics) if metric.duration > threshold]
     
     def check_ui_responsiveness(self):
         """检查UI响应性"""
@@ -119,6 +112,7 @@ class PerformanceMonitor:
         
         if time_since_last_update > self.ui_response_threshold:
             self.ui_blocked_count += 1
+            ui_blocked_total.inc()
             #logger.warning(f"UI可能被阻塞，距离上次更新: {time_since_last_update:.3f}秒")
     
         self.last_ui_update = current_time
@@ -129,24 +123,23 @@ class PerformanceMonitor:
     
     def get_summary(self) -> Dict:
         """获取性能摘要"""
-        with self._lock:
-            total_operations = len(self.metrics)
-            successful_operations = sum(1 for m in self.metrics if m.success)
-            failed_operations = total_operations - successful_operations
-            
-            # 按操作类型分组统计
-            operation_summary = {}
-            for operation in self.operation_stats:
-                operation_summary[operation] = self.get_operation_stats(operation)
-            
-            return {
-                'total_operations': total_operations,
-                'successful_operations': successful_operations,
-                'failed_operations': failed_operations,
-                'success_rate': successful_operations / total_operations if total_operations > 0 else 0,
-                'ui_blocked_count': self.ui_blocked_count,
-                'operation_summary': operation_summary
-            }
+        total_operations = self.total_operations
+        failed_operations = self.failed_operations
+        successful_operations = total_operations - failed_operations
+        
+        # 按操作类型分组统计
+        operation_summary = {}
+        for (operation,) in operation_seconds.label_values():
+            operation_summary[operation] = self.get_operation_stats(operation)
+        
+        return {
+            'total_operations': total_operations,
+            'successful_operations': successful_operations,
+            'failed_operations': failed_operations,
+            'success_rate': successful_operations / total_operations if total_operations > 0 else 0,
+            'ui_blocked_count': self.ui_blocked_count,
+            'operation_summary': operation_summary
+        }
 
 
 class AsyncPerformanceDecorator:
@@ -167,7 +160,7 @@ class AsyncPerformanceDecorator:
         """装饰器调用"""
         if asyncio.iscoroutinefunction(func):
             async def async_wrapper(*args, **kwargs):
-                start_time = time.time()
+                start_time = time.perf_counter()
                 success = True
                 error_message = None
                 
@@ -179,7 +172,7 @@ class AsyncPerformanceDecorator:
                     error_message = str(e)
                     raise
                 finally:
-                    duration = time.time() - start_time
+                    duration = time.perf_counter() - start_time
                     self.monitor.record_operation(
                         self.operation_name, duration, success, error_message
                     )
@@ -187,7 +180,7 @@ class AsyncPerformanceDecorator:
             return async_wrapper
         else:
             def sync_wrapper(*args, **kwargs):
-                start_time = time.time()
+                start_time = time.perf_counter()
                 success = True
                 error_message = None
                 
@@ -199,7 +192,7 @@ class AsyncPerformanceDecorator:
                     error_message = str(e)
                     raise
                 finally:
-                    duration = time.time() - start_time
+                    duration = time.perf_counter() - start_time
                     self.monitor.record_operation(
                         self.operation_name, duration, success, error_message
                     )
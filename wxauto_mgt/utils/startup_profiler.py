@@ -0,0 +1,155 @@
+"""
+启动性能分析模块
+
+记录程序冷启动过程中各初始化阶段的耗时，启用后还会统计每个模块的导入耗时，
+用于 --profile-startup 参数输出启动报告。
+"""
+
+import builtins
+import logging
+import sys
+import threading
+import time
+from typing import Dict, List, Tuple
+
+logger = logging.getLogger('wxauto_mgt')
+
+
+class StartupProfiler:
+    """启动性能分析器"""
+
+    def __init__(self):
+        """初始化分析器"""
+        self.enabled = False
+        self._started = time.perf_counter()
+        self._last_checkpoint = self._started
+        # (阶段名称, 耗时)
+        self._phases: List[Tuple[str, float]] = []
+        # 模块名 -> [累计耗时, 自身耗时]
+        self._imports: Dict[str, List[float]] = {}
+        # 每个线程各自的导入栈（子模块耗时累加到栈顶）
+        self._local = threading.local()
+        self._original_import = None
+        self._recording = False
+
+    def enable(self):
+        """启用分析并开始统计模块导入耗时（需要在导入其他模块之前调用）"""
+        if self.enabled:
+            return
+        self.enabled = True
+        self._recording = True
+        if self._original_import is None:
+            self._original_import = builtins.__import__
+            builtins.__import__ = self._make_timed_import(self._original_import)
+
+    def disable(self):
+        """
+        停止统计模块导入耗时
+
+        其他线程可能已经取得了计时导入函数，因此计时函数始终保留原始导入函数的引用，
+        停止后直接调用原始导入函数。
+        """
+        self._recording = False
+        if self._original_import is not None and builtins.__import__ is not self._original_import:
+            builtins.__import__ = self._original_import
+
+    def _make_timed_import(self, original_import):
+        """
+        创建计时导入函数
+
+        Args:
+            original_import: 原始的 __import__ 函数
+
+        Returns:
+            Callable: 记录首次导入模块耗时的导入函数
+        """
+        def timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+            if not self._recording:
+                return original_import(name, globals, locals, fromlist, level)
+
+            module_name = name
+            if level and globals:
+                package = globals.get('__package__') or ''
+                parts = package.split('.')
+                base = '.'.join(parts[:len(parts) - level + 1]) if level > 1 else package
+                module_name = f"{base}.{name}" if name else base
+
+            if module_name in sys.modules:
+                return original_import(name, globals, locals, fromlist, level)
+
+            stack = getattr(self._local, 'stack', None)
+            if stack is None:
+                stack = self._local.stack = []
+
+            # 子模块的导入时间从父模块的自身耗时中扣除
+            stack.append(0.0)
+            started = time.perf_counter()
+            try:
+                return original_import(name, globals, locals, fromlist, level)
+            finally:
+                elapsed = time.perf_counter() - started
+                children = stack.pop()
+                if stack:
+                    stack[-1] += elapsed
+                stats = self._imports.setdefault(module_name, [0.0, 0.0])
+                stats[0] += elapsed
+                stats[1] += elapsed - children
+
+        return timed_import
+
+    def checkpoint(self, phase: str):
+        """
+        记录一个初始化阶段结束，耗时为距上一个阶段结束的时间
+
+        Args:
+            phase: 阶段名称
+        """
+        now = time.perf_counter()
+        self._phases.append((phase, now - self._last_checkpoint))
+        self._last_checkpoint = now
+
+    def record(self, phase: str, duration: float):
+        """
+        记录一个独立计时的阶段（如后台任务）
+
+        Args:
+            phase: 阶段名称
+            duration: 耗时（秒）
+        """
+        self._phases.append((phase, duration))
+        if self.enabled:
+            logger.info(f"[启动分析] {phase}: {duration * 1000:.1f} ms")
+
+    def elapsed(self) -> float:
+        """距离分析器创建（程序启动）的秒数"""
+        return time.perf_counter() - self._started
+
+    def report(self, top: int = 25) -> str:
+        """
+        生成启动报告
+
+        Args:
+            top: 列出自身耗时最多的模块数量
+
+        Returns:
+            str: 报告文本
+        """
+        lines = ["=" * 60, f"启动分析报告（总耗时 {self.elapsed() * 1000:.1f} ms）", "-" * 60, "初始化阶段:"]
+        for phase, duration in self._phases:
+            lines.append(f"  {phase:<30} {duration * 1000:>10.1f} ms")
+
+        if self._imports:
+            total_self = sum(stats[1] for stats in self._imports.values())
+            lines.append("-" * 60)
+            lines.append(f"模块导入（共 {len(self._imports)} 个, 自身耗时合计 {total_self * 1000:.1f} ms）:")
+            lines.append(f"  {'模块':<40} {'自身':>8} {'累计':>8}")
+            ranked = sorted(self._imports.items(), key=lambda item: item[1][1], reverse=True)
+            for module_name, (cumulative, self_time) in ranked[:top]:
+                lines.append(f"  {module_name:<40} {self_time * 1000:>6.1f}ms {cumulative * 1000:>6.1f}ms")
+
+        lines.append("=" * 60)
+        return "\n".join(lines)
+
+
+# 创建全局实例
+startup_profiler = StartupProfiler()
@@ -8,7 +8,6 @@ from fastapi import FastAPI, APIRouter, Request, Depends, HTTPException
 from fastapi.responses import JSONResponse
 from typing import Dict, List, Optional, Any, Union
 import platform
-import psutil
 import time
 import datetime
 import os
@@ -22,12 +21,18 @@ from wxauto_mgt.utils.logging import logger
 from wxauto_mgt.core.api_client import instance_manager
 from wxauto_mgt.core.service_platform_manager import platform_manager, rule_manager
 from wxauto_mgt.core.message_listener import message_listener
+from wxauto_mgt.core.message_trace import message_tracer
+from wxauto_mgt.core.loop_monitor import loop_monitor
 from wxauto_mgt.data.db_manager import db_manager
 from wxauto_mgt.data.config_store import config_store
 from wxauto_mgt.config import get_version
+from wxauto_mgt.core.service_bridge import service_bridge
+from wxauto_mgt.web.metrics_sampler import metrics_sampler
+from wxauto_mgt.web.routing import MainLoopRoute
+from wxauto_mgt.web.response_cache import cache_response
 
-# 创建API路由器
-api_router = APIRouter()
+# 创建API路由器（处理函数在核心服务所在的主事件循环中执行）
+api_router = APIRouter(route_class=MainLoopRoute)
 
 # 初始化标志
 _initialized = False
@@ -309,24 +314,14 @@ async def get_instance_status(instance_id: str, request: Request):
         if not base_url or not api_key:
             raise HTTPException(status_code=400, detail=f"实例 {instance_id} 缺少API URL或API KEY")
 
-        # 构建实例health API URL
-        import requests
-        if not base_url.endswith('/'):
-            base_url += '/'
-
-        status_url = f"{base_url}api/health"
-        headers = {
-            'X-API-Key': api_key,
-            'Content-Type': 'application/json'
-        }
-
-        # 获取状态信息
-        logger.debug(f"向实例 {instance_id} 发送状态请求: {status_url}")
-        response = requests.get(status_url, headers=headers, timeout=5)
+        # 使用后台采样器的实例快照，快照中没有时立即探测一次
+        instance_state = metrics_sampler.get_instance(instance_id)
+        if not instance_state:
+            instance_state = await metrics_sampler.sample_instance(instance)
 
         # 检查响应状态
-        if response.status_code != 200:
-            logger.warning(f"实例 {instance_id} 状态请求失败，状态码: {response.status_code}")
+        if not instance_state.get('health'):
+            logger.warning(f"实例 {instance_id} 状态请求失败")
             return {
                 "code": 1,
                 "message": "实例离线或无法访问",
@@ -337,8 +332,7 @@ async def get_instance_status(instance_id: str, request: Request):
                 }
             }
 
-        # 解析响应
-        result = response.json()
+        result = instance_state['health']
         logger.debug(f"实例 {instance_id} 状态响应: {result}")
 
         # 如果响应中已经包含code字段，直接返回
@@ -397,32 +391,14 @@ async def get_system_resources(request: Request, instance_id: Optional[str] = No
                 if not base_url or not api_key:
                     raise HTTPException(status_code=400, detail=f"实例 {instance_id} 缺少API URL或API KEY")
 
-                # 构建请求URL
-                import requests
-
-                # 先获取健康状态信息（包含uptime）
-                health_url = f"{base_url}/api/health"
-                resources_url = f"{base_url}/api/system/resources"
-                headers = {'X-API-Key': api_key}
-
-                # 获取健康状态
-                logger.debug(f"向实例 {instance_id} 发送健康状态请求: {health_url}")
-                health_data = None
-                try:
-                    health_response = requests.get(health_url, headers=headers, timeout=5)
-                    if health_response.status_code == 200:
-                        health_data = health_response.json()
-                        logger.debug(f"实例 {instance_id} 健康状态响应: {health_data}")
-                except Exception as e:
-                    logger.warning(f"获取实例 {instance_id} 健康状态失败: {e}")
-
-                # 获取资源信息
-                logger.debug(f"向实例 {instance_id} 发送资源请求: {resources_url}")
-                response = requests.get(resources_url, headers=headers, timeout=5)
+                # 使用后台采样器的实例快照，快照中没有时立即探测一次
+                instance_state = metrics_sampler.get_instance(instance_id)
+                if not instance_state:
+                    instance_state = await metrics_sampler.sample_instance(instance)
 
                 # 检查响应状态
-                if response.status_code != 200:
-                    logger.warning(f"实例 {instance_id} 资源请求失败，状态码: {response.status_code}")
+                if not instance_state.get('resources'):
+                    logger.warning(f"实例 {instance_id} 资源请求失败")
                     # 返回默认资源信息
                     return {
                         "code": 0,
@@ -441,9 +417,10 @@ async def get_system_resources(request: Request, instance_id: Optional[str] = No
                         }
                     }
 
-                # 解析响应
-                result = response.json()
-                logger.debug(f"实例 {instance_id} 资源响应: {result}")
+                # 复制快照，避免补充字段时修改快照本身
+                import copy
+                result = copy.deepcopy(instance_state['resources'])
+                result['snapshot_age'] = round(time.time() - instance_state['sampled_at'], 2)
 
                 # 确保响应中包含启动时间
                 if 'data' in result and isinstance(result['data'], dict):
@@ -512,20 +489,21 @@ async def get_system_resources(request: Request, instance_id: Optional[str] = No
                     }
                 }
 
-        # 获取系统资源使用情况
-        cpu_percent = psutil.cpu_percent(interval=0.1)
-        memory = psutil.virtual_memory()
-        memory_used_mb = memory.used / (1024 * 1024)
-        memory_total_mb = memory.total / (1024 * 1024)
-        memory_percent = memory.percent
-        memory_free_mb = memory.available / (1024 * 1024)
+        # 获取系统资源使用情况（后台采样器快照）
+        await metrics_sampler.ensure_ready()
+        host = metrics_sampler.get_host()
+        cpu_percent = host.get('cpu_percent', 0)
+        memory_used_mb = host.get('memory_used', 0) / (1024 * 1024)
+        memory_total_mb = host.get('memory_total', 0) / (1024 * 1024)
+        memory_percent = host.get('memory_percent', 0)
+        memory_free_mb = host.get('memory_available', 0) / (1024 * 1024)
 
         return {
             "code": 0,
             "message": "获取成功",
             "data": {
                 "cpu": {
-                    "core_count": psutil.cpu_count(),
+                    "core_count": host.get('cpu_count'),
                     "usage_percent": cpu_percent
                 },
                 "memory": {
@@ -534,328 +512,190 @@ async def get_system_resources(request: Request, instance_id: Optional[str] = No
                     "usage_percent": memory_percent,
                     "free": round(memory_free_mb)
                 }
-            }
+            },
+            "snapshot_age": metrics_sampler.get_age()['host']
         }
     except Exception as e:
         logger.error(f"获取系统资源失败: {e}")
         logger.error(traceback.format_exc())
         raise HTTPException(status_code=500, detail=f"获取系统资源失败: {str(e)}")
 
+# 事件循环监控API
+@api_router.get("/system/event-loop")
+async def get_event_loop_stats(request: Request, limit: int = 20, include_stack: bool = False):
+    """获取事件循环调度延迟统计和阻塞热点"""
+    await verify_request_auth(request)
+    return {
+        "stats": loop_monitor.get_stats(),
+        "offenders": loop_monitor.get_offenders(limit, include_stack)
+    }
+
 # 系统状态API
 @api_router.get("/system/status")
 async def get_system_status(request: Request):
-    """获取系统状态"""
+    """获取系统状态（返回后台采样器的快照）"""
     try:
         # 验证认证
         await verify_request_auth(request)
 
         # 确保管理器已初始化
         await initialize_managers()
+        await metrics_sampler.ensure_ready()
 
-        # 获取系统启动时间
-        boot_time = psutil.boot_time()
-        boot_time_str = datetime.datetime.fromtimestamp(boot_time).strftime("%Y-%m-%d %H:%M:%S")
-        uptime_seconds = time.time() - boot_time
+        host = metrics_sampler.get_host()
+        stats = metrics_sampler.get_stats()
 
         # 格式化运行时间
+        uptime_seconds = time.time() - host.get('boot_time', time.time())
         days, remainder = divmod(uptime_seconds, 86400)
         hours, remainder = divmod(remainder, 3600)
         minutes, _ = divmod(remainder, 60)  # 使用_忽略秒数
         uptime_str = f"{int(days)}天{int(hours)}小时{int(minutes)}分钟"
 
-        # 获取系统资源使用情况
-        cpu_percent = psutil.cpu_percent(interval=0.1)
-        memory = psutil.virtual_memory()
-        memory_used_gb = memory.used / (1024 ** 3)
-        memory_total_gb = memory.total / (1024 ** 3)
-        memory_percent = memory.percent
-
-        # 获取磁盘使用情况
-        disk = psutil.disk_usage('/')
-        disk_used_gb = disk.used / (1024 ** 3)
-        disk_total_gb = disk.total / (1024 ** 3)
-        disk_percent = disk.percent
-
-        # 获取wxauto_mgt版本
-        version = get_version()
-
-        # 获取实例状态
-        try:
-            # 从数据库获取实例列表
-            instances_query = "SELECT * FROM instances WHERE enabled = 1"
-            db_instances = await db_manager.fetchall(instances_query)
-
-            # 初始化计数器
-            online_count = 0
-            offline_count = 0
-            error_count = 0
-
-            # 检查每个实例的实际连接状态
-            for instance in db_instances:
-                instance_id = instance.get('instance_id')
-                base_url = instance.get('base_url')
-                api_key = instance.get('api_key')
-
-                if not base_url or not api_key:
-                    offline_count += 1
-                    continue
-
-                try:
-                    # 调用健康检查API获取微信连接状态
-                    import requests
-                    health_url = f"{base_url}/api/health"
-                    headers = {'X-API-Key': api_key}
-
-                    health_response = requests.get(health_url, headers=headers, timeout=5)
-                    if health_response.status_code == 200:
-                        health_data = health_response.json()
-                        if 'data' in health_data and health_data['data'].get('wechat_status') == 'connected':
-                            online_count += 1
-                        else:
-                            offline_count += 1
-                    else:
-                        offline_count += 1
-                except Exception as e:
-                    logger.warning(f"检查实例 {instance_id} 连接状态失败: {e}")
-                    offline_count += 1
-
-        except Exception as e:
-            logger.warning(f"获取实例状态失败: {e}")
-            logger.warning(traceback.format_exc())
-            online_count = 0
-            offline_count = 0
-            error_count = 0
-
-        # 获取消息处理状态
-        today_start = datetime.datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-        today_start_timestamp = int(today_start.timestamp())
-
-        # 获取今日消息数量
-        try:
-            today_messages_query = "SELECT COUNT(*) as count FROM messages WHERE create_time >= ?"
-            today_messages_result = await db_manager.fetchone(today_messages_query, (today_start_timestamp,))
-            today_messages_count = today_messages_result['count'] if today_messages_result else 0
-        except Exception:
-            today_messages_count = 0
-
-        # 获取待处理消息数量
-        try:
-            pending_messages_query = "SELECT COUNT(*) as count FROM messages WHERE delivery_status = 0"
-            pending_messages_result = await db_manager.fetchone(pending_messages_query)
-            pending_messages_count = pending_messages_result['count'] if pending_messages_result else 0
-        except Exception:
-            pending_messages_count = 0
-
-        # 获取消息总数
-        try:
-            total_messages_query = "SELECT COUNT(*) as count FROM messages"
-            total_messages_result = await db_manager.fetchone(total_messages_query)
-            total_messages_count = total_messages_result['count'] if total_messages_result else 0
-        except Exception:
-            total_messages_count = 0
-
-        # 获取监听对象总数
-        try:
-            # 直接从数据库获取监听对象总数
-            listeners_query = "SELECT COUNT(*) as count FROM listeners"
-            listeners_result = await db_manager.fetchone(listeners_query)
-            listeners_count = listeners_result['count'] if listeners_result and 'count' in listeners_result else 0
-
-            # 如果数据库中没有记录，尝试从消息监听器获取
-            if listeners_count == 0 and hasattr(message_listener, 'get_all_listeners'):
-                all_listeners = message_listener.get_all_listeners()
-                listeners_count = len(all_listeners) if all_listeners else 0
-
-            # 记录实际的监听对象数量
-            logger.debug(f"获取到实际监听对象数量: {listeners_count}")
-
-            # 不再强制设置为至少1个
-        except Exception as e:
-            logger.warning(f"获取监听对象总数失败: {e}")
-            listeners_count = 0  # 出错时默认为0
-
-        # 计算消息处理成功率
-        try:
-            success_query = "SELECT COUNT(*) as count FROM messages WHERE delivery_status = 1"
-            success_result = await db_manager.fetchone(success_query)
-            success_count = success_result['count'] if success_result else 0
-
-            total_query = "SELECT COUNT(*) as count FROM messages WHERE delivery_status IN (0, 1, 2)"
-            total_result = await db_manager.fetchone(total_query)
-            total_count = total_result['count'] if total_result else 0
-
-            success_rate = round((success_count / total_count) * 100) if total_count > 0 else 100
-        except Exception:
-            success_rate = 100
-
-        # 获取最近活跃的实例
-        active_instance_name = ""  # 默认为空
-        try:
-            # 查询最新的消息记录对应的实例
-            latest_message_query = """
-                SELECT m.instance_id, i.name
-                FROM messages m
-                JOIN instances i ON m.instance_id = i.instance_id
-                ORDER BY m.create_time DESC
-                LIMIT 1
-            """
-            latest_message = await db_manager.fetchone(latest_message_query)
-            if latest_message and 'name' in latest_message:
-                active_instance_name = latest_message['name']
+        # 统计实例连接状态
+        online_count = 0
+        offline_count = 0
+        for instance_state in metrics_sampler.get_instances().values():
+            if instance_state.get('wechat_status') == 'connected':
+                online_count += 1
             else:
-                # 如果没有消息记录，尝试获取任意一个实例名称
-                instance_query = "SELECT name FROM instances LIMIT 1"
-                instance_result = await db_manager.fetchone(instance_query)
-                if instance_result and 'name' in instance_result:
-                    active_instance_name = instance_result['name']
-        except Exception as e:
-            logger.warning(f"获取最近活跃实例失败: {e}")
-            # 保持默认值为空
+                offline_count += 1
+
+        # 如果数据库中没有监听对象记录，尝试从消息监听器获取
+        listeners_count = stats.get('listeners_count', 0)
+        if listeners_count == 0 and hasattr(message_listener, 'get_all_listeners'):
+            all_listeners = message_listener.get_all_listeners()
+            listeners_count = len(all_listeners) if all_listeners else 0
 
         return {
             "system_status": {
                 "status": "running",
                 "uptime": uptime_str,
-                "version": version
+                "version": get_version()
             },
             "instance_status": {
                 "online": online_count,
                 "offline": offline_count,
-                "error": error_count,
-                "active_instance": active_instance_name
+                "error": 0,
+                "active_instance": stats.get('active_instance', '')
             },
             "message_processing": {
-                "today_messages": today_messages_count,
-                "success_rate": success_rate,
-                "pending": pending_messages_count,
-                "total_messages": total_messages_count,
+                "today_messages": stats.get('today_messages', 0),
+                "success_rate": stats.get('success_rate', 100),
+                "pending": stats.get('pending', 0),
+                "total_messages": stats.get('total_messages', 0),
                 "listeners_count": listeners_count
             },
             "system_resources": {
-                "cpu_percent": cpu_percent,
-                "memory_used_gb": round(memory_used_gb, 2),
-                "memory_total_gb": round(memory_total_gb, 2),
-                "memory_percent": memory_percent,
-                "disk_used_gb": round(disk_used_gb, 2),
-                "disk_total_gb": round(disk_total_gb, 2),
-                "disk_percent": disk_percent
-            }
+                "cpu_percent": host.get('cpu_percent', 0),
+                "memory_used_gb": round(host.get('memory_used', 0) / (1024 ** 3), 2),
+                "memory_total_gb": round(host.get('memory_total', 0) / (1024 ** 3), 2),
+                "memory_percent": host.get('memory_percent', 0),
+                "disk_used_gb": round(host.get('disk_used', 0) / (1024 ** 3), 2),
+                "disk_total_gb": round(host.get('disk_total', 0) / (1024 ** 3), 2),
+                "disk_percent": host.get('disk_percent', 0)
+            },
+            # 快照各部分距上次采样的秒数
+            "snapshot_age": metrics_sampler.get_age()
         }
     except Exception as e:
         logger.error(f"获取系统状态失败: {e}")
         logger.error(traceback.format_exc())
         raise HTTPException(status_code=500, detail=f"获取系统状态失败: {str(e)}")
 
-# 实例状态缓存（避免频繁请求）
-_instance_cache = {}
-_cache_timeout = 30  # 缓存30秒
+# 实例状态缓存时间（秒），使用 service_bridge 的只读快照，实例状态变化时失效
+INSTANCE_STATUS_TTL = 30
 
 async def get_instance_status_cached(instance_id: str, base_url: str, api_key: str):
     """获取实例状态（带缓存）"""
-    import time
-    current_time = time.time()
-
-    # 检查缓存
-    if instance_id in _instance_cache:
-        cache_data = _instance_cache[instance_id]
-        if current_time - cache_data['timestamp'] < _cache_timeout:
-            logger.debug(f"使用缓存的实例 {instance_id} 状态")
-            return cache_data['data']
-
-    # 缓存过期或不存在，重新获取
-    import requests
-    import asyncio
-
-    result = {
-        'status': 'OFFLINE',
-        'runtime': '未知',
-        'cpu_percent': 0,
-        'memory_used': 0,
-        'memory_total': 0,
-        'memory_percent': 0
-    }
+    async def load_status():
+        result = {
+            'status': 'OFFLINE',
+            'runtime': '未知',
+            'cpu_percent': 0,
+            'memory_used': 0,
+            'memory_total': 0,
+            'memory_percent': 0
+        }
 
-    try:
-        headers = {'X-API-Key': api_key}
+        try:
+            headers = {'X-API-Key': api_key}
 
-        # 并发发送健康检查和资源请求
-        async def fetch_health():
-            try:
-                health_url = f"{base_url}/api/health"
-                async with aiohttp.ClientSession() as session:
-                    async with session.get(health_url, headers=headers, timeout=aiohttp.ClientTimeout(total=2)) as response:
-                        if response.status == 200:
-                            return await response.json()
-                        return None
-            except:
-                return None
-
-        async def fetch_resources():
-            try:
-                resources_url = f"{base_url}/api/system/resources"
-                async with aiohttp.ClientSession() as session:
-                    async with session.get(resources_url, headers=headers, timeout=aiohttp.ClientTimeout(total=2)) as response:
-                        if response.status == 200:
-                            return await response.json()
-                        return None
-            except:
-                return None
-
-        # 并发执行请求
-        health_data, resources_data = await asyncio.gather(
-            fetch_health(),
-            fetch_resources(),
-            return_exceptions=True
-        )
+            # 并发发送健康检查和资源请求
+            async def fetch_health():
+                try:
+                    health_url = f"{base_url}/api/health"
+                    async with aiohttp.ClientSession() as session:
+                        async with session.get(health_url, headers=headers, timeout=aiohttp.ClientTimeout(total=2)) as response:
+                            if response.status == 200:
+                                return await response.json()
+                            return None
+                except:
+                    return None
+
+            async def fetch_resources():
+                try:
+                    resources_url = f"{base_url}/api/system/resources"
+                    async with aiohttp.ClientSession() as session:
+                        async with session.get(resources_url, headers=headers, timeout=aiohttp.ClientTimeout(total=2)) as response:
+                            if response.status == 200:
+                                return await response.json()
+                            return None
+                except:
+                    return None
+
+            # 并发执行请求
+            health_data, resources_data = await asyncio.gather(
+                fetch_health(),
+                fetch_resources(),
+                return_exceptions=True
+            )
 
-        # 处理健康检查结果
-        if health_data and 'data' in health_data:
-            data = health_data['data']
-
-            # 更新状态
-            if data.get('wechat_status') == 'connected':
-                result['status'] = 'ONLINE'
-
-            # 格式化运行时间
-            if 'uptime' in data:
-                uptime_seconds = data['uptime']
-                days, remainder = divmod(uptime_seconds, 86400)
-                hours, remainder = divmod(remainder, 3600)
-                minutes, _ = divmod(remainder, 60)
-
-                if days > 0:
-                    result['runtime'] = f"{int(days)}天{int(hours)}小时{int(minutes)}分钟"
-                elif hours > 0:
-                    result['runtime'] = f"{int(hours)}小时{int(minutes)}分钟"
-                else:
-                    result['runtime'] = f"{int(minutes)}分钟"
-
-        # 处理资源信息结果
-        if resources_data and 'data' in resources_data:
-            data = resources_data['data']
-
-            if 'cpu' in data and 'usage_percent' in data['cpu']:
-                result['cpu_percent'] = data['cpu']['usage_percent']
-
-            if 'memory' in data:
-                memory_data = data['memory']
-                result['memory_used'] = round(memory_data.get('used', 0) / 1024, 1)
-                result['memory_total'] = round(memory_data.get('total', 0) / 1024, 1)
-                result['memory_percent'] = memory_data.get('usage_percent', 0)
+            # 处理健康检查结果
+            if health_data and 'data' in health_data:
+                data = health_data['data']
+
+                # 更新状态
+                if data.get('wechat_status') == 'connected':
+                    result['status'] = 'ONLINE'
+
+                # 格式化运行时间
+                if 'uptime' in data:
+                    uptime_seconds = data['uptime']
+                    days, remainder = divmod(uptime_seconds, 86400)
+                    hours, remainder = divmod(remainder, 3600)
+                    minutes, _ = divmod(remainder, 60)
+
+                    if days > 0:
+                        result['runtime'] = f"{int(days)}天{int(hours)}小时{int(minutes)}分钟"
+                    elif hours > 0:
+                        result['runtime'] = f"{int(hours)}小时{int(minutes)}分钟"
+                    else:
+                        result['runtime'] = f"{int(minutes)}分钟"
 
-    except Exception as e:
-        logger.warning(f"获取实例 {instance_id} 状态失败: {e}")
+            # 处理资源信息结果
+            if resources_data and 'data' in resources_data:
+                data = resources_data['data']
 
-    # 更新缓存
-    _instance_cache[instance_id] = {
-        'timestamp': current_time,
-        'data': result
-    }
+                if 'cpu' in data and 'usage_percent' in data['cpu']:
+                    result['cpu_percent'] = data['cpu']['usage_percent']
+
+                if 'memory' in data:
+                    memory_data = data['memory']
+                    result['memory_used'] = round(memory_data.get('used', 0) / 1024, 1)
+                    result['memory_total'] = round(memory_data.get('total', 0) / 1024, 1)
+                    result['memory_percent'] = memory_data.get('usage_percent', 0)
+
+        except Exception as e:
+            logger.warning(f"获取实例 {instance_id} 状态失败: {e}")
+
+        return result
 
-    return result
+    return await service_bridge.snapshot(f"instance_status:{instance_id}", load_status, ttl=INSTANCE_STATUS_TTL)
 
 # 实例列表API
 @api_router.get("/instances")
+@cache_response('instances', ttl=30)
 async def get_instances(request: Request):
     """获取所有实例"""
     try:
@@ -865,51 +705,56 @@ async def get_instances(request: Request):
         # 确保管理器已初始化
         await initialize_managers()
 
-        # 尝试从数据库获取实例列表
-        result = []
-        try:
-            # 构建查询
-            instances_query = "SELECT * FROM instances"
-            db_instances = await db_manager.fetchall(instances_query)
-
-            # 获取每个实例的详细信息
-            for instance in db_instances:
-                instance_id = instance.get('instance_id')
-
-                # 获取实例消息数量
-                try:
-                    messages_query = "SELECT COUNT(*) as count FROM messages WHERE instance_id = ?"
-                    messages_result = await db_manager.fetchone(messages_query, (instance_id,))
-                    messages_count = messages_result['count'] if messages_result else 0
-                except Exception:
-                    messages_count = 0
-
-                # 获取实例监听对象数量
-                try:
-                    # 首先尝试从数据库获取监听对象数量
-                    listeners_query = "SELECT COUNT(*) as count FROM listeners WHERE instance_id = ?"
-                    listeners_result = await db_manager.fetchone(listeners_query, (instance_id,))
-
-                    if listeners_result and 'count' in listeners_result:
-                        listeners_count = listeners_result['count']
-                    else:
-                        # 如果数据库查询失败，尝试从消息监听器获取
-                        if hasattr(message_listener, 'get_listeners_by_instance'):
-                            listeners_count = len(message_listener.get_listeners_by_instance(instance_id))
+        async def load_instances():
+            # 尝试从数据库获取实例列表
+            result = []
+            try:
+                # 构建查询
+                instances_query = "SELECT * FROM instances"
+                db_instances = await db_manager.fetchall(instances_query)
+
+                # 获取每个实例的详细信息
+                for instance in db_instances:
+                    instance_id = instance.get('instance_id')
+
+                    # 获取实例消息数量
+                    try:
+                        messages_query = "SELECT COUNT(*) as count FROM messages WHERE instance_id = ?"
+                        messages_result = await db_manager.fetchone(messages_query, (instance_id,))
+                        messages_count = messages_result['count'] if messages_result else 0
+                    except Exception:
+                        messages_count = 0
+
+                    # 获取实例监听对象数量
+                    try:
+                        # 首先尝试从数据库获取监听对象数量
+                        listeners_query = "SELECT COUNT(*) as count FROM listeners WHERE instance_id = ?"
+                        listeners_result = await db_manager.fetchone(listeners_query, (instance_id,))
+
+                        if listeners_result and 'count' in listeners_result:
+                            listeners_count = listeners_result['count']
                         else:
-                            listeners_count = 0
-                except Exception as e:
-                    logger.warning(f"获取实例 {instance_id} 监听对象数量失败: {e}")
-                    listeners_count = 0
-
-                # 构建实例信息（不包含资源信息，资源信息通过专门的API获取）
-                result.append({
-                    **instance,
-                    "messages_count": messages_count,
-                    "listeners_count": listeners_count
-                })
-        except Exception as e:
-            logger.warning(f"从数据库获取实例列表失败: {e}")
+                            # 如果数据库查询失败，尝试从消息监听器获取
+                            if hasattr(message_listener, 'get_listeners_by_instance'):
+                                listeners_count = len(message_listener.get_listeners_by_instance(instance_id))
+                            else:
+                                listeners_count = 0
+                    except Exception as e:
+                        logger.warning(f"获取实例 {instance_id} 监听对象数量失败: {e}")
+                        listeners_count = 0
+
+                    # 构建实例信息（不包含资源信息，资源信息通过专门的API获取）
+                    result.append({
+                        **instance,
+                        "messages_count": messages_count,
+                        "listeners_count": listeners_count
+                    })
+            except Exception as e:
+                logger.warning(f"从数据库获取实例列表失败: {e}")
+            return result
+
+        # 短时间内的重复请求共享同一份只读快照
+        result = await service_bridge.snapshot('instances', load_instances)
 
         return result
     except Exception as e:
@@ -1086,6 +931,7 @@ async def delete_instance(instance_id: str, request: Request):
 
 # 服务平台列表API
 @api_router.get("/platforms")
+@cache_response('platforms', ttl=300)
 async def get_platforms(request: Request):
     """获取所有服务平台"""
     try:
@@ -1095,21 +941,25 @@ async def get_platforms(request: Request):
         # 确保管理器已初始化
         await initialize_managers()
 
-        # 从服务平台管理器获取所有平台
-        platforms = await platform_manager.get_all_platforms()
-
-        # 处理敏感信息
-        for platform in platforms:
-            # 对于包含API密钥的配置，隐藏密钥
-            if 'config' in platform and isinstance(platform['config'], dict):
-                config = platform['config']
-                if 'api_key' in config and config['api_key']:
-                    # 只显示前4位和后4位，中间用星号代替
-                    api_key = config['api_key']
-                    if len(api_key) > 8:
-                        config['api_key'] = api_key[:4] + '*' * (len(api_key) - 8) + api_key[-4:]
-                    else:
-                        config['api_key'] = '********'
+        async def load_platforms():
+            # 从服务平台管理器获取所有平台
+            platforms = await platform_manager.get_all_platforms()
+
+            # 处理敏感信息
+            for platform in platforms:
+                # 对于包含API密钥的配置，隐藏密钥
+                if 'config' in platform and isinstance(platform['config'], dict):
+                    config = platform['config']
+                    if 'api_key' in config and config['api_key']:
+                        # 只显示前4位和后4位，中间用星号代替
+                        api_key = config['api_key']
+                        if len(api_key) > 8:
+                            config['api_key'] = api_key[:4] + '*' * (len(api_key) - 8) + api_key[-4:]
+                        else:
+                            config['api_key'] = '********'
+            return platforms
+
+        platforms = await service_bridge.snapshot('platforms', load_platforms)
 
         return platforms
     except Exception as e:
@@ -1119,6 +969,7 @@ async def get_platforms(request: Request):
 
 # 消息转发规则列表API
 @api_router.get("/rules")
+@cache_response('rules', ttl=300)
 async def get_rules(request: Request, instance_id: Optional[str] = None):
     """获取所有消息转发规则"""
     try:
@@ -1128,15 +979,15 @@ async def get_rules(request: Request, instance_id: Optional[str] = None):
         # 确保管理器已初始化
         await initialize_managers()
 
-        # 从规则管理器获取所有规则
-        rules = await rule_manager.get_all_rules()
+        # 从规则管理器获取所有规则（只读快照，不能原地修改）
+        rules = await service_bridge.snapshot('rules', rule_manager.get_all_rules)
 
         # 如果指定了实例ID，则过滤规则
         if instance_id:
             rules = [rule for rule in rules if rule['instance_id'] == instance_id or rule['instance_id'] == '*']
 
         # 按优先级排序（降序）
-        rules.sort(key=lambda x: (-x.get('priority', 0), x.get('rule_id', '')))
+        rules = sorted(rules, key=lambda x: (-x.get('priority', 0), x.get('rule_id', '')))
 
         return rules
     except Exception as e:
@@ -1456,6 +1307,7 @@ async def remove_listener(request: Request):
 
 # 监听对象列表API
 @api_router.get("/listeners")
+@cache_response('listeners', ttl=30)
 async def get_listeners(request: Request, instance_id: Optional[str] = None, since: Optional[int] = None):
     """
     获取所有监听对象
@@ -1470,67 +1322,70 @@ async def get_listeners(request: Request, instance_id: Optional[str] = None, sin
         # 记录API调用
         logger.debug(f"获取监听对象列表 API 被调用，参数：instance_id={instance_id}, since={since}")
 
-        # 尝试从数据库获取监听对象
-        listeners = []
-        try:
-            # 构建查询条件，添加排序逻辑
-            query = "SELECT * FROM listeners WHERE 1=1"
-            params = []
-
-            if instance_id:
-                query += " AND instance_id = ?"
-                params.append(instance_id)
-
-            if since:
-                query += " AND update_time > ?"
-                params.append(since)
-
-            # 添加排序：按状态排序（活跃在前），然后按最后消息时间降序排序
-            query += " ORDER BY CASE WHEN status = 'active' THEN 0 ELSE 1 END, last_message_time DESC"
-
-            # 执行查询
-            db_listeners = await db_manager.fetchall(query, tuple(params))
-            if db_listeners:
-                listeners = db_listeners
-                logger.debug(f"从数据库获取到 {len(listeners)} 个监听对象")
-        except Exception as e:
-            logger.warning(f"从数据库获取监听对象失败: {e}")
+        async def load_listeners():
+            # 尝试从数据库获取监听对象
+            listeners = []
+            try:
+                # 构建查询条件，添加排序逻辑
+                query = "SELECT * FROM listeners WHERE 1=1"
+                params = []
+
+                if instance_id:
+                    query += " AND instance_id = ?"
+                    params.append(instance_id)
+
+                # 添加排序：按状态排序（活跃在前），然后按最后消息时间降序排序
+                query += " ORDER BY CASE WHEN status = 'active' THEN 0 ELSE 1 END, last_message_time DESC"
+
+                # 执行查询
+                db_listeners = await db_manager.fetchall(query, tuple(params))
+                if db_listeners:
+                    listeners = db_listeners
+                    logger.debug(f"从数据库获取到 {len(listeners)} 个监听对象")
+            except Exception as e:
+                logger.warning(f"从数据库获取监听对象失败: {e}")
 
-        # 如果指定了实例ID，则过滤监听对象
-        if instance_id and listeners:
-            listeners = [listener for listener in listeners if listener.get('instance_id') == instance_id]
-            logger.debug(f"过滤后剩余 {len(listeners)} 个监听对象")
+            # 如果指定了实例ID，则过滤监听对象
+            if instance_id and listeners:
+                listeners = [listener for listener in listeners if listener.get('instance_id') == instance_id]
+                logger.debug(f"过滤后剩余 {len(listeners)} 个监听对象")
 
-        # 添加额外信息并统一字段名
-        for listener in listeners:
-            # 统一字段名：将 'who' 字段映射为 'chat_name'
-            if 'who' in listener:
-                listener['chat_name'] = listener['who']
+            # 添加额外信息并统一字段名
+            for listener in listeners:
+                # 统一字段名：将 'who' 字段映射为 'chat_name'
+                if 'who' in listener:
+                    listener['chat_name'] = listener['who']
 
-            # 设置状态信息
-            status = listener.get('status', 'active')
-            listener['status'] = status
+                # 设置状态信息
+                status = listener.get('status', 'active')
+                listener['status'] = status
 
-            # 获取最后一条消息时间
-            try:
-                # 始终尝试获取最新的消息时间
-                listener_instance_id = listener.get('instance_id')
-                chat_name = listener.get('chat_name') or listener.get('who')
-
-                # 查询最后一条消息
-                query = """
-                    SELECT create_time FROM messages
-                    WHERE instance_id = ? AND chat_name = ?
-                    ORDER BY create_time DESC LIMIT 1
-                """
-                result = await db_manager.fetchone(query, (listener_instance_id, chat_name))
-                if result and 'create_time' in result:
-                    listener['last_message_time'] = result['create_time']
-                    logger.debug(f"更新监听对象 {chat_name} 的最后消息时间为 {result['create_time']}")
-            except Exception as e:
-                logger.warning(f"获取监听对象最后消息时间失败: {e}")
-                # 保留现有的last_message_time值
-                listener['last_message_time'] = listener.get('last_message_time', 0)
+                # 获取最后一条消息时间
+                try:
+                    # 始终尝试获取最新的消息时间
+                    listener_instance_id = listener.get('instance_id')
+                    chat_name = listener.get('chat_name') or listener.get('who')
+
+                    # 查询最后一条消息
+                    query = """
+                        SELECT create_time FROM messages
+                        WHERE instance_id = ? AND chat_name = ?
+                        ORDER BY create_time DESC LIMIT 1
+                    """
+                    result = await db_manager.fetchone(query, (listener_instance_id, chat_name))
+                    if result and 'create_time' in result:
+                        listener['last_message_time'] = result['create_time']
+                        logger.debug(f"更新监听对象 {chat_name} 的最后消息时间为 {result['create_time']}")
+                except Exception as e:
+                    logger.warning(f"获取监听对象最后消息时间失败: {e}")
+                    # 保留现有的last_message_time值
+                    listener['last_message_time'] = listener.get('last_message_time', 0)
+            return listeners
+
+        # 快照不区分since（每次轮询的since都不同），按实例共享，再按更新时间过滤
+        listeners = await service_bridge.snapshot(f"listeners:{instance_id}", load_listeners)
+        if since:
+            listeners = [listener for listener in listeners if (listener.get('update_time') or 0) > since]
 
         return listeners
     except Exception as e:
@@ -1540,6 +1395,7 @@ async def get_listeners(request: Request, instance_id: Optional[str] = None, sin
 
 # 消息列表API
 @api_router.get("/messages")
+@cache_response('messages', ttl=30)
 async def get_messages(
     request: Request,
     instance_id: Optional[str] = None,
@@ -1594,6 +1450,31 @@ async def get_messages(
         logger.error(traceback.format_exc())
         raise HTTPException(status_code=500, detail=f"获取消息列表失败: {str(e)}")
 
+@api_router.get("/messages/traces/stats")
+async def get_message_trace_stats(request: Request):
+    """获取消息各处理阶段的耗时统计（次数、平均值、分位数）"""
+    await verify_request_auth(request)
+    return {
+        "stages": message_tracer.get_stage_stats(),
+        "total": message_tracer.get_total_stats(),
+        "tracer": message_tracer.get_stats()
+    }
+
+@api_router.get("/messages/traces/slow")
+async def get_slow_messages(request: Request, limit: int = 50):
+    """获取最近的慢消息及其超出预算的阶段"""
+    await verify_request_auth(request)
+    return message_tracer.get_slow_messages(limit)
+
+@api_router.get("/messages/{message_id}/trace")
+async def get_message_trace(request: Request, message_id: str):
+    """获取单条消息的各阶段耗时"""
+    await verify_request_auth(request)
+    trace = message_tracer.get_trace(message_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail="没有该消息的追踪记录")
+    return trace
+
 # 日志API
 @api_router.get("/logs")
 async def get_logs(request: Request, limit: int = 50, since: Optional[int] = None):
@@ -1824,6 +1705,7 @@ async def get_accounting_records(
         raise HTTPException(status_code=500, detail=f"获取记账记录失败: {str(e)}")
 
 @api_router.get("/accounting/stats")
+@cache_response('accounting', ttl=60)
 async def get_accounting_stats(request: Request, platform_id: Optional[str] = None):
     """获取记账统计信息"""
     try:
@@ -4,6 +4,7 @@ Web服务配置管理模块
 使用统一的配置存储机制，避免全局变量和配置不一致问题
 """
 
+import sys
 from typing import Optional
 from functools import lru_cache
 from wxauto_mgt.utils.logging import logger
@@ -154,6 +155,7 @@ class WebServiceConfig:
             self._port = config.get('port', 8080)
             self._auto_start = config.get('auto_start', True)
             self._password = config.get('password')
+            _invalidate_auth_cache()
             logger.debug(f"已加载Web服务配置: host={self._host}, port={self._port}, auto_start={self._auto_start}, has_password={bool(self._password)}")
         else:
             logger.warning(f"Web服务配置格式不正确: {type(config)}, 使用默认值")
@@ -189,6 +191,7 @@ class WebServiceConfig:
                 from wxauto_mgt.web.security import hash_password
                 new_config['password'] = hash_password(password)
                 self._password = new_config['password']
+                _invalidate_auth_cache()
             
             # 保存到存储
             await config_store.set_config('system', 'web_service', new_config)
@@ -216,6 +219,13 @@ class WebServiceConfig:
         }
 
 
+def _invalidate_auth_cache():
+    """密码变化时清除认证结果缓存（安全模块未加载时没有缓存，无需处理）"""
+    security_module = sys.modules.get('wxauto_mgt.web.security')
+    if security_module is not None:
+        security_module.invalidate_auth_cache()
+
+
 @lru_cache()
 def get_web_service_config() -> WebServiceConfig:
     """获取Web服务配置实例（单例模式）"""
@@ -235,4 +245,5 @@ def set_web_service_config_dict(config: dict):
     web_config._port = config.get('port', web_config._port)
     web_config._auto_start = config.get('auto_start', web_config._auto_start)
     web_config._password = config.get('password', web_config._password)
+    _invalidate_auth_cache()
     web_config._loaded = True
@@ -0,0 +1,295 @@
+"""
+系统指标后台采样器
+
+按固定节奏在后台采集主机资源、各实例健康/资源状态和消息统计，保存为内存快照，
+系统状态相关API直接返回快照，不再在请求处理中阻塞采样或逐个探测实例。
+"""
+
+import asyncio
+import datetime
+import time
+from typing import Dict, Any, Optional
+
+import aiohttp
+import psutil
+
+from wxauto_mgt.utils.logging import logger
+from wxauto_mgt.data.db_manager import db_manager
+
+
+class SystemMetricsSampler:
+    """系统指标后台采样器"""
+
+    def __init__(self, host_interval: float = 5, instance_interval: float = 15,
+                 stats_interval: float = 10, probe_timeout: float = 3):
+        """
+        初始化采样器
+
+        Args:
+            host_interval: 主机资源采样间隔（秒）
+            instance_interval: 实例健康/资源探测间隔（秒）
+            stats_interval: 消息统计查询间隔（秒）
+            probe_timeout: 单个实例请求超时（秒）
+        """
+        self.host_interval = host_interval
+        self.instance_interval = instance_interval
+        self.stats_interval = stats_interval
+        self.probe_timeout = probe_timeout
+
+        self._host: Dict[str, Any] = {}
+        self._instances: Dict[str, Dict[str, Any]] = {}
+        self._stats: Dict[str, Any] = {}
+        self._sampled_at = {'host': 0.0, 'instances': 0.0, 'stats': 0.0}
+
+        self._task: Optional[asyncio.Task] = None
+        self._refresh_lock: Optional[asyncio.Lock] = None
+
+    async def start(self):
+        """在当前事件循环中启动后台采样任务"""
+        if self._task and not self._task.done():
+            return
+
+        self._refresh_lock = asyncio.Lock()
+        # 第一次调用cpu_percent(interval=None)只建立基准，之后返回两次调用之间的平均值
+        psutil.cpu_percent(interval=None)
+        self._task = asyncio.create_task(self._sample_loop())
+        logger.info("系统指标采样器已启动")
+
+    async def stop(self):
+        """停止后台采样任务"""
+        if self._task and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+        logger.info("系统指标采样器已停止")
+
+    async def _sample_loop(self):
+        """采样循环"""
+        while True:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"采集系统指标失败: {e}")
+
+            await asyncio.sleep(self.host_interval)
+
+    async def refresh(self, force: bool = False):
+        """
+        刷新到期的指标
+
+        Args:
+            force: 是否忽略采样间隔强制刷新全部指标
+        """
+        if self._refresh_lock is None:
+            self._refresh_lock = asyncio.Lock()
+
+        async with self._refresh_lock:
+            now = time.time()
+            tasks = []
+            if force or now - self._sampled_at['host'] >= self.host_interval:
+                tasks.append(self._sample_host())
+            if force or now - self._sampled_at['instances'] >= self.instance_interval:
+                tasks.append(self._sample_instances())
+            if force or now - self._sampled_at['stats'] >= self.stats_interval:
+                tasks.append(self._sample_stats())
+
+            if tasks:
+                results = await asyncio.gather(*tasks, return_exceptions=True)
+                for result in results:
+                    if isinstance(result, Exception):
+                        logger.warning(f"采集系统指标失败: {result}")
+
+    async def ensure_ready(self):
+        """确保至少完成过一次采样（服务刚启动时的首次请求）"""
+        if not self._sampled_at['host']:
+            await self.refresh(force=True)
+
+    async def _sample_host(self):
+        """采集主机资源（psutil调用放到线程池中执行）"""
+        def collect() -> Dict[str, Any]:
+            memory = psutil.virtual_memory()
+            disk = psutil.disk_usage('/')
+            return {
+                'cpu_percent': psutil.cpu_percent(interval=None),
+                'cpu_count': psutil.cpu_count(),
+                'memory_used': memory.used,
+                'memory_total': memory.total,
+                'memory_available': memory.available,
+                'memory_percent': memory.percent,
+                'disk_used': disk.used,
+                'disk_total': disk.total,
+                'disk_percent': disk.percent,
+                'boot_time': psutil.boot_time()
+            }
+
+        loop = asyncio.get_running_loop()
+        self._host = await loop.run_in_executor(None, collect)
+        self._sampled_at['host'] = time.time()
+
+    async def _sample_instances(self):
+        """并发探测所有启用实例的健康状态和资源使用情况"""
+        db_instances = await db_manager.fetchall("SELECT * FROM instances WHERE enabled = 1")
+
+        timeout = aiohttp.ClientTimeout(total=self.probe_timeout)
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+            results = await asyncio.gather(
+                *[self._probe_instance(session, dict(instance)) for instance in db_instances],
+                return_exceptions=True
+            )
+
+        instances = {}
+        for instance, result in zip(db_instances, results):
+            if isinstance(result, Exception):
+                logger.warning(f"探测实例 {instance.get('instance_id')} 状态失败: {result}")
+                continue
+            instances[instance.get('instance_id')] = result
+
+        self._instances = instances
+        self._sampled_at['instances'] = time.time()
+
+    async def sample_instance(self, instance: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        立即探测单个实例并更新快照（用于快照中没有的实例）
+
+        Args:
+            instance: 实例数据库记录
+
+        Returns:
+            Dict[str, Any]: 实例状态
+        """
+        timeout = aiohttp.ClientTimeout(total=self.probe_timeout)
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+            result = await self._probe_instance(session, dict(instance))
+        self._instances[instance.get('instance_id')] = result
+        return result
+
+    async def _probe_instance(self, session, instance: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        探测单个实例
+
+        Args:
+            session: aiohttp会话
+            instance: 实例数据库记录
+
+        Returns:
+            Dict[str, Any]: 实例状态，包含health、resources原始响应和wechat_status
+        """
+        result = {
+            'instance': instance,
+            'health': None,
+            'resources': None,
+            'wechat_status': 'disconnected',
+            'sampled_at': time.time()
+        }
+
+        base_url = (instance.get('base_url') or '').rstrip('/')
+        api_key = instance.get('api_key')
+        if not base_url or not api_key:
+            return result
+
+        headers = {'X-API-Key': api_key}
+
+        async def fetch(path: str):
+            try:
+                async with session.get(f"{base_url}{path}", headers=headers) as response:
+                    if response.status == 200:
+                        return await response.json()
+            except Exception as e:
+                logger.debug(f"请求实例 {instance.get('instance_id')} {path} 失败: {e}")
+            return None
+
+        result['health'], result['resources'] = await asyncio.gather(
+            fetch('/api/health'),
+            fetch('/api/system/resources')
+        )
+
+        health = result['health']
+        if isinstance(health, dict) and isinstance(health.get('data'), dict):
+            result['wechat_status'] = health['data'].get('wechat_status', 'disconnected')
+
+        return result
+
+    async def _sample_stats(self):
+        """查询消息处理统计"""
+        today_start = datetime.datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+
+        row = await db_manager.fetchone(
+            """
+            SELECT
+                COUNT(*) AS total,
+                SUM(CASE WHEN create_time >= ? THEN 1 ELSE 0 END) AS today,
+                SUM(CASE WHEN delivery_status = 0 THEN 1 ELSE 0 END) AS pending,
+                SUM(CASE WHEN delivery_status = 1 THEN 1 ELSE 0 END) AS delivered,
+                SUM(CASE WHEN delivery_status IN (0, 1, 2) THEN 1 ELSE 0 END) AS finished
+            FROM messages
+            """,
+            (int(today_start.timestamp()),)
+        ) or {}
+
+        listeners = await db_manager.fetchone("SELECT COUNT(*) AS count FROM listeners") or {}
+
+        active_instance_name = ""
+        latest = await db_manager.fetchone(
+            """
+            SELECT i.name
+            FROM messages m
+            JOIN instances i ON m.instance_id = i.instance_id
+            ORDER BY m.create_time DESC
+            LIMIT 1
+            """
+        )
+        if latest and latest.get('name'):
+            active_instance_name = latest['name']
+        else:
+            any_instance = await db_manager.fetchone("SELECT name FROM instances LIMIT 1")
+            if any_instance and any_instance.get('name'):
+                active_instance_name = any_instance['name']
+
+        finished = row.get('finished') or 0
+        self._stats = {
+            'today_messages': row.get('today') or 0,
+            'pending': row.get('pending') or 0,
+            'total_messages': row.get('total') or 0,
+            'success_rate': round((row.get('delivered') or 0) / finished * 100) if finished else 100,
+            'listeners_count': listeners.get('count') or 0,
+            'active_instance': active_instance_name
+        }
+        self._sampled_at['stats'] = time.time()
+
+    def get_host(self) -> Dict[str, Any]:
+        """获取主机资源快照"""
+        return self._host
+
+    def get_instance(self, instance_id: str) -> Optional[Dict[str, Any]]:
+        """获取实例状态快照"""
+        return self._instances.get(instance_id)
+
+    def get_instances(self) -> Dict[str, Dict[str, Any]]:
+        """获取所有实例状态快照"""
+        return self._instances
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取消息统计快照"""
+        return self._stats
+
+    def get_age(self) -> Dict[str, Optional[float]]:
+        """
+        获取各部分快照的年龄
+
+        Returns:
+            Dict[str, Optional[float]]: 各部分距上次采样的秒数，未采样过为None
+        """
+        now = time.time()
+        return {
+            name: round(now - sampled_at, 2) if sampled_at else None
+            for name, sampled_at in self._sampled_at.items()
+        }
+
+
+# 创建全局实例
+metrics_sampler = SystemMetricsSampler()
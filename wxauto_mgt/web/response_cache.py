@@ -0,0 +1,261 @@
+"""
+Web响应缓存模块
+
+为读多写少的GET接口缓存序列化后的响应体（按路径+查询参数），并支持：
+
+- ETag / If-None-Match：内容未变化时返回 304 Not Modified
+- gzip：较大的JSON响应按需压缩，压缩结果随缓存条目保存
+- 按标签失效：核心服务的领域事件（消息、监听对象、实例变化、记账完成）和配置变更通知
+  （平台、规则、实例配置变化）使相关标签失效；任何修改类API请求使全部缓存失效
+
+缓存只在主事件循环中访问（见 MainLoopRoute），不需要加锁。
+"""
+
+import gzip
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from fastapi import Request, Response
+
+from wxauto_mgt.core.config_notifier import config_notifier, ConfigChangeEvent, ConfigChangeType
+from wxauto_mgt.core.domain_events import domain_events, DomainEvent, DomainEventType
+from wxauto_mgt.utils.logging import logger
+
+# 领域事件影响的缓存标签
+_DOMAIN_EVENT_TAGS = {
+    DomainEventType.MESSAGE_SAVED: ('messages', 'listeners', 'instances'),
+    DomainEventType.DELIVERY_STATUS_CHANGED: ('messages',),
+    DomainEventType.LISTENER_ADDED: ('listeners', 'instances'),
+    DomainEventType.LISTENER_REMOVED: ('listeners', 'instances'),
+    DomainEventType.INSTANCE_STATUS_CHANGED: ('instances',),
+    DomainEventType.ACCOUNTING_RECORDED: ('accounting',),
+}
+
+# 配置变更影响的缓存标签（按变更类型前缀）
+_CONFIG_CHANGE_TAGS = {
+    'platform_': ('platforms', 'rules'),
+    'rule_': ('rules',),
+    'instance_': ('instances', 'rules'),
+}
+
+
+class CachePolicy:
+    """接口的缓存策略"""
+
+    __slots__ = ('tags', 'ttl')
+
+    def __init__(self, tags: Tuple[str, ...], ttl: float):
+        self.tags = tags
+        self.ttl = ttl
+
+
+class CachedResponse:
+    """缓存的响应"""
+
+    __slots__ = ('body', 'gzip_body', 'etag', 'media_type', 'expires', 'versions')
+
+    def __init__(self, body: bytes, etag: str, media_type: str, expires: float, versions: Tuple[int, ...]):
+        self.body = body
+        self.gzip_body: Optional[bytes] = None
+        self.etag = etag
+        self.media_type = media_type
+        self.expires = expires
+        self.versions = versions
+
+
+def cache_response(*tags: str, ttl: float = 30) -> Callable:
+    """
+    为API处理函数声明响应缓存策略（由 MainLoopRoute 执行）
+
+    Args:
+        *tags: 响应依赖的数据标签，标签失效时缓存失效
+        ttl: 缓存有效期（秒）
+
+    Example:
+        @api_router.get("/rules")
+        @cache_response('rules', ttl=300)
+        async def get_rules(request: Request): ...
+    """
+    def decorator(func: Callable) -> Callable:
+        func.__response_cache__ = CachePolicy(tuple(tags), ttl)
+        return func
+    return decorator
+
+
+def get_cache_policy(endpoint: Callable) -> Optional[CachePolicy]:
+    """获取处理函数的缓存策略"""
+    return getattr(endpoint, '__response_cache__', None)
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """检查 If-None-Match 请求头是否包含当前ETag"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    candidates = [value.strip() for value in if_none_match.split(',')]
+    return etag in candidates or f"W/{etag}" in candidates
+
+
+class ResponseCache:
+    """Web响应缓存"""
+
+    def __init__(self, max_entries: int = 256, gzip_min_size: int = 1024):
+        """
+        初始化响应缓存
+
+        Args:
+            max_entries: 最大缓存条目数，超出时淘汰最久未使用的条目
+            gzip_min_size: 响应体超过该字节数且客户端支持时使用gzip压缩
+        """
+        self.max_entries = max_entries
+        self.gzip_min_size = gzip_min_size
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._tag_versions: Dict[str, int] = {}
+        self._subscribed = False
+        self._stats = {'hits': 0, 'misses': 0, 'not_modified': 0, 'invalidations': 0}
+
+    async def start(self):
+        """订阅领域事件和配置变更通知（在主事件循环中调用）"""
+        if self._subscribed:
+            return
+        for event_type in _DOMAIN_EVENT_TAGS:
+            domain_events.subscribe(event_type, self._on_domain_event)
+        await config_notifier.subscribe_all(self._on_config_changed)
+        self._subscribed = True
+        logger.debug("Web响应缓存已订阅数据变更事件")
+
+    async def stop(self):
+        """取消订阅并清空缓存"""
+        if not self._subscribed:
+            return
+        domain_events.unsubscribe_all(self._on_domain_event)
+        await config_notifier.unsubscribe_all(self._on_config_changed)
+        self._subscribed = False
+        self.invalidate()
+
+    def _on_domain_event(self, event: DomainEvent):
+        """领域事件回调"""
+        self.invalidate_tags(*_DOMAIN_EVENT_TAGS.get(event.event_type, ()))
+
+    async def _on_config_changed(self, event: ConfigChangeEvent):
+        """配置变更回调"""
+        change = event.change_type.value if isinstance(event.change_type, ConfigChangeType) else str(event.change_type)
+        for prefix, tags in _CONFIG_CHANGE_TAGS.items():
+            if change.startswith(prefix):
+                self.invalidate_tags(*tags)
+
+    def invalidate_tags(self, *tags: str):
+        """
+        使依赖指定标签的缓存失效（增加标签版本号，缓存条目在下次访问时判断）
+
+        处理函数使用的只读快照由 SnapshotInvalidator 订阅同样的事件后清除。
+
+        Args:
+            *tags: 数据标签
+        """
+        for tag in tags:
+            self._tag_versions[tag] = self._tag_versions.get(tag, 0) + 1
+        if tags:
+            self._stats['invalidations'] += 1
+
+    def invalidate(self):
+        """清空全部缓存"""
+        self._entries.clear()
+        self._stats['invalidations'] += 1
+
+    def _versions(self, tags: Iterable[str]) -> Tuple[int, ...]:
+        return tuple(self._tag_versions.get(tag, 0) for tag in tags)
+
+    @staticmethod
+    def _cache_key(request: Request) -> str:
+        query = sorted(request.query_params.multi_items())
+        return request.url.path + ('?' + '&'.join(f"{k}={v}" for k, v in query) if query else '')
+
+    def _get(self, key: str, policy: CachePolicy) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires <= time.monotonic() or entry.versions != self._versions(policy.tags):
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _put(self, key: str, entry: CachedResponse):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def serve(self, request: Request, policy: CachePolicy, handler: Callable) -> Response:
+        """
+        按缓存策略处理GET请求：命中时直接返回缓存的响应体，否则调用处理函数并缓存结果
+
+        Args:
+            request: 请求对象
+            policy: 缓存策略
+            handler: 原始路由处理函数（接收request，返回Response）
+
+        Returns:
+            Response: 响应（可能是304）
+        """
+        # 缓存命中时不执行处理函数，需要先验证认证
+        from .api import verify_request_auth
+        await verify_request_auth(request)
+
+        key = self._cache_key(request)
+        entry = self._get(key, policy)
+        if entry is not None:
+            self._stats['hits'] += 1
+        else:
+            self._stats['misses'] += 1
+            versions = self._versions(policy.tags)
+            response = await handler(request)
+            body = getattr(response, 'body', None)
+            if response.status_code != 200 or not isinstance(body, (bytes, bytearray)):
+                return response
+            entry = CachedResponse(
+                bytes(body),
+                '"' + hashlib.sha1(body).hexdigest()[:20] + '"',
+                response.media_type or 'application/json',
+                time.monotonic() + policy.ttl,
+                versions
+            )
+            # 生成响应期间数据发生变化时不缓存，只返回本次结果
+            if versions == self._versions(policy.tags):
+                self._put(key, entry)
+
+        return self._build_response(request, entry)
+
+    def _build_response(self, request: Request, entry: CachedResponse) -> Response:
+        """根据请求头生成 304、gzip 或普通响应"""
+        headers = {'ETag': entry.etag, 'Cache-Control': 'no-cache', 'Vary': 'Accept-Encoding'}
+
+        if _etag_matches(request.headers.get('if-none-match'), entry.etag):
+            self._stats['not_modified'] += 1
+            return Response(status_code=304, headers=headers)
+
+        body = entry.body
+        if len(body) >= self.gzip_min_size and 'gzip' in request.headers.get('accept-encoding', ''):
+            if entry.gzip_body is None:
+                entry.gzip_body = gzip.compress(body, compresslevel=5)
+            body = entry.gzip_body
+            headers['Content-Encoding'] = 'gzip'
+
+        return Response(content=body, media_type=entry.media_type, headers=headers)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取统计信息
+
+        Returns:
+            Dict[str, Any]: 命中、未命中、304次数、失效次数和当前条目数
+        """
+        return {**self._stats, 'entries': len(self._entries)}
+
+
+# 创建全局实例
+response_cache = ResponseCache()
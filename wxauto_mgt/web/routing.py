@@ -0,0 +1,125 @@
+"""
+Web路由扩展
+
+API路由的处理函数提交到核心服务所在的主事件循环中执行，
+Web线程的事件循环只负责HTTP收发。
+
+处理函数使用的只读快照在Web修改请求完成后失效，核心服务的领域事件和配置变更通知
+（包括在界面上做的修改）也会使相关快照失效。
+"""
+
+import asyncio
+from typing import Callable
+
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+
+from wxauto_mgt.core.config_notifier import config_notifier, ConfigChangeEvent, ConfigChangeType
+from wxauto_mgt.core.domain_events import domain_events, DomainEvent, DomainEventType
+from wxauto_mgt.core.service_bridge import service_bridge
+from wxauto_mgt.utils.logging import logger
+from wxauto_mgt.web.response_cache import response_cache, get_cache_policy
+
+# 查询请求和修改请求的处理超时（秒），修改请求可能包含实例登录、平台测试等耗时操作
+READ_TIMEOUT = 30
+WRITE_TIMEOUT = 120
+
+# 领域事件影响的快照键前缀
+_DOMAIN_EVENT_SNAPSHOTS = {
+    DomainEventType.MESSAGE_SAVED: ('listeners:', 'instances'),
+    DomainEventType.LISTENER_ADDED: ('listeners:', 'instances'),
+    DomainEventType.LISTENER_REMOVED: ('listeners:', 'instances'),
+    DomainEventType.INSTANCE_STATUS_CHANGED: ('instances', 'instance_status:'),
+}
+
+# 配置变更影响的快照键前缀（按变更类型前缀）
+_CONFIG_CHANGE_SNAPSHOTS = {
+    'platform_': ('platforms', 'rules'),
+    'rule_': ('rules',),
+    'instance_': ('instances', 'instance_status:', 'rules'),
+}
+
+
+class SnapshotInvalidator:
+    """核心服务数据变化时使相关的只读快照失效"""
+
+    def __init__(self):
+        """初始化"""
+        self._subscribed = False
+
+    async def start(self):
+        """订阅领域事件和配置变更通知（在主事件循环中调用）"""
+        if self._subscribed:
+            return
+        for event_type in _DOMAIN_EVENT_SNAPSHOTS:
+            domain_events.subscribe(event_type, self._on_domain_event)
+        await config_notifier.subscribe_all(self._on_config_changed)
+        self._subscribed = True
+
+    async def stop(self):
+        """取消订阅"""
+        if not self._subscribed:
+            return
+        domain_events.unsubscribe_all(self._on_domain_event)
+        await config_notifier.unsubscribe_all(self._on_config_changed)
+        self._subscribed = False
+
+    def _on_domain_event(self, event: DomainEvent):
+        """领域事件回调"""
+        for prefix in _DOMAIN_EVENT_SNAPSHOTS.get(event.event_type, ()):
+            service_bridge.invalidate(prefix)
+
+    async def _on_config_changed(self, event: ConfigChangeEvent):
+        """配置变更回调"""
+        change = event.change_type.value if isinstance(event.change_type, ConfigChangeType) else str(event.change_type)
+        for change_prefix, prefixes in _CONFIG_CHANGE_SNAPSHOTS.items():
+            if change.startswith(change_prefix):
+                for prefix in prefixes:
+                    service_bridge.invalidate(prefix)
+
+
+class MainLoopRoute(APIRoute):
+    """在主事件循环中执行处理函数的路由"""
+
+    def get_route_handler(self) -> Callable:
+        original_handler = super().get_route_handler()
+        cache_policy = get_cache_policy(self.endpoint)
+
+        async def route_handler(request: Request) -> Response:
+            is_read = request.method in ("GET", "HEAD")
+
+            async def run_in_service_loop():
+                if cache_policy is not None and request.method == "GET":
+                    return await response_cache.serve(request, cache_policy, original_handler)
+                response = await original_handler(request)
+                # 修改类请求完成后使只读快照和响应缓存失效
+                if not is_read:
+                    service_bridge.invalidate()
+                    response_cache.invalidate()
+                return response
+
+            if service_bridge.in_service_loop():
+                return await run_in_service_loop()
+
+            # 请求体只能在Web线程的事件循环中读取，读取后会缓存在request上供处理函数使用
+            await request.body()
+
+            try:
+                return await service_bridge.call(
+                    run_in_service_loop(),
+                    timeout=READ_TIMEOUT if is_read else WRITE_TIMEOUT
+                )
+            except asyncio.TimeoutError:
+                logger.warning(f"API请求处理超时: {request.method} {request.url.path}")
+                return JSONResponse(status_code=504, content={"detail": "服务繁忙，请求处理超时"})
+            except RuntimeError:
+                if service_bridge.loop is not None and service_bridge.loop.is_closed():
+                    return JSONResponse(status_code=503, content={"detail": "服务正在关闭"})
+                raise
+
+        return route_handler
+
+
+# 创建全局实例
+snapshot_invalidator = SnapshotInvalidator()
@@ -6,6 +6,7 @@ Web服务安全模块
 
 import hashlib
 import secrets
+import time
 from datetime import datetime, timedelta, timezone
 from typing import Optional, Dict, Any
 from fastapi import HTTPException, Depends, status
@@ -23,6 +24,31 @@ JWT_EXPIRATION_HOURS = 24
 # HTTP Bearer token scheme
 security = HTTPBearer()
 
+# 认证结果缓存：是否需要密码（短TTL）和已验证的令牌（按令牌哈希缓存到过期时间）
+PASSWORD_REQUIRED_TTL = 5.0
+TOKEN_CACHE_MAX_SIZE = 1024
+_password_required_cache: Optional[tuple] = None  # (是否需要密码, 缓存时间)
+_verified_tokens: Dict[str, tuple] = {}  # 令牌哈希 -> (payload, 过期时间戳)
+
+def invalidate_auth_cache():
+    """清除认证结果缓存（密码或JWT密钥变化时调用）"""
+    global _password_required_cache
+    _password_required_cache = None
+    _verified_tokens.clear()
+
+def _cache_verified_token(token_key: str, payload: Dict[str, Any]):
+    """缓存已验证的令牌，超出容量时先清理过期令牌，再移除最早缓存的令牌"""
+    now = time.time()
+    if len(_verified_tokens) >= TOKEN_CACHE_MAX_SIZE:
+        for key in [key for key, (_, expires_at) in _verified_tokens.items() if expires_at <= now]:
+            del _verified_tokens[key]
+        while len(_verified_tokens) >= TOKEN_CACHE_MAX_SIZE:
+            del _verified_tokens[next(iter(_verified_tokens))]
+
+    exp = payload.get('exp')
+    expires_at = float(exp) if isinstance(exp, (int, float)) else now + JWT_EXPIRATION_HOURS * 3600
+    _verified_tokens[token_key] = (payload, expires_at)
+
 async def initialize_security():
     """初始化安全模块"""
     global JWT_SECRET_KEY
@@ -44,6 +70,8 @@ async def initialize_security():
         # 使用临时密钥
         JWT_SECRET_KEY = secrets.token_urlsafe(32)
 
+    invalidate_auth_cache()
+
 def hash_password(password: str) -> str:
     """
     对密码进行哈希处理
@@ -100,6 +128,7 @@ async def set_web_service_password(password: str) -> bool:
         web_config = get_web_service_config()
         success = await web_config.save_config(password=password)
         if success:
+            invalidate_auth_cache()
             logger.info("web服务密码已更新")
         return success
     except Exception as e:
@@ -142,8 +171,18 @@ def verify_token(token: str) -> Optional[Dict[str, Any]]:
             logger.error("JWT验证失败: JWT密钥未设置")
             return None
 
+        # 已验证且未过期的令牌直接返回缓存的payload
+        token_key = hashlib.sha256(token.encode('utf-8')).hexdigest()
+        cached = _verified_tokens.get(token_key)
+        if cached is not None:
+            payload, expires_at = cached
+            if expires_at > time.time():
+                return payload
+            del _verified_tokens[token_key]
+
         payload = jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
         logger.debug(f"JWT验证成功: payload={payload}")
+        _cache_verified_token(token_key, payload)
         return payload
     except jwt.ExpiredSignatureError:
         logger.warning("JWT令牌已过期")
@@ -260,9 +299,16 @@ async def check_password_required() -> bool:
     Returns:
         bool: 是否需要密码验证
     """
+    global _password_required_cache
+
+    now = time.monotonic()
+    if _password_required_cache is not None and now - _password_required_cache[1] < PASSWORD_REQUIRED_TTL:
+        return _password_required_cache[0]
+
     try:
         stored_password = await get_web_service_password()
-        return bool(stored_password)
+        _password_required_cache = (bool(stored_password), now)
+        return _password_required_cache[0]
     except Exception as e:
         logger.error(f"检查密码要求失败: {e}")
         return False
@@ -11,7 +11,7 @@ import threading
 import asyncio
 import uvicorn
 from fastapi import FastAPI, Request, HTTPException
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse
 from typing import Optional
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
@@ -104,6 +104,15 @@ def create_app():
             from .security import initialize_security
             await initialize_security()
             logger.info("安全模块初始化完成")
+
+            # 在主事件循环中启动系统指标后台采样，并让只读快照和响应缓存订阅数据变更事件
+            from wxauto_mgt.core.service_bridge import service_bridge
+            from .metrics_sampler import metrics_sampler
+            from .response_cache import response_cache
+            from .routing import snapshot_invalidator
+            await service_bridge.call(metrics_sampler.start())
+            await service_bridge.call(snapshot_invalidator.start())
+            await service_bridge.call(response_cache.start())
         except Exception as e:
             logger.error(f"启动初始化失败: {e}")
             import traceback
@@ -120,11 +129,17 @@ def create_app():
 
             # 设置较短的清理超时，避免阻塞关闭过程
             import asyncio
+            from wxauto_mgt.core.service_bridge import service_bridge
+            from .metrics_sampler import metrics_sampler
+            from .response_cache import response_cache
+            from .routing import snapshot_invalidator
             try:
                 await asyncio.wait_for(
                     asyncio.gather(
                         # 在这里添加需要清理的异步任务
-                        asyncio.sleep(0.1),  # 占位符，实际清理任务可以在这里添加
+                        service_bridge.call(metrics_sampler.stop()),
+                        service_bridge.call(response_cache.stop()),
+                        service_bridge.call(snapshot_invalidator.stop()),
                         return_exceptions=True
                     ),
                     timeout=1.0  # 1秒超时
@@ -145,6 +160,16 @@ def create_app():
     from .api import api_router
     app.include_router(api_router, prefix="/api")
 
+    # Prometheus指标导出
+    @app.get("/metrics")
+    async def metrics(request: Request):
+        from wxauto_mgt.core.service_bridge import service_bridge
+        from wxauto_mgt.utils.metrics_registry import metrics_registry, PROMETHEUS_CONTENT_TYPE
+        from .api import verify_request_auth
+
+        await service_bridge.call(verify_request_auth(request))
+        return PlainTextResponse(metrics_registry.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
     # 注册路由
     from .routes import register_routes
     register_routes(app, templates)